@@ -19,12 +19,17 @@ License: Apache 2.0
 # FIX: is this really the right way to do things?
 # Definitely helps with tab completion and less user code
 
+import ais.ais_msg_1
 import ais.ais_msg_1_handcoded
+import ais.ais_msg_2
 import ais.ais_msg_2_handcoded
+import ais.ais_msg_3
 import ais.ais_msg_3_handcoded
+import ais.ais_msg_4
 import ais.ais_msg_4_handcoded
 import ais.ais_msg_5
 import ais.ais_msg_6
+import ais.ais_msg_7
 import ais.ais_msg_7_handcoded
 import ais.ais_msg_8
 import ais.ais_msg_9
@@ -48,6 +53,9 @@ import ais.ais_msg_24_handcoded
 # import ais.ais_msg_26
 # import ais.ais_msg_27
 
+from aisutils import binary
+from aisutils import bitreader
+
 msgNames = {
     1: 'Position, Class A',  # FIX: Explain difference between 1..3.
     2: 'Position, Class A',
@@ -140,3 +148,50 @@ msgModByFirstChar = {
     # 'J': ais.ais_msg_26,
     # 'K': ais.ais_msg_26,
 }
+
+msgViewByNumber = {
+    1: ais.ais_msg_1.View,
+    2: ais.ais_msg_2.View,
+    3: ais.ais_msg_3.View,
+    4: ais.ais_msg_4.View,
+    5: ais.ais_msg_5.View,
+    6: ais.ais_msg_6.View,
+    7: ais.ais_msg_7.View,
+    8: ais.ais_msg_8.View,
+    9: ais.ais_msg_9.View,
+    10: ais.ais_msg_10.View,
+    # 11: ais.ais_msg_11.View,
+    12: ais.ais_msg_12.View,
+    # 13: ais.ais_msg_13.View,
+    14: ais.ais_msg_14.View,
+    15: ais.ais_msg_15.View,
+    # 16: ais.ais_msg_16.View,
+    # 17: ais.ais_msg_17.View,
+    18: ais.ais_msg_18.View,
+    19: ais.ais_msg_19.View,
+    20: ais.ais_msg_20.View,
+    21: ais.ais_msg_21.View,
+    22: ais.ais_msg_22.View,
+    # 23: ais.ais_msg_23.View,
+    # 24: No generated decoder yet
+    }
+"""Lazy views that only decode the fields that are actually used."""
+
+
+def msgView(bv, numeric='decimal'):
+    """Wrap a message in the lazy view for its message number.
+
+    Nothing past the message number is decoded until a field is used:
+
+      view = ais.msgView(binary.ais6tobitvec(payload))
+      print view.UserID, view.longitude, view.latitude
+
+    @param bv: message bits or the armored NMEA payload
+    @type bv: BitReader, BitVector or str
+    @param numeric: decimal, float or raw for the scaled fields
+    @raise KeyError: if there is no view for the message number
+    """
+    if isinstance(bv, str):
+        bv = binary.ais6tobitvec(bv)
+    bits = bitreader.asBitReader(bv)
+    return msgViewByNumber[bits.uint(0, 6)](bits, numeric)
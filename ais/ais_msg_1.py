@@ -21,6 +21,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -117,62 +118,61 @@ def encode(params, validate=False):
       - state_slotoffset(uint): Communications State - SOTDMA  In what slot will the next transmission occur. BROKEN
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     """
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=1),6))
+    v = 0
+    v = (v<<6)|0x1
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
     if 'NavigationStatus' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['NavigationStatus']),4))
+        v = (v<<4)|(params['NavigationStatus']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=15),4))
+        v = (v<<4)|0xf
     if 'ROT' in params:
-        bvList.append(binary.bvFromSignedInt(params['ROT'],8))
+        v = (v<<8)|(params['ROT']&0xff)
     else:
-        bvList.append(binary.bvFromSignedInt(-128,8))
+        v = (v<<8)|0x80
     if 'SOG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['SOG'])*Decimal('10')))),10))
+        v = (v<<10)|(int(Decimal(params['SOG'])*Decimal('10'))&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(1023)),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['PositionAccuracy']),1))
+        v = (v<<10)|0x3ff
+    v = (v<<1)|(params['PositionAccuracy']&0x1)
     if 'longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'COG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['COG'])*Decimal('10')))),12))
+        v = (v<<12)|(int(Decimal(params['COG'])*Decimal('10'))&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(3600)),12))
+        v = (v<<12)|0xe10
     if 'TrueHeading' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TrueHeading']),9))
+        v = (v<<9)|(params['TrueHeading']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'TimeStamp' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TimeStamp']),6))
+        v = (v<<6)|(params['TimeStamp']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),1))
-    if params["RAIM"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_syncstate']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_slottimeout']),3))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_slotoffset']),14))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<6)|0x3c
+    v = (v<<4)|0x0
+    v = (v<<1)|0x0
+    v = (v<<1)|(1 if params['RAIM'] else 0)
+    v = (v<<2)|(params['state_syncstate']&0x3)
+    v = (v<<3)|(params['state_slottimeout']&0x7)
+    v = (v<<14)|(params['state_slotoffset']&0x3fff)
+
+    return bitreader.BitReader(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     """Unpack a position message.
 
     Fields in params:
@@ -194,90 +194,294 @@ def decode(bv, validate=False):
       - state_syncstate(uint): Communications State - SOTDMA  Sycronization state
       - state_slottimeout(uint): Communications State - SOTDMA  Frames remaining until a new slot is selected
       - state_slotoffset(uint): Communications State - SOTDMA  In what slot will the next transmission occur. BROKEN
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     """
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['NavigationStatus']=decodeNavigationStatus(bits,numeric=numeric)
+        r['ROT']=decodeROT(bits,numeric=numeric)
+        r['SOG']=decodeSOG(bits,numeric=numeric)
+        r['PositionAccuracy']=decodePositionAccuracy(bits,numeric=numeric)
+        r['longitude']=decodelongitude(bits,numeric=numeric)
+        r['latitude']=decodelatitude(bits,numeric=numeric)
+        r['COG']=decodeCOG(bits,numeric=numeric)
+        r['TrueHeading']=decodeTrueHeading(bits,numeric=numeric)
+        r['TimeStamp']=decodeTimeStamp(bits,numeric=numeric)
+        r['RegionalReserved']=decodeRegionalReserved(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['RAIM']=decodeRAIM(bits,numeric=numeric)
+        r['state_syncstate']=decodestate_syncstate(bits,numeric=numeric)
+        r['state_slottimeout']=decodestate_slottimeout(bits,numeric=numeric)
+        r['state_slotoffset']=decodestate_slotoffset(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=1
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['NavigationStatus']=int(bv[38:42])
-    r['ROT']=binary.signedIntFromBV(bv[42:50])
-    r['SOG']=Decimal(int(bv[50:60]))/Decimal('10')
-    r['PositionAccuracy']=int(bv[60:61])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
-    r['COG']=Decimal(int(bv[116:128]))/Decimal('10')
-    r['TrueHeading']=int(bv[128:137])
-    r['TimeStamp']=int(bv[137:143])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
+    r['NavigationStatus']=int((v>>126)&0xf)
+    r['ROT']=int((((v>>118)&0xff)^0x80)-0x80)
+    r['PositionAccuracy']=int((v>>107)&0x1)
+    r['TrueHeading']=int((v>>31)&0x1ff)
+    r['TimeStamp']=int((v>>25)&0x3f)
     r['RegionalReserved']=0
     r['Spare']=0
-    r['RAIM']=bool(int(bv[148:149]))
-    r['state_syncstate']=int(bv[149:151])
-    r['state_slottimeout']=int(bv[151:154])
-    r['state_slotoffset']=int(bv[154:168])
+    r['RAIM']=bool((v>>19)&0x1)
+    r['state_syncstate']=int((v>>17)&0x3)
+    r['state_slottimeout']=int((v>>14)&0x7)
+    r['state_slotoffset']=int(v&0x3fff)
+    if 'decimal' == numeric:
+        r['SOG']=Decimal((v>>108)&0x3ff)/Decimal('10')
+        r['longitude']=Decimal((((v>>79)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['latitude']=Decimal((((v>>52)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['COG']=Decimal((v>>40)&0xfff)/Decimal('10')
+    elif 'float' == numeric:
+        r['SOG']=((v>>108)&0x3ff)/10.0
+        r['longitude']=((((v>>79)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['latitude']=((((v>>52)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['COG']=((v>>40)&0xfff)/10.0
+    elif 'raw' == numeric:
+        r['SOG']=int((v>>108)&0x3ff)
+        r['longitude']=int((((v>>79)&0xfffffff)^0x8000000)-0x8000000)
+        r['latitude']=int((((v>>52)&0x7ffffff)^0x4000000)-0x4000000)
+        r['COG']=int((v>>40)&0xfff)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeNavigationStatus(bv, validate=False):
-    return int(bv[38:42])
+def decodeNavigationStatus(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,4)
 
-def decodeROT(bv, validate=False):
-    return binary.signedIntFromBV(bv[42:50])
+def decodeROT(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).sint(42,8)
 
-def decodeSOG(bv, validate=False):
-    return Decimal(int(bv[50:60]))/Decimal('10')
+def decodeSOG(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(50,10)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodePositionAccuracy(bv, validate=False):
-    return int(bv[60:61])
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(60,1)
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(61,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(89,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeCOG(bv, validate=False):
-    return Decimal(int(bv[116:128]))/Decimal('10')
+def decodeCOG(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(116,12)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeTrueHeading(bv, validate=False):
-    return int(bv[128:137])
+def decodeTrueHeading(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(128,9)
 
-def decodeTimeStamp(bv, validate=False):
-    return int(bv[137:143])
+def decodeTimeStamp(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(137,6)
 
-def decodeRegionalReserved(bv, validate=False):
+def decodeRegionalReserved(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeRAIM(bv, validate=False):
-    return bool(int(bv[148:149]))
-
-def decodestate_syncstate(bv, validate=False):
-    return int(bv[149:151])
-
-def decodestate_slottimeout(bv, validate=False):
-    return int(bv[151:154])
-
-def decodestate_slotoffset(bv, validate=False):
-    return int(bv[154:168])
+def decodeRAIM(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(148,1))
+
+def decodestate_syncstate(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(149,2)
+
+def decodestate_slottimeout(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(151,3)
+
+def decodestate_slotoffset(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(154,14)
+
+
+class View(object):
+    '''Lazy view of a position message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_NavigationStatus','_ROT','_SOG','_PositionAccuracy','_longitude','_latitude','_COG','_TrueHeading','_TimeStamp','_RegionalReserved','_Spare','_RAIM','_state_syncstate','_state_slottimeout','_state_slotoffset')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def NavigationStatus(self):
+        try: return self._NavigationStatus
+        except AttributeError: pass
+        self._NavigationStatus = decodeNavigationStatus(self.bits)
+        return self._NavigationStatus
+
+    @property
+    def ROT(self):
+        try: return self._ROT
+        except AttributeError: pass
+        self._ROT = decodeROT(self.bits)
+        return self._ROT
+
+    @property
+    def SOG(self):
+        try: return self._SOG
+        except AttributeError: pass
+        self._SOG = decodeSOG(self.bits, numeric=self.numeric)
+        return self._SOG
+
+    @property
+    def PositionAccuracy(self):
+        try: return self._PositionAccuracy
+        except AttributeError: pass
+        self._PositionAccuracy = decodePositionAccuracy(self.bits)
+        return self._PositionAccuracy
+
+    @property
+    def longitude(self):
+        try: return self._longitude
+        except AttributeError: pass
+        self._longitude = decodelongitude(self.bits, numeric=self.numeric)
+        return self._longitude
+
+    @property
+    def latitude(self):
+        try: return self._latitude
+        except AttributeError: pass
+        self._latitude = decodelatitude(self.bits, numeric=self.numeric)
+        return self._latitude
+
+    @property
+    def COG(self):
+        try: return self._COG
+        except AttributeError: pass
+        self._COG = decodeCOG(self.bits, numeric=self.numeric)
+        return self._COG
+
+    @property
+    def TrueHeading(self):
+        try: return self._TrueHeading
+        except AttributeError: pass
+        self._TrueHeading = decodeTrueHeading(self.bits)
+        return self._TrueHeading
+
+    @property
+    def TimeStamp(self):
+        try: return self._TimeStamp
+        except AttributeError: pass
+        self._TimeStamp = decodeTimeStamp(self.bits)
+        return self._TimeStamp
+
+    @property
+    def RegionalReserved(self):
+        try: return self._RegionalReserved
+        except AttributeError: pass
+        self._RegionalReserved = decodeRegionalReserved(self.bits)
+        return self._RegionalReserved
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def RAIM(self):
+        try: return self._RAIM
+        except AttributeError: pass
+        self._RAIM = decodeRAIM(self.bits)
+        return self._RAIM
+
+    @property
+    def state_syncstate(self):
+        try: return self._state_syncstate
+        except AttributeError: pass
+        self._state_syncstate = decodestate_syncstate(self.bits)
+        return self._state_syncstate
+
+    @property
+    def state_slottimeout(self):
+        try: return self._state_slottimeout
+        except AttributeError: pass
+        self._state_slottimeout = decodestate_slottimeout(self.bits)
+        return self._state_slottimeout
+
+    @property
+    def state_slotoffset(self):
+        try: return self._state_slotoffset
+        except AttributeError: pass
+        self._state_slotoffset = decodestate_slotoffset(self.bits)
+        return self._state_slotoffset
 
 
 def printHtml(params, out=sys.stdout):
@@ -840,6 +1044,77 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('position', fieldListPostgres+tuple(extraFields),
+                        geometry=('Position',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('position', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('NavigationStatus'),
+                        get('ROT'),
+                        sqlhelp.toFloat(get('SOG')),
+                        get('PositionAccuracy'),
+                        sqlhelp.geometryWkt('POINT',get('longitude'),get('latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TrueHeading'),
+                        get('TimeStamp'),
+                        get('RegionalReserved'),
+                        get('Spare'),
+                        get('RAIM'),
+                        get('state_syncstate'),
+                        get('state_slottimeout'),
+                        get('state_slotoffset'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('NavigationStatus'),
+                        get('ROT'),
+                        sqlhelp.toFloat(get('SOG')),
+                        get('PositionAccuracy'),
+                        sqlhelp.toFloat(get('longitude')),
+                        sqlhelp.toFloat(get('latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TrueHeading'),
+                        get('TimeStamp'),
+                        get('RegionalReserved'),
+                        get('Spare'),
+                        get('RAIM'),
+                        get('state_syncstate'),
+                        get('state_slottimeout'),
+                        get('state_slotoffset'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -982,6 +1257,24 @@ class Testposition(unittest.TestCase):
         self.failUnlessEqual(r['state_slottimeout'],params['state_slottimeout'])
         self.failUnlessEqual(r['state_slotoffset'],params['state_slotoffset'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('SOG', 'longitude', 'latitude', 'COG'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "position" AIS message')
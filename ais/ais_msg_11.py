@@ -22,6 +22,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -116,65 +117,64 @@ def encode(params, validate=False):
       - state_slotoffset(uint): Communications State - SOTDMA  In what slot will the next transmission occur. BROKEN
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=11),6))
+    v = 0
+    v = (v<<6)|0xb
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
     if 'Time_year' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['Time_year']),14))
+        v = (v<<14)|(params['Time_year']&0x3fff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),14))
+        v = (v<<14)|0x0
     if 'Time_month' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['Time_month']),4))
+        v = (v<<4)|(params['Time_month']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'Time_day' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['Time_day']),5))
+        v = (v<<5)|(params['Time_day']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),5))
+        v = (v<<5)|0x0
     if 'Time_hour' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['Time_hour']),5))
+        v = (v<<5)|(params['Time_hour']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'Time_min' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['Time_min']),6))
+        v = (v<<6)|(params['Time_min']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'Time_sec' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['Time_sec']),6))
+        v = (v<<6)|(params['Time_sec']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['PositionAccuracy']),1))
+        v = (v<<6)|0x3c
+    v = (v<<1)|(params['PositionAccuracy']&0x1)
     if 'Position_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['Position_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['Position_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'Position_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['Position_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['Position_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'fixtype' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fixtype']),4))
+        v = (v<<4)|(params['fixtype']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),10))
-    if params["RAIM"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_syncstate']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_slottimeout']),3))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_slotoffset']),14))
+        v = (v<<4)|0x0
+    v = (v<<10)|0x0
+    v = (v<<1)|(1 if params['RAIM'] else 0)
+    v = (v<<2)|(params['state_syncstate']&0x3)
+    v = (v<<3)|(params['state_slottimeout']&0x7)
+    v = (v<<14)|(params['state_slotoffset']&0x3fff)
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,168)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a bsreport message.
 
     Fields in params:
@@ -196,90 +196,282 @@ def decode(bv, validate=False):
       - state_syncstate(uint): Communications State - SOTDMA  Sycronization state
       - state_slottimeout(uint): Communications State - SOTDMA  Frames remaining until a new slot is selected
       - state_slotoffset(uint): Communications State - SOTDMA  In what slot will the next transmission occur. BROKEN
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Time_year']=decodeTime_year(bits,numeric=numeric)
+        r['Time_month']=decodeTime_month(bits,numeric=numeric)
+        r['Time_day']=decodeTime_day(bits,numeric=numeric)
+        r['Time_hour']=decodeTime_hour(bits,numeric=numeric)
+        r['Time_min']=decodeTime_min(bits,numeric=numeric)
+        r['Time_sec']=decodeTime_sec(bits,numeric=numeric)
+        r['PositionAccuracy']=decodePositionAccuracy(bits,numeric=numeric)
+        r['Position_longitude']=decodePosition_longitude(bits,numeric=numeric)
+        r['Position_latitude']=decodePosition_latitude(bits,numeric=numeric)
+        r['fixtype']=decodefixtype(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['RAIM']=decodeRAIM(bits,numeric=numeric)
+        r['state_syncstate']=decodestate_syncstate(bits,numeric=numeric)
+        r['state_slottimeout']=decodestate_slottimeout(bits,numeric=numeric)
+        r['state_slotoffset']=decodestate_slotoffset(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=11
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['Time_year']=int(bv[38:52])
-    r['Time_month']=int(bv[52:56])
-    r['Time_day']=int(bv[56:61])
-    r['Time_hour']=int(bv[61:66])
-    r['Time_min']=int(bv[66:72])
-    r['Time_sec']=int(bv[72:78])
-    r['PositionAccuracy']=int(bv[78:79])
-    r['Position_longitude']=Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000')
-    r['Position_latitude']=Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000')
-    r['fixtype']=int(bv[134:138])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
+    r['Time_year']=int((v>>116)&0x3fff)
+    r['Time_month']=int((v>>112)&0xf)
+    r['Time_day']=int((v>>107)&0x1f)
+    r['Time_hour']=int((v>>102)&0x1f)
+    r['Time_min']=int((v>>96)&0x3f)
+    r['Time_sec']=int((v>>90)&0x3f)
+    r['PositionAccuracy']=int((v>>89)&0x1)
+    r['fixtype']=int((v>>30)&0xf)
     r['Spare']=0
-    r['RAIM']=bool(int(bv[148:149]))
-    r['state_syncstate']=int(bv[149:151])
-    r['state_slottimeout']=int(bv[151:154])
-    r['state_slotoffset']=int(bv[154:168])
+    r['RAIM']=bool((v>>19)&0x1)
+    r['state_syncstate']=int((v>>17)&0x3)
+    r['state_slottimeout']=int((v>>14)&0x7)
+    r['state_slotoffset']=int(v&0x3fff)
+    if 'decimal' == numeric:
+        r['Position_longitude']=Decimal((((v>>61)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['Position_latitude']=Decimal((((v>>34)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+    elif 'float' == numeric:
+        r['Position_longitude']=((((v>>61)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['Position_latitude']=((((v>>34)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+    elif 'raw' == numeric:
+        r['Position_longitude']=int((((v>>61)&0xfffffff)^0x8000000)-0x8000000)
+        r['Position_latitude']=int((((v>>34)&0x7ffffff)^0x4000000)-0x4000000)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeTime_year(bv, validate=False):
-    return int(bv[38:52])
+def decodeTime_year(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,14)
 
-def decodeTime_month(bv, validate=False):
-    return int(bv[52:56])
+def decodeTime_month(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(52,4)
 
-def decodeTime_day(bv, validate=False):
-    return int(bv[56:61])
+def decodeTime_day(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(56,5)
 
-def decodeTime_hour(bv, validate=False):
-    return int(bv[61:66])
+def decodeTime_hour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(61,5)
 
-def decodeTime_min(bv, validate=False):
-    return int(bv[66:72])
+def decodeTime_min(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(66,6)
 
-def decodeTime_sec(bv, validate=False):
-    return int(bv[72:78])
+def decodeTime_sec(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(72,6)
 
-def decodePositionAccuracy(bv, validate=False):
-    return int(bv[78:79])
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(78,1)
 
-def decodePosition_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000')
+def decodePosition_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(79,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodePosition_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000')
+def decodePosition_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(107,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodefixtype(bv, validate=False):
-    return int(bv[134:138])
+def decodefixtype(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(134,4)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeRAIM(bv, validate=False):
-    return bool(int(bv[148:149]))
+def decodeRAIM(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(148,1))
 
-def decodestate_syncstate(bv, validate=False):
-    return int(bv[149:151])
+def decodestate_syncstate(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(149,2)
 
-def decodestate_slottimeout(bv, validate=False):
-    return int(bv[151:154])
+def decodestate_slottimeout(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(151,3)
 
-def decodestate_slotoffset(bv, validate=False):
-    return int(bv[154:168])
+def decodestate_slotoffset(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(154,14)
+
+
+class View(object):
+    '''Lazy view of a bsreport message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Time_year','_Time_month','_Time_day','_Time_hour','_Time_min','_Time_sec','_PositionAccuracy','_Position_longitude','_Position_latitude','_fixtype','_Spare','_RAIM','_state_syncstate','_state_slottimeout','_state_slotoffset')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Time_year(self):
+        try: return self._Time_year
+        except AttributeError: pass
+        self._Time_year = decodeTime_year(self.bits)
+        return self._Time_year
+
+    @property
+    def Time_month(self):
+        try: return self._Time_month
+        except AttributeError: pass
+        self._Time_month = decodeTime_month(self.bits)
+        return self._Time_month
+
+    @property
+    def Time_day(self):
+        try: return self._Time_day
+        except AttributeError: pass
+        self._Time_day = decodeTime_day(self.bits)
+        return self._Time_day
+
+    @property
+    def Time_hour(self):
+        try: return self._Time_hour
+        except AttributeError: pass
+        self._Time_hour = decodeTime_hour(self.bits)
+        return self._Time_hour
+
+    @property
+    def Time_min(self):
+        try: return self._Time_min
+        except AttributeError: pass
+        self._Time_min = decodeTime_min(self.bits)
+        return self._Time_min
+
+    @property
+    def Time_sec(self):
+        try: return self._Time_sec
+        except AttributeError: pass
+        self._Time_sec = decodeTime_sec(self.bits)
+        return self._Time_sec
+
+    @property
+    def PositionAccuracy(self):
+        try: return self._PositionAccuracy
+        except AttributeError: pass
+        self._PositionAccuracy = decodePositionAccuracy(self.bits)
+        return self._PositionAccuracy
+
+    @property
+    def Position_longitude(self):
+        try: return self._Position_longitude
+        except AttributeError: pass
+        self._Position_longitude = decodePosition_longitude(self.bits, numeric=self.numeric)
+        return self._Position_longitude
+
+    @property
+    def Position_latitude(self):
+        try: return self._Position_latitude
+        except AttributeError: pass
+        self._Position_latitude = decodePosition_latitude(self.bits, numeric=self.numeric)
+        return self._Position_latitude
+
+    @property
+    def fixtype(self):
+        try: return self._fixtype
+        except AttributeError: pass
+        self._fixtype = decodefixtype(self.bits)
+        return self._fixtype
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def RAIM(self):
+        try: return self._RAIM
+        except AttributeError: pass
+        self._RAIM = decodeRAIM(self.bits)
+        return self._RAIM
+
+    @property
+    def state_syncstate(self):
+        try: return self._state_syncstate
+        except AttributeError: pass
+        self._state_syncstate = decodestate_syncstate(self.bits)
+        return self._state_syncstate
+
+    @property
+    def state_slottimeout(self):
+        try: return self._state_slottimeout
+        except AttributeError: pass
+        self._state_slottimeout = decodestate_slottimeout(self.bits)
+        return self._state_slottimeout
+
+    @property
+    def state_slotoffset(self):
+        try: return self._state_slotoffset
+        except AttributeError: pass
+        self._state_slotoffset = decodestate_slotoffset(self.bits)
+        return self._state_slotoffset
 
 
 def printHtml(params, out=sys.stdout):
@@ -795,6 +987,77 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('bsreport', fieldListPostgres+tuple(extraFields),
+                        geometry=('Position',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('bsreport', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Time_year'),
+                        get('Time_month'),
+                        get('Time_day'),
+                        get('Time_hour'),
+                        get('Time_min'),
+                        get('Time_sec'),
+                        get('PositionAccuracy'),
+                        sqlhelp.geometryWkt('POINT',get('Position_longitude'),get('Position_latitude')),
+                        get('fixtype'),
+                        get('Spare'),
+                        get('RAIM'),
+                        get('state_syncstate'),
+                        get('state_slottimeout'),
+                        get('state_slotoffset'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Time_year'),
+                        get('Time_month'),
+                        get('Time_day'),
+                        get('Time_hour'),
+                        get('Time_min'),
+                        get('Time_sec'),
+                        get('PositionAccuracy'),
+                        sqlhelp.toFloat(get('Position_longitude')),
+                        sqlhelp.toFloat(get('Position_latitude')),
+                        get('fixtype'),
+                        get('Spare'),
+                        get('RAIM'),
+                        get('state_syncstate'),
+                        get('state_slottimeout'),
+                        get('state_slotoffset'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -937,6 +1200,24 @@ class Testbsreport(unittest.TestCase):
         self.failUnlessEqual(r['state_slottimeout'],params['state_slottimeout'])
         self.failUnlessEqual(r['state_slotoffset'],params['state_slotoffset'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('Position_longitude', 'Position_latitude'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "bsreport" AIS message')
@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -83,27 +84,26 @@ def encode(params, validate=False):
       - Spare(uint): Must be 0 (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=6),6))
+    v = 0
+    v = (v<<6)|0x6
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SeqNum']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestinationID']),30))
-    if params["RetransmitFlag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),1))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|(params['SeqNum']&0x3)
+    v = (v<<30)|(params['DestinationID']&0x3fffffff)
+    v = (v<<1)|(1 if params['RetransmitFlag'] else 0)
+    v = (v<<1)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,72)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a asrm message.
 
     Fields in params:
@@ -114,48 +114,136 @@ def decode(bv, validate=False):
       - DestinationID(uint): Unique ship identification number (MMSI).
       - RetransmitFlag(bool): Should the message be restransmitted?
       - Spare(uint): Must be 0 (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 72:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['SeqNum']=decodeSeqNum(bits,numeric=numeric)
+        r['DestinationID']=decodeDestinationID(bits,numeric=numeric)
+        r['RetransmitFlag']=decodeRetransmitFlag(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 72: v >>= n-72
     r = {}
     r['MessageID']=6
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['SeqNum']=int(bv[38:40])
-    r['DestinationID']=int(bv[40:70])
-    r['RetransmitFlag']=bool(int(bv[70:71]))
+    r['RepeatIndicator']=int((v>>64)&0x3)
+    r['UserID']=int((v>>34)&0x3fffffff)
+    r['SeqNum']=int((v>>32)&0x3)
+    r['DestinationID']=int((v>>2)&0x3fffffff)
+    r['RetransmitFlag']=bool((v>>1)&0x1)
     r['Spare']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 6
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSeqNum(bv, validate=False):
-    return int(bv[38:40])
+def decodeSeqNum(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,2)
 
-def decodeDestinationID(bv, validate=False):
-    return int(bv[40:70])
+def decodeDestinationID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(40,30)
 
-def decodeRetransmitFlag(bv, validate=False):
-    return bool(int(bv[70:71]))
+def decodeRetransmitFlag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(70,1))
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a asrm message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_SeqNum','_DestinationID','_RetransmitFlag','_Spare')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def SeqNum(self):
+        try: return self._SeqNum
+        except AttributeError: pass
+        self._SeqNum = decodeSeqNum(self.bits)
+        return self._SeqNum
+
+    @property
+    def DestinationID(self):
+        try: return self._DestinationID
+        except AttributeError: pass
+        self._DestinationID = decodeDestinationID(self.bits)
+        return self._DestinationID
+
+    @property
+    def RetransmitFlag(self):
+        try: return self._RetransmitFlag
+        except AttributeError: pass
+        self._RetransmitFlag = decodeRetransmitFlag(self.bits)
+        return self._RetransmitFlag
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>asrm</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -411,6 +499,56 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('asrm', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('asrm', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('SeqNum'),
+                        get('DestinationID'),
+                        get('RetransmitFlag'),
+                        get('Spare'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('SeqNum'),
+                        get('DestinationID'),
+                        get('RetransmitFlag'),
+                        get('Spare'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -509,6 +647,14 @@ class Testasrm(unittest.TestCase):
         self.failUnlessEqual(r['RetransmitFlag'],params['RetransmitFlag'])
         self.failUnlessEqual(r['Spare'],params['Spare'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "asrm" AIS message')
@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -70,23 +71,23 @@ def encode(params, validate=False):
       - Spare2(uint): Must be 0 (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=14),6))
+    v = 0
+    v = (v<<6)|0xe
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),1))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<1)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,39)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a srbm message.
 
     Fields in params:
@@ -94,36 +95,100 @@ def decode(bv, validate=False):
       - RepeatIndicator(uint): Indicated how many times a message has been repeated
       - UserID(uint): Unique ship identification number (MMSI).  Also known as the Source ID
       - Spare2(uint): Must be 0 (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 39:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 39: v >>= n-39
     r = {}
     r['MessageID']=14
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>31)&0x3)
+    r['UserID']=int((v>>1)&0x3fffffff)
     r['Spare2']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 14
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a srbm message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare2')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>srbm</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -346,6 +411,50 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('srbm', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('srbm', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare2'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare2'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -432,6 +541,14 @@ class Testsrbm(unittest.TestCase):
         self.failUnlessEqual(r['UserID'],params['UserID'])
         self.failUnlessEqual(r['Spare2'],params['Spare2'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "srbm" AIS message')
@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -100,33 +101,33 @@ def encode(params, validate=False):
       - Spare3(uint): Not used.  Should be set to zero. Researved for future use. (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=15),6))
+    v = 0
+    v = (v<<6)|0xf
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['MessageID1']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SlotOffset']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['MessageID12']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SlotOffset12']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestID2']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['MessageID2']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SlotOffset2']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<30)|(params['DestID']&0x3fffffff)
+    v = (v<<6)|(params['MessageID1']&0x3f)
+    v = (v<<6)|(params['SlotOffset']&0x3f)
+    v = (v<<2)|0x0
+    v = (v<<6)|(params['MessageID12']&0x3f)
+    v = (v<<6)|(params['SlotOffset12']&0x3f)
+    v = (v<<2)|0x0
+    v = (v<<30)|(params['DestID2']&0x3fffffff)
+    v = (v<<6)|(params['MessageID2']&0x3f)
+    v = (v<<6)|(params['SlotOffset2']&0x3f)
+    v = (v<<2)|0x0
+
+    return bitreader.BitReader(v,140)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a interrogation message.
 
     Fields in params:
@@ -144,76 +145,220 @@ def decode(bv, validate=False):
       - MessageID2(uint): requested message type from interrogated station
       - SlotOffset2(uint): requested message type from interrogated station
       - Spare3(uint): Not used.  Should be set to zero. Researved for future use. (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 140:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['DestID']=decodeDestID(bits,numeric=numeric)
+        r['MessageID1']=decodeMessageID1(bits,numeric=numeric)
+        r['SlotOffset']=decodeSlotOffset(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['MessageID12']=decodeMessageID12(bits,numeric=numeric)
+        r['SlotOffset12']=decodeSlotOffset12(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        r['DestID2']=decodeDestID2(bits,numeric=numeric)
+        r['MessageID2']=decodeMessageID2(bits,numeric=numeric)
+        r['SlotOffset2']=decodeSlotOffset2(bits,numeric=numeric)
+        r['Spare3']=decodeSpare3(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 140: v >>= n-140
     r = {}
     r['MessageID']=15
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['DestID']=int(bv[38:68])
-    r['MessageID1']=int(bv[68:74])
-    r['SlotOffset']=int(bv[74:80])
+    r['RepeatIndicator']=int((v>>132)&0x3)
+    r['UserID']=int((v>>102)&0x3fffffff)
+    r['DestID']=int((v>>72)&0x3fffffff)
+    r['MessageID1']=int((v>>66)&0x3f)
+    r['SlotOffset']=int((v>>60)&0x3f)
     r['Spare']=0
-    r['MessageID12']=int(bv[82:88])
-    r['SlotOffset12']=int(bv[88:94])
+    r['MessageID12']=int((v>>52)&0x3f)
+    r['SlotOffset12']=int((v>>46)&0x3f)
     r['Spare2']=0
-    r['DestID2']=int(bv[96:126])
-    r['MessageID2']=int(bv[126:132])
-    r['SlotOffset2']=int(bv[132:138])
+    r['DestID2']=int((v>>14)&0x3fffffff)
+    r['MessageID2']=int((v>>8)&0x3f)
+    r['SlotOffset2']=int((v>>2)&0x3f)
     r['Spare3']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 15
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeDestID(bv, validate=False):
-    return int(bv[38:68])
+def decodeDestID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,30)
 
-def decodeMessageID1(bv, validate=False):
-    return int(bv[68:74])
+def decodeMessageID1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(68,6)
 
-def decodeSlotOffset(bv, validate=False):
-    return int(bv[74:80])
+def decodeSlotOffset(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(74,6)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeMessageID12(bv, validate=False):
-    return int(bv[82:88])
+def decodeMessageID12(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(82,6)
 
-def decodeSlotOffset12(bv, validate=False):
-    return int(bv[88:94])
+def decodeSlotOffset12(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(88,6)
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeDestID2(bv, validate=False):
-    return int(bv[96:126])
+def decodeDestID2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(96,30)
 
-def decodeMessageID2(bv, validate=False):
-    return int(bv[126:132])
+def decodeMessageID2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(126,6)
 
-def decodeSlotOffset2(bv, validate=False):
-    return int(bv[132:138])
+def decodeSlotOffset2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(132,6)
 
-def decodeSpare3(bv, validate=False):
+def decodeSpare3(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a interrogation message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_DestID','_MessageID1','_SlotOffset','_Spare','_MessageID12','_SlotOffset12','_Spare2','_DestID2','_MessageID2','_SlotOffset2','_Spare3')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def DestID(self):
+        try: return self._DestID
+        except AttributeError: pass
+        self._DestID = decodeDestID(self.bits)
+        return self._DestID
+
+    @property
+    def MessageID1(self):
+        try: return self._MessageID1
+        except AttributeError: pass
+        self._MessageID1 = decodeMessageID1(self.bits)
+        return self._MessageID1
+
+    @property
+    def SlotOffset(self):
+        try: return self._SlotOffset
+        except AttributeError: pass
+        self._SlotOffset = decodeSlotOffset(self.bits)
+        return self._SlotOffset
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def MessageID12(self):
+        try: return self._MessageID12
+        except AttributeError: pass
+        self._MessageID12 = decodeMessageID12(self.bits)
+        return self._MessageID12
+
+    @property
+    def SlotOffset12(self):
+        try: return self._SlotOffset12
+        except AttributeError: pass
+        self._SlotOffset12 = decodeSlotOffset12(self.bits)
+        return self._SlotOffset12
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
+
+    @property
+    def DestID2(self):
+        try: return self._DestID2
+        except AttributeError: pass
+        self._DestID2 = decodeDestID2(self.bits)
+        return self._DestID2
+
+    @property
+    def MessageID2(self):
+        try: return self._MessageID2
+        except AttributeError: pass
+        self._MessageID2 = decodeMessageID2(self.bits)
+        return self._MessageID2
+
+    @property
+    def SlotOffset2(self):
+        try: return self._SlotOffset2
+        except AttributeError: pass
+        self._SlotOffset2 = decodeSlotOffset2(self.bits)
+        return self._SlotOffset2
+
+    @property
+    def Spare3(self):
+        try: return self._Spare3
+        except AttributeError: pass
+        self._Spare3 = decodeSpare3(self.bits)
+        return self._Spare3
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>interrogation</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -546,6 +691,70 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('interrogation', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('interrogation', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('DestID'),
+                        get('MessageID1'),
+                        get('SlotOffset'),
+                        get('Spare'),
+                        get('MessageID12'),
+                        get('SlotOffset12'),
+                        get('Spare2'),
+                        get('DestID2'),
+                        get('MessageID2'),
+                        get('SlotOffset2'),
+                        get('Spare3'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('DestID'),
+                        get('MessageID1'),
+                        get('SlotOffset'),
+                        get('Spare'),
+                        get('MessageID12'),
+                        get('SlotOffset12'),
+                        get('Spare2'),
+                        get('DestID2'),
+                        get('MessageID2'),
+                        get('SlotOffset2'),
+                        get('Spare3'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -672,6 +881,14 @@ class Testinterrogation(unittest.TestCase):
         self.failUnlessEqual(r['SlotOffset2'],params['SlotOffset2'])
         self.failUnlessEqual(r['Spare3'],params['Spare3'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "interrogation" AIS message')
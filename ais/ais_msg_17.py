@@ -21,6 +21,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -79,33 +80,34 @@ def encode(params, validate=False):
       - BinaryData(binary): GNSS Differential correction data
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=17),6))
+    v = 0
+    v = (v<<6)|0x11
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
     if 'x' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['x'])*Decimal('600')),18))
+        v = (v<<18)|(int(Decimal(params['x'])*Decimal('600'))&0x3ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,18))
+        v = (v<<18)|0x1a838
     if 'y' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['y'])*Decimal('600')),17))
+        v = (v<<17)|(int(Decimal(params['y'])*Decimal('600'))&0x1ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600,17))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),5))
-    bvList.append(params['BinaryData'])
+        v = (v<<17)|0xd548
+    v = (v<<5)|0x0
+    binBits = params['BinaryData']
+    v = (v<<len(binBits))|int(binBits)
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,80+len(params['BinaryData']))
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a gnss_correction message.
 
     Fields in params:
@@ -117,50 +119,163 @@ def decode(bv, validate=False):
       - y(decimal): North South location
       - Spare2(uint): Reserved for definition by a regional authority. (field automatically set to "0")
       - BinaryData(binary): GNSS Differential correction data
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 80:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['x']=decodex(bits,numeric=numeric)
+        r['y']=decodey(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        r['BinaryData']=decodeBinaryData(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 80: v >>= n-80
     r = {}
     r['MessageID']=17
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>72)&0x3)
+    r['UserID']=int((v>>42)&0x3fffffff)
     r['Spare']=0
-    r['x']=Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
-    r['y']=Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
     r['Spare2']=0
-    r['BinaryData']=bv[80:]
+    r['BinaryData']=bits[80:]
+    if 'decimal' == numeric:
+        r['x']=Decimal((((v>>22)&0x3ffff)^0x20000)-0x20000)/Decimal('600')
+        r['y']=Decimal((((v>>5)&0x1ffff)^0x10000)-0x10000)/Decimal('600')
+    elif 'float' == numeric:
+        r['x']=((((v>>22)&0x3ffff)^0x20000)-0x20000)/600.0
+        r['y']=((((v>>5)&0x1ffff)^0x10000)-0x10000)/600.0
+    elif 'raw' == numeric:
+        r['x']=int((((v>>22)&0x3ffff)^0x20000)-0x20000)
+        r['y']=int((((v>>5)&0x1ffff)^0x10000)-0x10000)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 17
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodex(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
+def decodex(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(40,18)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodey(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(58,17)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeSpare2(bv, validate=False, numeric='decimal'):
+    return 0
 
-def decodey(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
+def decodeBinaryData(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return bits[80:]
 
-def decodeSpare2(bv, validate=False):
-    return 0
 
-def decodeBinaryData(bv, validate=False):
-    return bv[80:]
+class View(object):
+    '''Lazy view of a gnss_correction message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_x','_y','_Spare2','_BinaryData')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def x(self):
+        try: return self._x
+        except AttributeError: pass
+        self._x = decodex(self.bits, numeric=self.numeric)
+        return self._x
+
+    @property
+    def y(self):
+        try: return self._y
+        except AttributeError: pass
+        self._y = decodey(self.bits, numeric=self.numeric)
+        return self._y
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
+
+    @property
+    def BinaryData(self):
+        try: return self._BinaryData
+        except AttributeError: pass
+        self._BinaryData = decodeBinaryData(self.bits)
+        return self._BinaryData
 
 
 def printHtml(params, out=sys.stdout):
@@ -431,6 +546,58 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('gnss_correction', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('gnss_correction', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        sqlhelp.toFloat(get('x')),
+                        sqlhelp.toFloat(get('y')),
+                        get('Spare2'),
+                        sqlhelp.toBits(get('BinaryData')),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        sqlhelp.toFloat(get('x')),
+                        sqlhelp.toFloat(get('y')),
+                        get('Spare2'),
+                        sqlhelp.toBits(get('BinaryData')),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -533,6 +700,24 @@ class Testgnss_correction(unittest.TestCase):
         self.failUnlessEqual(r['Spare2'],params['Spare2'])
         self.failUnlessEqual(r['BinaryData'],params['BinaryData'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('x', 'y'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "gnss_correction" AIS message')
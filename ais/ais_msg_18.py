@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -128,65 +129,58 @@ def encode(params, validate=False):
       - CommState(uint): Not decoded by this software yet
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=18),6))
+    v = 0
+    v = (v<<6)|0x12
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<8)|0x0
     if 'SOG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['SOG'])*Decimal('10')))),10))
+        v = (v<<10)|(int(Decimal(params['SOG'])*Decimal('10'))&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(1023)),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['PositionAccuracy']),1))
+        v = (v<<10)|0x3ff
+    v = (v<<1)|(params['PositionAccuracy']&0x1)
     if 'longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'COG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['COG'])*Decimal('10')))),12))
+        v = (v<<12)|(int(Decimal(params['COG'])*Decimal('10'))&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(3600)),12))
+        v = (v<<12)|0xe10
     if 'TrueHeading' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TrueHeading']),9))
+        v = (v<<9)|(params['TrueHeading']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'TimeStamp' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TimeStamp']),6))
+        v = (v<<6)|(params['TimeStamp']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    if params["cs_unit"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["display_flag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["dsc_flag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["band_flag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["msg22_flag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["mode_flag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["RAIM"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['CommStateSelector']),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['CommState']),19))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<6)|0x3c
+    v = (v<<2)|0x0
+    v = (v<<1)|(1 if params['cs_unit'] else 0)
+    v = (v<<1)|(1 if params['display_flag'] else 0)
+    v = (v<<1)|(1 if params['dsc_flag'] else 0)
+    v = (v<<1)|(1 if params['band_flag'] else 0)
+    v = (v<<1)|(1 if params['msg22_flag'] else 0)
+    v = (v<<1)|(1 if params['mode_flag'] else 0)
+    v = (v<<1)|(1 if params['RAIM'] else 0)
+    v = (v<<1)|(params['CommStateSelector']&0x1)
+    v = (v<<19)|(params['CommState']&0x7ffff)
+
+    return bitreader.BitReader(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a positionb message.
 
     Fields in params:
@@ -211,102 +205,330 @@ def decode(bv, validate=False):
       - RAIM(bool): Receiver autonomous integrity monitoring flag
       - CommStateSelector(uint): SOTDMA or ITDMA
       - CommState(uint): Not decoded by this software yet
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Reserved1']=decodeReserved1(bits,numeric=numeric)
+        r['SOG']=decodeSOG(bits,numeric=numeric)
+        r['PositionAccuracy']=decodePositionAccuracy(bits,numeric=numeric)
+        r['longitude']=decodelongitude(bits,numeric=numeric)
+        r['latitude']=decodelatitude(bits,numeric=numeric)
+        r['COG']=decodeCOG(bits,numeric=numeric)
+        r['TrueHeading']=decodeTrueHeading(bits,numeric=numeric)
+        r['TimeStamp']=decodeTimeStamp(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['cs_unit']=decodecs_unit(bits,numeric=numeric)
+        r['display_flag']=decodedisplay_flag(bits,numeric=numeric)
+        r['dsc_flag']=decodedsc_flag(bits,numeric=numeric)
+        r['band_flag']=decodeband_flag(bits,numeric=numeric)
+        r['msg22_flag']=decodemsg22_flag(bits,numeric=numeric)
+        r['mode_flag']=decodemode_flag(bits,numeric=numeric)
+        r['RAIM']=decodeRAIM(bits,numeric=numeric)
+        r['CommStateSelector']=decodeCommStateSelector(bits,numeric=numeric)
+        r['CommState']=decodeCommState(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=18
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
     r['Reserved1']=0
-    r['SOG']=Decimal(int(bv[46:56]))/Decimal('10')
-    r['PositionAccuracy']=int(bv[56:57])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[57:85]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[85:112]))/Decimal('600000')
-    r['COG']=Decimal(int(bv[112:124]))/Decimal('10')
-    r['TrueHeading']=int(bv[124:133])
-    r['TimeStamp']=int(bv[133:139])
+    r['PositionAccuracy']=int((v>>111)&0x1)
+    r['TrueHeading']=int((v>>35)&0x1ff)
+    r['TimeStamp']=int((v>>29)&0x3f)
     r['Spare']=0
-    r['cs_unit']=bool(int(bv[141:142]))
-    r['display_flag']=bool(int(bv[142:143]))
-    r['dsc_flag']=bool(int(bv[143:144]))
-    r['band_flag']=bool(int(bv[144:145]))
-    r['msg22_flag']=bool(int(bv[145:146]))
-    r['mode_flag']=bool(int(bv[146:147]))
-    r['RAIM']=bool(int(bv[147:148]))
-    r['CommStateSelector']=int(bv[148:149])
-    r['CommState']=int(bv[149:168])
+    r['cs_unit']=bool((v>>26)&0x1)
+    r['display_flag']=bool((v>>25)&0x1)
+    r['dsc_flag']=bool((v>>24)&0x1)
+    r['band_flag']=bool((v>>23)&0x1)
+    r['msg22_flag']=bool((v>>22)&0x1)
+    r['mode_flag']=bool((v>>21)&0x1)
+    r['RAIM']=bool((v>>20)&0x1)
+    r['CommStateSelector']=int((v>>19)&0x1)
+    r['CommState']=int(v&0x7ffff)
+    if 'decimal' == numeric:
+        r['SOG']=Decimal((v>>112)&0x3ff)/Decimal('10')
+        r['longitude']=Decimal((((v>>83)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['latitude']=Decimal((((v>>56)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['COG']=Decimal((v>>44)&0xfff)/Decimal('10')
+    elif 'float' == numeric:
+        r['SOG']=((v>>112)&0x3ff)/10.0
+        r['longitude']=((((v>>83)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['latitude']=((((v>>56)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['COG']=((v>>44)&0xfff)/10.0
+    elif 'raw' == numeric:
+        r['SOG']=int((v>>112)&0x3ff)
+        r['longitude']=int((((v>>83)&0xfffffff)^0x8000000)-0x8000000)
+        r['latitude']=int((((v>>56)&0x7ffffff)^0x4000000)-0x4000000)
+        r['COG']=int((v>>44)&0xfff)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 18
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeReserved1(bv, validate=False):
+def decodeReserved1(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeSOG(bv, validate=False):
-    return Decimal(int(bv[46:56]))/Decimal('10')
-
-def decodePositionAccuracy(bv, validate=False):
-    return int(bv[56:57])
-
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[57:85]))/Decimal('600000')
-
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[85:112]))/Decimal('600000')
+def decodeSOG(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(46,10)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(56,1)
+
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(57,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(85,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeCOG(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(112,12)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeTrueHeading(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(124,9)
+
+def decodeTimeStamp(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(133,6)
+
+def decodeSpare(bv, validate=False, numeric='decimal'):
+    return 0
 
-def decodeCOG(bv, validate=False):
-    return Decimal(int(bv[112:124]))/Decimal('10')
+def decodecs_unit(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(141,1))
 
-def decodeTrueHeading(bv, validate=False):
-    return int(bv[124:133])
+def decodedisplay_flag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(142,1))
 
-def decodeTimeStamp(bv, validate=False):
-    return int(bv[133:139])
+def decodedsc_flag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(143,1))
 
-def decodeSpare(bv, validate=False):
-    return 0
+def decodeband_flag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(144,1))
 
-def decodecs_unit(bv, validate=False):
-    return bool(int(bv[141:142]))
+def decodemsg22_flag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(145,1))
 
-def decodedisplay_flag(bv, validate=False):
-    return bool(int(bv[142:143]))
+def decodemode_flag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(146,1))
 
-def decodedsc_flag(bv, validate=False):
-    return bool(int(bv[143:144]))
+def decodeRAIM(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(147,1))
 
-def decodeband_flag(bv, validate=False):
-    return bool(int(bv[144:145]))
+def decodeCommStateSelector(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(148,1)
 
-def decodemsg22_flag(bv, validate=False):
-    return bool(int(bv[145:146]))
+def decodeCommState(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(149,19)
 
-def decodemode_flag(bv, validate=False):
-    return bool(int(bv[146:147]))
 
-def decodeRAIM(bv, validate=False):
-    return bool(int(bv[147:148]))
+class View(object):
+    '''Lazy view of a positionb message.
 
-def decodeCommStateSelector(bv, validate=False):
-    return int(bv[148:149])
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
 
-def decodeCommState(bv, validate=False):
-    return int(bv[149:168])
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Reserved1','_SOG','_PositionAccuracy','_longitude','_latitude','_COG','_TrueHeading','_TimeStamp','_Spare','_cs_unit','_display_flag','_dsc_flag','_band_flag','_msg22_flag','_mode_flag','_RAIM','_CommStateSelector','_CommState')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Reserved1(self):
+        try: return self._Reserved1
+        except AttributeError: pass
+        self._Reserved1 = decodeReserved1(self.bits)
+        return self._Reserved1
+
+    @property
+    def SOG(self):
+        try: return self._SOG
+        except AttributeError: pass
+        self._SOG = decodeSOG(self.bits, numeric=self.numeric)
+        return self._SOG
+
+    @property
+    def PositionAccuracy(self):
+        try: return self._PositionAccuracy
+        except AttributeError: pass
+        self._PositionAccuracy = decodePositionAccuracy(self.bits)
+        return self._PositionAccuracy
+
+    @property
+    def longitude(self):
+        try: return self._longitude
+        except AttributeError: pass
+        self._longitude = decodelongitude(self.bits, numeric=self.numeric)
+        return self._longitude
+
+    @property
+    def latitude(self):
+        try: return self._latitude
+        except AttributeError: pass
+        self._latitude = decodelatitude(self.bits, numeric=self.numeric)
+        return self._latitude
+
+    @property
+    def COG(self):
+        try: return self._COG
+        except AttributeError: pass
+        self._COG = decodeCOG(self.bits, numeric=self.numeric)
+        return self._COG
+
+    @property
+    def TrueHeading(self):
+        try: return self._TrueHeading
+        except AttributeError: pass
+        self._TrueHeading = decodeTrueHeading(self.bits)
+        return self._TrueHeading
+
+    @property
+    def TimeStamp(self):
+        try: return self._TimeStamp
+        except AttributeError: pass
+        self._TimeStamp = decodeTimeStamp(self.bits)
+        return self._TimeStamp
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def cs_unit(self):
+        try: return self._cs_unit
+        except AttributeError: pass
+        self._cs_unit = decodecs_unit(self.bits)
+        return self._cs_unit
+
+    @property
+    def display_flag(self):
+        try: return self._display_flag
+        except AttributeError: pass
+        self._display_flag = decodedisplay_flag(self.bits)
+        return self._display_flag
+
+    @property
+    def dsc_flag(self):
+        try: return self._dsc_flag
+        except AttributeError: pass
+        self._dsc_flag = decodedsc_flag(self.bits)
+        return self._dsc_flag
+
+    @property
+    def band_flag(self):
+        try: return self._band_flag
+        except AttributeError: pass
+        self._band_flag = decodeband_flag(self.bits)
+        return self._band_flag
+
+    @property
+    def msg22_flag(self):
+        try: return self._msg22_flag
+        except AttributeError: pass
+        self._msg22_flag = decodemsg22_flag(self.bits)
+        return self._msg22_flag
+
+    @property
+    def mode_flag(self):
+        try: return self._mode_flag
+        except AttributeError: pass
+        self._mode_flag = decodemode_flag(self.bits)
+        return self._mode_flag
+
+    @property
+    def RAIM(self):
+        try: return self._RAIM
+        except AttributeError: pass
+        self._RAIM = decodeRAIM(self.bits)
+        return self._RAIM
+
+    @property
+    def CommStateSelector(self):
+        try: return self._CommStateSelector
+        except AttributeError: pass
+        self._CommStateSelector = decodeCommStateSelector(self.bits)
+        return self._CommStateSelector
+
+    @property
+    def CommState(self):
+        try: return self._CommState
+        except AttributeError: pass
+        self._CommState = decodeCommState(self.bits)
+        return self._CommState
 
 
 def printHtml(params, out=sys.stdout):
@@ -908,6 +1130,83 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('positionb', fieldListPostgres+tuple(extraFields),
+                        geometry=('Position',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('positionb', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Reserved1'),
+                        sqlhelp.toFloat(get('SOG')),
+                        get('PositionAccuracy'),
+                        sqlhelp.geometryWkt('POINT',get('longitude'),get('latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TrueHeading'),
+                        get('TimeStamp'),
+                        get('Spare'),
+                        get('cs_unit'),
+                        get('display_flag'),
+                        get('dsc_flag'),
+                        get('band_flag'),
+                        get('msg22_flag'),
+                        get('mode_flag'),
+                        get('RAIM'),
+                        get('CommStateSelector'),
+                        get('CommState'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Reserved1'),
+                        sqlhelp.toFloat(get('SOG')),
+                        get('PositionAccuracy'),
+                        sqlhelp.toFloat(get('longitude')),
+                        sqlhelp.toFloat(get('latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TrueHeading'),
+                        get('TimeStamp'),
+                        get('Spare'),
+                        get('cs_unit'),
+                        get('display_flag'),
+                        get('dsc_flag'),
+                        get('band_flag'),
+                        get('msg22_flag'),
+                        get('mode_flag'),
+                        get('RAIM'),
+                        get('CommStateSelector'),
+                        get('CommState'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1062,6 +1361,24 @@ class Testpositionb(unittest.TestCase):
         self.failUnlessEqual(r['CommStateSelector'],params['CommStateSelector'])
         self.failUnlessEqual(r['CommState'],params['CommState'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('SOG', 'longitude', 'latitude', 'COG'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "positionb" AIS message')
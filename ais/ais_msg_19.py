@@ -24,6 +24,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -130,81 +131,80 @@ def encode(params, validate=False):
       - Spare3(uint): Not used. Should be set to zero (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=19),6))
+    v = 0
+    v = (v<<6)|0x13
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<8)|0x0
     if 'SOG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['SOG'])*Decimal('10')))),10))
+        v = (v<<10)|(int(Decimal(params['SOG'])*Decimal('10'))&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(1023)),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['PositionAccuracy']),1))
+        v = (v<<10)|0x3ff
+    v = (v<<1)|(params['PositionAccuracy']&0x1)
     if 'longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'COG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['COG'])*Decimal('10')))),12))
+        v = (v<<12)|(int(Decimal(params['COG'])*Decimal('10'))&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(3600)),12))
+        v = (v<<12)|0xe10
     if 'TrueHeading' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TrueHeading']),9))
+        v = (v<<9)|(params['TrueHeading']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'TimeStamp' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TimeStamp']),6))
+        v = (v<<6)|(params['TimeStamp']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<6)|0x3c
+    v = (v<<4)|0x0
     if 'name' in params:
-        bvList.append(aisstring.encode(params['name'],120))
+        v = (v<<120)|(int(aisstring.encode(params['name'],120)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
+        v = (v<<120)|int(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
     if 'shipandcargo' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['shipandcargo']),8))
+        v = (v<<8)|(params['shipandcargo']&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
+        v = (v<<8)|0x0
     if 'dimA' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimA']),9))
+        v = (v<<9)|(params['dimA']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),9))
+        v = (v<<9)|0x0
     if 'dimB' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimB']),9))
+        v = (v<<9)|(params['dimB']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),9))
+        v = (v<<9)|0x0
     if 'dimC' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimC']),6))
+        v = (v<<6)|(params['dimC']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<6)|0x0
     if 'dimD' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimD']),6))
+        v = (v<<6)|(params['dimD']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<6)|0x0
     if 'fixtype' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fixtype']),4))
+        v = (v<<4)|(params['fixtype']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
-    if params["RAIM"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DTE']),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),5))
+        v = (v<<4)|0x0
+    v = (v<<1)|(1 if params['RAIM'] else 0)
+    v = (v<<1)|(params['DTE']&0x1)
+    v = (v<<5)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,312)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a b_pos_and_shipdata message.
 
     Fields in params:
@@ -230,106 +230,343 @@ def decode(bv, validate=False):
       - RAIM(bool): Receiver autonomous integrity monitoring flag
       - DTE(uint): Data terminal ready
       - Spare3(uint): Not used. Should be set to zero (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 312:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['SOG']=decodeSOG(bits,numeric=numeric)
+        r['PositionAccuracy']=decodePositionAccuracy(bits,numeric=numeric)
+        r['longitude']=decodelongitude(bits,numeric=numeric)
+        r['latitude']=decodelatitude(bits,numeric=numeric)
+        r['COG']=decodeCOG(bits,numeric=numeric)
+        r['TrueHeading']=decodeTrueHeading(bits,numeric=numeric)
+        r['TimeStamp']=decodeTimeStamp(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        r['name']=decodename(bits,numeric=numeric)
+        r['shipandcargo']=decodeshipandcargo(bits,numeric=numeric)
+        r['dimA']=decodedimA(bits,numeric=numeric)
+        r['dimB']=decodedimB(bits,numeric=numeric)
+        r['dimC']=decodedimC(bits,numeric=numeric)
+        r['dimD']=decodedimD(bits,numeric=numeric)
+        r['fixtype']=decodefixtype(bits,numeric=numeric)
+        r['RAIM']=decodeRAIM(bits,numeric=numeric)
+        r['DTE']=decodeDTE(bits,numeric=numeric)
+        r['Spare3']=decodeSpare3(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 312: v >>= n-312
     r = {}
     r['MessageID']=19
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>304)&0x3)
+    r['UserID']=int((v>>274)&0x3fffffff)
     r['Spare']=0
-    r['SOG']=Decimal(int(bv[46:56]))/Decimal('10')
-    r['PositionAccuracy']=int(bv[56:57])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[57:85]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[85:112]))/Decimal('600000')
-    r['COG']=Decimal(int(bv[112:124]))/Decimal('10')
-    r['TrueHeading']=int(bv[124:133])
-    r['TimeStamp']=int(bv[133:139])
+    r['PositionAccuracy']=int((v>>255)&0x1)
+    r['TrueHeading']=int((v>>179)&0x1ff)
+    r['TimeStamp']=int((v>>173)&0x3f)
     r['Spare2']=0
-    r['name']=aisstring.decode(bv[143:263])
-    r['shipandcargo']=int(bv[263:271])
-    r['dimA']=int(bv[271:280])
-    r['dimB']=int(bv[280:289])
-    r['dimC']=int(bv[289:295])
-    r['dimD']=int(bv[295:301])
-    r['fixtype']=int(bv[301:305])
-    r['RAIM']=bool(int(bv[305:306]))
-    r['DTE']=int(bv[306:307])
+    r['name']=aisstring.decode(bits[143:263])
+    r['shipandcargo']=int((v>>41)&0xff)
+    r['dimA']=int((v>>32)&0x1ff)
+    r['dimB']=int((v>>23)&0x1ff)
+    r['dimC']=int((v>>17)&0x3f)
+    r['dimD']=int((v>>11)&0x3f)
+    r['fixtype']=int((v>>7)&0xf)
+    r['RAIM']=bool((v>>6)&0x1)
+    r['DTE']=int((v>>5)&0x1)
     r['Spare3']=0
+    if 'decimal' == numeric:
+        r['SOG']=Decimal((v>>256)&0x3ff)/Decimal('10')
+        r['longitude']=Decimal((((v>>227)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['latitude']=Decimal((((v>>200)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['COG']=Decimal((v>>188)&0xfff)/Decimal('10')
+    elif 'float' == numeric:
+        r['SOG']=((v>>256)&0x3ff)/10.0
+        r['longitude']=((((v>>227)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['latitude']=((((v>>200)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['COG']=((v>>188)&0xfff)/10.0
+    elif 'raw' == numeric:
+        r['SOG']=int((v>>256)&0x3ff)
+        r['longitude']=int((((v>>227)&0xfffffff)^0x8000000)-0x8000000)
+        r['latitude']=int((((v>>200)&0x7ffffff)^0x4000000)-0x4000000)
+        r['COG']=int((v>>188)&0xfff)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 19
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeSOG(bv, validate=False):
-    return Decimal(int(bv[46:56]))/Decimal('10')
-
-def decodePositionAccuracy(bv, validate=False):
-    return int(bv[56:57])
-
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[57:85]))/Decimal('600000')
-
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[85:112]))/Decimal('600000')
+def decodeSOG(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(46,10)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(56,1)
+
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(57,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(85,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeCOG(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(112,12)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeTrueHeading(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(124,9)
+
+def decodeTimeStamp(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(133,6)
+
+def decodeSpare2(bv, validate=False, numeric='decimal'):
+    return 0
 
-def decodeCOG(bv, validate=False):
-    return Decimal(int(bv[112:124]))/Decimal('10')
+def decodename(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[143:263])
 
-def decodeTrueHeading(bv, validate=False):
-    return int(bv[124:133])
+def decodeshipandcargo(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(263,8)
 
-def decodeTimeStamp(bv, validate=False):
-    return int(bv[133:139])
+def decodedimA(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(271,9)
 
-def decodeSpare2(bv, validate=False):
-    return 0
+def decodedimB(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(280,9)
 
-def decodename(bv, validate=False):
-    return aisstring.decode(bv[143:263])
+def decodedimC(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(289,6)
 
-def decodeshipandcargo(bv, validate=False):
-    return int(bv[263:271])
+def decodedimD(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(295,6)
 
-def decodedimA(bv, validate=False):
-    return int(bv[271:280])
+def decodefixtype(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(301,4)
 
-def decodedimB(bv, validate=False):
-    return int(bv[280:289])
+def decodeRAIM(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(305,1))
 
-def decodedimC(bv, validate=False):
-    return int(bv[289:295])
+def decodeDTE(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(306,1)
 
-def decodedimD(bv, validate=False):
-    return int(bv[295:301])
+def decodeSpare3(bv, validate=False, numeric='decimal'):
+    return 0
 
-def decodefixtype(bv, validate=False):
-    return int(bv[301:305])
 
-def decodeRAIM(bv, validate=False):
-    return bool(int(bv[305:306]))
+class View(object):
+    '''Lazy view of a b_pos_and_shipdata message.
 
-def decodeDTE(bv, validate=False):
-    return int(bv[306:307])
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
 
-def decodeSpare3(bv, validate=False):
-    return 0
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_SOG','_PositionAccuracy','_longitude','_latitude','_COG','_TrueHeading','_TimeStamp','_Spare2','_name','_shipandcargo','_dimA','_dimB','_dimC','_dimD','_fixtype','_RAIM','_DTE','_Spare3')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def SOG(self):
+        try: return self._SOG
+        except AttributeError: pass
+        self._SOG = decodeSOG(self.bits, numeric=self.numeric)
+        return self._SOG
+
+    @property
+    def PositionAccuracy(self):
+        try: return self._PositionAccuracy
+        except AttributeError: pass
+        self._PositionAccuracy = decodePositionAccuracy(self.bits)
+        return self._PositionAccuracy
+
+    @property
+    def longitude(self):
+        try: return self._longitude
+        except AttributeError: pass
+        self._longitude = decodelongitude(self.bits, numeric=self.numeric)
+        return self._longitude
+
+    @property
+    def latitude(self):
+        try: return self._latitude
+        except AttributeError: pass
+        self._latitude = decodelatitude(self.bits, numeric=self.numeric)
+        return self._latitude
+
+    @property
+    def COG(self):
+        try: return self._COG
+        except AttributeError: pass
+        self._COG = decodeCOG(self.bits, numeric=self.numeric)
+        return self._COG
+
+    @property
+    def TrueHeading(self):
+        try: return self._TrueHeading
+        except AttributeError: pass
+        self._TrueHeading = decodeTrueHeading(self.bits)
+        return self._TrueHeading
+
+    @property
+    def TimeStamp(self):
+        try: return self._TimeStamp
+        except AttributeError: pass
+        self._TimeStamp = decodeTimeStamp(self.bits)
+        return self._TimeStamp
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
+
+    @property
+    def name(self):
+        try: return self._name
+        except AttributeError: pass
+        self._name = decodename(self.bits)
+        return self._name
+
+    @property
+    def shipandcargo(self):
+        try: return self._shipandcargo
+        except AttributeError: pass
+        self._shipandcargo = decodeshipandcargo(self.bits)
+        return self._shipandcargo
+
+    @property
+    def dimA(self):
+        try: return self._dimA
+        except AttributeError: pass
+        self._dimA = decodedimA(self.bits)
+        return self._dimA
+
+    @property
+    def dimB(self):
+        try: return self._dimB
+        except AttributeError: pass
+        self._dimB = decodedimB(self.bits)
+        return self._dimB
+
+    @property
+    def dimC(self):
+        try: return self._dimC
+        except AttributeError: pass
+        self._dimC = decodedimC(self.bits)
+        return self._dimC
+
+    @property
+    def dimD(self):
+        try: return self._dimD
+        except AttributeError: pass
+        self._dimD = decodedimD(self.bits)
+        return self._dimD
+
+    @property
+    def fixtype(self):
+        try: return self._fixtype
+        except AttributeError: pass
+        self._fixtype = decodefixtype(self.bits)
+        return self._fixtype
+
+    @property
+    def RAIM(self):
+        try: return self._RAIM
+        except AttributeError: pass
+        self._RAIM = decodeRAIM(self.bits)
+        return self._RAIM
+
+    @property
+    def DTE(self):
+        try: return self._DTE
+        except AttributeError: pass
+        self._DTE = decodeDTE(self.bits)
+        return self._DTE
+
+    @property
+    def Spare3(self):
+        try: return self._Spare3
+        except AttributeError: pass
+        self._Spare3 = decodeSpare3(self.bits)
+        return self._Spare3
 
 
 def printHtml(params, out=sys.stdout):
@@ -1084,6 +1321,85 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('b_pos_and_shipdata', fieldListPostgres+tuple(extraFields),
+                        geometry=('Position',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('b_pos_and_shipdata', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        sqlhelp.toFloat(get('SOG')),
+                        get('PositionAccuracy'),
+                        sqlhelp.geometryWkt('POINT',get('longitude'),get('latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TrueHeading'),
+                        get('TimeStamp'),
+                        get('Spare2'),
+                        get('name'),
+                        get('shipandcargo'),
+                        get('dimA'),
+                        get('dimB'),
+                        get('dimC'),
+                        get('dimD'),
+                        get('fixtype'),
+                        get('RAIM'),
+                        get('DTE'),
+                        get('Spare3'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        sqlhelp.toFloat(get('SOG')),
+                        get('PositionAccuracy'),
+                        sqlhelp.toFloat(get('longitude')),
+                        sqlhelp.toFloat(get('latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TrueHeading'),
+                        get('TimeStamp'),
+                        get('Spare2'),
+                        get('name'),
+                        get('shipandcargo'),
+                        get('dimA'),
+                        get('dimB'),
+                        get('dimC'),
+                        get('dimD'),
+                        get('fixtype'),
+                        get('RAIM'),
+                        get('DTE'),
+                        get('Spare3'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1242,6 +1558,24 @@ class Testb_pos_and_shipdata(unittest.TestCase):
         self.failUnlessEqual(r['DTE'],params['DTE'])
         self.failUnlessEqual(r['Spare3'],params['Spare3'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('SOG', 'longitude', 'latitude', 'COG'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "b_pos_and_shipdata" AIS message')
@@ -22,6 +22,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -118,88 +119,88 @@ def encode(params, validate=False):
       - variablespare(uint): This field is a serious pain.  This padding makes the message byte aligned (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=20),6))
+    v = 0
+    v = (v<<6)|0x14
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
     if 'offset1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['offset1']),12))
+        v = (v<<12)|(params['offset1']&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),12))
+        v = (v<<12)|0x0
     if 'numslots1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['numslots1']),4))
+        v = (v<<4)|(params['numslots1']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'timeout1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timeout1']),3))
+        v = (v<<3)|(params['timeout1']&0x7)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),3))
+        v = (v<<3)|0x0
     if 'increment1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['increment1']),11))
+        v = (v<<11)|(params['increment1']&0x7ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),11))
+        v = (v<<11)|0x0
     if 'offset2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['offset2']),12))
+        v = (v<<12)|(params['offset2']&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),12))
+        v = (v<<12)|0x0
     if 'numslots2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['numslots2']),4))
+        v = (v<<4)|(params['numslots2']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'timeout2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timeout2']),3))
+        v = (v<<3)|(params['timeout2']&0x7)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),3))
+        v = (v<<3)|0x0
     if 'increment2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['increment2']),11))
+        v = (v<<11)|(params['increment2']&0x7ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),11))
+        v = (v<<11)|0x0
     if 'offset3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['offset3']),12))
+        v = (v<<12)|(params['offset3']&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),12))
+        v = (v<<12)|0x0
     if 'numslots3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['numslots3']),4))
+        v = (v<<4)|(params['numslots3']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'timeout3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timeout3']),3))
+        v = (v<<3)|(params['timeout3']&0x7)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),3))
+        v = (v<<3)|0x0
     if 'increment3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['increment3']),11))
+        v = (v<<11)|(params['increment3']&0x7ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),11))
+        v = (v<<11)|0x0
     if 'offset4' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['offset4']),12))
+        v = (v<<12)|(params['offset4']&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),12))
+        v = (v<<12)|0x0
     if 'numslots4' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['numslots4']),4))
+        v = (v<<4)|(params['numslots4']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'timeout4' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timeout4']),3))
+        v = (v<<3)|(params['timeout4']&0x7)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),3))
+        v = (v<<3)|0x0
     if 'increment4' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['increment4']),11))
+        v = (v<<11)|(params['increment4']&0x7ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<11)|0x0
+    v = (v<<6)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,166)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a datalinkmng message.
 
     Fields in params:
@@ -224,107 +225,310 @@ def decode(bv, validate=False):
       - timeout4(uint): Time-out value in minutes (optional)
       - increment4(uint): Increment to repeast reservation of this block (optional)
       - variablespare(uint): This field is a serious pain.  This padding makes the message byte aligned (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 166:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['offset1']=decodeoffset1(bits,numeric=numeric)
+        r['numslots1']=decodenumslots1(bits,numeric=numeric)
+        r['timeout1']=decodetimeout1(bits,numeric=numeric)
+        r['increment1']=decodeincrement1(bits,numeric=numeric)
+        if n<=72: return r; # All fields below are optional
+        r['offset2']=decodeoffset2(bits,numeric=numeric)
+        r['numslots2']=decodenumslots2(bits,numeric=numeric)
+        r['timeout2']=decodetimeout2(bits,numeric=numeric)
+        r['increment2']=decodeincrement2(bits,numeric=numeric)
+        if n<=104: return r; # All fields below are optional
+        r['offset3']=decodeoffset3(bits,numeric=numeric)
+        r['numslots3']=decodenumslots3(bits,numeric=numeric)
+        r['timeout3']=decodetimeout3(bits,numeric=numeric)
+        r['increment3']=decodeincrement3(bits,numeric=numeric)
+        if n<=136: return r; # All fields below are optional
+        r['offset4']=decodeoffset4(bits,numeric=numeric)
+        r['numslots4']=decodenumslots4(bits,numeric=numeric)
+        r['timeout4']=decodetimeout4(bits,numeric=numeric)
+        r['increment4']=decodeincrement4(bits,numeric=numeric)
+        r['variablespare']=decodevariablespare(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 166: v >>= n-166
     r = {}
     r['MessageID']=20
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>158)&0x3)
+    r['UserID']=int((v>>128)&0x3fffffff)
     r['Spare']=0
-    r['offset1']=int(bv[40:52])
-    r['numslots1']=int(bv[52:56])
-    r['timeout1']=int(bv[56:59])
-    r['increment1']=int(bv[59:70])
-    if len(bv)<=72: return r; # All fields below are optional
-    r['offset2']=int(bv[70:82])
-    r['numslots2']=int(bv[82:86])
-    r['timeout2']=int(bv[86:89])
-    r['increment2']=int(bv[89:100])
-    if len(bv)<=104: return r; # All fields below are optional
-    r['offset3']=int(bv[100:112])
-    r['numslots3']=int(bv[112:116])
-    r['timeout3']=int(bv[116:119])
-    r['increment3']=int(bv[119:130])
-    if len(bv)<=136: return r; # All fields below are optional
-    r['offset4']=int(bv[130:142])
-    r['numslots4']=int(bv[142:146])
-    r['timeout4']=int(bv[146:149])
-    r['increment4']=int(bv[149:160])
+    r['offset1']=int((v>>114)&0xfff)
+    r['numslots1']=int((v>>110)&0xf)
+    r['timeout1']=int((v>>107)&0x7)
+    r['increment1']=int((v>>96)&0x7ff)
+    if n<=72: return r; # All fields below are optional
+    r['offset2']=int((v>>84)&0xfff)
+    r['numslots2']=int((v>>80)&0xf)
+    r['timeout2']=int((v>>77)&0x7)
+    r['increment2']=int((v>>66)&0x7ff)
+    if n<=104: return r; # All fields below are optional
+    r['offset3']=int((v>>54)&0xfff)
+    r['numslots3']=int((v>>50)&0xf)
+    r['timeout3']=int((v>>47)&0x7)
+    r['increment3']=int((v>>36)&0x7ff)
+    if n<=136: return r; # All fields below are optional
+    r['offset4']=int((v>>24)&0xfff)
+    r['numslots4']=int((v>>20)&0xf)
+    r['timeout4']=int((v>>17)&0x7)
+    r['increment4']=int((v>>6)&0x7ff)
     r['variablespare']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 20
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeoffset1(bv, validate=False):
-    return int(bv[40:52])
+def decodeoffset1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(40,12)
 
-def decodenumslots1(bv, validate=False):
-    return int(bv[52:56])
+def decodenumslots1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(52,4)
 
-def decodetimeout1(bv, validate=False):
-    return int(bv[56:59])
+def decodetimeout1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(56,3)
 
-def decodeincrement1(bv, validate=False):
-    return int(bv[59:70])
+def decodeincrement1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(59,11)
 
-def decodeoffset2(bv, validate=False):
-    return int(bv[70:82])
+def decodeoffset2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(70,12)
 
-def decodenumslots2(bv, validate=False):
-    return int(bv[82:86])
+def decodenumslots2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(82,4)
 
-def decodetimeout2(bv, validate=False):
-    return int(bv[86:89])
+def decodetimeout2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(86,3)
 
-def decodeincrement2(bv, validate=False):
-    return int(bv[89:100])
+def decodeincrement2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(89,11)
 
-def decodeoffset3(bv, validate=False):
-    return int(bv[100:112])
+def decodeoffset3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(100,12)
 
-def decodenumslots3(bv, validate=False):
-    return int(bv[112:116])
+def decodenumslots3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(112,4)
 
-def decodetimeout3(bv, validate=False):
-    return int(bv[116:119])
+def decodetimeout3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(116,3)
 
-def decodeincrement3(bv, validate=False):
-    return int(bv[119:130])
+def decodeincrement3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(119,11)
 
-def decodeoffset4(bv, validate=False):
-    return int(bv[130:142])
+def decodeoffset4(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(130,12)
 
-def decodenumslots4(bv, validate=False):
-    return int(bv[142:146])
+def decodenumslots4(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(142,4)
 
-def decodetimeout4(bv, validate=False):
-    return int(bv[146:149])
+def decodetimeout4(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(146,3)
 
-def decodeincrement4(bv, validate=False):
-    return int(bv[149:160])
+def decodeincrement4(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(149,11)
 
-def decodevariablespare(bv, validate=False):
+def decodevariablespare(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a datalinkmng message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_offset1','_numslots1','_timeout1','_increment1','_offset2','_numslots2','_timeout2','_increment2','_offset3','_numslots3','_timeout3','_increment3','_offset4','_numslots4','_timeout4','_increment4','_variablespare')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def offset1(self):
+        try: return self._offset1
+        except AttributeError: pass
+        self._offset1 = decodeoffset1(self.bits)
+        return self._offset1
+
+    @property
+    def numslots1(self):
+        try: return self._numslots1
+        except AttributeError: pass
+        self._numslots1 = decodenumslots1(self.bits)
+        return self._numslots1
+
+    @property
+    def timeout1(self):
+        try: return self._timeout1
+        except AttributeError: pass
+        self._timeout1 = decodetimeout1(self.bits)
+        return self._timeout1
+
+    @property
+    def increment1(self):
+        try: return self._increment1
+        except AttributeError: pass
+        self._increment1 = decodeincrement1(self.bits)
+        return self._increment1
+
+    @property
+    def offset2(self):
+        try: return self._offset2
+        except AttributeError: pass
+        self._offset2 = decodeoffset2(self.bits)
+        return self._offset2
+
+    @property
+    def numslots2(self):
+        try: return self._numslots2
+        except AttributeError: pass
+        self._numslots2 = decodenumslots2(self.bits)
+        return self._numslots2
+
+    @property
+    def timeout2(self):
+        try: return self._timeout2
+        except AttributeError: pass
+        self._timeout2 = decodetimeout2(self.bits)
+        return self._timeout2
+
+    @property
+    def increment2(self):
+        try: return self._increment2
+        except AttributeError: pass
+        self._increment2 = decodeincrement2(self.bits)
+        return self._increment2
+
+    @property
+    def offset3(self):
+        try: return self._offset3
+        except AttributeError: pass
+        self._offset3 = decodeoffset3(self.bits)
+        return self._offset3
+
+    @property
+    def numslots3(self):
+        try: return self._numslots3
+        except AttributeError: pass
+        self._numslots3 = decodenumslots3(self.bits)
+        return self._numslots3
+
+    @property
+    def timeout3(self):
+        try: return self._timeout3
+        except AttributeError: pass
+        self._timeout3 = decodetimeout3(self.bits)
+        return self._timeout3
+
+    @property
+    def increment3(self):
+        try: return self._increment3
+        except AttributeError: pass
+        self._increment3 = decodeincrement3(self.bits)
+        return self._increment3
+
+    @property
+    def offset4(self):
+        try: return self._offset4
+        except AttributeError: pass
+        self._offset4 = decodeoffset4(self.bits)
+        return self._offset4
+
+    @property
+    def numslots4(self):
+        try: return self._numslots4
+        except AttributeError: pass
+        self._numslots4 = decodenumslots4(self.bits)
+        return self._numslots4
+
+    @property
+    def timeout4(self):
+        try: return self._timeout4
+        except AttributeError: pass
+        self._timeout4 = decodetimeout4(self.bits)
+        return self._timeout4
+
+    @property
+    def increment4(self):
+        try: return self._increment4
+        except AttributeError: pass
+        self._increment4 = decodeincrement4(self.bits)
+        return self._increment4
+
+    @property
+    def variablespare(self):
+        try: return self._variablespare
+        except AttributeError: pass
+        self._variablespare = decodevariablespare(self.bits)
+        return self._variablespare
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>datalinkmng</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -738,6 +942,84 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('datalinkmng', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('datalinkmng', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('offset1'),
+                        get('numslots1'),
+                        get('timeout1'),
+                        get('increment1'),
+                        get('offset2'),
+                        get('numslots2'),
+                        get('timeout2'),
+                        get('increment2'),
+                        get('offset3'),
+                        get('numslots3'),
+                        get('timeout3'),
+                        get('increment3'),
+                        get('offset4'),
+                        get('numslots4'),
+                        get('timeout4'),
+                        get('increment4'),
+                        get('variablespare'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('offset1'),
+                        get('numslots1'),
+                        get('timeout1'),
+                        get('increment1'),
+                        get('offset2'),
+                        get('numslots2'),
+                        get('timeout2'),
+                        get('increment2'),
+                        get('offset3'),
+                        get('numslots3'),
+                        get('timeout3'),
+                        get('increment3'),
+                        get('offset4'),
+                        get('numslots4'),
+                        get('timeout4'),
+                        get('increment4'),
+                        get('variablespare'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -892,6 +1174,14 @@ class Testdatalinkmng(unittest.TestCase):
         self.failUnlessEqual(r['increment4'],params['increment4'])
         self.failUnlessEqual(r['variablespare'],params['variablespare'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "datalinkmng" AIS message')
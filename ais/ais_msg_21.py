@@ -22,6 +22,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -122,70 +123,66 @@ def encode(params, validate=False):
       - spare(uint): Not Used (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=21),6))
+    v = 0
+    v = (v<<6)|0x15
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
     if 'type' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['type']),5))
+        v = (v<<5)|(params['type']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),5))
+        v = (v<<5)|0x0
     if 'name' in params:
-        bvList.append(aisstring.encode(params['name'],120))
+        v = (v<<120)|(int(aisstring.encode(params['name'],120)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['PositionAccuracy']),1))
+        v = (v<<120)|int(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
+    v = (v<<1)|(params['PositionAccuracy']&0x1)
     if 'longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'dimA' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimA']),9))
+        v = (v<<9)|(params['dimA']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),9))
+        v = (v<<9)|0x0
     if 'dimB' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimB']),9))
+        v = (v<<9)|(params['dimB']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),9))
+        v = (v<<9)|0x0
     if 'dimC' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimC']),6))
+        v = (v<<6)|(params['dimC']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<6)|0x0
     if 'dimD' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimD']),6))
+        v = (v<<6)|(params['dimD']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<6)|0x0
     if 'FixType' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['FixType']),4))
+        v = (v<<4)|(params['FixType']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timestamp']),6))
-    if params["OffPosition"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['status']),8))
-    if params["RAIM"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["virtual_aton_flag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    if params["assigned_mode_flag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),1))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<4)|0x0
+    v = (v<<6)|(params['timestamp']&0x3f)
+    v = (v<<1)|(1 if params['OffPosition'] else 0)
+    v = (v<<8)|(params['status']&0xff)
+    v = (v<<1)|(1 if params['RAIM'] else 0)
+    v = (v<<1)|(1 if params['virtual_aton_flag'] else 0)
+    v = (v<<1)|(1 if params['assigned_mode_flag'] else 0)
+    v = (v<<1)|0x0
+
+    return bitreader.BitReader(v,272)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a AidsToNavReport message.
 
     Fields in params:
@@ -209,100 +206,309 @@ def decode(bv, validate=False):
       - virtual_aton_flag(bool): Does the unit physically exist?
       - assigned_mode_flag(bool): autonomous or controlled
       - spare(uint): Not Used (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 272:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['type']=decodetype(bits,numeric=numeric)
+        r['name']=decodename(bits,numeric=numeric)
+        r['PositionAccuracy']=decodePositionAccuracy(bits,numeric=numeric)
+        r['longitude']=decodelongitude(bits,numeric=numeric)
+        r['latitude']=decodelatitude(bits,numeric=numeric)
+        r['dimA']=decodedimA(bits,numeric=numeric)
+        r['dimB']=decodedimB(bits,numeric=numeric)
+        r['dimC']=decodedimC(bits,numeric=numeric)
+        r['dimD']=decodedimD(bits,numeric=numeric)
+        r['FixType']=decodeFixType(bits,numeric=numeric)
+        r['timestamp']=decodetimestamp(bits,numeric=numeric)
+        r['OffPosition']=decodeOffPosition(bits,numeric=numeric)
+        r['status']=decodestatus(bits,numeric=numeric)
+        r['RAIM']=decodeRAIM(bits,numeric=numeric)
+        r['virtual_aton_flag']=decodevirtual_aton_flag(bits,numeric=numeric)
+        r['assigned_mode_flag']=decodeassigned_mode_flag(bits,numeric=numeric)
+        r['spare']=decodespare(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 272: v >>= n-272
     r = {}
     r['MessageID']=21
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['type']=int(bv[38:43])
-    r['name']=aisstring.decode(bv[43:163])
-    r['PositionAccuracy']=int(bv[163:164])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[164:192]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[192:219]))/Decimal('600000')
-    r['dimA']=int(bv[219:228])
-    r['dimB']=int(bv[228:237])
-    r['dimC']=int(bv[237:243])
-    r['dimD']=int(bv[243:249])
-    r['FixType']=int(bv[249:253])
-    r['timestamp']=int(bv[253:259])
-    r['OffPosition']=bool(int(bv[259:260]))
-    r['status']=int(bv[260:268])
-    r['RAIM']=bool(int(bv[268:269]))
-    r['virtual_aton_flag']=bool(int(bv[269:270]))
-    r['assigned_mode_flag']=bool(int(bv[270:271]))
+    r['RepeatIndicator']=int((v>>264)&0x3)
+    r['UserID']=int((v>>234)&0x3fffffff)
+    r['type']=int((v>>229)&0x1f)
+    r['name']=aisstring.decode(bits[43:163])
+    r['PositionAccuracy']=int((v>>108)&0x1)
+    r['dimA']=int((v>>44)&0x1ff)
+    r['dimB']=int((v>>35)&0x1ff)
+    r['dimC']=int((v>>29)&0x3f)
+    r['dimD']=int((v>>23)&0x3f)
+    r['FixType']=int((v>>19)&0xf)
+    r['timestamp']=int((v>>13)&0x3f)
+    r['OffPosition']=bool((v>>12)&0x1)
+    r['status']=int((v>>4)&0xff)
+    r['RAIM']=bool((v>>3)&0x1)
+    r['virtual_aton_flag']=bool((v>>2)&0x1)
+    r['assigned_mode_flag']=bool((v>>1)&0x1)
     r['spare']=0
+    if 'decimal' == numeric:
+        r['longitude']=Decimal((((v>>80)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['latitude']=Decimal((((v>>53)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+    elif 'float' == numeric:
+        r['longitude']=((((v>>80)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['latitude']=((((v>>53)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+    elif 'raw' == numeric:
+        r['longitude']=int((((v>>80)&0xfffffff)^0x8000000)-0x8000000)
+        r['latitude']=int((((v>>53)&0x7ffffff)^0x4000000)-0x4000000)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 21
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodetype(bv, validate=False):
-    return int(bv[38:43])
+def decodetype(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,5)
 
-def decodename(bv, validate=False):
-    return aisstring.decode(bv[43:163])
+def decodename(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[43:163])
 
-def decodePositionAccuracy(bv, validate=False):
-    return int(bv[163:164])
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(163,1)
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[164:192]))/Decimal('600000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(164,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[192:219]))/Decimal('600000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(192,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodedimA(bv, validate=False):
-    return int(bv[219:228])
+def decodedimA(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(219,9)
 
-def decodedimB(bv, validate=False):
-    return int(bv[228:237])
+def decodedimB(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(228,9)
 
-def decodedimC(bv, validate=False):
-    return int(bv[237:243])
+def decodedimC(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(237,6)
 
-def decodedimD(bv, validate=False):
-    return int(bv[243:249])
+def decodedimD(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(243,6)
 
-def decodeFixType(bv, validate=False):
-    return int(bv[249:253])
+def decodeFixType(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(249,4)
 
-def decodetimestamp(bv, validate=False):
-    return int(bv[253:259])
+def decodetimestamp(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(253,6)
 
-def decodeOffPosition(bv, validate=False):
-    return bool(int(bv[259:260]))
+def decodeOffPosition(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(259,1))
 
-def decodestatus(bv, validate=False):
-    return int(bv[260:268])
+def decodestatus(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(260,8)
 
-def decodeRAIM(bv, validate=False):
-    return bool(int(bv[268:269]))
+def decodeRAIM(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(268,1))
 
-def decodevirtual_aton_flag(bv, validate=False):
-    return bool(int(bv[269:270]))
+def decodevirtual_aton_flag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(269,1))
 
-def decodeassigned_mode_flag(bv, validate=False):
-    return bool(int(bv[270:271]))
+def decodeassigned_mode_flag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(270,1))
 
-def decodespare(bv, validate=False):
+def decodespare(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a AidsToNavReport message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_type','_name','_PositionAccuracy','_longitude','_latitude','_dimA','_dimB','_dimC','_dimD','_FixType','_timestamp','_OffPosition','_status','_RAIM','_virtual_aton_flag','_assigned_mode_flag','_spare')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def type(self):
+        try: return self._type
+        except AttributeError: pass
+        self._type = decodetype(self.bits)
+        return self._type
+
+    @property
+    def name(self):
+        try: return self._name
+        except AttributeError: pass
+        self._name = decodename(self.bits)
+        return self._name
+
+    @property
+    def PositionAccuracy(self):
+        try: return self._PositionAccuracy
+        except AttributeError: pass
+        self._PositionAccuracy = decodePositionAccuracy(self.bits)
+        return self._PositionAccuracy
+
+    @property
+    def longitude(self):
+        try: return self._longitude
+        except AttributeError: pass
+        self._longitude = decodelongitude(self.bits, numeric=self.numeric)
+        return self._longitude
+
+    @property
+    def latitude(self):
+        try: return self._latitude
+        except AttributeError: pass
+        self._latitude = decodelatitude(self.bits, numeric=self.numeric)
+        return self._latitude
+
+    @property
+    def dimA(self):
+        try: return self._dimA
+        except AttributeError: pass
+        self._dimA = decodedimA(self.bits)
+        return self._dimA
+
+    @property
+    def dimB(self):
+        try: return self._dimB
+        except AttributeError: pass
+        self._dimB = decodedimB(self.bits)
+        return self._dimB
+
+    @property
+    def dimC(self):
+        try: return self._dimC
+        except AttributeError: pass
+        self._dimC = decodedimC(self.bits)
+        return self._dimC
+
+    @property
+    def dimD(self):
+        try: return self._dimD
+        except AttributeError: pass
+        self._dimD = decodedimD(self.bits)
+        return self._dimD
+
+    @property
+    def FixType(self):
+        try: return self._FixType
+        except AttributeError: pass
+        self._FixType = decodeFixType(self.bits)
+        return self._FixType
+
+    @property
+    def timestamp(self):
+        try: return self._timestamp
+        except AttributeError: pass
+        self._timestamp = decodetimestamp(self.bits)
+        return self._timestamp
+
+    @property
+    def OffPosition(self):
+        try: return self._OffPosition
+        except AttributeError: pass
+        self._OffPosition = decodeOffPosition(self.bits)
+        return self._OffPosition
+
+    @property
+    def status(self):
+        try: return self._status
+        except AttributeError: pass
+        self._status = decodestatus(self.bits)
+        return self._status
+
+    @property
+    def RAIM(self):
+        try: return self._RAIM
+        except AttributeError: pass
+        self._RAIM = decodeRAIM(self.bits)
+        return self._RAIM
+
+    @property
+    def virtual_aton_flag(self):
+        try: return self._virtual_aton_flag
+        except AttributeError: pass
+        self._virtual_aton_flag = decodevirtual_aton_flag(self.bits)
+        return self._virtual_aton_flag
+
+    @property
+    def assigned_mode_flag(self):
+        try: return self._assigned_mode_flag
+        except AttributeError: pass
+        self._assigned_mode_flag = decodeassigned_mode_flag(self.bits)
+        return self._assigned_mode_flag
+
+    @property
+    def spare(self):
+        try: return self._spare
+        except AttributeError: pass
+        self._spare = decodespare(self.bits)
+        return self._spare
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>AidsToNavReport</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -962,6 +1168,81 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('AidsToNavReport', fieldListPostgres+tuple(extraFields),
+                        geometry=('Position',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('AidsToNavReport', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('type'),
+                        get('name'),
+                        get('PositionAccuracy'),
+                        sqlhelp.geometryWkt('POINT',get('longitude'),get('latitude')),
+                        get('dimA'),
+                        get('dimB'),
+                        get('dimC'),
+                        get('dimD'),
+                        get('FixType'),
+                        get('timestamp'),
+                        get('OffPosition'),
+                        get('status'),
+                        get('RAIM'),
+                        get('virtual_aton_flag'),
+                        get('assigned_mode_flag'),
+                        get('spare'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('type'),
+                        get('name'),
+                        get('PositionAccuracy'),
+                        sqlhelp.toFloat(get('longitude')),
+                        sqlhelp.toFloat(get('latitude')),
+                        get('dimA'),
+                        get('dimB'),
+                        get('dimC'),
+                        get('dimD'),
+                        get('FixType'),
+                        get('timestamp'),
+                        get('OffPosition'),
+                        get('status'),
+                        get('RAIM'),
+                        get('virtual_aton_flag'),
+                        get('assigned_mode_flag'),
+                        get('spare'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1112,6 +1393,24 @@ class TestAidsToNavReport(unittest.TestCase):
         self.failUnlessEqual(r['assigned_mode_flag'],params['assigned_mode_flag'])
         self.failUnlessEqual(r['spare'],params['spare'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('longitude', 'latitude'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "AidsToNavReport" AIS message')
@@ -22,6 +22,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -113,48 +114,48 @@ def encode(params, validate=False):
       - Spare2(uint): Not used.  Should be set to zero. (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=22),6))
+    v = 0
+    v = (v<<6)|0x16
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ChanA']),12))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ChanB']),12))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TxRxMode']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['power']),1))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<12)|(params['ChanA']&0xfff)
+    v = (v<<12)|(params['ChanB']&0xfff)
+    v = (v<<4)|(params['TxRxMode']&0xf)
+    v = (v<<1)|(params['power']&0x1)
     if 'corner1_lon' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner1_lon'])*Decimal('600')),18))
+        v = (v<<18)|(int(Decimal(params['corner1_lon'])*Decimal('600'))&0x3ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,18))
+        v = (v<<18)|0x1a838
     if 'corner1_lat' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner1_lat'])*Decimal('600')),17))
+        v = (v<<17)|(int(Decimal(params['corner1_lat'])*Decimal('600'))&0x1ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,17))
+        v = (v<<17)|0x1a838
     if 'corner2_lon' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner2_lon'])*Decimal('600')),18))
+        v = (v<<18)|(int(Decimal(params['corner2_lon'])*Decimal('600'))&0x3ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,18))
+        v = (v<<18)|0x1a838
     if 'corner2_lat' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner2_lat'])*Decimal('600')),17))
+        v = (v<<17)|(int(Decimal(params['corner2_lat'])*Decimal('600'))&0x1ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,17))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['IndicatorType']),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ChanABandwidth']),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ChanBBandwidth']),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TransZoneSize']),3))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),23))
+        v = (v<<17)|0x1a838
+    v = (v<<1)|(params['IndicatorType']&0x1)
+    v = (v<<1)|(params['ChanABandwidth']&0x1)
+    v = (v<<1)|(params['ChanBBandwidth']&0x1)
+    v = (v<<3)|(params['TransZoneSize']&0x7)
+    v = (v<<23)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,168)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a ChanMngmt message.
 
     Fields in params:
@@ -175,88 +176,284 @@ def decode(bv, validate=False):
       - ChanBBandwidth(uint): FIX: put in a description
       - TransZoneSize(uint): FIX: put in a description
       - Spare2(uint): Not used.  Should be set to zero. (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['ChanA']=decodeChanA(bits,numeric=numeric)
+        r['ChanB']=decodeChanB(bits,numeric=numeric)
+        r['TxRxMode']=decodeTxRxMode(bits,numeric=numeric)
+        r['power']=decodepower(bits,numeric=numeric)
+        r['corner1_lon']=decodecorner1_lon(bits,numeric=numeric)
+        r['corner1_lat']=decodecorner1_lat(bits,numeric=numeric)
+        r['corner2_lon']=decodecorner2_lon(bits,numeric=numeric)
+        r['corner2_lat']=decodecorner2_lat(bits,numeric=numeric)
+        r['IndicatorType']=decodeIndicatorType(bits,numeric=numeric)
+        r['ChanABandwidth']=decodeChanABandwidth(bits,numeric=numeric)
+        r['ChanBBandwidth']=decodeChanBBandwidth(bits,numeric=numeric)
+        r['TransZoneSize']=decodeTransZoneSize(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=22
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
     r['Spare']=0
-    r['ChanA']=int(bv[40:52])
-    r['ChanB']=int(bv[52:64])
-    r['TxRxMode']=int(bv[64:68])
-    r['power']=int(bv[68:69])
-    r['corner1_lon']=Decimal(binary.signedIntFromBV(bv[69:87]))/Decimal('600')
-    r['corner1_lat']=Decimal(binary.signedIntFromBV(bv[87:104]))/Decimal('600')
-    r['corner2_lon']=Decimal(binary.signedIntFromBV(bv[104:122]))/Decimal('600')
-    r['corner2_lat']=Decimal(binary.signedIntFromBV(bv[122:139]))/Decimal('600')
-    r['IndicatorType']=int(bv[139:140])
-    r['ChanABandwidth']=int(bv[140:141])
-    r['ChanBBandwidth']=int(bv[141:142])
-    r['TransZoneSize']=int(bv[142:145])
+    r['ChanA']=int((v>>116)&0xfff)
+    r['ChanB']=int((v>>104)&0xfff)
+    r['TxRxMode']=int((v>>100)&0xf)
+    r['power']=int((v>>99)&0x1)
+    r['IndicatorType']=int((v>>28)&0x1)
+    r['ChanABandwidth']=int((v>>27)&0x1)
+    r['ChanBBandwidth']=int((v>>26)&0x1)
+    r['TransZoneSize']=int((v>>23)&0x7)
     r['Spare2']=0
+    if 'decimal' == numeric:
+        r['corner1_lon']=Decimal((((v>>81)&0x3ffff)^0x20000)-0x20000)/Decimal('600')
+        r['corner1_lat']=Decimal((((v>>64)&0x1ffff)^0x10000)-0x10000)/Decimal('600')
+        r['corner2_lon']=Decimal((((v>>46)&0x3ffff)^0x20000)-0x20000)/Decimal('600')
+        r['corner2_lat']=Decimal((((v>>29)&0x1ffff)^0x10000)-0x10000)/Decimal('600')
+    elif 'float' == numeric:
+        r['corner1_lon']=((((v>>81)&0x3ffff)^0x20000)-0x20000)/600.0
+        r['corner1_lat']=((((v>>64)&0x1ffff)^0x10000)-0x10000)/600.0
+        r['corner2_lon']=((((v>>46)&0x3ffff)^0x20000)-0x20000)/600.0
+        r['corner2_lat']=((((v>>29)&0x1ffff)^0x10000)-0x10000)/600.0
+    elif 'raw' == numeric:
+        r['corner1_lon']=int((((v>>81)&0x3ffff)^0x20000)-0x20000)
+        r['corner1_lat']=int((((v>>64)&0x1ffff)^0x10000)-0x10000)
+        r['corner2_lon']=int((((v>>46)&0x3ffff)^0x20000)-0x20000)
+        r['corner2_lat']=int((((v>>29)&0x1ffff)^0x10000)-0x10000)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 22
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeChanA(bv, validate=False):
-    return int(bv[40:52])
+def decodeChanA(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(40,12)
 
-def decodeChanB(bv, validate=False):
-    return int(bv[52:64])
+def decodeChanB(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(52,12)
 
-def decodeTxRxMode(bv, validate=False):
-    return int(bv[64:68])
+def decodeTxRxMode(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(64,4)
 
-def decodepower(bv, validate=False):
-    return int(bv[68:69])
+def decodepower(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(68,1)
 
-def decodecorner1_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[69:87]))/Decimal('600')
+def decodecorner1_lon(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(69,18)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodecorner1_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[87:104]))/Decimal('600')
+def decodecorner1_lat(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(87,17)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodecorner2_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[104:122]))/Decimal('600')
+def decodecorner2_lon(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(104,18)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodecorner2_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[122:139]))/Decimal('600')
+def decodecorner2_lat(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(122,17)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeIndicatorType(bv, validate=False):
-    return int(bv[139:140])
+def decodeIndicatorType(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(139,1)
 
-def decodeChanABandwidth(bv, validate=False):
-    return int(bv[140:141])
+def decodeChanABandwidth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(140,1)
 
-def decodeChanBBandwidth(bv, validate=False):
-    return int(bv[141:142])
+def decodeChanBBandwidth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(141,1)
 
-def decodeTransZoneSize(bv, validate=False):
-    return int(bv[142:145])
+def decodeTransZoneSize(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(142,3)
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a ChanMngmt message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_ChanA','_ChanB','_TxRxMode','_power','_corner1_lon','_corner1_lat','_corner2_lon','_corner2_lat','_IndicatorType','_ChanABandwidth','_ChanBBandwidth','_TransZoneSize','_Spare2')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def ChanA(self):
+        try: return self._ChanA
+        except AttributeError: pass
+        self._ChanA = decodeChanA(self.bits)
+        return self._ChanA
+
+    @property
+    def ChanB(self):
+        try: return self._ChanB
+        except AttributeError: pass
+        self._ChanB = decodeChanB(self.bits)
+        return self._ChanB
+
+    @property
+    def TxRxMode(self):
+        try: return self._TxRxMode
+        except AttributeError: pass
+        self._TxRxMode = decodeTxRxMode(self.bits)
+        return self._TxRxMode
+
+    @property
+    def power(self):
+        try: return self._power
+        except AttributeError: pass
+        self._power = decodepower(self.bits)
+        return self._power
+
+    @property
+    def corner1_lon(self):
+        try: return self._corner1_lon
+        except AttributeError: pass
+        self._corner1_lon = decodecorner1_lon(self.bits, numeric=self.numeric)
+        return self._corner1_lon
+
+    @property
+    def corner1_lat(self):
+        try: return self._corner1_lat
+        except AttributeError: pass
+        self._corner1_lat = decodecorner1_lat(self.bits, numeric=self.numeric)
+        return self._corner1_lat
+
+    @property
+    def corner2_lon(self):
+        try: return self._corner2_lon
+        except AttributeError: pass
+        self._corner2_lon = decodecorner2_lon(self.bits, numeric=self.numeric)
+        return self._corner2_lon
+
+    @property
+    def corner2_lat(self):
+        try: return self._corner2_lat
+        except AttributeError: pass
+        self._corner2_lat = decodecorner2_lat(self.bits, numeric=self.numeric)
+        return self._corner2_lat
+
+    @property
+    def IndicatorType(self):
+        try: return self._IndicatorType
+        except AttributeError: pass
+        self._IndicatorType = decodeIndicatorType(self.bits)
+        return self._IndicatorType
+
+    @property
+    def ChanABandwidth(self):
+        try: return self._ChanABandwidth
+        except AttributeError: pass
+        self._ChanABandwidth = decodeChanABandwidth(self.bits)
+        return self._ChanABandwidth
+
+    @property
+    def ChanBBandwidth(self):
+        try: return self._ChanBBandwidth
+        except AttributeError: pass
+        self._ChanBBandwidth = decodeChanBBandwidth(self.bits)
+        return self._ChanBBandwidth
+
+    @property
+    def TransZoneSize(self):
+        try: return self._TransZoneSize
+        except AttributeError: pass
+        self._TransZoneSize = decodeTransZoneSize(self.bits)
+        return self._TransZoneSize
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>ChanMngmt</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -731,6 +928,74 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('ChanMngmt', fieldListPostgres+tuple(extraFields),
+                        geometry=('corner1', 'corner2'), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('ChanMngmt', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('ChanA'),
+                        get('ChanB'),
+                        get('TxRxMode'),
+                        get('power'),
+                        sqlhelp.geometryWkt('POINT',get('corner1_lon'),get('corner1_lat')),
+                        sqlhelp.geometryWkt('POINT',get('corner2_lon'),get('corner2_lat')),
+                        get('IndicatorType'),
+                        get('ChanABandwidth'),
+                        get('ChanBBandwidth'),
+                        get('TransZoneSize'),
+                        get('Spare2'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('ChanA'),
+                        get('ChanB'),
+                        get('TxRxMode'),
+                        get('power'),
+                        sqlhelp.toFloat(get('corner1_lon')),
+                        sqlhelp.toFloat(get('corner1_lat')),
+                        sqlhelp.toFloat(get('corner2_lon')),
+                        sqlhelp.toFloat(get('corner2_lat')),
+                        get('IndicatorType'),
+                        get('ChanABandwidth'),
+                        get('ChanBBandwidth'),
+                        get('TransZoneSize'),
+                        get('Spare2'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -869,6 +1134,24 @@ class TestChanMngmt(unittest.TestCase):
         self.failUnlessEqual(r['TransZoneSize'],params['TransZoneSize'])
         self.failUnlessEqual(r['Spare2'],params['Spare2'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('corner1_lon', 'corner1_lat', 'corner2_lon', 'corner2_lat'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "ChanMngmt" AIS message')
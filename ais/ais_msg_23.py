@@ -22,6 +22,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -107,49 +108,49 @@ def encode(params, validate=False):
       - Spare3(uint): Not used.  Should be set to zero. (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=23),6))
+    v = 0
+    v = (v<<6)|0x17
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
     if 'corner1_lon' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner1_lon'])*Decimal('600')),18))
+        v = (v<<18)|(int(Decimal(params['corner1_lon'])*Decimal('600'))&0x3ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,18))
+        v = (v<<18)|0x1a838
     if 'corner1_lat' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner1_lat'])*Decimal('600')),17))
+        v = (v<<17)|(int(Decimal(params['corner1_lat'])*Decimal('600'))&0x1ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,17))
+        v = (v<<17)|0x1a838
     if 'corner2_lon' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner2_lon'])*Decimal('600')),18))
+        v = (v<<18)|(int(Decimal(params['corner2_lon'])*Decimal('600'))&0x3ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,18))
+        v = (v<<18)|0x1a838
     if 'corner2_lat' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['corner2_lat'])*Decimal('600')),17))
+        v = (v<<17)|(int(Decimal(params['corner2_lat'])*Decimal('600'))&0x1ffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600,17))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['StationType']),4))
+        v = (v<<17)|0x1a838
+    v = (v<<4)|(params['StationType']&0xf)
     if 'shipandcargo' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['shipandcargo']),8))
+        v = (v<<8)|(params['shipandcargo']&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),22))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TxRxMode']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ReportingInterval']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['QuietTime']),22))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<8)|0x0
+    v = (v<<22)|0x0
+    v = (v<<4)|(params['TxRxMode']&0xf)
+    v = (v<<4)|(params['ReportingInterval']&0xf)
+    v = (v<<22)|(params['QuietTime']&0x3fffff)
+    v = (v<<6)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,180)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a ChanMngmt message.
 
     Fields in params:
@@ -168,78 +169,258 @@ def decode(bv, validate=False):
       - ReportingInterval(uint): Command the stations to report as given in table 17
       - QuietTime(uint): How long to be quiet
       - Spare3(uint): Not used.  Should be set to zero. (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 180:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['corner1_lon']=decodecorner1_lon(bits,numeric=numeric)
+        r['corner1_lat']=decodecorner1_lat(bits,numeric=numeric)
+        r['corner2_lon']=decodecorner2_lon(bits,numeric=numeric)
+        r['corner2_lat']=decodecorner2_lat(bits,numeric=numeric)
+        r['StationType']=decodeStationType(bits,numeric=numeric)
+        r['shipandcargo']=decodeshipandcargo(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        r['TxRxMode']=decodeTxRxMode(bits,numeric=numeric)
+        r['ReportingInterval']=decodeReportingInterval(bits,numeric=numeric)
+        r['QuietTime']=decodeQuietTime(bits,numeric=numeric)
+        r['Spare3']=decodeSpare3(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 180: v >>= n-180
     r = {}
     r['MessageID']=23
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>172)&0x3)
+    r['UserID']=int((v>>142)&0x3fffffff)
     r['Spare']=0
-    r['corner1_lon']=Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
-    r['corner1_lat']=Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
-    r['corner2_lon']=Decimal(binary.signedIntFromBV(bv[75:93]))/Decimal('600')
-    r['corner2_lat']=Decimal(binary.signedIntFromBV(bv[93:110]))/Decimal('600')
-    r['StationType']=int(bv[110:114])
-    r['shipandcargo']=int(bv[114:122])
+    r['StationType']=int((v>>66)&0xf)
+    r['shipandcargo']=int((v>>58)&0xff)
     r['Spare2']=0
-    r['TxRxMode']=int(bv[144:148])
-    r['ReportingInterval']=int(bv[148:152])
-    r['QuietTime']=int(bv[152:174])
+    r['TxRxMode']=int((v>>32)&0xf)
+    r['ReportingInterval']=int((v>>28)&0xf)
+    r['QuietTime']=int((v>>6)&0x3fffff)
     r['Spare3']=0
+    if 'decimal' == numeric:
+        r['corner1_lon']=Decimal((((v>>122)&0x3ffff)^0x20000)-0x20000)/Decimal('600')
+        r['corner1_lat']=Decimal((((v>>105)&0x1ffff)^0x10000)-0x10000)/Decimal('600')
+        r['corner2_lon']=Decimal((((v>>87)&0x3ffff)^0x20000)-0x20000)/Decimal('600')
+        r['corner2_lat']=Decimal((((v>>70)&0x1ffff)^0x10000)-0x10000)/Decimal('600')
+    elif 'float' == numeric:
+        r['corner1_lon']=((((v>>122)&0x3ffff)^0x20000)-0x20000)/600.0
+        r['corner1_lat']=((((v>>105)&0x1ffff)^0x10000)-0x10000)/600.0
+        r['corner2_lon']=((((v>>87)&0x3ffff)^0x20000)-0x20000)/600.0
+        r['corner2_lat']=((((v>>70)&0x1ffff)^0x10000)-0x10000)/600.0
+    elif 'raw' == numeric:
+        r['corner1_lon']=int((((v>>122)&0x3ffff)^0x20000)-0x20000)
+        r['corner1_lat']=int((((v>>105)&0x1ffff)^0x10000)-0x10000)
+        r['corner2_lon']=int((((v>>87)&0x3ffff)^0x20000)-0x20000)
+        r['corner2_lat']=int((((v>>70)&0x1ffff)^0x10000)-0x10000)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 23
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodecorner1_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[40:58]))/Decimal('600')
-
-def decodecorner1_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[58:75]))/Decimal('600')
-
-def decodecorner2_lon(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[75:93]))/Decimal('600')
+def decodecorner1_lon(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(40,18)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodecorner1_lat(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(58,17)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodecorner2_lon(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(75,18)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodecorner2_lat(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(93,17)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600')
+    if 'float' == numeric: return val/600.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeStationType(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(110,4)
+
+def decodeshipandcargo(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(114,8)
+
+def decodeSpare2(bv, validate=False, numeric='decimal'):
+    return 0
 
-def decodecorner2_lat(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[93:110]))/Decimal('600')
+def decodeTxRxMode(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(144,4)
 
-def decodeStationType(bv, validate=False):
-    return int(bv[110:114])
+def decodeReportingInterval(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(148,4)
 
-def decodeshipandcargo(bv, validate=False):
-    return int(bv[114:122])
+def decodeQuietTime(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(152,22)
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare3(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeTxRxMode(bv, validate=False):
-    return int(bv[144:148])
 
-def decodeReportingInterval(bv, validate=False):
-    return int(bv[148:152])
+class View(object):
+    '''Lazy view of a ChanMngmt message.
 
-def decodeQuietTime(bv, validate=False):
-    return int(bv[152:174])
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
 
-def decodeSpare3(bv, validate=False):
-    return 0
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_corner1_lon','_corner1_lat','_corner2_lon','_corner2_lat','_StationType','_shipandcargo','_Spare2','_TxRxMode','_ReportingInterval','_QuietTime','_Spare3')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def corner1_lon(self):
+        try: return self._corner1_lon
+        except AttributeError: pass
+        self._corner1_lon = decodecorner1_lon(self.bits, numeric=self.numeric)
+        return self._corner1_lon
+
+    @property
+    def corner1_lat(self):
+        try: return self._corner1_lat
+        except AttributeError: pass
+        self._corner1_lat = decodecorner1_lat(self.bits, numeric=self.numeric)
+        return self._corner1_lat
+
+    @property
+    def corner2_lon(self):
+        try: return self._corner2_lon
+        except AttributeError: pass
+        self._corner2_lon = decodecorner2_lon(self.bits, numeric=self.numeric)
+        return self._corner2_lon
+
+    @property
+    def corner2_lat(self):
+        try: return self._corner2_lat
+        except AttributeError: pass
+        self._corner2_lat = decodecorner2_lat(self.bits, numeric=self.numeric)
+        return self._corner2_lat
+
+    @property
+    def StationType(self):
+        try: return self._StationType
+        except AttributeError: pass
+        self._StationType = decodeStationType(self.bits)
+        return self._StationType
+
+    @property
+    def shipandcargo(self):
+        try: return self._shipandcargo
+        except AttributeError: pass
+        self._shipandcargo = decodeshipandcargo(self.bits)
+        return self._shipandcargo
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
+
+    @property
+    def TxRxMode(self):
+        try: return self._TxRxMode
+        except AttributeError: pass
+        self._TxRxMode = decodeTxRxMode(self.bits)
+        return self._TxRxMode
+
+    @property
+    def ReportingInterval(self):
+        try: return self._ReportingInterval
+        except AttributeError: pass
+        self._ReportingInterval = decodeReportingInterval(self.bits)
+        return self._ReportingInterval
+
+    @property
+    def QuietTime(self):
+        try: return self._QuietTime
+        except AttributeError: pass
+        self._QuietTime = decodeQuietTime(self.bits)
+        return self._QuietTime
+
+    @property
+    def Spare3(self):
+        try: return self._Spare3
+        except AttributeError: pass
+        self._Spare3 = decodeSpare3(self.bits)
+        return self._Spare3
 
 
 def printHtml(params, out=sys.stdout):
@@ -870,6 +1051,70 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('ChanMngmt', fieldListPostgres+tuple(extraFields),
+                        geometry=('corner1', 'corner2'), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('ChanMngmt', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        sqlhelp.geometryWkt('POINT',get('corner1_lon'),get('corner1_lat')),
+                        sqlhelp.geometryWkt('POINT',get('corner2_lon'),get('corner2_lat')),
+                        get('StationType'),
+                        get('shipandcargo'),
+                        get('Spare2'),
+                        get('TxRxMode'),
+                        get('ReportingInterval'),
+                        get('QuietTime'),
+                        get('Spare3'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        sqlhelp.toFloat(get('corner1_lon')),
+                        sqlhelp.toFloat(get('corner1_lat')),
+                        sqlhelp.toFloat(get('corner2_lon')),
+                        sqlhelp.toFloat(get('corner2_lat')),
+                        get('StationType'),
+                        get('shipandcargo'),
+                        get('Spare2'),
+                        get('TxRxMode'),
+                        get('ReportingInterval'),
+                        get('QuietTime'),
+                        get('Spare3'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1000,6 +1245,24 @@ class TestChanMngmt(unittest.TestCase):
         self.failUnlessEqual(r['QuietTime'],params['QuietTime'])
         self.failUnlessEqual(r['Spare3'],params['Spare3'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('corner1_lon', 'corner1_lat', 'corner2_lon', 'corner2_lat'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "ChanMngmt" AIS message')
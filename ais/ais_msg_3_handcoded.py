@@ -11,6 +11,7 @@ from BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 import commstate
 from aisutils import sqlhelp
 
@@ -39,23 +40,37 @@ def decode_aivdm(msg):
     bv = binary.ais6tobitvec(msg.split(',')[5])
     print decode(bv)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
+    bv = bitreader.asBitReader(bv)
     r = {}
-    r['MessageID']=int(bv[:6])
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['NavigationStatus']=int(bv[38:42])
-    r['ROT']=binary.signedIntFromBV(bv[42:50])
-    r['SOG']=Decimal(int(bv[50:60]))/Decimal('10')
-    r['PositionAccuracy']=int(bv[60:61])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
-    r['COG']=Decimal(int(bv[116:128]))/Decimal('10')
-    r['TrueHeading']=int(bv[128:137])
-    r['TimeStamp']=int(bv[137:143])
+    r['MessageID']=bv.uint(0,6)
+    r['RepeatIndicator']=bv.uint(6,2)
+    r['UserID']=bv.uint(8,30)
+    r['NavigationStatus']=bv.uint(38,4)
+    r['ROT']=bv.sint(42,8)
+    r['PositionAccuracy']=bv.uint(60,1)
+    r['TrueHeading']=bv.uint(128,9)
+    r['TimeStamp']=bv.uint(137,6)
     r['RegionalReserved']=0
     r['Spare']=0
-    r['RAIM']=bool(int(bv[148:149]))
+    r['RAIM']=bool(bv.uint(148,1))
+    if 'decimal' == numeric:
+        r['SOG']=Decimal(bv.uint(50,10))/Decimal('10')
+        r['longitude']=Decimal(bv.sint(61,28))/Decimal('600000')
+        r['latitude']=Decimal(bv.sint(89,27))/Decimal('600000')
+        r['COG']=Decimal(bv.uint(116,12))/Decimal('10')
+    elif 'float' == numeric:
+        r['SOG']=bv.uint(50,10)/10.
+        r['longitude']=bv.sint(61,28)/600000.
+        r['latitude']=bv.sint(89,27)/600000.
+        r['COG']=bv.uint(116,12)/10.
+    elif 'raw' == numeric:
+        r['SOG']=bv.uint(50,10)
+        r['longitude']=bv.sint(61,28)
+        r['latitude']=bv.sint(89,27)
+        r['COG']=bv.uint(116,12)
+    else:
+        raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     r.update(commstate.itdma_parse_bits(bv[-19:]))
     return r
 
@@ -119,6 +134,51 @@ def sqlCreate(fields=None, extraFields=None, addCoastGuardFields=True,
 
     return c
 
+fieldListPostgres = tuple([field for field in fieldList
+                           if field not in ('longitude', 'latitude')]) + ('Position',)
+'Columns of the position table in postgres with the position as PostGIS'
+
+
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+    """Prepared INSERT for the rows from sqlRow.
+
+    @param extraFields: names of the columns after the message fields such as cg_sec.
+    Their values are passed to sqlRow as extraValues in the same order.
+    @param dbType: 'sqlite' or 'postgres'
+    @param placeholder: parameter marker of the database module (? for sqlite)
+    @rtype: sqlhelp.preparedInsert
+    """
+    if dbType == 'postgres':
+        return sqlhelp.preparedInsert('position', fieldListPostgres + tuple(extraFields),
+                                      geometry=('Position',), dbType=dbType,
+                                      placeholder=placeholder)
+    return sqlhelp.preparedInsert('position', fieldList + tuple(extraFields),
+                                  dbType=dbType, placeholder=placeholder)
+
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+    """Values of a message in the column order of sqlRowInsert.
+
+    @param params: dict keyed by field name of values.  Missing fields are None (NULL).
+    @param extraValues: values for the extraFields given to sqlRowInsert
+    @rtype: tuple
+    """
+    get = params.get
+    row = (get('MessageID'), get('RepeatIndicator'), get('UserID'),
+           get('NavigationStatus'), get('ROT'), sqlhelp.toFloat(get('SOG')),
+           get('PositionAccuracy'))
+    if dbType != 'postgres':
+        row += (sqlhelp.toFloat(get('longitude')), sqlhelp.toFloat(get('latitude')))
+    row += (sqlhelp.toFloat(get('COG')), get('TrueHeading'), get('TimeStamp'),
+            get('RegionalReserved'), get('Spare'), get('RAIM'))
+    row += tuple([get(field) for field in commstate.itdma_fields])
+    if dbType == 'postgres':
+        row += (sqlhelp.geometryWkt('POINT', get('longitude'), get('latitude')),)
+    if extraValues:
+        return row + tuple(extraValues)
+    return row
+
+
 def printFields(params, out=sys.stdout, format='std', fieldList=None, dbType='postgres'):
 
 	if 'std'==format:
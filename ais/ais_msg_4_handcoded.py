@@ -16,6 +16,7 @@ from BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 import commstate
 from aisutils import sqlhelp
 
@@ -44,7 +45,7 @@ def decode_aivdm(msg):
     bv = binary.ais6tobitvec(msg.split(',')[5])
     print decode(bv)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     """Unpack a bsreport message.
 
     Fields in params:
@@ -69,26 +70,37 @@ def decode(bv, validate=False):
     @type bv: BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale.
     @rtype: dict
     @return: params
     """
 
+    bv = bitreader.asBitReader(bv)
     r = {}
     r['MessageID'] = 4
-    r['RepeatIndicator'] = int(bv[6:8])
-    r['UserID'] = int(bv[8:38])
-    r['Time_year'] = int(bv[38:52])
-    r['Time_month'] = int(bv[52:56])
-    r['Time_day'] = int(bv[56:61])
-    r['Time_hour'] = int(bv[61:66])
-    r['Time_min'] = int(bv[66:72])
-    r['Time_sec'] = int(bv[72:78])
-    r['PositionAccuracy'] = int(bv[78:79])
-    r['Position_longitude'] = Decimal(binary.signedIntFromBV(bv[79:107]))/Decimal('600000')
-    r['Position_latitude'] = Decimal(binary.signedIntFromBV(bv[107:134]))/Decimal('600000')
-    r['fixtype'] = int(bv[134:138])
+    r['RepeatIndicator'] = bv.uint(6,2)
+    r['UserID'] = bv.uint(8,30)
+    r['Time_year'] = bv.uint(38,14)
+    r['Time_month'] = bv.uint(52,4)
+    r['Time_day'] = bv.uint(56,5)
+    r['Time_hour'] = bv.uint(61,5)
+    r['Time_min'] = bv.uint(66,6)
+    r['Time_sec'] = bv.uint(72,6)
+    r['PositionAccuracy'] = bv.uint(78,1)
+    r['fixtype'] = bv.uint(134,4)
     r['Spare'] = 0
-    r['RAIM'] = bool(int(bv[148:149]))
+    r['RAIM'] = bool(bv.uint(148,1))
+    if 'decimal' == numeric:
+        r['Position_longitude'] = Decimal(bv.sint(79,28))/Decimal('600000')
+        r['Position_latitude'] = Decimal(bv.sint(107,27))/Decimal('600000')
+    elif 'float' == numeric:
+        r['Position_longitude'] = bv.sint(79,28)/600000.
+        r['Position_latitude'] = bv.sint(107,27)/600000.
+    elif 'raw' == numeric:
+        r['Position_longitude'] = bv.sint(79,28)
+        r['Position_latitude'] = bv.sint(107,27)
+    else:
+        raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     r.update(commstate.sotdma_parse_bits(bv[-19:]))
     return r
 
@@ -140,6 +152,52 @@ def sqlCreate(fields=None, extraFields=None, addCoastGuardFields=True, dbType='p
 
     return c
 
+fieldListPostgres = tuple([field for field in fieldList
+                           if field not in ('Position_longitude', 'Position_latitude')]) + ('Position',)
+'Columns of the bsreport table in postgres with the position as PostGIS'
+
+
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+    """Prepared INSERT for the rows from sqlRow.
+
+    @param extraFields: names of the columns after the message fields such as cg_sec.
+    Their values are passed to sqlRow as extraValues in the same order.
+    @param dbType: 'sqlite' or 'postgres'
+    @param placeholder: parameter marker of the database module (? for sqlite)
+    @rtype: sqlhelp.preparedInsert
+    """
+    if dbType == 'postgres':
+        return sqlhelp.preparedInsert('bsreport', fieldListPostgres + tuple(extraFields),
+                                      geometry=('Position',), dbType=dbType,
+                                      placeholder=placeholder)
+    return sqlhelp.preparedInsert('bsreport', fieldList + tuple(extraFields),
+                                  dbType=dbType, placeholder=placeholder)
+
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+    """Values of a message in the column order of sqlRowInsert.
+
+    @param params: dict keyed by field name of values.  Missing fields are None (NULL).
+    @param extraValues: values for the extraFields given to sqlRowInsert
+    @rtype: tuple
+    """
+    get = params.get
+    row = (get('MessageID'), get('RepeatIndicator'), get('UserID'),
+           get('Time_year'), get('Time_month'), get('Time_day'),
+           get('Time_hour'), get('Time_min'), get('Time_sec'),
+           get('PositionAccuracy'))
+    if dbType != 'postgres':
+        row += (sqlhelp.toFloat(get('Position_longitude')),
+                sqlhelp.toFloat(get('Position_latitude')))
+    row += (get('fixtype'), get('Spare'), get('RAIM'))
+    row += tuple([get(field) for field in commstate.sotdma_fields])
+    if dbType == 'postgres':
+        row += (sqlhelp.geometryWkt('POINT', get('Position_longitude'), get('Position_latitude')),)
+    if extraValues:
+        return row + tuple(extraValues)
+    return row
+
+
 def printFields(params, out=sys.stdout, format='std', fieldList=None, dbType='postgres'):
     """Print a bsreport message to stdout.
 
@@ -22,6 +22,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -119,88 +120,88 @@ def encode(params, validate=False):
       - Spare(uint): Reserved for definition by a regional authority. (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=5),6))
+    v = 0
+    v = (v<<6)|0x5
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
     if 'AISversion' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['AISversion']),2))
+        v = (v<<2)|(params['AISversion']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
+        v = (v<<2)|0x0
     if 'IMOnumber' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['IMOnumber']),30))
+        v = (v<<30)|(params['IMOnumber']&0x3fffffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),30))
+        v = (v<<30)|0x0
     if 'callsign' in params:
-        bvList.append(aisstring.encode(params['callsign'],42))
+        v = (v<<42)|(int(aisstring.encode(params['callsign'],42)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@',42))
+        v = (v<<42)|int(aisstring.encode('@@@@@@@',42))
     if 'name' in params:
-        bvList.append(aisstring.encode(params['name'],120))
+        v = (v<<120)|(int(aisstring.encode(params['name'],120)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
+        v = (v<<120)|int(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
     if 'shipandcargo' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['shipandcargo']),8))
+        v = (v<<8)|(params['shipandcargo']&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
+        v = (v<<8)|0x0
     if 'dimA' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimA']),9))
+        v = (v<<9)|(params['dimA']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),9))
+        v = (v<<9)|0x0
     if 'dimB' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimB']),9))
+        v = (v<<9)|(params['dimB']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),9))
+        v = (v<<9)|0x0
     if 'dimC' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimC']),6))
+        v = (v<<6)|(params['dimC']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<6)|0x0
     if 'dimD' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dimD']),6))
+        v = (v<<6)|(params['dimD']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<6)|0x0
     if 'fixtype' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fixtype']),4))
+        v = (v<<4)|(params['fixtype']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'ETAmonth' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETAmonth']),4))
+        v = (v<<4)|(params['ETAmonth']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'ETAday' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETAday']),5))
+        v = (v<<5)|(params['ETAday']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),5))
+        v = (v<<5)|0x0
     if 'ETAhour' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETAhour']),5))
+        v = (v<<5)|(params['ETAhour']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'ETAminute' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETAminute']),6))
+        v = (v<<6)|(params['ETAminute']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'draught' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['draught'])*Decimal('10')))),8))
+        v = (v<<8)|(int(Decimal(params['draught'])*Decimal('10'))&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(0)),8))
+        v = (v<<8)|0x0
     if 'destination' in params:
-        bvList.append(aisstring.encode(params['destination'],120))
+        v = (v<<120)|(int(aisstring.encode(params['destination'],120)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dte']),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),1))
+        v = (v<<120)|int(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
+    v = (v<<1)|(params['dte']&0x1)
+    v = (v<<1)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,424)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a shipdata message.
 
     Fields in params:
@@ -225,104 +226,317 @@ def decode(bv, validate=False):
       - destination(aisstr6): Where is the vessel going
       - dte(uint): Data terminal ready
       - Spare(uint): Reserved for definition by a regional authority. (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 424:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['AISversion']=decodeAISversion(bits,numeric=numeric)
+        r['IMOnumber']=decodeIMOnumber(bits,numeric=numeric)
+        r['callsign']=decodecallsign(bits,numeric=numeric)
+        r['name']=decodename(bits,numeric=numeric)
+        r['shipandcargo']=decodeshipandcargo(bits,numeric=numeric)
+        r['dimA']=decodedimA(bits,numeric=numeric)
+        r['dimB']=decodedimB(bits,numeric=numeric)
+        r['dimC']=decodedimC(bits,numeric=numeric)
+        r['dimD']=decodedimD(bits,numeric=numeric)
+        r['fixtype']=decodefixtype(bits,numeric=numeric)
+        r['ETAmonth']=decodeETAmonth(bits,numeric=numeric)
+        r['ETAday']=decodeETAday(bits,numeric=numeric)
+        r['ETAhour']=decodeETAhour(bits,numeric=numeric)
+        r['ETAminute']=decodeETAminute(bits,numeric=numeric)
+        r['draught']=decodedraught(bits,numeric=numeric)
+        r['destination']=decodedestination(bits,numeric=numeric)
+        r['dte']=decodedte(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 424: v >>= n-424
     r = {}
     r['MessageID']=5
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['AISversion']=int(bv[38:40])
-    r['IMOnumber']=int(bv[40:70])
-    r['callsign']=aisstring.decode(bv[70:112])
-    r['name']=aisstring.decode(bv[112:232])
-    r['shipandcargo']=int(bv[232:240])
-    r['dimA']=int(bv[240:249])
-    r['dimB']=int(bv[249:258])
-    r['dimC']=int(bv[258:264])
-    r['dimD']=int(bv[264:270])
-    r['fixtype']=int(bv[270:274])
-    r['ETAmonth']=int(bv[274:278])
-    r['ETAday']=int(bv[278:283])
-    r['ETAhour']=int(bv[283:288])
-    r['ETAminute']=int(bv[288:294])
-    r['draught']=Decimal(int(bv[294:302]))/Decimal('10')
-    r['destination']=aisstring.decode(bv[302:422])
-    r['dte']=int(bv[422:423])
+    r['RepeatIndicator']=int((v>>416)&0x3)
+    r['UserID']=int((v>>386)&0x3fffffff)
+    r['AISversion']=int((v>>384)&0x3)
+    r['IMOnumber']=int((v>>354)&0x3fffffff)
+    r['callsign']=aisstring.decode(bits[70:112])
+    r['name']=aisstring.decode(bits[112:232])
+    r['shipandcargo']=int((v>>184)&0xff)
+    r['dimA']=int((v>>175)&0x1ff)
+    r['dimB']=int((v>>166)&0x1ff)
+    r['dimC']=int((v>>160)&0x3f)
+    r['dimD']=int((v>>154)&0x3f)
+    r['fixtype']=int((v>>150)&0xf)
+    r['ETAmonth']=int((v>>146)&0xf)
+    r['ETAday']=int((v>>141)&0x1f)
+    r['ETAhour']=int((v>>136)&0x1f)
+    r['ETAminute']=int((v>>130)&0x3f)
+    r['destination']=aisstring.decode(bits[302:422])
+    r['dte']=int((v>>1)&0x1)
     r['Spare']=0
+    if 'decimal' == numeric:
+        r['draught']=Decimal((v>>122)&0xff)/Decimal('10')
+    elif 'float' == numeric:
+        r['draught']=((v>>122)&0xff)/10.0
+    elif 'raw' == numeric:
+        r['draught']=int((v>>122)&0xff)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 5
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeAISversion(bv, validate=False):
-    return int(bv[38:40])
+def decodeAISversion(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,2)
 
-def decodeIMOnumber(bv, validate=False):
-    return int(bv[40:70])
+def decodeIMOnumber(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(40,30)
 
-def decodecallsign(bv, validate=False):
-    return aisstring.decode(bv[70:112])
+def decodecallsign(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[70:112])
 
-def decodename(bv, validate=False):
-    return aisstring.decode(bv[112:232])
+def decodename(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[112:232])
 
-def decodeshipandcargo(bv, validate=False):
-    return int(bv[232:240])
+def decodeshipandcargo(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(232,8)
 
-def decodedimA(bv, validate=False):
-    return int(bv[240:249])
+def decodedimA(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(240,9)
 
-def decodedimB(bv, validate=False):
-    return int(bv[249:258])
+def decodedimB(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(249,9)
 
-def decodedimC(bv, validate=False):
-    return int(bv[258:264])
+def decodedimC(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(258,6)
 
-def decodedimD(bv, validate=False):
-    return int(bv[264:270])
+def decodedimD(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(264,6)
 
-def decodefixtype(bv, validate=False):
-    return int(bv[270:274])
+def decodefixtype(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(270,4)
 
-def decodeETAmonth(bv, validate=False):
-    return int(bv[274:278])
+def decodeETAmonth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(274,4)
 
-def decodeETAday(bv, validate=False):
-    return int(bv[278:283])
+def decodeETAday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(278,5)
 
-def decodeETAhour(bv, validate=False):
-    return int(bv[283:288])
+def decodeETAhour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(283,5)
 
-def decodeETAminute(bv, validate=False):
-    return int(bv[288:294])
+def decodeETAminute(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(288,6)
 
-def decodedraught(bv, validate=False):
-    return Decimal(int(bv[294:302]))/Decimal('10')
+def decodedraught(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(294,8)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodedestination(bv, validate=False):
-    return aisstring.decode(bv[302:422])
+def decodedestination(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[302:422])
 
-def decodedte(bv, validate=False):
-    return int(bv[422:423])
+def decodedte(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(422,1)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a shipdata message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_AISversion','_IMOnumber','_callsign','_name','_shipandcargo','_dimA','_dimB','_dimC','_dimD','_fixtype','_ETAmonth','_ETAday','_ETAhour','_ETAminute','_draught','_destination','_dte','_Spare')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def AISversion(self):
+        try: return self._AISversion
+        except AttributeError: pass
+        self._AISversion = decodeAISversion(self.bits)
+        return self._AISversion
+
+    @property
+    def IMOnumber(self):
+        try: return self._IMOnumber
+        except AttributeError: pass
+        self._IMOnumber = decodeIMOnumber(self.bits)
+        return self._IMOnumber
+
+    @property
+    def callsign(self):
+        try: return self._callsign
+        except AttributeError: pass
+        self._callsign = decodecallsign(self.bits)
+        return self._callsign
+
+    @property
+    def name(self):
+        try: return self._name
+        except AttributeError: pass
+        self._name = decodename(self.bits)
+        return self._name
+
+    @property
+    def shipandcargo(self):
+        try: return self._shipandcargo
+        except AttributeError: pass
+        self._shipandcargo = decodeshipandcargo(self.bits)
+        return self._shipandcargo
+
+    @property
+    def dimA(self):
+        try: return self._dimA
+        except AttributeError: pass
+        self._dimA = decodedimA(self.bits)
+        return self._dimA
+
+    @property
+    def dimB(self):
+        try: return self._dimB
+        except AttributeError: pass
+        self._dimB = decodedimB(self.bits)
+        return self._dimB
+
+    @property
+    def dimC(self):
+        try: return self._dimC
+        except AttributeError: pass
+        self._dimC = decodedimC(self.bits)
+        return self._dimC
+
+    @property
+    def dimD(self):
+        try: return self._dimD
+        except AttributeError: pass
+        self._dimD = decodedimD(self.bits)
+        return self._dimD
+
+    @property
+    def fixtype(self):
+        try: return self._fixtype
+        except AttributeError: pass
+        self._fixtype = decodefixtype(self.bits)
+        return self._fixtype
+
+    @property
+    def ETAmonth(self):
+        try: return self._ETAmonth
+        except AttributeError: pass
+        self._ETAmonth = decodeETAmonth(self.bits)
+        return self._ETAmonth
+
+    @property
+    def ETAday(self):
+        try: return self._ETAday
+        except AttributeError: pass
+        self._ETAday = decodeETAday(self.bits)
+        return self._ETAday
+
+    @property
+    def ETAhour(self):
+        try: return self._ETAhour
+        except AttributeError: pass
+        self._ETAhour = decodeETAhour(self.bits)
+        return self._ETAhour
+
+    @property
+    def ETAminute(self):
+        try: return self._ETAminute
+        except AttributeError: pass
+        self._ETAminute = decodeETAminute(self.bits)
+        return self._ETAminute
+
+    @property
+    def draught(self):
+        try: return self._draught
+        except AttributeError: pass
+        self._draught = decodedraught(self.bits, numeric=self.numeric)
+        return self._draught
+
+    @property
+    def destination(self):
+        try: return self._destination
+        except AttributeError: pass
+        self._destination = decodedestination(self.bits)
+        return self._destination
+
+    @property
+    def dte(self):
+        try: return self._dte
+        except AttributeError: pass
+        self._dte = decodedte(self.bits)
+        return self._dte
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>shipdata</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -977,6 +1191,84 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('shipdata', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('shipdata', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('AISversion'),
+                        get('IMOnumber'),
+                        get('callsign'),
+                        get('name'),
+                        get('shipandcargo'),
+                        get('dimA'),
+                        get('dimB'),
+                        get('dimC'),
+                        get('dimD'),
+                        get('fixtype'),
+                        get('ETAmonth'),
+                        get('ETAday'),
+                        get('ETAhour'),
+                        get('ETAminute'),
+                        sqlhelp.toFloat(get('draught')),
+                        get('destination'),
+                        get('dte'),
+                        get('Spare'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('AISversion'),
+                        get('IMOnumber'),
+                        get('callsign'),
+                        get('name'),
+                        get('shipandcargo'),
+                        get('dimA'),
+                        get('dimB'),
+                        get('dimC'),
+                        get('dimD'),
+                        get('fixtype'),
+                        get('ETAmonth'),
+                        get('ETAday'),
+                        get('ETAhour'),
+                        get('ETAminute'),
+                        sqlhelp.toFloat(get('draught')),
+                        get('destination'),
+                        get('dte'),
+                        get('Spare'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1131,6 +1423,24 @@ class Testshipdata(unittest.TestCase):
         self.failUnlessEqual(r['dte'],params['dte'])
         self.failUnlessEqual(r['Spare'],params['Spare'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('draught',):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "shipdata" AIS message')
@@ -22,6 +22,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -92,31 +93,31 @@ def encode(params, validate=False):
       - SeqID4(uint): Sequence ID of the message to be acknowledged
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=7),6))
+    v = 0
+    v = (v<<6)|0x7
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestID1']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SeqID1']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestID2']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SeqID2']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestID3']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SeqID3']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestID4']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SeqID4']),2))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<30)|(params['DestID1']&0x3fffffff)
+    v = (v<<2)|(params['SeqID1']&0x3)
+    v = (v<<30)|(params['DestID2']&0x3fffffff)
+    v = (v<<2)|(params['SeqID2']&0x3)
+    v = (v<<30)|(params['DestID3']&0x3fffffff)
+    v = (v<<2)|(params['SeqID3']&0x3)
+    v = (v<<30)|(params['DestID4']&0x3fffffff)
+    v = (v<<2)|(params['SeqID4']&0x3)
+
+    return bitreader.BitReader(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a binack message.
 
     Fields in params:
@@ -132,66 +133,194 @@ def decode(bv, validate=False):
       - SeqID3(uint): Sequence ID of the message to be acknowledged
       - DestID4(uint): MMSI destication to ACK
       - SeqID4(uint): Sequence ID of the message to be acknowledged
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['DestID1']=decodeDestID1(bits,numeric=numeric)
+        r['SeqID1']=decodeSeqID1(bits,numeric=numeric)
+        r['DestID2']=decodeDestID2(bits,numeric=numeric)
+        r['SeqID2']=decodeSeqID2(bits,numeric=numeric)
+        r['DestID3']=decodeDestID3(bits,numeric=numeric)
+        r['SeqID3']=decodeSeqID3(bits,numeric=numeric)
+        r['DestID4']=decodeDestID4(bits,numeric=numeric)
+        r['SeqID4']=decodeSeqID4(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=7
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
     r['Spare']=0
-    r['DestID1']=int(bv[40:70])
-    r['SeqID1']=int(bv[70:72])
-    r['DestID2']=int(bv[72:102])
-    r['SeqID2']=int(bv[102:104])
-    r['DestID3']=int(bv[104:134])
-    r['SeqID3']=int(bv[134:136])
-    r['DestID4']=int(bv[136:166])
-    r['SeqID4']=int(bv[166:168])
+    r['DestID1']=int((v>>98)&0x3fffffff)
+    r['SeqID1']=int((v>>96)&0x3)
+    r['DestID2']=int((v>>66)&0x3fffffff)
+    r['SeqID2']=int((v>>64)&0x3)
+    r['DestID3']=int((v>>34)&0x3fffffff)
+    r['SeqID3']=int((v>>32)&0x3)
+    r['DestID4']=int((v>>2)&0x3fffffff)
+    r['SeqID4']=int(v&0x3)
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 7
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeDestID1(bv, validate=False):
-    return int(bv[40:70])
+def decodeDestID1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(40,30)
 
-def decodeSeqID1(bv, validate=False):
-    return int(bv[70:72])
+def decodeSeqID1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(70,2)
 
-def decodeDestID2(bv, validate=False):
-    return int(bv[72:102])
+def decodeDestID2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(72,30)
 
-def decodeSeqID2(bv, validate=False):
-    return int(bv[102:104])
+def decodeSeqID2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(102,2)
 
-def decodeDestID3(bv, validate=False):
-    return int(bv[104:134])
+def decodeDestID3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(104,30)
 
-def decodeSeqID3(bv, validate=False):
-    return int(bv[134:136])
+def decodeSeqID3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(134,2)
 
-def decodeDestID4(bv, validate=False):
-    return int(bv[136:166])
+def decodeDestID4(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(136,30)
 
-def decodeSeqID4(bv, validate=False):
-    return int(bv[166:168])
+def decodeSeqID4(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(166,2)
+
+
+class View(object):
+    '''Lazy view of a binack message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_DestID1','_SeqID1','_DestID2','_SeqID2','_DestID3','_SeqID3','_DestID4','_SeqID4')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def DestID1(self):
+        try: return self._DestID1
+        except AttributeError: pass
+        self._DestID1 = decodeDestID1(self.bits)
+        return self._DestID1
+
+    @property
+    def SeqID1(self):
+        try: return self._SeqID1
+        except AttributeError: pass
+        self._SeqID1 = decodeSeqID1(self.bits)
+        return self._SeqID1
+
+    @property
+    def DestID2(self):
+        try: return self._DestID2
+        except AttributeError: pass
+        self._DestID2 = decodeDestID2(self.bits)
+        return self._DestID2
+
+    @property
+    def SeqID2(self):
+        try: return self._SeqID2
+        except AttributeError: pass
+        self._SeqID2 = decodeSeqID2(self.bits)
+        return self._SeqID2
+
+    @property
+    def DestID3(self):
+        try: return self._DestID3
+        except AttributeError: pass
+        self._DestID3 = decodeDestID3(self.bits)
+        return self._DestID3
+
+    @property
+    def SeqID3(self):
+        try: return self._SeqID3
+        except AttributeError: pass
+        self._SeqID3 = decodeSeqID3(self.bits)
+        return self._SeqID3
+
+    @property
+    def DestID4(self):
+        try: return self._DestID4
+        except AttributeError: pass
+        self._DestID4 = decodeDestID4(self.bits)
+        return self._DestID4
+
+    @property
+    def SeqID4(self):
+        try: return self._SeqID4
+        except AttributeError: pass
+        self._SeqID4 = decodeSeqID4(self.bits)
+        return self._SeqID4
 
 
 def printHtml(params, out=sys.stdout):
@@ -504,6 +633,66 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('binack', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('binack', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('DestID1'),
+                        get('SeqID1'),
+                        get('DestID2'),
+                        get('SeqID2'),
+                        get('DestID3'),
+                        get('SeqID3'),
+                        get('DestID4'),
+                        get('SeqID4'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('DestID1'),
+                        get('SeqID1'),
+                        get('DestID2'),
+                        get('SeqID2'),
+                        get('DestID3'),
+                        get('SeqID3'),
+                        get('DestID4'),
+                        get('SeqID4'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -622,6 +811,14 @@ class Testbinack(unittest.TestCase):
         self.failUnlessEqual(r['DestID4'],params['DestID4'])
         self.failUnlessEqual(r['SeqID4'],params['SeqID4'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "binack" AIS message')
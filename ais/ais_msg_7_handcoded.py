@@ -142,7 +142,7 @@ def encode(params, validate=False):
 
 	return binary.joinBV(bvList)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
 	'''Unpack a binack message
 
 	Fields in params:
@@ -161,6 +161,7 @@ def decode(bv, validate=False):
 	@type bv: BitVector
 	@param bv: Bits defining a message
 	@param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+	@param numeric: accepted for the same call as the generated modules.  There are no scaled fields.
 	@rtype: dict
 	@return: params
 	'''
@@ -537,6 +538,31 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
 	return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+	'''
+	Prepared INSERT for the rows from sqlRow.
+	@param extraFields: names of the columns after the message fields such as cg_sec.
+	Their values are passed to sqlRow as extraValues in the same order.
+	@param dbType: 'sqlite' or 'postgres'
+	@param placeholder: parameter marker of the database module (? for sqlite)
+	@rtype: sqlhelp.preparedInsert
+	'''
+	return sqlhelp.preparedInsert('binack', fieldList+tuple(extraFields),
+		dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+	'''
+	Values of a message in the column order of sqlRowInsert.  Missing
+	fields are None (NULL).  All of the fields are integers.
+	@param params: dict keyed by field name of values
+	@param extraValues: values for the extraFields given to sqlRowInsert
+	@rtype: tuple
+	'''
+	get = params.get
+	return tuple([get(field) for field in fieldList])+tuple(extraValues)
+
+
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
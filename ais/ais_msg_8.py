@@ -21,6 +21,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -76,26 +77,27 @@ def encode(params, validate=False):
       - BinaryData(binary): Bits for a binary broadcast message
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['dac']),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fi']),6))
-    bvList.append(params['BinaryData'])
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|(params['dac']&0x3ff)
+    v = (v<<6)|(params['fi']&0x3f)
+    binBits = params['BinaryData']
+    v = (v<<len(binBits))|int(binBits)
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,56+len(params['BinaryData']))
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a bin_broadcast message.
 
     Fields in params:
@@ -106,46 +108,135 @@ def decode(bv, validate=False):
       - dac(uint): Appid designated area code (country)
       - fi(uint): Appid functional identifier
       - BinaryData(binary): Bits for a binary broadcast message
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 56:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fi']=decodefi(bits,numeric=numeric)
+        r['BinaryData']=decodeBinaryData(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 56: v >>= n-56
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>48)&0x3)
+    r['UserID']=int((v>>18)&0x3fffffff)
     r['Spare']=0
-    r['dac']=int(bv[40:50])
-    r['fi']=int(bv[50:56])
-    r['BinaryData']=bv[56:]
+    r['dac']=int((v>>6)&0x3ff)
+    r['fi']=int(v&0x3f)
+    r['BinaryData']=bits[56:]
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
-    return int(bv[40:50])
+def decodedac(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(40,10)
 
-def decodefi(bv, validate=False):
-    return int(bv[50:56])
+def decodefi(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(50,6)
 
-def decodeBinaryData(bv, validate=False):
-    return bv[56:]
+def decodeBinaryData(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return bits[56:]
+
+
+class View(object):
+    '''Lazy view of a bin_broadcast message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fi','_BinaryData')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fi(self):
+        try: return self._fi
+        except AttributeError: pass
+        self._fi = decodefi(self.bits)
+        return self._fi
+
+    @property
+    def BinaryData(self):
+        try: return self._BinaryData
+        except AttributeError: pass
+        self._BinaryData = decodeBinaryData(self.bits)
+        return self._BinaryData
 
 
 def printHtml(params, out=sys.stdout):
@@ -403,6 +494,56 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('bin_broadcast', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('bin_broadcast', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fi'),
+                        sqlhelp.toBits(get('BinaryData')),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fi'),
+                        sqlhelp.toBits(get('BinaryData')),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -501,6 +642,14 @@ class Testbin_broadcast(unittest.TestCase):
         self.failUnlessEqual(r['fi'],params['fi'])
         self.failUnlessEqual(r['BinaryData'],params['BinaryData'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "bin_broadcast" AIS message')
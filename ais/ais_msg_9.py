@@ -21,6 +21,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -118,58 +119,56 @@ def encode(params, validate=False):
       - state_slotoffset(uint): Communications State - SOTDMA  In what slot will the next transmission occur. BROKEN
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=9),6))
+    v = 0
+    v = (v<<6)|0x9
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
     if 'Altitude' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['Altitude']),12))
+        v = (v<<12)|(params['Altitude']&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=4095),12))
+        v = (v<<12)|0xfff
     if 'SOG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SOG']),10))
+        v = (v<<10)|(params['SOG']&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=1023),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['PositionAccuracy']),1))
+        v = (v<<10)|0x3ff
+    v = (v<<1)|(params['PositionAccuracy']&0x1)
     if 'Position_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['Position_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['Position_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'Position_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['Position_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['Position_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'COG' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['COG'])*Decimal('10')))),12))
+        v = (v<<12)|(int(Decimal(params['COG'])*Decimal('10'))&0xfff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(3600)),12))
+        v = (v<<12)|0xe10
     if 'TimeStamp' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['TimeStamp']),6))
+        v = (v<<6)|(params['TimeStamp']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
-    if params["DTE"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),3))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['assigned_mode']),1))
-    if params["RAIM"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['comm_state']),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_syncstate']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_slottimeout']),3))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['state_slotoffset']),14))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<6)|0x3c
+    v = (v<<8)|0x0
+    v = (v<<1)|(1 if params['DTE'] else 0)
+    v = (v<<3)|0x0
+    v = (v<<1)|(params['assigned_mode']&0x1)
+    v = (v<<1)|(1 if params['RAIM'] else 0)
+    v = (v<<1)|(params['comm_state']&0x1)
+    v = (v<<2)|(params['state_syncstate']&0x3)
+    v = (v<<3)|(params['state_slottimeout']&0x7)
+    v = (v<<14)|(params['state_slotoffset']&0x3fff)
+
+    return bitreader.BitReader(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a SARposition message.
 
     Fields in params:
@@ -192,94 +191,300 @@ def decode(bv, validate=False):
       - state_syncstate(uint): Communications State - SOTDMA  Sycronization state
       - state_slottimeout(uint): Communications State - SOTDMA  Frames remaining until a new slot is selected
       - state_slotoffset(uint): Communications State - SOTDMA  In what slot will the next transmission occur. BROKEN
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Altitude']=decodeAltitude(bits,numeric=numeric)
+        r['SOG']=decodeSOG(bits,numeric=numeric)
+        r['PositionAccuracy']=decodePositionAccuracy(bits,numeric=numeric)
+        r['Position_longitude']=decodePosition_longitude(bits,numeric=numeric)
+        r['Position_latitude']=decodePosition_latitude(bits,numeric=numeric)
+        r['COG']=decodeCOG(bits,numeric=numeric)
+        r['TimeStamp']=decodeTimeStamp(bits,numeric=numeric)
+        r['Reserved']=decodeReserved(bits,numeric=numeric)
+        r['DTE']=decodeDTE(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['assigned_mode']=decodeassigned_mode(bits,numeric=numeric)
+        r['RAIM']=decodeRAIM(bits,numeric=numeric)
+        r['comm_state']=decodecomm_state(bits,numeric=numeric)
+        r['state_syncstate']=decodestate_syncstate(bits,numeric=numeric)
+        r['state_slottimeout']=decodestate_slottimeout(bits,numeric=numeric)
+        r['state_slotoffset']=decodestate_slotoffset(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=9
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['Altitude']=int(bv[38:50])
-    r['SOG']=int(bv[50:60])
-    r['PositionAccuracy']=int(bv[60:61])
-    r['Position_longitude']=Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
-    r['Position_latitude']=Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
-    r['COG']=Decimal(int(bv[116:128]))/Decimal('10')
-    r['TimeStamp']=int(bv[128:134])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
+    r['Altitude']=int((v>>118)&0xfff)
+    r['SOG']=int((v>>108)&0x3ff)
+    r['PositionAccuracy']=int((v>>107)&0x1)
+    r['TimeStamp']=int((v>>34)&0x3f)
     r['Reserved']=0
-    r['DTE']=bool(int(bv[142:143]))
+    r['DTE']=bool((v>>25)&0x1)
     r['Spare']=0
-    r['assigned_mode']=int(bv[146:147])
-    r['RAIM']=bool(int(bv[147:148]))
-    r['comm_state']=int(bv[148:149])
-    r['state_syncstate']=int(bv[149:151])
-    r['state_slottimeout']=int(bv[151:154])
-    r['state_slotoffset']=int(bv[154:168])
+    r['assigned_mode']=int((v>>21)&0x1)
+    r['RAIM']=bool((v>>20)&0x1)
+    r['comm_state']=int((v>>19)&0x1)
+    r['state_syncstate']=int((v>>17)&0x3)
+    r['state_slottimeout']=int((v>>14)&0x7)
+    r['state_slotoffset']=int(v&0x3fff)
+    if 'decimal' == numeric:
+        r['Position_longitude']=Decimal((((v>>79)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['Position_latitude']=Decimal((((v>>52)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['COG']=Decimal((v>>40)&0xfff)/Decimal('10')
+    elif 'float' == numeric:
+        r['Position_longitude']=((((v>>79)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['Position_latitude']=((((v>>52)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['COG']=((v>>40)&0xfff)/10.0
+    elif 'raw' == numeric:
+        r['Position_longitude']=int((((v>>79)&0xfffffff)^0x8000000)-0x8000000)
+        r['Position_latitude']=int((((v>>52)&0x7ffffff)^0x4000000)-0x4000000)
+        r['COG']=int((v>>40)&0xfff)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 9
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeAltitude(bv, validate=False):
-    return int(bv[38:50])
+def decodeAltitude(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,12)
 
-def decodeSOG(bv, validate=False):
-    return int(bv[50:60])
+def decodeSOG(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(50,10)
 
-def decodePositionAccuracy(bv, validate=False):
-    return int(bv[60:61])
+def decodePositionAccuracy(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(60,1)
 
-def decodePosition_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[61:89]))/Decimal('600000')
+def decodePosition_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(61,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodePosition_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[89:116]))/Decimal('600000')
+def decodePosition_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(89,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeCOG(bv, validate=False):
-    return Decimal(int(bv[116:128]))/Decimal('10')
+def decodeCOG(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(116,12)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeTimeStamp(bv, validate=False):
-    return int(bv[128:134])
+def decodeTimeStamp(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(128,6)
 
-def decodeReserved(bv, validate=False):
+def decodeReserved(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeDTE(bv, validate=False):
-    return bool(int(bv[142:143]))
+def decodeDTE(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(142,1))
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeassigned_mode(bv, validate=False):
-    return int(bv[146:147])
+def decodeassigned_mode(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(146,1)
 
-def decodeRAIM(bv, validate=False):
-    return bool(int(bv[147:148]))
+def decodeRAIM(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(147,1))
 
-def decodecomm_state(bv, validate=False):
-    return int(bv[148:149])
+def decodecomm_state(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(148,1)
 
-def decodestate_syncstate(bv, validate=False):
-    return int(bv[149:151])
+def decodestate_syncstate(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(149,2)
 
-def decodestate_slottimeout(bv, validate=False):
-    return int(bv[151:154])
+def decodestate_slottimeout(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(151,3)
 
-def decodestate_slotoffset(bv, validate=False):
-    return int(bv[154:168])
+def decodestate_slotoffset(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(154,14)
+
+
+class View(object):
+    '''Lazy view of a SARposition message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Altitude','_SOG','_PositionAccuracy','_Position_longitude','_Position_latitude','_COG','_TimeStamp','_Reserved','_DTE','_Spare','_assigned_mode','_RAIM','_comm_state','_state_syncstate','_state_slottimeout','_state_slotoffset')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Altitude(self):
+        try: return self._Altitude
+        except AttributeError: pass
+        self._Altitude = decodeAltitude(self.bits)
+        return self._Altitude
+
+    @property
+    def SOG(self):
+        try: return self._SOG
+        except AttributeError: pass
+        self._SOG = decodeSOG(self.bits)
+        return self._SOG
+
+    @property
+    def PositionAccuracy(self):
+        try: return self._PositionAccuracy
+        except AttributeError: pass
+        self._PositionAccuracy = decodePositionAccuracy(self.bits)
+        return self._PositionAccuracy
+
+    @property
+    def Position_longitude(self):
+        try: return self._Position_longitude
+        except AttributeError: pass
+        self._Position_longitude = decodePosition_longitude(self.bits, numeric=self.numeric)
+        return self._Position_longitude
+
+    @property
+    def Position_latitude(self):
+        try: return self._Position_latitude
+        except AttributeError: pass
+        self._Position_latitude = decodePosition_latitude(self.bits, numeric=self.numeric)
+        return self._Position_latitude
+
+    @property
+    def COG(self):
+        try: return self._COG
+        except AttributeError: pass
+        self._COG = decodeCOG(self.bits, numeric=self.numeric)
+        return self._COG
+
+    @property
+    def TimeStamp(self):
+        try: return self._TimeStamp
+        except AttributeError: pass
+        self._TimeStamp = decodeTimeStamp(self.bits)
+        return self._TimeStamp
+
+    @property
+    def Reserved(self):
+        try: return self._Reserved
+        except AttributeError: pass
+        self._Reserved = decodeReserved(self.bits)
+        return self._Reserved
+
+    @property
+    def DTE(self):
+        try: return self._DTE
+        except AttributeError: pass
+        self._DTE = decodeDTE(self.bits)
+        return self._DTE
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def assigned_mode(self):
+        try: return self._assigned_mode
+        except AttributeError: pass
+        self._assigned_mode = decodeassigned_mode(self.bits)
+        return self._assigned_mode
+
+    @property
+    def RAIM(self):
+        try: return self._RAIM
+        except AttributeError: pass
+        self._RAIM = decodeRAIM(self.bits)
+        return self._RAIM
+
+    @property
+    def comm_state(self):
+        try: return self._comm_state
+        except AttributeError: pass
+        self._comm_state = decodecomm_state(self.bits)
+        return self._comm_state
+
+    @property
+    def state_syncstate(self):
+        try: return self._state_syncstate
+        except AttributeError: pass
+        self._state_syncstate = decodestate_syncstate(self.bits)
+        return self._state_syncstate
+
+    @property
+    def state_slottimeout(self):
+        try: return self._state_slottimeout
+        except AttributeError: pass
+        self._state_slottimeout = decodestate_slottimeout(self.bits)
+        return self._state_slottimeout
+
+    @property
+    def state_slotoffset(self):
+        try: return self._state_slotoffset
+        except AttributeError: pass
+        self._state_slotoffset = decodestate_slotoffset(self.bits)
+        return self._state_slotoffset
 
 
 def printHtml(params, out=sys.stdout):
@@ -848,6 +1053,79 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('SARposition', fieldListPostgres+tuple(extraFields),
+                        geometry=('Position',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('SARposition', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Altitude'),
+                        get('SOG'),
+                        get('PositionAccuracy'),
+                        sqlhelp.geometryWkt('POINT',get('Position_longitude'),get('Position_latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TimeStamp'),
+                        get('Reserved'),
+                        get('DTE'),
+                        get('Spare'),
+                        get('assigned_mode'),
+                        get('RAIM'),
+                        get('comm_state'),
+                        get('state_syncstate'),
+                        get('state_slottimeout'),
+                        get('state_slotoffset'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Altitude'),
+                        get('SOG'),
+                        get('PositionAccuracy'),
+                        sqlhelp.toFloat(get('Position_longitude')),
+                        sqlhelp.toFloat(get('Position_latitude')),
+                        sqlhelp.toFloat(get('COG')),
+                        get('TimeStamp'),
+                        get('Reserved'),
+                        get('DTE'),
+                        get('Spare'),
+                        get('assigned_mode'),
+                        get('RAIM'),
+                        get('comm_state'),
+                        get('state_syncstate'),
+                        get('state_slottimeout'),
+                        get('state_slotoffset'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -994,6 +1272,24 @@ class TestSARposition(unittest.TestCase):
         self.failUnlessEqual(r['state_slottimeout'],params['state_slottimeout'])
         self.failUnlessEqual(r['state_slotoffset'],params['state_slotoffset'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('Position_longitude', 'Position_latitude', 'COG'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "SARposition" AIS message')
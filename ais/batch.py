@@ -0,0 +1,233 @@
+__copyright__ = '2026'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Decode blocks of position reports into numpy columns.
+
+Decoding one line at a time through the message modules is fine for a
+few thousand reports, but traffic density work needs hundreds of
+millions.  Here the armoring and field extraction for a whole block of
+payloads is done with numpy.  The first 24 characters (144 bits) of
+each payload are turned into three 48 bit limbs held in uint64 arrays,
+and each field is then a shift and mask over the limbs.
+
+Only single sentence class A (1, 2, 3) and class B (18, 19) position
+reports are kept.  Values are passed through as sent, so unavailable
+values such as a longitude of 181 or a heading of 511 are left for the
+caller to filter.
+
+  >>> lines = [
+  ...   '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433',
+  ...   '!AIVDM,1,1,,A,B52K>;h00Fc>jpUlNV@ikwpUoP06,0*4C,b003669710,1241895000',
+  ...   '!AIVDM,1,1,,B,55NHt`02;vTH<H5SK:0<PT4h1B0b1A@4000000160P3496v0Bhj2DQhCR@000000000,0*1B,r003669945,1165850433']
+  >>> pos = decode_positions(lines)
+  >>> len(pos), list(pos['msgnum']), list(pos['mmsi'])
+  (2, [1, 18], [366985620, 338087471])
+  >>> '%.5f %.5f %s' % (pos['lon'][0], pos['lat'][0], pos['station'][0])
+  '-91.23304 29.67211 r003669945'
+
+@requires: U{numpy<http://numpy.scipy.org/>}
+@since: 2026-Oct-16
+@see: L{aisutils.grid.Grid.addPoints}
+'''
+
+
+import numpy
+
+positionMsgChars = '123BC'
+'''First payload character of the messages that decode_positions keeps'''
+
+payloadChars = 24
+'''Characters of each payload needed for every position field (144 bits)'''
+
+sextetLut = numpy.zeros(256, dtype=numpy.uint8) + 0xff
+'''Armor character to 6 bit value.  0xff marks a bad character.'''
+for _c in range(ord('0'), ord('W')+1): sextetLut[_c] = _c - 48
+for _c in range(ord('`'), ord('w')+1): sextetLut[_c] = _c - 56
+del _c
+
+# (start bit, number of bits) for class A and class B reports
+classAFields = {
+    'mmsi': (8,30), 'sog': (50,10), 'lon': (61,28), 'lat': (89,27),
+    'cog': (116,12), 'heading': (128,9), 'timestamp': (137,6),
+    }
+classBFields = {
+    'mmsi': (8,30), 'sog': (46,10), 'lon': (57,28), 'lat': (85,27),
+    'cog': (112,12), 'heading': (124,9), 'timestamp': (133,6),
+    }
+
+def positionDtype(stationWidth=16):
+    '''
+    @param stationWidth: characters to keep for the station name
+    @return: numpy dtype of the structured array from decode_positions
+    '''
+    return numpy.dtype([
+        ('msgnum', numpy.uint8),
+        ('mmsi', numpy.uint32),
+        ('lon', numpy.float64),
+        ('lat', numpy.float64),
+        ('sog', numpy.float32),
+        ('cog', numpy.float32),
+        ('heading', numpy.uint16),
+        ('timestamp', numpy.uint8),
+        ('cg_sec', numpy.float64),
+        ('station', 'S%d' % stationWidth),
+        ])
+
+
+def payload_limbs(payloads):
+    '''
+    Turn the first 24 characters of each payload into three 48 bit limbs.
+
+    >>> limbs, good = payload_limbs(['0'*23+'1', '0'*23+'~'])
+    >>> int(limbs[0,2]), list(good)
+    (1, [True, False])
+
+    @param payloads: list of armored payloads with at least 24 characters each
+    @return: (limbs, good) where limbs is a (n,3) uint64 array and good
+    is a boolean array that is False for payloads with bad characters
+    '''
+    n = len(payloads)
+    if 0 == n:
+        return numpy.zeros((0,3), dtype=numpy.uint64), numpy.zeros(0, dtype=bool)
+    chars = numpy.frombuffer(''.join([p[:payloadChars] for p in payloads]), dtype=numpy.uint8)
+    sextets = sextetLut[chars].reshape(n, 3, 8)
+    good = (sextets != 0xff).all(axis=2).all(axis=1)
+    sextets = sextets.astype(numpy.uint64)
+    limbs = numpy.zeros((n,3), dtype=numpy.uint64)
+    for j in range(8):
+        limbs |= sextets[:,:,j] << numpy.uint64(6*(7-j))
+    return limbs, good
+
+
+def limb_field(limbs, start, numBits, signed=False):
+    '''
+    Pull one field of up to 48 bits out of the limbs.
+
+    >>> limbs, good = payload_limbs(['15Mw1U?P00qNGTP@v`0@9wwn'])
+    >>> int(limb_field(limbs, 8, 30)[0]), int(limb_field(limbs, 61, 28, signed=True)[0])
+    (366985620, -54739824)
+
+    @param start: first bit of the field in the message
+    @param numBits: width of the field
+    @param signed: True for a twos complement field
+    @return: int64 array
+    '''
+    assert numBits <= 48
+    limb = start // 48
+    offset = start % 48
+    if offset + numBits <= 48:
+        val = limbs[:,limb] >> numpy.uint64(48 - offset - numBits)
+    else:
+        loBits = offset + numBits - 48
+        val = (limbs[:,limb] << numpy.uint64(loBits)) | (limbs[:,limb+1] >> numpy.uint64(48 - loBits))
+    val = (val & numpy.uint64((1 << numBits) - 1)).astype(numpy.int64)
+    if signed:
+        sign = 1 << (numBits - 1)
+        val = (val ^ sign) - sign
+    return val
+
+
+def split_lines(lines, index=None):
+    '''
+    Pick out the single sentence position reports from USCG NMEA lines.
+
+    @param index: list that gets the index in lines of each report kept
+    @return: (payloads, stations, cg_secs) lists
+    '''
+    payloads = []
+    stations = []
+    cg_secs = []
+    for i, line in enumerate(lines):
+        fields = line.rstrip().split(',')
+        if len(fields) < 7 or '1' != fields[1] or fields[0][-3:] not in ('VDM','VDO'):
+            continue
+        body = fields[5]
+        if len(body) < payloadChars or body[0] not in positionMsgChars:
+            continue
+        station = ''
+        for field in fields[7:]:
+            if field[:1] in ('r','b','B'):
+                station = field
+                break
+        try:
+            cg_sec = float(fields[-1])
+        except ValueError:
+            cg_sec = numpy.nan
+        payloads.append(body)
+        stations.append(station)
+        cg_secs.append(cg_sec)
+        if index is not None:
+            index.append(i)
+    return payloads, stations, cg_secs
+
+
+def decode_positions(lines, stationWidth=16, index=None):
+    '''
+    Decode all of the position reports in a block of USCG NMEA lines.
+
+    >>> index = []
+    >>> pos = decode_positions(['# comment', '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E'], index=index)
+    >>> index
+    [1]
+
+    @param lines: sequence of USCG NMEA strings
+    @param stationWidth: characters to keep for the station name
+    @param index: list that gets the index in lines of each row of the result
+    @return: structured array with the positionDtype columns msgnum,
+    mmsi, lon, lat, sog, cog, heading, timestamp, cg_sec and station
+    @rtype: numpy.ndarray
+    '''
+    kept = []
+    payloads, stations, cg_secs = split_lines(lines, kept)
+    limbs, good = payload_limbs(payloads)
+    limbs = limbs[good]
+    if index is not None:
+        index.extend([i for i, isGood in zip(kept, good) if isGood])
+
+    r = numpy.zeros(len(limbs), dtype=positionDtype(stationWidth))
+    r['station'] = numpy.array(stations, dtype='S%d' % stationWidth)[good]
+    r['cg_sec'] = numpy.array(cg_secs, dtype=numpy.float64)[good]
+    if 0 == len(limbs):
+        return r
+
+    msgnum = limb_field(limbs, 0, 6)
+    r['msgnum'] = msgnum
+    classB = msgnum >= 18
+    def field(name, signed=False):
+        a = limb_field(limbs, classAFields[name][0], classAFields[name][1], signed)
+        b = limb_field(limbs, classBFields[name][0], classBFields[name][1], signed)
+        return numpy.where(classB, b, a)
+
+    r['mmsi'] = field('mmsi')
+    r['lon'] = field('lon', signed=True) / 600000.
+    r['lat'] = field('lat', signed=True) / 600000.
+    r['sog'] = field('sog') / 10.
+    r['cog'] = field('cog') / 10.
+    r['heading'] = field('heading')
+    r['timestamp'] = field('timestamp')
+    return r
+
+
+def iter_positions(lines, blockSize=100000, stationWidth=16):
+    '''
+    Decode a long stream of lines a block at a time so that memory stays
+    bounded.
+
+    @param lines: iterable of USCG NMEA strings such as an open file
+    @param blockSize: number of lines handed to decode_positions at once
+    @return: generator of structured arrays from decode_positions
+    '''
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= blockSize:
+            yield decode_positions(block, stationWidth)
+            block = []
+    if block:
+        yield decode_positions(block, stationWidth)
+
+
+if __name__ == '__main__':
+    from aisutils import doctestmain
+    doctestmain.main()
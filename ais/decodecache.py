@@ -0,0 +1,150 @@
+__copyright__ = '2026'
+__license__   = 'Apache 2.0'
+
+__doc__ ='''
+Least recently used cache of decoded messages keyed by the armored payload,
+fill bits, message module and numeric mode.
+
+A receiver network hears the same transmission at many stations, so a
+feed is full of repeated payloads.  DecodeCache remembers the decoded
+dict for the most recent payloads so that the repeats are a dictionary
+lookup rather than a full decode.
+
+  >>> cache = DecodeCache(maxSize=2)
+  >>> msg = cache.decode('15Mw1U?P00qNGTP@v`0@9wwn26sd')
+  >>> msg['UserID'], str(msg['longitude'])
+  (366985620, '-91.23304')
+  >>> msg = cache.decode('15Mw1U?P00qNGTP@v`0@9wwn26sd')
+  >>> sorted(cache.stats().items())
+  [('evictions', 0), ('hits', 1), ('misses', 1), ('size', 1)]
+  >>> msg = cache.decode('15Mw1U?P00qNGTP@v`0@9wwn26sd', numeric='float')
+  >>> msg['longitude'], cache.misses
+  (-91.23304, 2)
+
+Each call returns a new dict, so callers are free to change what they
+get back.  Decode errors are not cached.
+
+@since: 2026-Oct-16
+@see: L{ais.msgModByFirstChar}
+'''
+
+import threading
+
+import ais
+from aisutils import binary
+
+# Indexes into each link of the circular doubly linked list
+PREV, NEXT, KEY, RESULT = 0, 1, 2, 3
+
+
+class DecodeCache(object):
+    '''
+    Bounded LRU memoization in front of the message module decode
+    functions.  Safe to share between threads.
+    '''
+
+    def __init__(self, maxSize=10000, numeric='decimal'):
+        '''
+        @param maxSize: number of decoded messages to keep.  0 turns off caching.
+        @param numeric: default numeric mode for decode.  See the message modules.
+        '''
+        self.maxSize = maxSize
+        self.numeric = numeric
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        '''Drop all cached messages.  The counters are kept.'''
+        self.cache = {}
+        self.root = root = [] # Sentinel.  root[NEXT] is the oldest entry
+        root[:] = [root, root, None, None]
+
+    def __len__(self):
+        return len(self.cache)
+
+    def stats(self):
+        '''
+        @return: hits, misses, evictions and size
+        @rtype: dict
+        '''
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self.cache)}
+
+    def decode(self, payload, fillBits=0, msgMod=None, bv=None, numeric=None):
+        '''
+        Decode a payload or return the cached result from an earlier decode.
+
+        >>> cache = DecodeCache(maxSize=1)
+        >>> a = cache.decode('15Mw1U?P00qNGTP@v`0@9wwn26sd')
+        >>> b = cache.decode('B52K>;h00Fc>jpUlNV@ikwpUoP06')
+        >>> a = cache.decode('15Mw1U?P00qNGTP@v`0@9wwn26sd')
+        >>> cache.misses, cache.evictions
+        (3, 2)
+
+        @param payload: armored message payload from the NMEA string
+        @param fillBits: number of fill bits from the NMEA string
+        @type fillBits: int
+        @param msgMod: module to decode with.  Defaults to the one from
+        ais.msgModByFirstChar
+        @param bv: bits for the payload if the caller already has them
+        @param numeric: decimal, float or raw.  Defaults to the numeric of the cache.
+        @raise KeyError: no message module for the payload
+        @return: decoded message
+        @rtype: dict
+        '''
+        if msgMod is None:
+            msgMod = ais.msgModByFirstChar[payload[0]]
+        if numeric is None:
+            numeric = self.numeric
+        key = (payload, fillBits, msgMod, numeric)
+        root = self.root
+        self.lock.acquire()
+        try:
+            link = self.cache.get(key)
+            if link is not None:
+                # Move to the newest end
+                link[PREV][NEXT] = link[NEXT]
+                link[NEXT][PREV] = link[PREV]
+                last = root[PREV]
+                last[NEXT] = root[PREV] = link
+                link[PREV] = last
+                link[NEXT] = root
+                self.hits += 1
+                return dict(link[RESULT])
+            self.misses += 1
+        finally:
+            self.lock.release()
+
+        if bv is None:
+            bv = binary.ais6tobitvec(payload)
+        if 'decimal' == numeric:
+            result = msgMod.decode(bv)
+        else:
+            result = msgMod.decode(bv, numeric=numeric)
+        if self.maxSize <= 0:
+            return result
+
+        self.lock.acquire()
+        try:
+            if key not in self.cache:
+                if len(self.cache) >= self.maxSize:
+                    oldest = root[NEXT]
+                    root[NEXT] = oldest[NEXT]
+                    oldest[NEXT][PREV] = root
+                    del self.cache[oldest[KEY]]
+                    self.evictions += 1
+                last = root[PREV]
+                link = [last, root, key, result]
+                last[NEXT] = root[PREV] = link
+                self.cache[key] = link
+        finally:
+            self.lock.release()
+        return dict(result)
+
+
+if __name__ == '__main__':
+    from aisutils import doctestmain
+    doctestmain.main()
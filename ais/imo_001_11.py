@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -197,164 +198,164 @@ def encode(params, validate=False):
       - Spare2(uint): Must be zero (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=1),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=11),6))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|0x1
+    v = (v<<6)|0xb
     if 'latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['latitude'])*Decimal('60000')),24))
+        v = (v<<24)|(int(Decimal(params['latitude'])*Decimal('60000'))&0xffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(5460000,24))
+        v = (v<<24)|0x535020
     if 'longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['longitude'])*Decimal('60000')),25))
+        v = (v<<25)|(int(Decimal(params['longitude'])*Decimal('60000'))&0x1ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(10860000,25))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['day']),5))
+        v = (v<<25)|0xa5b5e0
+    v = (v<<5)|(params['day']&0x1f)
     if 'hour' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['hour']),5))
+        v = (v<<5)|(params['hour']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=31),5))
+        v = (v<<5)|0x1f
     if 'min' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['min']),6))
+        v = (v<<6)|(params['min']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=63),6))
+        v = (v<<6)|0x3f
     if 'avewind' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['avewind']),7))
+        v = (v<<7)|(params['avewind']&0x7f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=127),7))
+        v = (v<<7)|0x7f
     if 'windgust' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['windgust']),7))
+        v = (v<<7)|(params['windgust']&0x7f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=127),7))
+        v = (v<<7)|0x7f
     if 'winddir' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['winddir']),9))
+        v = (v<<9)|(params['winddir']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'windgustdir' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['windgustdir']),9))
+        v = (v<<9)|(params['windgustdir']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'airtemp' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['airtemp'])*Decimal('10')),11))
+        v = (v<<11)|(int(Decimal(params['airtemp'])*Decimal('10'))&0x7ff)
     else:
-        bvList.append(binary.bvFromSignedInt(1023,11))
+        v = (v<<11)|0x3ff
     if 'relhumid' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['relhumid']),7))
+        v = (v<<7)|(params['relhumid']&0x7f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=127),7))
+        v = (v<<7)|0x7f
     if 'dewpoint' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['dewpoint'])*Decimal('10')),10))
+        v = (v<<10)|(int(Decimal(params['dewpoint'])*Decimal('10'))&0x3ff)
     else:
-        bvList.append(binary.bvFromSignedInt(511,10))
+        v = (v<<10)|0x1ff
     if 'airpressure' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['airpressure']-(800))*Decimal('1')))),9))
+        v = (v<<9)|(int(Decimal(params['airpressure']-(800))*Decimal('1'))&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(1311)),9))
+        v = (v<<9)|0x11f
     if 'airpressuretrend' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['airpressuretrend']),2))
+        v = (v<<2)|(params['airpressuretrend']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=3),2))
+        v = (v<<2)|0x3
     if 'horizvis' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['horizvis'])*Decimal('10')))),8))
+        v = (v<<8)|(int(Decimal(params['horizvis'])*Decimal('10'))&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(255)),8))
-    bvList.append(binary.bvFromSignedInt(int(Decimal(params['waterlevel'])*Decimal('10')),9))
+        v = (v<<8)|0xff
+    v = (v<<9)|(int(Decimal(params['waterlevel'])*Decimal('10'))&0x1ff)
     if 'waterleveltrend' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['waterleveltrend']),2))
+        v = (v<<2)|(params['waterleveltrend']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=3),2))
+        v = (v<<2)|0x3
     if 'surfcurspeed' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['surfcurspeed'])*Decimal('10')))),8))
+        v = (v<<8)|(int(Decimal(params['surfcurspeed'])*Decimal('10'))&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(255)),8))
+        v = (v<<8)|0xff
     if 'surfcurdir' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['surfcurdir']),9))
+        v = (v<<9)|(params['surfcurdir']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'curspeed2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['curspeed2'])*Decimal('10')))),8))
+        v = (v<<8)|(int(Decimal(params['curspeed2'])*Decimal('10'))&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(255)),8))
+        v = (v<<8)|0xff
     if 'curdir2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['curdir2']),9))
+        v = (v<<9)|(params['curdir2']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'curlevel2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['curlevel2']),5))
+        v = (v<<5)|(params['curlevel2']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=31),5))
+        v = (v<<5)|0x1f
     if 'curspeed3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['curspeed3'])*Decimal('10')))),8))
+        v = (v<<8)|(int(Decimal(params['curspeed3'])*Decimal('10'))&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(255)),8))
+        v = (v<<8)|0xff
     if 'curdir3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['curdir3']),9))
+        v = (v<<9)|(params['curdir3']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'curlevel3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['curlevel3']),5))
+        v = (v<<5)|(params['curlevel3']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=31),5))
+        v = (v<<5)|0x1f
     if 'sigwaveheight' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['sigwaveheight'])*Decimal('10')))),8))
+        v = (v<<8)|(int(Decimal(params['sigwaveheight'])*Decimal('10'))&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(255)),8))
+        v = (v<<8)|0xff
     if 'waveperiod' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['waveperiod']),6))
+        v = (v<<6)|(params['waveperiod']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=63),6))
+        v = (v<<6)|0x3f
     if 'wavedir' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['wavedir']),9))
+        v = (v<<9)|(params['wavedir']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'swellheight' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['swellheight'])*Decimal('10')))),8))
+        v = (v<<8)|(int(Decimal(params['swellheight'])*Decimal('10'))&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(255)),8))
+        v = (v<<8)|0xff
     if 'swellperiod' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['swellperiod']),6))
+        v = (v<<6)|(params['swellperiod']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=63),6))
+        v = (v<<6)|0x3f
     if 'swelldir' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['swelldir']),9))
+        v = (v<<9)|(params['swelldir']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
+        v = (v<<9)|0x1ff
     if 'seastate' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['seastate']),4))
+        v = (v<<4)|(params['seastate']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=15),4))
+        v = (v<<4)|0xf
     if 'watertemp' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['watertemp']-(-10))*Decimal('10')))),10))
+        v = (v<<10)|(int(Decimal(params['watertemp']-(-10))*Decimal('10'))&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(923)),10))
+        v = (v<<10)|0x39b
     if 'preciptype' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['preciptype']),3))
+        v = (v<<3)|(params['preciptype']&0x7)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=7),3))
+        v = (v<<3)|0x7
     if 'salinity' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['salinity'])*Decimal('10')),9))
+        v = (v<<9)|(int(Decimal(params['salinity'])*Decimal('10'))&0x1ff)
     else:
-        bvList.append(binary.bvFromSignedInt(923,9))
+        v = (v<<9)|0x19b
     if 'ice' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ice']),2))
+        v = (v<<2)|(params['ice']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=3),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),6))
+        v = (v<<2)|0x3
+    v = (v<<6)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,352)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a imo_met_hydro message.
 
     Fields in params:
@@ -401,190 +402,654 @@ def decode(bv, validate=False):
       - salinity(decimal): Salinity
       - ice(uint): Yes or no for the presence of ice
       - Spare2(uint): Must be zero (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 352:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['latitude']=decodelatitude(bits,numeric=numeric)
+        r['longitude']=decodelongitude(bits,numeric=numeric)
+        r['day']=decodeday(bits,numeric=numeric)
+        r['hour']=decodehour(bits,numeric=numeric)
+        r['min']=decodemin(bits,numeric=numeric)
+        r['avewind']=decodeavewind(bits,numeric=numeric)
+        r['windgust']=decodewindgust(bits,numeric=numeric)
+        r['winddir']=decodewinddir(bits,numeric=numeric)
+        r['windgustdir']=decodewindgustdir(bits,numeric=numeric)
+        r['airtemp']=decodeairtemp(bits,numeric=numeric)
+        r['relhumid']=decoderelhumid(bits,numeric=numeric)
+        r['dewpoint']=decodedewpoint(bits,numeric=numeric)
+        r['airpressure']=decodeairpressure(bits,numeric=numeric)
+        r['airpressuretrend']=decodeairpressuretrend(bits,numeric=numeric)
+        r['horizvis']=decodehorizvis(bits,numeric=numeric)
+        r['waterlevel']=decodewaterlevel(bits,numeric=numeric)
+        r['waterleveltrend']=decodewaterleveltrend(bits,numeric=numeric)
+        r['surfcurspeed']=decodesurfcurspeed(bits,numeric=numeric)
+        r['surfcurdir']=decodesurfcurdir(bits,numeric=numeric)
+        r['curspeed2']=decodecurspeed2(bits,numeric=numeric)
+        r['curdir2']=decodecurdir2(bits,numeric=numeric)
+        r['curlevel2']=decodecurlevel2(bits,numeric=numeric)
+        r['curspeed3']=decodecurspeed3(bits,numeric=numeric)
+        r['curdir3']=decodecurdir3(bits,numeric=numeric)
+        r['curlevel3']=decodecurlevel3(bits,numeric=numeric)
+        r['sigwaveheight']=decodesigwaveheight(bits,numeric=numeric)
+        r['waveperiod']=decodewaveperiod(bits,numeric=numeric)
+        r['wavedir']=decodewavedir(bits,numeric=numeric)
+        r['swellheight']=decodeswellheight(bits,numeric=numeric)
+        r['swellperiod']=decodeswellperiod(bits,numeric=numeric)
+        r['swelldir']=decodeswelldir(bits,numeric=numeric)
+        r['seastate']=decodeseastate(bits,numeric=numeric)
+        r['watertemp']=decodewatertemp(bits,numeric=numeric)
+        r['preciptype']=decodepreciptype(bits,numeric=numeric)
+        r['salinity']=decodesalinity(bits,numeric=numeric)
+        r['ice']=decodeice(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 352: v >>= n-352
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>344)&0x3)
+    r['UserID']=int((v>>314)&0x3fffffff)
     r['Spare']=0
     r['dac']=1
     r['fid']=11
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[56:80]))/Decimal('60000')
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[80:105]))/Decimal('60000')
-    r['day']=int(bv[105:110])
-    r['hour']=int(bv[110:115])
-    r['min']=int(bv[115:121])
-    r['avewind']=int(bv[121:128])
-    r['windgust']=int(bv[128:135])
-    r['winddir']=int(bv[135:144])
-    r['windgustdir']=int(bv[144:153])
-    r['airtemp']=Decimal(binary.signedIntFromBV(bv[153:164]))/Decimal('10')
-    r['relhumid']=int(bv[164:171])
-    r['dewpoint']=Decimal(binary.signedIntFromBV(bv[171:181]))/Decimal('10')
-    r['airpressure']=Decimal(int(bv[181:190]))/Decimal('1')+Decimal('800')
-    r['airpressuretrend']=int(bv[190:192])
-    r['horizvis']=Decimal(int(bv[192:200]))/Decimal('10')
-    r['waterlevel']=Decimal(binary.signedIntFromBV(bv[200:209]))/Decimal('10')
-    r['waterleveltrend']=int(bv[209:211])
-    r['surfcurspeed']=Decimal(int(bv[211:219]))/Decimal('10')
-    r['surfcurdir']=int(bv[219:228])
-    r['curspeed2']=Decimal(int(bv[228:236]))/Decimal('10')
-    r['curdir2']=int(bv[236:245])
-    r['curlevel2']=int(bv[245:250])
-    r['curspeed3']=Decimal(int(bv[250:258]))/Decimal('10')
-    r['curdir3']=int(bv[258:267])
-    r['curlevel3']=int(bv[267:272])
-    r['sigwaveheight']=Decimal(int(bv[272:280]))/Decimal('10')
-    r['waveperiod']=int(bv[280:286])
-    r['wavedir']=int(bv[286:295])
-    r['swellheight']=Decimal(int(bv[295:303]))/Decimal('10')
-    r['swellperiod']=int(bv[303:309])
-    r['swelldir']=int(bv[309:318])
-    r['seastate']=int(bv[318:322])
-    r['watertemp']=Decimal(int(bv[322:332]))/Decimal('10')+Decimal('-10')
-    r['preciptype']=int(bv[332:335])
-    r['salinity']=Decimal(binary.signedIntFromBV(bv[335:344]))/Decimal('10')
-    r['ice']=int(bv[344:346])
+    r['day']=int((v>>242)&0x1f)
+    r['hour']=int((v>>237)&0x1f)
+    r['min']=int((v>>231)&0x3f)
+    r['avewind']=int((v>>224)&0x7f)
+    r['windgust']=int((v>>217)&0x7f)
+    r['winddir']=int((v>>208)&0x1ff)
+    r['windgustdir']=int((v>>199)&0x1ff)
+    r['relhumid']=int((v>>181)&0x7f)
+    r['airpressuretrend']=int((v>>160)&0x3)
+    r['waterleveltrend']=int((v>>141)&0x3)
+    r['surfcurdir']=int((v>>124)&0x1ff)
+    r['curdir2']=int((v>>107)&0x1ff)
+    r['curlevel2']=int((v>>102)&0x1f)
+    r['curdir3']=int((v>>85)&0x1ff)
+    r['curlevel3']=int((v>>80)&0x1f)
+    r['waveperiod']=int((v>>66)&0x3f)
+    r['wavedir']=int((v>>57)&0x1ff)
+    r['swellperiod']=int((v>>43)&0x3f)
+    r['swelldir']=int((v>>34)&0x1ff)
+    r['seastate']=int((v>>30)&0xf)
+    r['preciptype']=int((v>>17)&0x7)
+    r['ice']=int((v>>6)&0x3)
     r['Spare2']=0
+    if 'decimal' == numeric:
+        r['latitude']=Decimal((((v>>272)&0xffffff)^0x800000)-0x800000)/Decimal('60000')
+        r['longitude']=Decimal((((v>>247)&0x1ffffff)^0x1000000)-0x1000000)/Decimal('60000')
+        r['airtemp']=Decimal((((v>>188)&0x7ff)^0x400)-0x400)/Decimal('10')
+        r['dewpoint']=Decimal((((v>>171)&0x3ff)^0x200)-0x200)/Decimal('10')
+        r['airpressure']=Decimal((v>>162)&0x1ff)/Decimal('1')+Decimal('800')
+        r['horizvis']=Decimal((v>>152)&0xff)/Decimal('10')
+        r['waterlevel']=Decimal((((v>>143)&0x1ff)^0x100)-0x100)/Decimal('10')
+        r['surfcurspeed']=Decimal((v>>133)&0xff)/Decimal('10')
+        r['curspeed2']=Decimal((v>>116)&0xff)/Decimal('10')
+        r['curspeed3']=Decimal((v>>94)&0xff)/Decimal('10')
+        r['sigwaveheight']=Decimal((v>>72)&0xff)/Decimal('10')
+        r['swellheight']=Decimal((v>>49)&0xff)/Decimal('10')
+        r['watertemp']=Decimal((v>>20)&0x3ff)/Decimal('10')+Decimal('-10')
+        r['salinity']=Decimal((((v>>8)&0x1ff)^0x100)-0x100)/Decimal('10')
+    elif 'float' == numeric:
+        r['latitude']=((((v>>272)&0xffffff)^0x800000)-0x800000)/60000.0
+        r['longitude']=((((v>>247)&0x1ffffff)^0x1000000)-0x1000000)/60000.0
+        r['airtemp']=((((v>>188)&0x7ff)^0x400)-0x400)/10.0
+        r['dewpoint']=((((v>>171)&0x3ff)^0x200)-0x200)/10.0
+        r['airpressure']=((v>>162)&0x1ff)/1.0+800.0
+        r['horizvis']=((v>>152)&0xff)/10.0
+        r['waterlevel']=((((v>>143)&0x1ff)^0x100)-0x100)/10.0
+        r['surfcurspeed']=((v>>133)&0xff)/10.0
+        r['curspeed2']=((v>>116)&0xff)/10.0
+        r['curspeed3']=((v>>94)&0xff)/10.0
+        r['sigwaveheight']=((v>>72)&0xff)/10.0
+        r['swellheight']=((v>>49)&0xff)/10.0
+        r['watertemp']=((v>>20)&0x3ff)/10.0+-10.0
+        r['salinity']=((((v>>8)&0x1ff)^0x100)-0x100)/10.0
+    elif 'raw' == numeric:
+        r['latitude']=int((((v>>272)&0xffffff)^0x800000)-0x800000)
+        r['longitude']=int((((v>>247)&0x1ffffff)^0x1000000)-0x1000000)
+        r['airtemp']=int((((v>>188)&0x7ff)^0x400)-0x400)
+        r['dewpoint']=int((((v>>171)&0x3ff)^0x200)-0x200)
+        r['airpressure']=int((v>>162)&0x1ff)
+        r['horizvis']=int((v>>152)&0xff)
+        r['waterlevel']=int((((v>>143)&0x1ff)^0x100)-0x100)
+        r['surfcurspeed']=int((v>>133)&0xff)
+        r['curspeed2']=int((v>>116)&0xff)
+        r['curspeed3']=int((v>>94)&0xff)
+        r['sigwaveheight']=int((v>>72)&0xff)
+        r['swellheight']=int((v>>49)&0xff)
+        r['watertemp']=int((v>>20)&0x3ff)
+        r['salinity']=int((((v>>8)&0x1ff)^0x100)-0x100)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[56:80]))/Decimal('60000')
-
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[80:105]))/Decimal('60000')
-
-def decodeday(bv, validate=False):
-    return int(bv[105:110])
-
-def decodehour(bv, validate=False):
-    return int(bv[110:115])
-
-def decodemin(bv, validate=False):
-    return int(bv[115:121])
-
-def decodeavewind(bv, validate=False):
-    return int(bv[121:128])
-
-def decodewindgust(bv, validate=False):
-    return int(bv[128:135])
-
-def decodewinddir(bv, validate=False):
-    return int(bv[135:144])
-
-def decodewindgustdir(bv, validate=False):
-    return int(bv[144:153])
-
-def decodeairtemp(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[153:164]))/Decimal('10')
-
-def decoderelhumid(bv, validate=False):
-    return int(bv[164:171])
-
-def decodedewpoint(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[171:181]))/Decimal('10')
-
-def decodeairpressure(bv, validate=False):
-    return Decimal(int(bv[181:190]))/Decimal('1')+Decimal('800')
-
-def decodeairpressuretrend(bv, validate=False):
-    return int(bv[190:192])
-
-def decodehorizvis(bv, validate=False):
-    return Decimal(int(bv[192:200]))/Decimal('10')
-
-def decodewaterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[200:209]))/Decimal('10')
-
-def decodewaterleveltrend(bv, validate=False):
-    return int(bv[209:211])
-
-def decodesurfcurspeed(bv, validate=False):
-    return Decimal(int(bv[211:219]))/Decimal('10')
-
-def decodesurfcurdir(bv, validate=False):
-    return int(bv[219:228])
-
-def decodecurspeed2(bv, validate=False):
-    return Decimal(int(bv[228:236]))/Decimal('10')
-
-def decodecurdir2(bv, validate=False):
-    return int(bv[236:245])
-
-def decodecurlevel2(bv, validate=False):
-    return int(bv[245:250])
-
-def decodecurspeed3(bv, validate=False):
-    return Decimal(int(bv[250:258]))/Decimal('10')
-
-def decodecurdir3(bv, validate=False):
-    return int(bv[258:267])
-
-def decodecurlevel3(bv, validate=False):
-    return int(bv[267:272])
-
-def decodesigwaveheight(bv, validate=False):
-    return Decimal(int(bv[272:280]))/Decimal('10')
-
-def decodewaveperiod(bv, validate=False):
-    return int(bv[280:286])
-
-def decodewavedir(bv, validate=False):
-    return int(bv[286:295])
-
-def decodeswellheight(bv, validate=False):
-    return Decimal(int(bv[295:303]))/Decimal('10')
-
-def decodeswellperiod(bv, validate=False):
-    return int(bv[303:309])
-
-def decodeswelldir(bv, validate=False):
-    return int(bv[309:318])
-
-def decodeseastate(bv, validate=False):
-    return int(bv[318:322])
-
-def decodewatertemp(bv, validate=False):
-    return Decimal(int(bv[322:332]))/Decimal('10')+Decimal('-10')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(56,24)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('60000')
+    if 'float' == numeric: return val/60000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(80,25)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('60000')
+    if 'float' == numeric: return val/60000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(105,5)
+
+def decodehour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(110,5)
+
+def decodemin(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(115,6)
+
+def decodeavewind(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(121,7)
+
+def decodewindgust(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(128,7)
+
+def decodewinddir(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(135,9)
+
+def decodewindgustdir(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(144,9)
+
+def decodeairtemp(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(153,11)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decoderelhumid(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(164,7)
+
+def decodedewpoint(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(171,10)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeairpressure(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(181,9)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('1')+Decimal('800')
+    if 'float' == numeric: return val/1.0+800.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeairpressuretrend(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(190,2)
+
+def decodehorizvis(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(192,8)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewaterlevel(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(200,9)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewaterleveltrend(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(209,2)
+
+def decodesurfcurspeed(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(211,8)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodesurfcurdir(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(219,9)
+
+def decodecurspeed2(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(228,8)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodecurdir2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(236,9)
+
+def decodecurlevel2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(245,5)
+
+def decodecurspeed3(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(250,8)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodecurdir3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(258,9)
+
+def decodecurlevel3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(267,5)
+
+def decodesigwaveheight(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(272,8)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewaveperiod(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(280,6)
+
+def decodewavedir(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(286,9)
+
+def decodeswellheight(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(295,8)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeswellperiod(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(303,6)
+
+def decodeswelldir(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(309,9)
+
+def decodeseastate(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(318,4)
+
+def decodewatertemp(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(322,10)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')+Decimal('-10')
+    if 'float' == numeric: return val/10.0+-10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodepreciptype(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(332,3)
+
+def decodesalinity(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(335,9)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodeice(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(344,2)
+
+def decodeSpare2(bv, validate=False, numeric='decimal'):
+    return 0
 
-def decodepreciptype(bv, validate=False):
-    return int(bv[332:335])
 
-def decodesalinity(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[335:344]))/Decimal('10')
+class View(object):
+    '''Lazy view of a imo_met_hydro message.
 
-def decodeice(bv, validate=False):
-    return int(bv[344:346])
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
 
-def decodeSpare2(bv, validate=False):
-    return 0
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fid','_latitude','_longitude','_day','_hour','_min','_avewind','_windgust','_winddir','_windgustdir','_airtemp','_relhumid','_dewpoint','_airpressure','_airpressuretrend','_horizvis','_waterlevel','_waterleveltrend','_surfcurspeed','_surfcurdir','_curspeed2','_curdir2','_curlevel2','_curspeed3','_curdir3','_curlevel3','_sigwaveheight','_waveperiod','_wavedir','_swellheight','_swellperiod','_swelldir','_seastate','_watertemp','_preciptype','_salinity','_ice','_Spare2')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def latitude(self):
+        try: return self._latitude
+        except AttributeError: pass
+        self._latitude = decodelatitude(self.bits, numeric=self.numeric)
+        return self._latitude
+
+    @property
+    def longitude(self):
+        try: return self._longitude
+        except AttributeError: pass
+        self._longitude = decodelongitude(self.bits, numeric=self.numeric)
+        return self._longitude
+
+    @property
+    def day(self):
+        try: return self._day
+        except AttributeError: pass
+        self._day = decodeday(self.bits)
+        return self._day
+
+    @property
+    def hour(self):
+        try: return self._hour
+        except AttributeError: pass
+        self._hour = decodehour(self.bits)
+        return self._hour
+
+    @property
+    def min(self):
+        try: return self._min
+        except AttributeError: pass
+        self._min = decodemin(self.bits)
+        return self._min
+
+    @property
+    def avewind(self):
+        try: return self._avewind
+        except AttributeError: pass
+        self._avewind = decodeavewind(self.bits)
+        return self._avewind
+
+    @property
+    def windgust(self):
+        try: return self._windgust
+        except AttributeError: pass
+        self._windgust = decodewindgust(self.bits)
+        return self._windgust
+
+    @property
+    def winddir(self):
+        try: return self._winddir
+        except AttributeError: pass
+        self._winddir = decodewinddir(self.bits)
+        return self._winddir
+
+    @property
+    def windgustdir(self):
+        try: return self._windgustdir
+        except AttributeError: pass
+        self._windgustdir = decodewindgustdir(self.bits)
+        return self._windgustdir
+
+    @property
+    def airtemp(self):
+        try: return self._airtemp
+        except AttributeError: pass
+        self._airtemp = decodeairtemp(self.bits, numeric=self.numeric)
+        return self._airtemp
+
+    @property
+    def relhumid(self):
+        try: return self._relhumid
+        except AttributeError: pass
+        self._relhumid = decoderelhumid(self.bits)
+        return self._relhumid
+
+    @property
+    def dewpoint(self):
+        try: return self._dewpoint
+        except AttributeError: pass
+        self._dewpoint = decodedewpoint(self.bits, numeric=self.numeric)
+        return self._dewpoint
+
+    @property
+    def airpressure(self):
+        try: return self._airpressure
+        except AttributeError: pass
+        self._airpressure = decodeairpressure(self.bits, numeric=self.numeric)
+        return self._airpressure
+
+    @property
+    def airpressuretrend(self):
+        try: return self._airpressuretrend
+        except AttributeError: pass
+        self._airpressuretrend = decodeairpressuretrend(self.bits)
+        return self._airpressuretrend
+
+    @property
+    def horizvis(self):
+        try: return self._horizvis
+        except AttributeError: pass
+        self._horizvis = decodehorizvis(self.bits, numeric=self.numeric)
+        return self._horizvis
+
+    @property
+    def waterlevel(self):
+        try: return self._waterlevel
+        except AttributeError: pass
+        self._waterlevel = decodewaterlevel(self.bits, numeric=self.numeric)
+        return self._waterlevel
+
+    @property
+    def waterleveltrend(self):
+        try: return self._waterleveltrend
+        except AttributeError: pass
+        self._waterleveltrend = decodewaterleveltrend(self.bits)
+        return self._waterleveltrend
+
+    @property
+    def surfcurspeed(self):
+        try: return self._surfcurspeed
+        except AttributeError: pass
+        self._surfcurspeed = decodesurfcurspeed(self.bits, numeric=self.numeric)
+        return self._surfcurspeed
+
+    @property
+    def surfcurdir(self):
+        try: return self._surfcurdir
+        except AttributeError: pass
+        self._surfcurdir = decodesurfcurdir(self.bits)
+        return self._surfcurdir
+
+    @property
+    def curspeed2(self):
+        try: return self._curspeed2
+        except AttributeError: pass
+        self._curspeed2 = decodecurspeed2(self.bits, numeric=self.numeric)
+        return self._curspeed2
+
+    @property
+    def curdir2(self):
+        try: return self._curdir2
+        except AttributeError: pass
+        self._curdir2 = decodecurdir2(self.bits)
+        return self._curdir2
+
+    @property
+    def curlevel2(self):
+        try: return self._curlevel2
+        except AttributeError: pass
+        self._curlevel2 = decodecurlevel2(self.bits)
+        return self._curlevel2
+
+    @property
+    def curspeed3(self):
+        try: return self._curspeed3
+        except AttributeError: pass
+        self._curspeed3 = decodecurspeed3(self.bits, numeric=self.numeric)
+        return self._curspeed3
+
+    @property
+    def curdir3(self):
+        try: return self._curdir3
+        except AttributeError: pass
+        self._curdir3 = decodecurdir3(self.bits)
+        return self._curdir3
+
+    @property
+    def curlevel3(self):
+        try: return self._curlevel3
+        except AttributeError: pass
+        self._curlevel3 = decodecurlevel3(self.bits)
+        return self._curlevel3
+
+    @property
+    def sigwaveheight(self):
+        try: return self._sigwaveheight
+        except AttributeError: pass
+        self._sigwaveheight = decodesigwaveheight(self.bits, numeric=self.numeric)
+        return self._sigwaveheight
+
+    @property
+    def waveperiod(self):
+        try: return self._waveperiod
+        except AttributeError: pass
+        self._waveperiod = decodewaveperiod(self.bits)
+        return self._waveperiod
+
+    @property
+    def wavedir(self):
+        try: return self._wavedir
+        except AttributeError: pass
+        self._wavedir = decodewavedir(self.bits)
+        return self._wavedir
+
+    @property
+    def swellheight(self):
+        try: return self._swellheight
+        except AttributeError: pass
+        self._swellheight = decodeswellheight(self.bits, numeric=self.numeric)
+        return self._swellheight
+
+    @property
+    def swellperiod(self):
+        try: return self._swellperiod
+        except AttributeError: pass
+        self._swellperiod = decodeswellperiod(self.bits)
+        return self._swellperiod
+
+    @property
+    def swelldir(self):
+        try: return self._swelldir
+        except AttributeError: pass
+        self._swelldir = decodeswelldir(self.bits)
+        return self._swelldir
+
+    @property
+    def seastate(self):
+        try: return self._seastate
+        except AttributeError: pass
+        self._seastate = decodeseastate(self.bits)
+        return self._seastate
+
+    @property
+    def watertemp(self):
+        try: return self._watertemp
+        except AttributeError: pass
+        self._watertemp = decodewatertemp(self.bits, numeric=self.numeric)
+        return self._watertemp
+
+    @property
+    def preciptype(self):
+        try: return self._preciptype
+        except AttributeError: pass
+        self._preciptype = decodepreciptype(self.bits)
+        return self._preciptype
+
+    @property
+    def salinity(self):
+        try: return self._salinity
+        except AttributeError: pass
+        self._salinity = decodesalinity(self.bits, numeric=self.numeric)
+        return self._salinity
+
+    @property
+    def ice(self):
+        try: return self._ice
+        except AttributeError: pass
+        self._ice = decodeice(self.bits)
+        return self._ice
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
 
 
 def printHtml(params, out=sys.stdout):
@@ -1411,6 +1876,127 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('imo_met_hydro', fieldListPostgres+tuple(extraFields),
+                        geometry=('Position',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('imo_met_hydro', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        sqlhelp.geometryWkt('POINT',get('latitude'),get('longitude')),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        get('avewind'),
+                        get('windgust'),
+                        get('winddir'),
+                        get('windgustdir'),
+                        sqlhelp.toFloat(get('airtemp')),
+                        get('relhumid'),
+                        sqlhelp.toFloat(get('dewpoint')),
+                        sqlhelp.toFloat(get('airpressure')),
+                        get('airpressuretrend'),
+                        sqlhelp.toFloat(get('horizvis')),
+                        sqlhelp.toFloat(get('waterlevel')),
+                        get('waterleveltrend'),
+                        sqlhelp.toFloat(get('surfcurspeed')),
+                        get('surfcurdir'),
+                        sqlhelp.toFloat(get('curspeed2')),
+                        get('curdir2'),
+                        get('curlevel2'),
+                        sqlhelp.toFloat(get('curspeed3')),
+                        get('curdir3'),
+                        get('curlevel3'),
+                        sqlhelp.toFloat(get('sigwaveheight')),
+                        get('waveperiod'),
+                        get('wavedir'),
+                        sqlhelp.toFloat(get('swellheight')),
+                        get('swellperiod'),
+                        get('swelldir'),
+                        get('seastate'),
+                        sqlhelp.toFloat(get('watertemp')),
+                        get('preciptype'),
+                        sqlhelp.toFloat(get('salinity')),
+                        get('ice'),
+                        get('Spare2'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        sqlhelp.toFloat(get('latitude')),
+                        sqlhelp.toFloat(get('longitude')),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        get('avewind'),
+                        get('windgust'),
+                        get('winddir'),
+                        get('windgustdir'),
+                        sqlhelp.toFloat(get('airtemp')),
+                        get('relhumid'),
+                        sqlhelp.toFloat(get('dewpoint')),
+                        sqlhelp.toFloat(get('airpressure')),
+                        get('airpressuretrend'),
+                        sqlhelp.toFloat(get('horizvis')),
+                        sqlhelp.toFloat(get('waterlevel')),
+                        get('waterleveltrend'),
+                        sqlhelp.toFloat(get('surfcurspeed')),
+                        get('surfcurdir'),
+                        sqlhelp.toFloat(get('curspeed2')),
+                        get('curdir2'),
+                        get('curlevel2'),
+                        sqlhelp.toFloat(get('curspeed3')),
+                        get('curdir3'),
+                        get('curlevel3'),
+                        sqlhelp.toFloat(get('sigwaveheight')),
+                        get('waveperiod'),
+                        get('wavedir'),
+                        sqlhelp.toFloat(get('swellheight')),
+                        get('swellperiod'),
+                        get('swelldir'),
+                        get('seastate'),
+                        sqlhelp.toFloat(get('watertemp')),
+                        get('preciptype'),
+                        sqlhelp.toFloat(get('salinity')),
+                        get('ice'),
+                        get('Spare2'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1653,6 +2239,24 @@ class Testimo_met_hydro(unittest.TestCase):
         self.failUnlessEqual(r['ice'],params['ice'])
         self.failUnlessEqual(r['Spare2'],params['Spare2'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('latitude', 'longitude', 'airtemp', 'dewpoint', 'airpressure', 'horizvis', 'waterlevel', 'surfcurspeed', 'curspeed2', 'curspeed3', 'sigwaveheight', 'swellheight', 'watertemp', 'salinity'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "imo_met_hydro" AIS message')
@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -125,51 +126,51 @@ def encode(params, validate=False):
       - spare2(uint): Padding out the slot (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=1),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=11),6))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|0x1
+    v = (v<<6)|0xb
     if 'reason' in params:
-        bvList.append(aisstring.encode(params['reason'],120))
+        v = (v<<120)|(int(aisstring.encode(params['reason'],120)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
+        v = (v<<120)|int(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
     if 'from' in params:
-        bvList.append(aisstring.encode(params['from'],120))
+        v = (v<<120)|(int(aisstring.encode(params['from'],120)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
+        v = (v<<120)|int(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
     if 'to' in params:
-        bvList.append(aisstring.encode(params['to'],120))
+        v = (v<<120)|(int(aisstring.encode(params['to'],120)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
+        v = (v<<120)|int(aisstring.encode('@@@@@@@@@@@@@@@@@@@@',120))
     if 'radius' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['radius']),10))
+        v = (v<<10)|(params['radius']&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=1001),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['unit']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['closingday']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['closingmonth']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fromhour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['frommin']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['today']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tomonth']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tohour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tomin']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<10)|0x3e9
+    v = (v<<2)|(params['unit']&0x3)
+    v = (v<<5)|(params['closingday']&0x1f)
+    v = (v<<4)|(params['closingmonth']&0xf)
+    v = (v<<5)|(params['fromhour']&0x1f)
+    v = (v<<6)|(params['frommin']&0x3f)
+    v = (v<<5)|(params['today']&0x1f)
+    v = (v<<4)|(params['tomonth']&0xf)
+    v = (v<<5)|(params['tohour']&0x1f)
+    v = (v<<6)|(params['tomin']&0x3f)
+    v = (v<<4)|0x0
+
+    return bitreader.BitReader(v,472)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a imo_fairway_closed message.
 
     Fields in params:
@@ -193,100 +194,295 @@ def decode(bv, validate=False):
       - tohour(uint): To LT hour (appr)
       - tomin(uint): To LT minute (appr)
       - spare2(uint): Padding out the slot (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 472:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['reason']=decodereason(bits,numeric=numeric)
+        r['from']=decodefrom(bits,numeric=numeric)
+        r['to']=decodeto(bits,numeric=numeric)
+        r['radius']=decoderadius(bits,numeric=numeric)
+        r['unit']=decodeunit(bits,numeric=numeric)
+        r['closingday']=decodeclosingday(bits,numeric=numeric)
+        r['closingmonth']=decodeclosingmonth(bits,numeric=numeric)
+        r['fromhour']=decodefromhour(bits,numeric=numeric)
+        r['frommin']=decodefrommin(bits,numeric=numeric)
+        r['today']=decodetoday(bits,numeric=numeric)
+        r['tomonth']=decodetomonth(bits,numeric=numeric)
+        r['tohour']=decodetohour(bits,numeric=numeric)
+        r['tomin']=decodetomin(bits,numeric=numeric)
+        r['spare2']=decodespare2(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 472: v >>= n-472
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>464)&0x3)
+    r['UserID']=int((v>>434)&0x3fffffff)
     r['Spare']=0
     r['dac']=1
     r['fid']=11
-    r['reason']=aisstring.decode(bv[56:176])
-    r['from']=aisstring.decode(bv[176:296])
-    r['to']=aisstring.decode(bv[296:416])
-    r['radius']=int(bv[416:426])
-    r['unit']=int(bv[426:428])
-    r['closingday']=int(bv[428:433])
-    r['closingmonth']=int(bv[433:437])
-    r['fromhour']=int(bv[437:442])
-    r['frommin']=int(bv[442:448])
-    r['today']=int(bv[448:453])
-    r['tomonth']=int(bv[453:457])
-    r['tohour']=int(bv[457:462])
-    r['tomin']=int(bv[462:468])
+    r['reason']=aisstring.decode(bits[56:176])
+    r['from']=aisstring.decode(bits[176:296])
+    r['to']=aisstring.decode(bits[296:416])
+    r['radius']=int((v>>46)&0x3ff)
+    r['unit']=int((v>>44)&0x3)
+    r['closingday']=int((v>>39)&0x1f)
+    r['closingmonth']=int((v>>35)&0xf)
+    r['fromhour']=int((v>>30)&0x1f)
+    r['frommin']=int((v>>24)&0x3f)
+    r['today']=int((v>>19)&0x1f)
+    r['tomonth']=int((v>>15)&0xf)
+    r['tohour']=int((v>>10)&0x1f)
+    r['tomin']=int((v>>4)&0x3f)
     r['spare2']=0
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodereason(bv, validate=False):
-    return aisstring.decode(bv[56:176])
+def decodereason(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[56:176])
 
-def decodefrom(bv, validate=False):
-    return aisstring.decode(bv[176:296])
+def decodefrom(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[176:296])
 
-def decodeto(bv, validate=False):
-    return aisstring.decode(bv[296:416])
+def decodeto(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[296:416])
 
-def decoderadius(bv, validate=False):
-    return int(bv[416:426])
+def decoderadius(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(416,10)
 
-def decodeunit(bv, validate=False):
-    return int(bv[426:428])
+def decodeunit(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(426,2)
 
-def decodeclosingday(bv, validate=False):
-    return int(bv[428:433])
+def decodeclosingday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(428,5)
 
-def decodeclosingmonth(bv, validate=False):
-    return int(bv[433:437])
+def decodeclosingmonth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(433,4)
 
-def decodefromhour(bv, validate=False):
-    return int(bv[437:442])
+def decodefromhour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(437,5)
 
-def decodefrommin(bv, validate=False):
-    return int(bv[442:448])
+def decodefrommin(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(442,6)
 
-def decodetoday(bv, validate=False):
-    return int(bv[448:453])
+def decodetoday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(448,5)
 
-def decodetomonth(bv, validate=False):
-    return int(bv[453:457])
+def decodetomonth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(453,4)
 
-def decodetohour(bv, validate=False):
-    return int(bv[457:462])
+def decodetohour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(457,5)
 
-def decodetomin(bv, validate=False):
-    return int(bv[462:468])
+def decodetomin(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(462,6)
 
-def decodespare2(bv, validate=False):
+def decodespare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a imo_fairway_closed message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fid','_reason','_from','_to','_radius','_unit','_closingday','_closingmonth','_fromhour','_frommin','_today','_tomonth','_tohour','_tomin','_spare2')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, {'from': 'from_'}.get(fieldName,fieldName))
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def reason(self):
+        try: return self._reason
+        except AttributeError: pass
+        self._reason = decodereason(self.bits)
+        return self._reason
+
+    @property
+    def from_(self):
+        try: return self._from
+        except AttributeError: pass
+        self._from = decodefrom(self.bits)
+        return self._from
+
+    @property
+    def to(self):
+        try: return self._to
+        except AttributeError: pass
+        self._to = decodeto(self.bits)
+        return self._to
+
+    @property
+    def radius(self):
+        try: return self._radius
+        except AttributeError: pass
+        self._radius = decoderadius(self.bits)
+        return self._radius
+
+    @property
+    def unit(self):
+        try: return self._unit
+        except AttributeError: pass
+        self._unit = decodeunit(self.bits)
+        return self._unit
+
+    @property
+    def closingday(self):
+        try: return self._closingday
+        except AttributeError: pass
+        self._closingday = decodeclosingday(self.bits)
+        return self._closingday
+
+    @property
+    def closingmonth(self):
+        try: return self._closingmonth
+        except AttributeError: pass
+        self._closingmonth = decodeclosingmonth(self.bits)
+        return self._closingmonth
+
+    @property
+    def fromhour(self):
+        try: return self._fromhour
+        except AttributeError: pass
+        self._fromhour = decodefromhour(self.bits)
+        return self._fromhour
+
+    @property
+    def frommin(self):
+        try: return self._frommin
+        except AttributeError: pass
+        self._frommin = decodefrommin(self.bits)
+        return self._frommin
+
+    @property
+    def today(self):
+        try: return self._today
+        except AttributeError: pass
+        self._today = decodetoday(self.bits)
+        return self._today
+
+    @property
+    def tomonth(self):
+        try: return self._tomonth
+        except AttributeError: pass
+        self._tomonth = decodetomonth(self.bits)
+        return self._tomonth
+
+    @property
+    def tohour(self):
+        try: return self._tohour
+        except AttributeError: pass
+        self._tohour = decodetohour(self.bits)
+        return self._tohour
+
+    @property
+    def tomin(self):
+        try: return self._tomin
+        except AttributeError: pass
+        self._tomin = decodetomin(self.bits)
+        return self._tomin
+
+    @property
+    def spare2(self):
+        try: return self._spare2
+        except AttributeError: pass
+        self._spare2 = decodespare2(self.bits)
+        return self._spare2
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>imo_fairway_closed</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -703,6 +899,82 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('imo_fairway_closed', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('imo_fairway_closed', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('reason'),
+                        get('from'),
+                        get('to'),
+                        get('radius'),
+                        get('unit'),
+                        get('closingday'),
+                        get('closingmonth'),
+                        get('fromhour'),
+                        get('frommin'),
+                        get('today'),
+                        get('tomonth'),
+                        get('tohour'),
+                        get('tomin'),
+                        get('spare2'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('reason'),
+                        get('from'),
+                        get('to'),
+                        get('radius'),
+                        get('unit'),
+                        get('closingday'),
+                        get('closingmonth'),
+                        get('fromhour'),
+                        get('frommin'),
+                        get('today'),
+                        get('tomonth'),
+                        get('tohour'),
+                        get('tomin'),
+                        get('spare2'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -853,6 +1125,14 @@ class Testimo_fairway_closed(unittest.TestCase):
         self.failUnlessEqual(r['tomin'],params['tomin'])
         self.failUnlessEqual(r['spare2'],params['spare2'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "imo_fairway_closed" AIS message')
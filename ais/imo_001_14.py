@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -179,133 +180,132 @@ def encode(params, validate=False):
       - curspeed3(udecimal): Current speed
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=6),6))
+    v = 0
+    v = (v<<6)|0x6
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['SeqNum']),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['DestinationID']),30))
-    if params["RetransmitFlag"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),1))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=1),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=11),6))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|(params['SeqNum']&0x3)
+    v = (v<<30)|(params['DestinationID']&0x3fffffff)
+    v = (v<<1)|(1 if params['RetransmitFlag'] else 0)
+    v = (v<<1)|0x0
+    v = (v<<10)|0x1
+    v = (v<<6)|0xb
     if 'month' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['month']),4))
+        v = (v<<4)|(params['month']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<4)|0x0
     if 'day' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['day']),5))
+        v = (v<<5)|(params['day']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),5))
+        v = (v<<5)|0x0
     if 'window1_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['window1_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['window1_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'window1_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['window1_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['window1_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'fromhour1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fromhour1']),5))
+        v = (v<<5)|(params['fromhour1']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'frommin1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['frommin1']),6))
+        v = (v<<6)|(params['frommin1']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'tohour1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tohour1']),5))
+        v = (v<<5)|(params['tohour1']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'tomin1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tomin1']),6))
+        v = (v<<6)|(params['tomin1']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'curdir1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['curdir1']),9))
+        v = (v<<9)|(params['curdir1']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=360),9))
+        v = (v<<9)|0x168
     if 'curspeed1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['curspeed1'])*Decimal('10')))),7))
+        v = (v<<7)|(int(Decimal(params['curspeed1'])*Decimal('10'))&0x7f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(127)),7))
+        v = (v<<7)|0x7f
     if 'window2_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['window2_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['window2_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'window2_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['window2_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['window2_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'fromhour2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fromhour2']),5))
+        v = (v<<5)|(params['fromhour2']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'frommin2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['frommin2']),6))
+        v = (v<<6)|(params['frommin2']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'tohour2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tohour2']),5))
+        v = (v<<5)|(params['tohour2']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'tomin2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tomin2']),6))
+        v = (v<<6)|(params['tomin2']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'curdir2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['curdir2']),9))
+        v = (v<<9)|(params['curdir2']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=360),9))
+        v = (v<<9)|0x168
     if 'curspeed2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['curspeed2'])*Decimal('10')))),7))
+        v = (v<<7)|(int(Decimal(params['curspeed2'])*Decimal('10'))&0x7f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(127)),7))
+        v = (v<<7)|0x7f
     if 'window3_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['window3_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['window3_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'window3_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['window3_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['window3_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'fromhour3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['fromhour3']),5))
+        v = (v<<5)|(params['fromhour3']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'frommin3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['frommin3']),6))
+        v = (v<<6)|(params['frommin3']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'tohour3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tohour3']),5))
+        v = (v<<5)|(params['tohour3']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=24),5))
+        v = (v<<5)|0x18
     if 'tomin3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['tomin3']),6))
+        v = (v<<6)|(params['tomin3']&0x3f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=60),6))
+        v = (v<<6)|0x3c
     if 'curdir3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['curdir3']),9))
+        v = (v<<9)|(params['curdir3']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=360),9))
+        v = (v<<9)|0x168
     if 'curspeed3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['curspeed3'])*Decimal('10')))),7))
+        v = (v<<7)|(int(Decimal(params['curspeed3'])*Decimal('10'))&0x7f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(127)),7))
+        v = (v<<7)|0x7f
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,376)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a imo_tidal_window message.
 
     Fields in params:
@@ -344,158 +344,528 @@ def decode(bv, validate=False):
       - tomin3(uint): To UTC minute
       - curdir3(uint): Current direction
       - curspeed3(udecimal): Current speed
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 376:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['SeqNum']=decodeSeqNum(bits,numeric=numeric)
+        r['DestinationID']=decodeDestinationID(bits,numeric=numeric)
+        r['RetransmitFlag']=decodeRetransmitFlag(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['month']=decodemonth(bits,numeric=numeric)
+        r['day']=decodeday(bits,numeric=numeric)
+        r['window1_longitude']=decodewindow1_longitude(bits,numeric=numeric)
+        r['window1_latitude']=decodewindow1_latitude(bits,numeric=numeric)
+        r['fromhour1']=decodefromhour1(bits,numeric=numeric)
+        r['frommin1']=decodefrommin1(bits,numeric=numeric)
+        r['tohour1']=decodetohour1(bits,numeric=numeric)
+        r['tomin1']=decodetomin1(bits,numeric=numeric)
+        r['curdir1']=decodecurdir1(bits,numeric=numeric)
+        r['curspeed1']=decodecurspeed1(bits,numeric=numeric)
+        r['window2_longitude']=decodewindow2_longitude(bits,numeric=numeric)
+        r['window2_latitude']=decodewindow2_latitude(bits,numeric=numeric)
+        r['fromhour2']=decodefromhour2(bits,numeric=numeric)
+        r['frommin2']=decodefrommin2(bits,numeric=numeric)
+        r['tohour2']=decodetohour2(bits,numeric=numeric)
+        r['tomin2']=decodetomin2(bits,numeric=numeric)
+        r['curdir2']=decodecurdir2(bits,numeric=numeric)
+        r['curspeed2']=decodecurspeed2(bits,numeric=numeric)
+        r['window3_longitude']=decodewindow3_longitude(bits,numeric=numeric)
+        r['window3_latitude']=decodewindow3_latitude(bits,numeric=numeric)
+        r['fromhour3']=decodefromhour3(bits,numeric=numeric)
+        r['frommin3']=decodefrommin3(bits,numeric=numeric)
+        r['tohour3']=decodetohour3(bits,numeric=numeric)
+        r['tomin3']=decodetomin3(bits,numeric=numeric)
+        r['curdir3']=decodecurdir3(bits,numeric=numeric)
+        r['curspeed3']=decodecurspeed3(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 376: v >>= n-376
     r = {}
     r['MessageID']=6
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
-    r['SeqNum']=int(bv[38:40])
-    r['DestinationID']=int(bv[40:70])
-    r['RetransmitFlag']=bool(int(bv[70:71]))
+    r['RepeatIndicator']=int((v>>368)&0x3)
+    r['UserID']=int((v>>338)&0x3fffffff)
+    r['SeqNum']=int((v>>336)&0x3)
+    r['DestinationID']=int((v>>306)&0x3fffffff)
+    r['RetransmitFlag']=bool((v>>305)&0x1)
     r['Spare']=0
     r['dac']=1
     r['fid']=11
-    r['month']=int(bv[88:92])
-    r['day']=int(bv[92:97])
-    r['window1_longitude']=Decimal(binary.signedIntFromBV(bv[97:125]))/Decimal('600000')
-    r['window1_latitude']=Decimal(binary.signedIntFromBV(bv[125:152]))/Decimal('600000')
-    r['fromhour1']=int(bv[152:157])
-    r['frommin1']=int(bv[157:163])
-    r['tohour1']=int(bv[163:168])
-    r['tomin1']=int(bv[168:174])
-    r['curdir1']=int(bv[174:183])
-    r['curspeed1']=Decimal(int(bv[183:190]))/Decimal('10')
-    r['window2_longitude']=Decimal(binary.signedIntFromBV(bv[190:218]))/Decimal('600000')
-    r['window2_latitude']=Decimal(binary.signedIntFromBV(bv[218:245]))/Decimal('600000')
-    r['fromhour2']=int(bv[245:250])
-    r['frommin2']=int(bv[250:256])
-    r['tohour2']=int(bv[256:261])
-    r['tomin2']=int(bv[261:267])
-    r['curdir2']=int(bv[267:276])
-    r['curspeed2']=Decimal(int(bv[276:283]))/Decimal('10')
-    r['window3_longitude']=Decimal(binary.signedIntFromBV(bv[283:311]))/Decimal('600000')
-    r['window3_latitude']=Decimal(binary.signedIntFromBV(bv[311:338]))/Decimal('600000')
-    r['fromhour3']=int(bv[338:343])
-    r['frommin3']=int(bv[343:349])
-    r['tohour3']=int(bv[349:354])
-    r['tomin3']=int(bv[354:360])
-    r['curdir3']=int(bv[360:369])
-    r['curspeed3']=Decimal(int(bv[369:376]))/Decimal('10')
+    r['month']=int((v>>284)&0xf)
+    r['day']=int((v>>279)&0x1f)
+    r['fromhour1']=int((v>>219)&0x1f)
+    r['frommin1']=int((v>>213)&0x3f)
+    r['tohour1']=int((v>>208)&0x1f)
+    r['tomin1']=int((v>>202)&0x3f)
+    r['curdir1']=int((v>>193)&0x1ff)
+    r['fromhour2']=int((v>>126)&0x1f)
+    r['frommin2']=int((v>>120)&0x3f)
+    r['tohour2']=int((v>>115)&0x1f)
+    r['tomin2']=int((v>>109)&0x3f)
+    r['curdir2']=int((v>>100)&0x1ff)
+    r['fromhour3']=int((v>>33)&0x1f)
+    r['frommin3']=int((v>>27)&0x3f)
+    r['tohour3']=int((v>>22)&0x1f)
+    r['tomin3']=int((v>>16)&0x3f)
+    r['curdir3']=int((v>>7)&0x1ff)
+    if 'decimal' == numeric:
+        r['window1_longitude']=Decimal((((v>>251)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['window1_latitude']=Decimal((((v>>224)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['curspeed1']=Decimal((v>>186)&0x7f)/Decimal('10')
+        r['window2_longitude']=Decimal((((v>>158)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['window2_latitude']=Decimal((((v>>131)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['curspeed2']=Decimal((v>>93)&0x7f)/Decimal('10')
+        r['window3_longitude']=Decimal((((v>>65)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['window3_latitude']=Decimal((((v>>38)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['curspeed3']=Decimal(v&0x7f)/Decimal('10')
+    elif 'float' == numeric:
+        r['window1_longitude']=((((v>>251)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['window1_latitude']=((((v>>224)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['curspeed1']=((v>>186)&0x7f)/10.0
+        r['window2_longitude']=((((v>>158)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['window2_latitude']=((((v>>131)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['curspeed2']=((v>>93)&0x7f)/10.0
+        r['window3_longitude']=((((v>>65)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['window3_latitude']=((((v>>38)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['curspeed3']=(v&0x7f)/10.0
+    elif 'raw' == numeric:
+        r['window1_longitude']=int((((v>>251)&0xfffffff)^0x8000000)-0x8000000)
+        r['window1_latitude']=int((((v>>224)&0x7ffffff)^0x4000000)-0x4000000)
+        r['curspeed1']=int((v>>186)&0x7f)
+        r['window2_longitude']=int((((v>>158)&0xfffffff)^0x8000000)-0x8000000)
+        r['window2_latitude']=int((((v>>131)&0x7ffffff)^0x4000000)-0x4000000)
+        r['curspeed2']=int((v>>93)&0x7f)
+        r['window3_longitude']=int((((v>>65)&0xfffffff)^0x8000000)-0x8000000)
+        r['window3_latitude']=int((((v>>38)&0x7ffffff)^0x4000000)-0x4000000)
+        r['curspeed3']=int(v&0x7f)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 6
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSeqNum(bv, validate=False):
-    return int(bv[38:40])
+def decodeSeqNum(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(38,2)
 
-def decodeDestinationID(bv, validate=False):
-    return int(bv[40:70])
+def decodeDestinationID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(40,30)
 
-def decodeRetransmitFlag(bv, validate=False):
-    return bool(int(bv[70:71]))
+def decodeRetransmitFlag(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(70,1))
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 11
 
-def decodemonth(bv, validate=False):
-    return int(bv[88:92])
+def decodemonth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(88,4)
+
+def decodeday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(92,5)
+
+def decodewindow1_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(97,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewindow1_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(125,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodefromhour1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(152,5)
+
+def decodefrommin1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(157,6)
+
+def decodetohour1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(163,5)
+
+def decodetomin1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(168,6)
+
+def decodecurdir1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(174,9)
+
+def decodecurspeed1(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(183,7)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewindow2_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(190,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewindow2_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(218,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodefromhour2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(245,5)
+
+def decodefrommin2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(250,6)
+
+def decodetohour2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(256,5)
+
+def decodetomin2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(261,6)
+
+def decodecurdir2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(267,9)
+
+def decodecurspeed2(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(276,7)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewindow3_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(283,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodewindow3_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(311,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodefromhour3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(338,5)
+
+def decodefrommin3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(343,6)
+
+def decodetohour3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(349,5)
+
+def decodetomin3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(354,6)
+
+def decodecurdir3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(360,9)
+
+def decodecurspeed3(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(369,7)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+
+class View(object):
+    '''Lazy view of a imo_tidal_window message.
 
-def decodeday(bv, validate=False):
-    return int(bv[92:97])
-
-def decodewindow1_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[97:125]))/Decimal('600000')
-
-def decodewindow1_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[125:152]))/Decimal('600000')
-
-def decodefromhour1(bv, validate=False):
-    return int(bv[152:157])
-
-def decodefrommin1(bv, validate=False):
-    return int(bv[157:163])
-
-def decodetohour1(bv, validate=False):
-    return int(bv[163:168])
-
-def decodetomin1(bv, validate=False):
-    return int(bv[168:174])
-
-def decodecurdir1(bv, validate=False):
-    return int(bv[174:183])
-
-def decodecurspeed1(bv, validate=False):
-    return Decimal(int(bv[183:190]))/Decimal('10')
-
-def decodewindow2_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[190:218]))/Decimal('600000')
-
-def decodewindow2_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[218:245]))/Decimal('600000')
-
-def decodefromhour2(bv, validate=False):
-    return int(bv[245:250])
-
-def decodefrommin2(bv, validate=False):
-    return int(bv[250:256])
-
-def decodetohour2(bv, validate=False):
-    return int(bv[256:261])
-
-def decodetomin2(bv, validate=False):
-    return int(bv[261:267])
-
-def decodecurdir2(bv, validate=False):
-    return int(bv[267:276])
-
-def decodecurspeed2(bv, validate=False):
-    return Decimal(int(bv[276:283]))/Decimal('10')
-
-def decodewindow3_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[283:311]))/Decimal('600000')
-
-def decodewindow3_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[311:338]))/Decimal('600000')
-
-def decodefromhour3(bv, validate=False):
-    return int(bv[338:343])
-
-def decodefrommin3(bv, validate=False):
-    return int(bv[343:349])
-
-def decodetohour3(bv, validate=False):
-    return int(bv[349:354])
-
-def decodetomin3(bv, validate=False):
-    return int(bv[354:360])
-
-def decodecurdir3(bv, validate=False):
-    return int(bv[360:369])
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
 
-def decodecurspeed3(bv, validate=False):
-    return Decimal(int(bv[369:376]))/Decimal('10')
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_SeqNum','_DestinationID','_RetransmitFlag','_Spare','_dac','_fid','_month','_day','_window1_longitude','_window1_latitude','_fromhour1','_frommin1','_tohour1','_tomin1','_curdir1','_curspeed1','_window2_longitude','_window2_latitude','_fromhour2','_frommin2','_tohour2','_tomin2','_curdir2','_curspeed2','_window3_longitude','_window3_latitude','_fromhour3','_frommin3','_tohour3','_tomin3','_curdir3','_curspeed3')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def SeqNum(self):
+        try: return self._SeqNum
+        except AttributeError: pass
+        self._SeqNum = decodeSeqNum(self.bits)
+        return self._SeqNum
+
+    @property
+    def DestinationID(self):
+        try: return self._DestinationID
+        except AttributeError: pass
+        self._DestinationID = decodeDestinationID(self.bits)
+        return self._DestinationID
+
+    @property
+    def RetransmitFlag(self):
+        try: return self._RetransmitFlag
+        except AttributeError: pass
+        self._RetransmitFlag = decodeRetransmitFlag(self.bits)
+        return self._RetransmitFlag
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def month(self):
+        try: return self._month
+        except AttributeError: pass
+        self._month = decodemonth(self.bits)
+        return self._month
+
+    @property
+    def day(self):
+        try: return self._day
+        except AttributeError: pass
+        self._day = decodeday(self.bits)
+        return self._day
+
+    @property
+    def window1_longitude(self):
+        try: return self._window1_longitude
+        except AttributeError: pass
+        self._window1_longitude = decodewindow1_longitude(self.bits, numeric=self.numeric)
+        return self._window1_longitude
+
+    @property
+    def window1_latitude(self):
+        try: return self._window1_latitude
+        except AttributeError: pass
+        self._window1_latitude = decodewindow1_latitude(self.bits, numeric=self.numeric)
+        return self._window1_latitude
+
+    @property
+    def fromhour1(self):
+        try: return self._fromhour1
+        except AttributeError: pass
+        self._fromhour1 = decodefromhour1(self.bits)
+        return self._fromhour1
+
+    @property
+    def frommin1(self):
+        try: return self._frommin1
+        except AttributeError: pass
+        self._frommin1 = decodefrommin1(self.bits)
+        return self._frommin1
+
+    @property
+    def tohour1(self):
+        try: return self._tohour1
+        except AttributeError: pass
+        self._tohour1 = decodetohour1(self.bits)
+        return self._tohour1
+
+    @property
+    def tomin1(self):
+        try: return self._tomin1
+        except AttributeError: pass
+        self._tomin1 = decodetomin1(self.bits)
+        return self._tomin1
+
+    @property
+    def curdir1(self):
+        try: return self._curdir1
+        except AttributeError: pass
+        self._curdir1 = decodecurdir1(self.bits)
+        return self._curdir1
+
+    @property
+    def curspeed1(self):
+        try: return self._curspeed1
+        except AttributeError: pass
+        self._curspeed1 = decodecurspeed1(self.bits, numeric=self.numeric)
+        return self._curspeed1
+
+    @property
+    def window2_longitude(self):
+        try: return self._window2_longitude
+        except AttributeError: pass
+        self._window2_longitude = decodewindow2_longitude(self.bits, numeric=self.numeric)
+        return self._window2_longitude
+
+    @property
+    def window2_latitude(self):
+        try: return self._window2_latitude
+        except AttributeError: pass
+        self._window2_latitude = decodewindow2_latitude(self.bits, numeric=self.numeric)
+        return self._window2_latitude
+
+    @property
+    def fromhour2(self):
+        try: return self._fromhour2
+        except AttributeError: pass
+        self._fromhour2 = decodefromhour2(self.bits)
+        return self._fromhour2
+
+    @property
+    def frommin2(self):
+        try: return self._frommin2
+        except AttributeError: pass
+        self._frommin2 = decodefrommin2(self.bits)
+        return self._frommin2
+
+    @property
+    def tohour2(self):
+        try: return self._tohour2
+        except AttributeError: pass
+        self._tohour2 = decodetohour2(self.bits)
+        return self._tohour2
+
+    @property
+    def tomin2(self):
+        try: return self._tomin2
+        except AttributeError: pass
+        self._tomin2 = decodetomin2(self.bits)
+        return self._tomin2
+
+    @property
+    def curdir2(self):
+        try: return self._curdir2
+        except AttributeError: pass
+        self._curdir2 = decodecurdir2(self.bits)
+        return self._curdir2
+
+    @property
+    def curspeed2(self):
+        try: return self._curspeed2
+        except AttributeError: pass
+        self._curspeed2 = decodecurspeed2(self.bits, numeric=self.numeric)
+        return self._curspeed2
+
+    @property
+    def window3_longitude(self):
+        try: return self._window3_longitude
+        except AttributeError: pass
+        self._window3_longitude = decodewindow3_longitude(self.bits, numeric=self.numeric)
+        return self._window3_longitude
+
+    @property
+    def window3_latitude(self):
+        try: return self._window3_latitude
+        except AttributeError: pass
+        self._window3_latitude = decodewindow3_latitude(self.bits, numeric=self.numeric)
+        return self._window3_latitude
+
+    @property
+    def fromhour3(self):
+        try: return self._fromhour3
+        except AttributeError: pass
+        self._fromhour3 = decodefromhour3(self.bits)
+        return self._fromhour3
+
+    @property
+    def frommin3(self):
+        try: return self._frommin3
+        except AttributeError: pass
+        self._frommin3 = decodefrommin3(self.bits)
+        return self._frommin3
+
+    @property
+    def tohour3(self):
+        try: return self._tohour3
+        except AttributeError: pass
+        self._tohour3 = decodetohour3(self.bits)
+        return self._tohour3
+
+    @property
+    def tomin3(self):
+        try: return self._tomin3
+        except AttributeError: pass
+        self._tomin3 = decodetomin3(self.bits)
+        return self._tomin3
+
+    @property
+    def curdir3(self):
+        try: return self._curdir3
+        except AttributeError: pass
+        self._curdir3 = decodecurdir3(self.bits)
+        return self._curdir3
+
+    @property
+    def curspeed3(self):
+        try: return self._curspeed3
+        except AttributeError: pass
+        self._curspeed3 = decodecurspeed3(self.bits, numeric=self.numeric)
+        return self._curspeed3
 
 
 def printHtml(params, out=sys.stdout):
@@ -1147,6 +1517,109 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('imo_tidal_window', fieldListPostgres+tuple(extraFields),
+                        geometry=('window1', 'window2', 'window3'), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('imo_tidal_window', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('SeqNum'),
+                        get('DestinationID'),
+                        get('RetransmitFlag'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('month'),
+                        get('day'),
+                        sqlhelp.geometryWkt('POINT',get('window1_longitude'),get('window1_latitude')),
+                        get('fromhour1'),
+                        get('frommin1'),
+                        get('tohour1'),
+                        get('tomin1'),
+                        get('curdir1'),
+                        sqlhelp.toFloat(get('curspeed1')),
+                        sqlhelp.geometryWkt('POINT',get('window2_longitude'),get('window2_latitude')),
+                        get('fromhour2'),
+                        get('frommin2'),
+                        get('tohour2'),
+                        get('tomin2'),
+                        get('curdir2'),
+                        sqlhelp.toFloat(get('curspeed2')),
+                        sqlhelp.geometryWkt('POINT',get('window3_longitude'),get('window3_latitude')),
+                        get('fromhour3'),
+                        get('frommin3'),
+                        get('tohour3'),
+                        get('tomin3'),
+                        get('curdir3'),
+                        sqlhelp.toFloat(get('curspeed3')),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('SeqNum'),
+                        get('DestinationID'),
+                        get('RetransmitFlag'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('month'),
+                        get('day'),
+                        sqlhelp.toFloat(get('window1_longitude')),
+                        sqlhelp.toFloat(get('window1_latitude')),
+                        get('fromhour1'),
+                        get('frommin1'),
+                        get('tohour1'),
+                        get('tomin1'),
+                        get('curdir1'),
+                        sqlhelp.toFloat(get('curspeed1')),
+                        sqlhelp.toFloat(get('window2_longitude')),
+                        sqlhelp.toFloat(get('window2_latitude')),
+                        get('fromhour2'),
+                        get('frommin2'),
+                        get('tohour2'),
+                        get('tomin2'),
+                        get('curdir2'),
+                        sqlhelp.toFloat(get('curspeed2')),
+                        sqlhelp.toFloat(get('window3_longitude')),
+                        sqlhelp.toFloat(get('window3_latitude')),
+                        get('fromhour3'),
+                        get('frommin3'),
+                        get('tohour3'),
+                        get('tomin3'),
+                        get('curdir3'),
+                        sqlhelp.toFloat(get('curspeed3')),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1357,6 +1830,24 @@ class Testimo_tidal_window(unittest.TestCase):
         self.failUnlessEqual(r['curdir3'],params['curdir3'])
         self.failUnlessAlmostEqual(r['curspeed3'],params['curspeed3'],1)
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('window1_longitude', 'window1_latitude', 'curspeed1', 'window2_longitude', 'window2_latitude', 'curspeed2', 'window3_longitude', 'window3_latitude', 'curspeed3'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "imo_tidal_window" AIS message')
@@ -26,6 +26,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -135,42 +136,42 @@ def encode(params, validate=False):
       - id4_i_have_no_idea(uint): One tide gauge measurement.  What are these bits for?  They do not seem to be specified (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=1),6))
-    bvList.append(aisstring.encode(params['country'],12))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id1_id']),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id1_sign']),1))
-    bvList.append(binary.bvFromSignedInt(int(Decimal(params['id1_waterlevel'])*Decimal('100')),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id2_id']),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id2_sign']),1))
-    bvList.append(binary.bvFromSignedInt(int(Decimal(params['id2_waterlevel'])*Decimal('100')),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id3_id']),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id3_sign']),1))
-    bvList.append(binary.bvFromSignedInt(int(Decimal(params['id3_waterlevel'])*Decimal('100')),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id4_id']),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['id4_sign']),1))
-    bvList.append(binary.bvFromSignedInt(int(Decimal(params['id4_waterlevel'])*Decimal('100')),11))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|0x0
+    v = (v<<6)|0x1
+    v = (v<<12)|(int(aisstring.encode(params['country'],12)))
+    v = (v<<11)|(params['id1_id']&0x7ff)
+    v = (v<<1)|(params['id1_sign']&0x1)
+    v = (v<<11)|(int(Decimal(params['id1_waterlevel'])*Decimal('100'))&0x7ff)
+    v = (v<<2)|0x0
+    v = (v<<11)|(params['id2_id']&0x7ff)
+    v = (v<<1)|(params['id2_sign']&0x1)
+    v = (v<<11)|(int(Decimal(params['id2_waterlevel'])*Decimal('100'))&0x7ff)
+    v = (v<<2)|0x0
+    v = (v<<11)|(params['id3_id']&0x7ff)
+    v = (v<<1)|(params['id3_sign']&0x1)
+    v = (v<<11)|(int(Decimal(params['id3_waterlevel'])*Decimal('100'))&0x7ff)
+    v = (v<<2)|0x0
+    v = (v<<11)|(params['id4_id']&0x7ff)
+    v = (v<<1)|(params['id4_sign']&0x1)
+    v = (v<<11)|(int(Decimal(params['id4_waterlevel'])*Decimal('100'))&0x7ff)
+    v = (v<<2)|0x0
+
+    return bitreader.BitReader(v,168)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a ris_waterlevel message.
 
     Fields in params:
@@ -197,112 +198,357 @@ def decode(bv, validate=False):
       - id4_sign(uint): One tide gauge measurement.  sign of the number in the waterlevel
       - id4_waterlevel(decimal): One tide gauge measurement.  Water level at the sensor
       - id4_i_have_no_idea(uint): One tide gauge measurement.  What are these bits for?  They do not seem to be specified (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['country']=decodecountry(bits,numeric=numeric)
+        r['id1_id']=decodeid1_id(bits,numeric=numeric)
+        r['id1_sign']=decodeid1_sign(bits,numeric=numeric)
+        r['id1_waterlevel']=decodeid1_waterlevel(bits,numeric=numeric)
+        r['id1_i_have_no_idea']=decodeid1_i_have_no_idea(bits,numeric=numeric)
+        r['id2_id']=decodeid2_id(bits,numeric=numeric)
+        r['id2_sign']=decodeid2_sign(bits,numeric=numeric)
+        r['id2_waterlevel']=decodeid2_waterlevel(bits,numeric=numeric)
+        r['id2_i_have_no_idea']=decodeid2_i_have_no_idea(bits,numeric=numeric)
+        r['id3_id']=decodeid3_id(bits,numeric=numeric)
+        r['id3_sign']=decodeid3_sign(bits,numeric=numeric)
+        r['id3_waterlevel']=decodeid3_waterlevel(bits,numeric=numeric)
+        r['id3_i_have_no_idea']=decodeid3_i_have_no_idea(bits,numeric=numeric)
+        r['id4_id']=decodeid4_id(bits,numeric=numeric)
+        r['id4_sign']=decodeid4_sign(bits,numeric=numeric)
+        r['id4_waterlevel']=decodeid4_waterlevel(bits,numeric=numeric)
+        r['id4_i_have_no_idea']=decodeid4_i_have_no_idea(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
     r['Spare']=0
     r['dac']=000
     r['fid']=1
-    r['country']=aisstring.decode(bv[56:68])
-    r['id1_id']=int(bv[68:79])
-    r['id1_sign']=int(bv[79:80])
-    r['id1_waterlevel']=Decimal(binary.signedIntFromBV(bv[80:91]))/Decimal('100')
+    r['country']=aisstring.decode(bits[56:68])
+    r['id1_id']=int((v>>89)&0x7ff)
+    r['id1_sign']=int((v>>88)&0x1)
     r['id1_i_have_no_idea']=0
-    r['id2_id']=int(bv[93:104])
-    r['id2_sign']=int(bv[104:105])
-    r['id2_waterlevel']=Decimal(binary.signedIntFromBV(bv[105:116]))/Decimal('100')
+    r['id2_id']=int((v>>64)&0x7ff)
+    r['id2_sign']=int((v>>63)&0x1)
     r['id2_i_have_no_idea']=0
-    r['id3_id']=int(bv[118:129])
-    r['id3_sign']=int(bv[129:130])
-    r['id3_waterlevel']=Decimal(binary.signedIntFromBV(bv[130:141]))/Decimal('100')
+    r['id3_id']=int((v>>39)&0x7ff)
+    r['id3_sign']=int((v>>38)&0x1)
     r['id3_i_have_no_idea']=0
-    r['id4_id']=int(bv[143:154])
-    r['id4_sign']=int(bv[154:155])
-    r['id4_waterlevel']=Decimal(binary.signedIntFromBV(bv[155:166]))/Decimal('100')
+    r['id4_id']=int((v>>14)&0x7ff)
+    r['id4_sign']=int((v>>13)&0x1)
     r['id4_i_have_no_idea']=0
+    if 'decimal' == numeric:
+        r['id1_waterlevel']=Decimal((((v>>77)&0x7ff)^0x400)-0x400)/Decimal('100')
+        r['id2_waterlevel']=Decimal((((v>>52)&0x7ff)^0x400)-0x400)/Decimal('100')
+        r['id3_waterlevel']=Decimal((((v>>27)&0x7ff)^0x400)-0x400)/Decimal('100')
+        r['id4_waterlevel']=Decimal((((v>>2)&0x7ff)^0x400)-0x400)/Decimal('100')
+    elif 'float' == numeric:
+        r['id1_waterlevel']=((((v>>77)&0x7ff)^0x400)-0x400)/100.0
+        r['id2_waterlevel']=((((v>>52)&0x7ff)^0x400)-0x400)/100.0
+        r['id3_waterlevel']=((((v>>27)&0x7ff)^0x400)-0x400)/100.0
+        r['id4_waterlevel']=((((v>>2)&0x7ff)^0x400)-0x400)/100.0
+    elif 'raw' == numeric:
+        r['id1_waterlevel']=int((((v>>77)&0x7ff)^0x400)-0x400)
+        r['id2_waterlevel']=int((((v>>52)&0x7ff)^0x400)-0x400)
+        r['id3_waterlevel']=int((((v>>27)&0x7ff)^0x400)-0x400)
+        r['id4_waterlevel']=int((((v>>2)&0x7ff)^0x400)-0x400)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 000
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodecountry(bv, validate=False):
-    return aisstring.decode(bv[56:68])
+def decodecountry(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[56:68])
 
-def decodeid1_id(bv, validate=False):
-    return int(bv[68:79])
+def decodeid1_id(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(68,11)
 
-def decodeid1_sign(bv, validate=False):
-    return int(bv[79:80])
+def decodeid1_sign(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(79,1)
 
-def decodeid1_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[80:91]))/Decimal('100')
+def decodeid1_waterlevel(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(80,11)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('100')
+    if 'float' == numeric: return val/100.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeid1_i_have_no_idea(bv, validate=False):
+def decodeid1_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeid2_id(bv, validate=False):
-    return int(bv[93:104])
+def decodeid2_id(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(93,11)
 
-def decodeid2_sign(bv, validate=False):
-    return int(bv[104:105])
+def decodeid2_sign(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(104,1)
 
-def decodeid2_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[105:116]))/Decimal('100')
+def decodeid2_waterlevel(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(105,11)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('100')
+    if 'float' == numeric: return val/100.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeid2_i_have_no_idea(bv, validate=False):
+def decodeid2_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeid3_id(bv, validate=False):
-    return int(bv[118:129])
+def decodeid3_id(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(118,11)
 
-def decodeid3_sign(bv, validate=False):
-    return int(bv[129:130])
+def decodeid3_sign(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(129,1)
 
-def decodeid3_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[130:141]))/Decimal('100')
+def decodeid3_waterlevel(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(130,11)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('100')
+    if 'float' == numeric: return val/100.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeid3_i_have_no_idea(bv, validate=False):
+def decodeid3_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodeid4_id(bv, validate=False):
-    return int(bv[143:154])
+def decodeid4_id(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(143,11)
 
-def decodeid4_sign(bv, validate=False):
-    return int(bv[154:155])
+def decodeid4_sign(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(154,1)
 
-def decodeid4_waterlevel(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[155:166]))/Decimal('100')
+def decodeid4_waterlevel(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(155,11)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('100')
+    if 'float' == numeric: return val/100.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeid4_i_have_no_idea(bv, validate=False):
+def decodeid4_i_have_no_idea(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a ris_waterlevel message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fid','_country','_id1_id','_id1_sign','_id1_waterlevel','_id1_i_have_no_idea','_id2_id','_id2_sign','_id2_waterlevel','_id2_i_have_no_idea','_id3_id','_id3_sign','_id3_waterlevel','_id3_i_have_no_idea','_id4_id','_id4_sign','_id4_waterlevel','_id4_i_have_no_idea')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def country(self):
+        try: return self._country
+        except AttributeError: pass
+        self._country = decodecountry(self.bits)
+        return self._country
+
+    @property
+    def id1_id(self):
+        try: return self._id1_id
+        except AttributeError: pass
+        self._id1_id = decodeid1_id(self.bits)
+        return self._id1_id
+
+    @property
+    def id1_sign(self):
+        try: return self._id1_sign
+        except AttributeError: pass
+        self._id1_sign = decodeid1_sign(self.bits)
+        return self._id1_sign
+
+    @property
+    def id1_waterlevel(self):
+        try: return self._id1_waterlevel
+        except AttributeError: pass
+        self._id1_waterlevel = decodeid1_waterlevel(self.bits, numeric=self.numeric)
+        return self._id1_waterlevel
+
+    @property
+    def id1_i_have_no_idea(self):
+        try: return self._id1_i_have_no_idea
+        except AttributeError: pass
+        self._id1_i_have_no_idea = decodeid1_i_have_no_idea(self.bits)
+        return self._id1_i_have_no_idea
+
+    @property
+    def id2_id(self):
+        try: return self._id2_id
+        except AttributeError: pass
+        self._id2_id = decodeid2_id(self.bits)
+        return self._id2_id
+
+    @property
+    def id2_sign(self):
+        try: return self._id2_sign
+        except AttributeError: pass
+        self._id2_sign = decodeid2_sign(self.bits)
+        return self._id2_sign
+
+    @property
+    def id2_waterlevel(self):
+        try: return self._id2_waterlevel
+        except AttributeError: pass
+        self._id2_waterlevel = decodeid2_waterlevel(self.bits, numeric=self.numeric)
+        return self._id2_waterlevel
+
+    @property
+    def id2_i_have_no_idea(self):
+        try: return self._id2_i_have_no_idea
+        except AttributeError: pass
+        self._id2_i_have_no_idea = decodeid2_i_have_no_idea(self.bits)
+        return self._id2_i_have_no_idea
+
+    @property
+    def id3_id(self):
+        try: return self._id3_id
+        except AttributeError: pass
+        self._id3_id = decodeid3_id(self.bits)
+        return self._id3_id
+
+    @property
+    def id3_sign(self):
+        try: return self._id3_sign
+        except AttributeError: pass
+        self._id3_sign = decodeid3_sign(self.bits)
+        return self._id3_sign
+
+    @property
+    def id3_waterlevel(self):
+        try: return self._id3_waterlevel
+        except AttributeError: pass
+        self._id3_waterlevel = decodeid3_waterlevel(self.bits, numeric=self.numeric)
+        return self._id3_waterlevel
+
+    @property
+    def id3_i_have_no_idea(self):
+        try: return self._id3_i_have_no_idea
+        except AttributeError: pass
+        self._id3_i_have_no_idea = decodeid3_i_have_no_idea(self.bits)
+        return self._id3_i_have_no_idea
+
+    @property
+    def id4_id(self):
+        try: return self._id4_id
+        except AttributeError: pass
+        self._id4_id = decodeid4_id(self.bits)
+        return self._id4_id
+
+    @property
+    def id4_sign(self):
+        try: return self._id4_sign
+        except AttributeError: pass
+        self._id4_sign = decodeid4_sign(self.bits)
+        return self._id4_sign
+
+    @property
+    def id4_waterlevel(self):
+        try: return self._id4_waterlevel
+        except AttributeError: pass
+        self._id4_waterlevel = decodeid4_waterlevel(self.bits, numeric=self.numeric)
+        return self._id4_waterlevel
+
+    @property
+    def id4_i_have_no_idea(self):
+        try: return self._id4_i_have_no_idea
+        except AttributeError: pass
+        self._id4_i_have_no_idea = decodeid4_i_have_no_idea(self.bits)
+        return self._id4_i_have_no_idea
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>ris_waterlevel</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -790,6 +1036,88 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('ris_waterlevel', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('ris_waterlevel', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('country'),
+                        get('id1_id'),
+                        get('id1_sign'),
+                        sqlhelp.toFloat(get('id1_waterlevel')),
+                        get('id1_i_have_no_idea'),
+                        get('id2_id'),
+                        get('id2_sign'),
+                        sqlhelp.toFloat(get('id2_waterlevel')),
+                        get('id2_i_have_no_idea'),
+                        get('id3_id'),
+                        get('id3_sign'),
+                        sqlhelp.toFloat(get('id3_waterlevel')),
+                        get('id3_i_have_no_idea'),
+                        get('id4_id'),
+                        get('id4_sign'),
+                        sqlhelp.toFloat(get('id4_waterlevel')),
+                        get('id4_i_have_no_idea'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('country'),
+                        get('id1_id'),
+                        get('id1_sign'),
+                        sqlhelp.toFloat(get('id1_waterlevel')),
+                        get('id1_i_have_no_idea'),
+                        get('id2_id'),
+                        get('id2_sign'),
+                        sqlhelp.toFloat(get('id2_waterlevel')),
+                        get('id2_i_have_no_idea'),
+                        get('id3_id'),
+                        get('id3_sign'),
+                        sqlhelp.toFloat(get('id3_waterlevel')),
+                        get('id3_i_have_no_idea'),
+                        get('id4_id'),
+                        get('id4_sign'),
+                        sqlhelp.toFloat(get('id4_waterlevel')),
+                        get('id4_i_have_no_idea'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -952,6 +1280,24 @@ class Testris_waterlevel(unittest.TestCase):
         self.failUnlessAlmostEqual(r['id4_waterlevel'],params['id4_waterlevel'],2)
         self.failUnlessEqual(r['id4_i_have_no_idea'],params['id4_i_have_no_idea'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('id1_waterlevel', 'id2_waterlevel', 'id3_waterlevel', 'id4_waterlevel'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "ris_waterlevel" AIS message')
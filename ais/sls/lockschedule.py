@@ -26,6 +26,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -87,27 +88,26 @@ def encode(params, validate=False):
       - reserved(uint): Reserved bits for future use (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
+    v = 0
     if 'vessel' in params:
-        bvList.append(aisstring.encode(params['vessel'],90))
+        v = (v<<90)|(int(aisstring.encode(params['vessel'],90)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@@@@@@@@@',90))
-    if params["direction"]: bvList.append(TrueBV)
-    else: bvList.append(FalseBV)
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETA_month']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETA_day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETA_hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['ETA_min']),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),19))
-
-    return binary.joinBV(bvList)
-
-def decode(bv, validate=False):
+        v = (v<<90)|int(aisstring.encode('@@@@@@@@@@@@@@@',90))
+    v = (v<<1)|(1 if params['direction'] else 0)
+    v = (v<<4)|(params['ETA_month']&0xf)
+    v = (v<<5)|(params['ETA_day']&0x1f)
+    v = (v<<5)|(params['ETA_hour']&0x1f)
+    v = (v<<6)|(params['ETA_min']&0x3f)
+    v = (v<<19)|0x0
+
+    return bitreader.BitReader(v,130)
+
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a sls_lockschedule message.
 
     Fields in params:
@@ -118,48 +118,137 @@ def decode(bv, validate=False):
       - ETA_hour(uint): Estimated time of arrival  UTC hours 0..23
       - ETA_min(uint): Estimated time of arrival  minutes
       - reserved(uint): Reserved bits for future use (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 130:
+        r = {}
+        r['vessel']=decodevessel(bits,numeric=numeric)
+        r['direction']=decodedirection(bits,numeric=numeric)
+        r['ETA_month']=decodeETA_month(bits,numeric=numeric)
+        r['ETA_day']=decodeETA_day(bits,numeric=numeric)
+        r['ETA_hour']=decodeETA_hour(bits,numeric=numeric)
+        r['ETA_min']=decodeETA_min(bits,numeric=numeric)
+        r['reserved']=decodereserved(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 130: v >>= n-130
     r = {}
-    r['vessel']=aisstring.decode(bv[0:90])
-    r['direction']=bool(int(bv[90:91]))
-    r['ETA_month']=int(bv[91:95])
-    r['ETA_day']=int(bv[95:100])
-    r['ETA_hour']=int(bv[100:105])
-    r['ETA_min']=int(bv[105:111])
+    r['vessel']=aisstring.decode(bits[0:90])
+    r['direction']=bool((v>>39)&0x1)
+    r['ETA_month']=int((v>>35)&0xf)
+    r['ETA_day']=int((v>>30)&0x1f)
+    r['ETA_hour']=int((v>>25)&0x1f)
+    r['ETA_min']=int((v>>19)&0x3f)
     r['reserved']=0
     return r
 
-def decodevessel(bv, validate=False):
-    return aisstring.decode(bv[0:90])
+def decodevessel(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[0:90])
 
-def decodedirection(bv, validate=False):
-    return bool(int(bv[90:91]))
+def decodedirection(bv, validate=False, numeric='decimal'):
+    return bool(bitreader.asBitReader(bv).uint(90,1))
 
-def decodeETA_month(bv, validate=False):
-    return int(bv[91:95])
+def decodeETA_month(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(91,4)
 
-def decodeETA_day(bv, validate=False):
-    return int(bv[95:100])
+def decodeETA_day(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(95,5)
 
-def decodeETA_hour(bv, validate=False):
-    return int(bv[100:105])
+def decodeETA_hour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(100,5)
 
-def decodeETA_min(bv, validate=False):
-    return int(bv[105:111])
+def decodeETA_min(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(105,6)
 
-def decodereserved(bv, validate=False):
+def decodereserved(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a sls_lockschedule message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_vessel','_direction','_ETA_month','_ETA_day','_ETA_hour','_ETA_min','_reserved')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def vessel(self):
+        try: return self._vessel
+        except AttributeError: pass
+        self._vessel = decodevessel(self.bits)
+        return self._vessel
+
+    @property
+    def direction(self):
+        try: return self._direction
+        except AttributeError: pass
+        self._direction = decodedirection(self.bits)
+        return self._direction
+
+    @property
+    def ETA_month(self):
+        try: return self._ETA_month
+        except AttributeError: pass
+        self._ETA_month = decodeETA_month(self.bits)
+        return self._ETA_month
+
+    @property
+    def ETA_day(self):
+        try: return self._ETA_day
+        except AttributeError: pass
+        self._ETA_day = decodeETA_day(self.bits)
+        return self._ETA_day
+
+    @property
+    def ETA_hour(self):
+        try: return self._ETA_hour
+        except AttributeError: pass
+        self._ETA_hour = decodeETA_hour(self.bits)
+        return self._ETA_hour
+
+    @property
+    def ETA_min(self):
+        try: return self._ETA_min
+        except AttributeError: pass
+        self._ETA_min = decodeETA_min(self.bits)
+        return self._ETA_min
+
+    @property
+    def reserved(self):
+        try: return self._reserved
+        except AttributeError: pass
+        self._reserved = decodereserved(self.bits)
+        return self._reserved
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>sls_lockschedule</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -415,6 +504,56 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('sls_lockschedule', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('sls_lockschedule', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('vessel'),
+                        get('direction'),
+                        get('ETA_month'),
+                        get('ETA_day'),
+                        get('ETA_hour'),
+                        get('ETA_min'),
+                        get('reserved'),
+                )
+        else:
+                row = (
+                        get('vessel'),
+                        get('direction'),
+                        get('ETA_month'),
+                        get('ETA_day'),
+                        get('ETA_hour'),
+                        get('ETA_min'),
+                        get('reserved'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -513,6 +652,14 @@ class Testsls_lockschedule(unittest.TestCase):
         self.failUnlessEqual(r['ETA_min'],params['ETA_min'])
         self.failUnlessEqual(r['reserved'],params['reserved'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "sls_lockschedule" AIS message')
@@ -26,6 +26,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -102,45 +103,45 @@ def encode(params, validate=False):
       - reserved(uint): Reserved bits for future use (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time_month']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time_day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time_hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time_min']),6))
+    v = 0
+    v = (v<<4)|(params['time_month']&0xf)
+    v = (v<<5)|(params['time_day']&0x1f)
+    v = (v<<5)|(params['time_hour']&0x1f)
+    v = (v<<6)|(params['time_min']&0x3f)
     if 'stationid' in params:
-        bvList.append(aisstring.encode(params['stationid'],42))
+        v = (v<<42)|(int(aisstring.encode(params['stationid'],42)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@',42))
+        v = (v<<42)|int(aisstring.encode('@@@@@@@',42))
     if 'pos_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['pos_longitude'])*Decimal('60000')),25))
+        v = (v<<25)|(int(Decimal(params['pos_longitude'])*Decimal('60000'))&0x1ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(10860000,25))
+        v = (v<<25)|0xa5b5e0
     if 'pos_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['pos_latitude'])*Decimal('60000')),24))
+        v = (v<<24)|(int(Decimal(params['pos_latitude'])*Decimal('60000'))&0xffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(5460000,24))
+        v = (v<<24)|0x535020
     if 'speed' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['speed'])*Decimal('10')))),10))
+        v = (v<<10)|(int(Decimal(params['speed'])*Decimal('10'))&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(1023)),10))
+        v = (v<<10)|0x3ff
     if 'gust' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['gust'])*Decimal('10')))),10))
+        v = (v<<10)|(int(Decimal(params['gust'])*Decimal('10'))&0x3ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(1023)),10))
+        v = (v<<10)|0x3ff
     if 'direction' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['direction']),9))
+        v = (v<<9)|(params['direction']&0x1ff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=511),9))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
+        v = (v<<9)|0x1ff
+    v = (v<<4)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,144)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a sls_wind message.
 
     Fields in params:
@@ -155,62 +156,211 @@ def decode(bv, validate=False):
       - gust(udecimal): Wind gust
       - direction(uint): Wind direction
       - reserved(uint): Reserved bits for future use (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 144:
+        r = {}
+        r['time_month']=decodetime_month(bits,numeric=numeric)
+        r['time_day']=decodetime_day(bits,numeric=numeric)
+        r['time_hour']=decodetime_hour(bits,numeric=numeric)
+        r['time_min']=decodetime_min(bits,numeric=numeric)
+        r['stationid']=decodestationid(bits,numeric=numeric)
+        r['pos_longitude']=decodepos_longitude(bits,numeric=numeric)
+        r['pos_latitude']=decodepos_latitude(bits,numeric=numeric)
+        r['speed']=decodespeed(bits,numeric=numeric)
+        r['gust']=decodegust(bits,numeric=numeric)
+        r['direction']=decodedirection(bits,numeric=numeric)
+        r['reserved']=decodereserved(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 144: v >>= n-144
     r = {}
-    r['time_month']=int(bv[0:4])
-    r['time_day']=int(bv[4:9])
-    r['time_hour']=int(bv[9:14])
-    r['time_min']=int(bv[14:20])
-    r['stationid']=aisstring.decode(bv[20:62])
-    r['pos_longitude']=Decimal(binary.signedIntFromBV(bv[62:87]))/Decimal('60000')
-    r['pos_latitude']=Decimal(binary.signedIntFromBV(bv[87:111]))/Decimal('60000')
-    r['speed']=Decimal(int(bv[111:121]))/Decimal('10')
-    r['gust']=Decimal(int(bv[121:131]))/Decimal('10')
-    r['direction']=int(bv[131:140])
+    r['time_month']=int((v>>140)&0xf)
+    r['time_day']=int((v>>135)&0x1f)
+    r['time_hour']=int((v>>130)&0x1f)
+    r['time_min']=int((v>>124)&0x3f)
+    r['stationid']=aisstring.decode(bits[20:62])
+    r['direction']=int((v>>4)&0x1ff)
     r['reserved']=0
+    if 'decimal' == numeric:
+        r['pos_longitude']=Decimal((((v>>57)&0x1ffffff)^0x1000000)-0x1000000)/Decimal('60000')
+        r['pos_latitude']=Decimal((((v>>33)&0xffffff)^0x800000)-0x800000)/Decimal('60000')
+        r['speed']=Decimal((v>>23)&0x3ff)/Decimal('10')
+        r['gust']=Decimal((v>>13)&0x3ff)/Decimal('10')
+    elif 'float' == numeric:
+        r['pos_longitude']=((((v>>57)&0x1ffffff)^0x1000000)-0x1000000)/60000.0
+        r['pos_latitude']=((((v>>33)&0xffffff)^0x800000)-0x800000)/60000.0
+        r['speed']=((v>>23)&0x3ff)/10.0
+        r['gust']=((v>>13)&0x3ff)/10.0
+    elif 'raw' == numeric:
+        r['pos_longitude']=int((((v>>57)&0x1ffffff)^0x1000000)-0x1000000)
+        r['pos_latitude']=int((((v>>33)&0xffffff)^0x800000)-0x800000)
+        r['speed']=int((v>>23)&0x3ff)
+        r['gust']=int((v>>13)&0x3ff)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodetime_month(bv, validate=False):
-    return int(bv[0:4])
-
-def decodetime_day(bv, validate=False):
-    return int(bv[4:9])
-
-def decodetime_hour(bv, validate=False):
-    return int(bv[9:14])
-
-def decodetime_min(bv, validate=False):
-    return int(bv[14:20])
-
-def decodestationid(bv, validate=False):
-    return aisstring.decode(bv[20:62])
-
-def decodepos_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[62:87]))/Decimal('60000')
+def decodetime_month(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(0,4)
+
+def decodetime_day(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(4,5)
+
+def decodetime_hour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(9,5)
+
+def decodetime_min(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(14,6)
+
+def decodestationid(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[20:62])
+
+def decodepos_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(62,25)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('60000')
+    if 'float' == numeric: return val/60000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodepos_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(87,24)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('60000')
+    if 'float' == numeric: return val/60000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodespeed(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(111,10)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodegust(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(121,10)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('10')
+    if 'float' == numeric: return val/10.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
+
+def decodedirection(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(131,9)
+
+def decodereserved(bv, validate=False, numeric='decimal'):
+    return 0
 
-def decodepos_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[87:111]))/Decimal('60000')
 
-def decodespeed(bv, validate=False):
-    return Decimal(int(bv[111:121]))/Decimal('10')
+class View(object):
+    '''Lazy view of a sls_wind message.
 
-def decodegust(bv, validate=False):
-    return Decimal(int(bv[121:131]))/Decimal('10')
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
 
-def decodedirection(bv, validate=False):
-    return int(bv[131:140])
-
-def decodereserved(bv, validate=False):
-    return 0
+    __slots__ = ('bits','numeric','_time_month','_time_day','_time_hour','_time_min','_stationid','_pos_longitude','_pos_latitude','_speed','_gust','_direction','_reserved')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def time_month(self):
+        try: return self._time_month
+        except AttributeError: pass
+        self._time_month = decodetime_month(self.bits)
+        return self._time_month
+
+    @property
+    def time_day(self):
+        try: return self._time_day
+        except AttributeError: pass
+        self._time_day = decodetime_day(self.bits)
+        return self._time_day
+
+    @property
+    def time_hour(self):
+        try: return self._time_hour
+        except AttributeError: pass
+        self._time_hour = decodetime_hour(self.bits)
+        return self._time_hour
+
+    @property
+    def time_min(self):
+        try: return self._time_min
+        except AttributeError: pass
+        self._time_min = decodetime_min(self.bits)
+        return self._time_min
+
+    @property
+    def stationid(self):
+        try: return self._stationid
+        except AttributeError: pass
+        self._stationid = decodestationid(self.bits)
+        return self._stationid
+
+    @property
+    def pos_longitude(self):
+        try: return self._pos_longitude
+        except AttributeError: pass
+        self._pos_longitude = decodepos_longitude(self.bits, numeric=self.numeric)
+        return self._pos_longitude
+
+    @property
+    def pos_latitude(self):
+        try: return self._pos_latitude
+        except AttributeError: pass
+        self._pos_latitude = decodepos_latitude(self.bits, numeric=self.numeric)
+        return self._pos_latitude
+
+    @property
+    def speed(self):
+        try: return self._speed
+        except AttributeError: pass
+        self._speed = decodespeed(self.bits, numeric=self.numeric)
+        return self._speed
+
+    @property
+    def gust(self):
+        try: return self._gust
+        except AttributeError: pass
+        self._gust = decodegust(self.bits, numeric=self.numeric)
+        return self._gust
+
+    @property
+    def direction(self):
+        try: return self._direction
+        except AttributeError: pass
+        self._direction = decodedirection(self.bits)
+        return self._direction
+
+    @property
+    def reserved(self):
+        try: return self._reserved
+        except AttributeError: pass
+        self._reserved = decodereserved(self.bits)
+        return self._reserved
 
 
 def printHtml(params, out=sys.stdout):
@@ -565,6 +715,63 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('sls_wind', fieldListPostgres+tuple(extraFields),
+                        geometry=('pos',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('sls_wind', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('time_month'),
+                        get('time_day'),
+                        get('time_hour'),
+                        get('time_min'),
+                        get('stationid'),
+                        sqlhelp.geometryWkt('POINT',get('pos_longitude'),get('pos_latitude')),
+                        sqlhelp.toFloat(get('speed')),
+                        sqlhelp.toFloat(get('gust')),
+                        get('direction'),
+                        get('reserved'),
+                )
+        else:
+                row = (
+                        get('time_month'),
+                        get('time_day'),
+                        get('time_hour'),
+                        get('time_min'),
+                        get('stationid'),
+                        sqlhelp.toFloat(get('pos_longitude')),
+                        sqlhelp.toFloat(get('pos_latitude')),
+                        sqlhelp.toFloat(get('speed')),
+                        sqlhelp.toFloat(get('gust')),
+                        get('direction'),
+                        get('reserved'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -679,6 +886,24 @@ class Testsls_wind(unittest.TestCase):
         self.failUnlessEqual(r['direction'],params['direction'])
         self.failUnlessEqual(r['reserved'],params['reserved'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('pos_longitude', 'pos_latitude', 'speed', 'gust'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "sls_wind" AIS message')
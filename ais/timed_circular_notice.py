@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -113,49 +114,49 @@ def encode(params, validate=False):
       - areatype(uint): What does this circular area represent
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=366),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=63),6))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|0x16e
+    v = (v<<6)|0x3f
     if 'month' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['month']),4))
+        v = (v<<4)|(params['month']&0xf)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['min']),6))
+        v = (v<<4)|0x0
+    v = (v<<5)|(params['day']&0x1f)
+    v = (v<<5)|(params['hour']&0x1f)
+    v = (v<<6)|(params['min']&0x3f)
     if 'longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'timetoexpire' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timetoexpire']),15))
+        v = (v<<15)|(params['timetoexpire']&0x7fff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=32767),15))
+        v = (v<<15)|0x7fff
     if 'radius' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int((Decimal(params['radius'])*Decimal('0.1')))),14))
+        v = (v<<14)|(int(Decimal(params['radius'])*Decimal('0.1'))&0x3fff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=int(16383)),14))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['areatype']),8))
+        v = (v<<14)|0x3fff
+    v = (v<<8)|(params['areatype']&0xff)
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,168)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a timed_circular_notice message.
 
     Fields in params:
@@ -174,78 +175,252 @@ def decode(bv, validate=False):
       - timetoexpire(uint): Minutes from the start time until the notice expires.  Max is aprox 23 days
       - radius(udecimal): Distance from center of detection zone (lat/lon above).  Distance in increments of 10 meters
       - areatype(uint): What does this circular area represent
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 168:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['month']=decodemonth(bits,numeric=numeric)
+        r['day']=decodeday(bits,numeric=numeric)
+        r['hour']=decodehour(bits,numeric=numeric)
+        r['min']=decodemin(bits,numeric=numeric)
+        r['longitude']=decodelongitude(bits,numeric=numeric)
+        r['latitude']=decodelatitude(bits,numeric=numeric)
+        r['timetoexpire']=decodetimetoexpire(bits,numeric=numeric)
+        r['radius']=decoderadius(bits,numeric=numeric)
+        r['areatype']=decodeareatype(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 168: v >>= n-168
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>160)&0x3)
+    r['UserID']=int((v>>130)&0x3fffffff)
     r['Spare']=0
     r['dac']=366
     r['fid']=63
-    r['month']=int(bv[56:60])
-    r['day']=int(bv[60:65])
-    r['hour']=int(bv[65:70])
-    r['min']=int(bv[70:76])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[76:104]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[104:131]))/Decimal('600000')
-    r['timetoexpire']=int(bv[131:146])
-    r['radius']=Decimal(int(bv[146:160]))/Decimal('0.1')
-    r['areatype']=int(bv[160:168])
+    r['month']=int((v>>108)&0xf)
+    r['day']=int((v>>103)&0x1f)
+    r['hour']=int((v>>98)&0x1f)
+    r['min']=int((v>>92)&0x3f)
+    r['timetoexpire']=int((v>>22)&0x7fff)
+    r['areatype']=int(v&0xff)
+    if 'decimal' == numeric:
+        r['longitude']=Decimal((((v>>64)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['latitude']=Decimal((((v>>37)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['radius']=Decimal((v>>8)&0x3fff)/Decimal('0.1')
+    elif 'float' == numeric:
+        r['longitude']=((((v>>64)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['latitude']=((((v>>37)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['radius']=((v>>8)&0x3fff)/0.1
+    elif 'raw' == numeric:
+        r['longitude']=int((((v>>64)&0xfffffff)^0x8000000)-0x8000000)
+        r['latitude']=int((((v>>37)&0x7ffffff)^0x4000000)-0x4000000)
+        r['radius']=int((v>>8)&0x3fff)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 63
 
-def decodemonth(bv, validate=False):
-    return int(bv[56:60])
+def decodemonth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(56,4)
 
-def decodeday(bv, validate=False):
-    return int(bv[60:65])
+def decodeday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(60,5)
 
-def decodehour(bv, validate=False):
-    return int(bv[65:70])
+def decodehour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(65,5)
 
-def decodemin(bv, validate=False):
-    return int(bv[70:76])
+def decodemin(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(70,6)
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[76:104]))/Decimal('600000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(76,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[104:131]))/Decimal('600000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(104,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodetimetoexpire(bv, validate=False):
-    return int(bv[131:146])
+def decodetimetoexpire(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(131,15)
 
-def decoderadius(bv, validate=False):
-    return Decimal(int(bv[146:160]))/Decimal('0.1')
+def decoderadius(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).uint(146,14)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('0.1')
+    if 'float' == numeric: return val/0.1
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodeareatype(bv, validate=False):
-    return int(bv[160:168])
+def decodeareatype(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(160,8)
+
+
+class View(object):
+    '''Lazy view of a timed_circular_notice message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fid','_month','_day','_hour','_min','_longitude','_latitude','_timetoexpire','_radius','_areatype')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def month(self):
+        try: return self._month
+        except AttributeError: pass
+        self._month = decodemonth(self.bits)
+        return self._month
+
+    @property
+    def day(self):
+        try: return self._day
+        except AttributeError: pass
+        self._day = decodeday(self.bits)
+        return self._day
+
+    @property
+    def hour(self):
+        try: return self._hour
+        except AttributeError: pass
+        self._hour = decodehour(self.bits)
+        return self._hour
+
+    @property
+    def min(self):
+        try: return self._min
+        except AttributeError: pass
+        self._min = decodemin(self.bits)
+        return self._min
+
+    @property
+    def longitude(self):
+        try: return self._longitude
+        except AttributeError: pass
+        self._longitude = decodelongitude(self.bits, numeric=self.numeric)
+        return self._longitude
+
+    @property
+    def latitude(self):
+        try: return self._latitude
+        except AttributeError: pass
+        self._latitude = decodelatitude(self.bits, numeric=self.numeric)
+        return self._latitude
+
+    @property
+    def timetoexpire(self):
+        try: return self._timetoexpire
+        except AttributeError: pass
+        self._timetoexpire = decodetimetoexpire(self.bits)
+        return self._timetoexpire
+
+    @property
+    def radius(self):
+        try: return self._radius
+        except AttributeError: pass
+        self._radius = decoderadius(self.bits, numeric=self.numeric)
+        return self._radius
+
+    @property
+    def areatype(self):
+        try: return self._areatype
+        except AttributeError: pass
+        self._areatype = decodeareatype(self.bits)
+        return self._areatype
 
 
 def printHtml(params, out=sys.stdout):
@@ -740,6 +915,71 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('timed_circular_notice', fieldListPostgres+tuple(extraFields),
+                        geometry=('center',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('timed_circular_notice', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('month'),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        sqlhelp.geometryWkt('POINT',get('longitude'),get('latitude')),
+                        get('timetoexpire'),
+                        sqlhelp.toFloat(get('radius')),
+                        get('areatype'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('month'),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        sqlhelp.toFloat(get('longitude')),
+                        sqlhelp.toFloat(get('latitude')),
+                        get('timetoexpire'),
+                        sqlhelp.toFloat(get('radius')),
+                        get('areatype'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -870,6 +1110,24 @@ class Testtimed_circular_notice(unittest.TestCase):
         self.failUnlessAlmostEqual(r['radius'],params['radius'],0)
         self.failUnlessEqual(r['areatype'],params['areatype'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('longitude', 'latitude', 'radius'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "timed_circular_notice" AIS message')
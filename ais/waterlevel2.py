@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -110,49 +111,49 @@ def encode(params, validate=False):
       - source(uint): How the water level was derived
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=366),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=63),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['month']),4))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['min']),6))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|0x16e
+    v = (v<<6)|0x3f
+    v = (v<<4)|(params['month']&0xf)
+    v = (v<<5)|(params['day']&0x1f)
+    v = (v<<5)|(params['hour']&0x1f)
+    v = (v<<6)|(params['min']&0x3f)
     if 'stationid' in params:
-        bvList.append(aisstring.encode(params['stationid'],42))
+        v = (v<<42)|(int(aisstring.encode(params['stationid'],42)))
     else:
-        bvList.append(aisstring.encode('@@@@@@@',42))
+        v = (v<<42)|int(aisstring.encode('@@@@@@@',42))
     if 'waterlevel' in params:
-        bvList.append(binary.bvFromSignedInt(params['waterlevel'],16))
+        v = (v<<16)|(params['waterlevel']&0xffff)
     else:
-        bvList.append(binary.bvFromSignedInt(-32768,16))
+        v = (v<<16)|0x8000
     if 'datum' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['datum']),5))
+        v = (v<<5)|(params['datum']&0x1f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=31),5))
+        v = (v<<5)|0x1f
     if 'sigma' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['sigma']),7))
+        v = (v<<7)|(params['sigma']&0x7f)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=127),7))
+        v = (v<<7)|0x7f
     if 'source' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['source']),3))
+        v = (v<<3)|(params['source']&0x7)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),3))
+        v = (v<<3)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,149)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a waterlevel message.
 
     Fields in params:
@@ -171,78 +172,231 @@ def decode(bv, validate=False):
       - datum(uint): What reference datum applies to the value
       - sigma(uint): Standard deviation of 1 second samples used to compute the water level height.  FIX: is this the correct description of sigma?
       - source(uint): How the water level was derived
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 149:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['month']=decodemonth(bits,numeric=numeric)
+        r['day']=decodeday(bits,numeric=numeric)
+        r['hour']=decodehour(bits,numeric=numeric)
+        r['min']=decodemin(bits,numeric=numeric)
+        r['stationid']=decodestationid(bits,numeric=numeric)
+        r['waterlevel']=decodewaterlevel(bits,numeric=numeric)
+        r['datum']=decodedatum(bits,numeric=numeric)
+        r['sigma']=decodesigma(bits,numeric=numeric)
+        r['source']=decodesource(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 149: v >>= n-149
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>141)&0x3)
+    r['UserID']=int((v>>111)&0x3fffffff)
     r['Spare']=0
     r['dac']=366
     r['fid']=63
-    r['month']=int(bv[56:60])
-    r['day']=int(bv[60:65])
-    r['hour']=int(bv[65:70])
-    r['min']=int(bv[70:76])
-    r['stationid']=aisstring.decode(bv[76:118])
-    r['waterlevel']=binary.signedIntFromBV(bv[118:134])
-    r['datum']=int(bv[134:139])
-    r['sigma']=int(bv[139:146])
-    r['source']=int(bv[146:149])
+    r['month']=int((v>>89)&0xf)
+    r['day']=int((v>>84)&0x1f)
+    r['hour']=int((v>>79)&0x1f)
+    r['min']=int((v>>73)&0x3f)
+    r['stationid']=aisstring.decode(bits[76:118])
+    r['waterlevel']=int((((v>>15)&0xffff)^0x8000)-0x8000)
+    r['datum']=int((v>>10)&0x1f)
+    r['sigma']=int((v>>3)&0x7f)
+    r['source']=int(v&0x7)
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 63
 
-def decodemonth(bv, validate=False):
-    return int(bv[56:60])
+def decodemonth(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(56,4)
 
-def decodeday(bv, validate=False):
-    return int(bv[60:65])
+def decodeday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(60,5)
 
-def decodehour(bv, validate=False):
-    return int(bv[65:70])
+def decodehour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(65,5)
 
-def decodemin(bv, validate=False):
-    return int(bv[70:76])
+def decodemin(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(70,6)
 
-def decodestationid(bv, validate=False):
-    return aisstring.decode(bv[76:118])
+def decodestationid(bv, validate=False, numeric='decimal'):
+    bits = bitreader.asBitReader(bv)
+    return aisstring.decode(bits[76:118])
 
-def decodewaterlevel(bv, validate=False):
-    return binary.signedIntFromBV(bv[118:134])
+def decodewaterlevel(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).sint(118,16)
 
-def decodedatum(bv, validate=False):
-    return int(bv[134:139])
+def decodedatum(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(134,5)
 
-def decodesigma(bv, validate=False):
-    return int(bv[139:146])
+def decodesigma(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(139,7)
 
-def decodesource(bv, validate=False):
-    return int(bv[146:149])
+def decodesource(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(146,3)
+
+
+class View(object):
+    '''Lazy view of a waterlevel message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fid','_month','_day','_hour','_min','_stationid','_waterlevel','_datum','_sigma','_source')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def month(self):
+        try: return self._month
+        except AttributeError: pass
+        self._month = decodemonth(self.bits)
+        return self._month
+
+    @property
+    def day(self):
+        try: return self._day
+        except AttributeError: pass
+        self._day = decodeday(self.bits)
+        return self._day
+
+    @property
+    def hour(self):
+        try: return self._hour
+        except AttributeError: pass
+        self._hour = decodehour(self.bits)
+        return self._hour
+
+    @property
+    def min(self):
+        try: return self._min
+        except AttributeError: pass
+        self._min = decodemin(self.bits)
+        return self._min
+
+    @property
+    def stationid(self):
+        try: return self._stationid
+        except AttributeError: pass
+        self._stationid = decodestationid(self.bits)
+        return self._stationid
+
+    @property
+    def waterlevel(self):
+        try: return self._waterlevel
+        except AttributeError: pass
+        self._waterlevel = decodewaterlevel(self.bits)
+        return self._waterlevel
+
+    @property
+    def datum(self):
+        try: return self._datum
+        except AttributeError: pass
+        self._datum = decodedatum(self.bits)
+        return self._datum
+
+    @property
+    def sigma(self):
+        try: return self._sigma
+        except AttributeError: pass
+        self._sigma = decodesigma(self.bits)
+        return self._sigma
+
+    @property
+    def source(self):
+        try: return self._source
+        except AttributeError: pass
+        self._source = decodesource(self.bits)
+        return self._source
 
 
 def printHtml(params, out=sys.stdout):
@@ -650,6 +804,72 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('waterlevel', fieldListPostgres+tuple(extraFields),
+                        geometry=(), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('waterlevel', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('month'),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        get('stationid'),
+                        get('waterlevel'),
+                        get('datum'),
+                        get('sigma'),
+                        get('source'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('month'),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        get('stationid'),
+                        get('waterlevel'),
+                        get('datum'),
+                        get('sigma'),
+                        get('source'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -780,6 +1000,14 @@ class Testwaterlevel(unittest.TestCase):
         self.failUnlessEqual(r['sigma'],params['sigma'])
         self.failUnlessEqual(r['source'],params['source'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "waterlevel" AIS message')
@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -110,48 +111,48 @@ def encode(params, validate=False):
       - radius(uint): Distance from center of detection zone (lat/lon above)
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=366),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=63),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['min']),6))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|0x16e
+    v = (v<<6)|0x3f
+    v = (v<<5)|(params['day']&0x1f)
+    v = (v<<5)|(params['hour']&0x1f)
+    v = (v<<6)|(params['min']&0x3f)
     if 'stationid' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['stationid']),8))
+        v = (v<<8)|(params['stationid']&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
+        v = (v<<8)|0x0
     if 'longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'timetoexpire' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timetoexpire']),16))
+        v = (v<<16)|(params['timetoexpire']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),16))
+        v = (v<<16)|0x0
     if 'radius' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['radius']),16))
+        v = (v<<16)|(params['radius']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=65535),16))
+        v = (v<<16)|0xffff
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,167)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a whalenotice message.
 
     Fields in params:
@@ -169,74 +170,234 @@ def decode(bv, validate=False):
       - latitude(decimal): Center of the detection zone.  North South location
       - timetoexpire(uint): Minutes from the detection time until the notice expires
       - radius(uint): Distance from center of detection zone (lat/lon above)
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 167:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['day']=decodeday(bits,numeric=numeric)
+        r['hour']=decodehour(bits,numeric=numeric)
+        r['min']=decodemin(bits,numeric=numeric)
+        r['stationid']=decodestationid(bits,numeric=numeric)
+        r['longitude']=decodelongitude(bits,numeric=numeric)
+        r['latitude']=decodelatitude(bits,numeric=numeric)
+        r['timetoexpire']=decodetimetoexpire(bits,numeric=numeric)
+        r['radius']=decoderadius(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 167: v >>= n-167
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>159)&0x3)
+    r['UserID']=int((v>>129)&0x3fffffff)
     r['Spare']=0
     r['dac']=366
     r['fid']=63
-    r['day']=int(bv[56:61])
-    r['hour']=int(bv[61:66])
-    r['min']=int(bv[66:72])
-    r['stationid']=int(bv[72:80])
-    r['longitude']=Decimal(binary.signedIntFromBV(bv[80:108]))/Decimal('600000')
-    r['latitude']=Decimal(binary.signedIntFromBV(bv[108:135]))/Decimal('600000')
-    r['timetoexpire']=int(bv[135:151])
-    r['radius']=int(bv[151:167])
+    r['day']=int((v>>106)&0x1f)
+    r['hour']=int((v>>101)&0x1f)
+    r['min']=int((v>>95)&0x3f)
+    r['stationid']=int((v>>87)&0xff)
+    r['timetoexpire']=int((v>>16)&0xffff)
+    r['radius']=int(v&0xffff)
+    if 'decimal' == numeric:
+        r['longitude']=Decimal((((v>>59)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['latitude']=Decimal((((v>>32)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+    elif 'float' == numeric:
+        r['longitude']=((((v>>59)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['latitude']=((((v>>32)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+    elif 'raw' == numeric:
+        r['longitude']=int((((v>>59)&0xfffffff)^0x8000000)-0x8000000)
+        r['latitude']=int((((v>>32)&0x7ffffff)^0x4000000)-0x4000000)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 63
 
-def decodeday(bv, validate=False):
-    return int(bv[56:61])
+def decodeday(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(56,5)
 
-def decodehour(bv, validate=False):
-    return int(bv[61:66])
+def decodehour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(61,5)
 
-def decodemin(bv, validate=False):
-    return int(bv[66:72])
+def decodemin(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(66,6)
 
-def decodestationid(bv, validate=False):
-    return int(bv[72:80])
+def decodestationid(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(72,8)
 
-def decodelongitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[80:108]))/Decimal('600000')
+def decodelongitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(80,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodelatitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[108:135]))/Decimal('600000')
+def decodelatitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(108,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodetimetoexpire(bv, validate=False):
-    return int(bv[135:151])
+def decodetimetoexpire(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(135,16)
 
-def decoderadius(bv, validate=False):
-    return int(bv[151:167])
+def decoderadius(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(151,16)
+
+
+class View(object):
+    '''Lazy view of a whalenotice message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fid','_day','_hour','_min','_stationid','_longitude','_latitude','_timetoexpire','_radius')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def day(self):
+        try: return self._day
+        except AttributeError: pass
+        self._day = decodeday(self.bits)
+        return self._day
+
+    @property
+    def hour(self):
+        try: return self._hour
+        except AttributeError: pass
+        self._hour = decodehour(self.bits)
+        return self._hour
+
+    @property
+    def min(self):
+        try: return self._min
+        except AttributeError: pass
+        self._min = decodemin(self.bits)
+        return self._min
+
+    @property
+    def stationid(self):
+        try: return self._stationid
+        except AttributeError: pass
+        self._stationid = decodestationid(self.bits)
+        return self._stationid
+
+    @property
+    def longitude(self):
+        try: return self._longitude
+        except AttributeError: pass
+        self._longitude = decodelongitude(self.bits, numeric=self.numeric)
+        return self._longitude
+
+    @property
+    def latitude(self):
+        try: return self._latitude
+        except AttributeError: pass
+        self._latitude = decodelatitude(self.bits, numeric=self.numeric)
+        return self._latitude
+
+    @property
+    def timetoexpire(self):
+        try: return self._timetoexpire
+        except AttributeError: pass
+        self._timetoexpire = decodetimetoexpire(self.bits)
+        return self._timetoexpire
+
+    @property
+    def radius(self):
+        try: return self._radius
+        except AttributeError: pass
+        self._radius = decoderadius(self.bits)
+        return self._radius
 
 
 def printHtml(params, out=sys.stdout):
@@ -614,6 +775,69 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('whalenotice', fieldListPostgres+tuple(extraFields),
+                        geometry=('whale',), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('whalenotice', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        get('stationid'),
+                        sqlhelp.geometryWkt('POINT',get('longitude'),get('latitude')),
+                        get('timetoexpire'),
+                        get('radius'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('day'),
+                        get('hour'),
+                        get('min'),
+                        get('stationid'),
+                        sqlhelp.toFloat(get('longitude')),
+                        sqlhelp.toFloat(get('latitude')),
+                        get('timetoexpire'),
+                        get('radius'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -740,6 +964,24 @@ class Testwhalenotice(unittest.TestCase):
         self.failUnlessEqual(r['timetoexpire'],params['timetoexpire'])
         self.failUnlessEqual(r['radius'],params['radius'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('longitude', 'latitude'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "whalenotice" AIS message')
@@ -25,6 +25,7 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
+from aisutils import bitreader
 from aisutils import sqlhelp
 from aisutils import uscg
 
@@ -173,100 +174,100 @@ def encode(params, validate=False):
       - Spare2(uint): Not used.  Should be set to zero. (field automatically set to "0")
     @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
-    @rtype: BitVector
+    @rtype: BitReader
     @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8
     @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.
     '''
 
-    bvList = []
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=8),6))
+    v = 0
+    v = (v<<6)|0x8
     if 'RepeatIndicator' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['RepeatIndicator']),2))
+        v = (v<<2)|(params['RepeatIndicator']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['UserID']),30))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=366),10))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=63),6))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=1),12))
+        v = (v<<2)|0x0
+    v = (v<<30)|(params['UserID']&0x3fffffff)
+    v = (v<<2)|0x0
+    v = (v<<10)|0x16e
+    v = (v<<6)|0x3f
+    v = (v<<12)|0x1
     if 'numreports' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['numreports']),2))
+        v = (v<<2)|(params['numreports']&0x3)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),2))
+        v = (v<<2)|0x0
     if 'stationid1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['stationid1']),8))
+        v = (v<<8)|(params['stationid1']&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time1_day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time1_hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time1_min']),6))
+        v = (v<<8)|0x0
+    v = (v<<5)|(params['time1_day']&0x1f)
+    v = (v<<5)|(params['time1_hour']&0x1f)
+    v = (v<<6)|(params['time1_min']&0x3f)
     if 'center1_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['center1_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['center1_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'center1_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['center1_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['center1_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'timetoexpire1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timetoexpire1']),16))
+        v = (v<<16)|(params['timetoexpire1']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=65535),16))
+        v = (v<<16)|0xffff
     if 'radius1' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['radius1']),16))
+        v = (v<<16)|(params['radius1']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=65534),16))
+        v = (v<<16)|0xfffe
     if 'stationid2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['stationid2']),8))
+        v = (v<<8)|(params['stationid2']&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time2_day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time2_hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time2_min']),6))
+        v = (v<<8)|0x0
+    v = (v<<5)|(params['time2_day']&0x1f)
+    v = (v<<5)|(params['time2_hour']&0x1f)
+    v = (v<<6)|(params['time2_min']&0x3f)
     if 'center2_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['center2_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['center2_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'center2_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['center2_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['center2_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'timetoexpire2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timetoexpire2']),16))
+        v = (v<<16)|(params['timetoexpire2']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=65535),16))
+        v = (v<<16)|0xffff
     if 'radius2' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['radius2']),16))
+        v = (v<<16)|(params['radius2']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=65534),16))
+        v = (v<<16)|0xfffe
     if 'stationid3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['stationid3']),8))
+        v = (v<<8)|(params['stationid3']&0xff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=0),8))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time3_day']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time3_hour']),5))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=params['time3_min']),6))
+        v = (v<<8)|0x0
+    v = (v<<5)|(params['time3_day']&0x1f)
+    v = (v<<5)|(params['time3_hour']&0x1f)
+    v = (v<<6)|(params['time3_min']&0x3f)
     if 'center3_longitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['center3_longitude'])*Decimal('600000')),28))
+        v = (v<<28)|(int(Decimal(params['center3_longitude'])*Decimal('600000'))&0xfffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(108600000,28))
+        v = (v<<28)|0x6791ac0
     if 'center3_latitude' in params:
-        bvList.append(binary.bvFromSignedInt(int(Decimal(params['center3_latitude'])*Decimal('600000')),27))
+        v = (v<<27)|(int(Decimal(params['center3_latitude'])*Decimal('600000'))&0x7ffffff)
     else:
-        bvList.append(binary.bvFromSignedInt(54600000,27))
+        v = (v<<27)|0x3412140
     if 'timetoexpire3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['timetoexpire3']),16))
+        v = (v<<16)|(params['timetoexpire3']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=65535),16))
+        v = (v<<16)|0xffff
     if 'radius3' in params:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=params['radius3']),16))
+        v = (v<<16)|(params['radius3']&0xffff)
     else:
-        bvList.append(binary.setBitVectorSize(BitVector(intVal=65534),16))
-    bvList.append(binary.setBitVectorSize(BitVector(intVal=0),21))
+        v = (v<<16)|0xfffe
+    v = (v<<21)|0x0
 
-    return binary.joinBV(bvList)
+    return bitreader.BitReader(v,424)
 
-def decode(bv, validate=False):
+def decode(bv, validate=False, numeric='decimal'):
     '''Unpack a whalenotice message.
 
     Fields in params:
@@ -303,152 +304,488 @@ def decode(bv, validate=False):
       - timetoexpire3(uint): Seconds from the detection time until the notice expires
       - radius3(uint): Distance from center of detection zone (lat/lon above)
       - Spare2(uint): Not used.  Should be set to zero. (field automatically set to "0")
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @param bv: Bits defining a message
     @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.
+    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.
     @rtype: dict
     @return: params
     '''
 
-    #Would be nice to check the bit count here..
-    #if validate:
-    #    assert (len(bv)==FIX: SOME NUMBER)
+    bits = bitreader.asBitReader(bv)
+    n = bits.size
+    if n < 424:
+        r = {}
+        r['MessageID']=decodeMessageID(bits,numeric=numeric)
+        r['RepeatIndicator']=decodeRepeatIndicator(bits,numeric=numeric)
+        r['UserID']=decodeUserID(bits,numeric=numeric)
+        r['Spare']=decodeSpare(bits,numeric=numeric)
+        r['dac']=decodedac(bits,numeric=numeric)
+        r['fid']=decodefid(bits,numeric=numeric)
+        r['efid']=decodeefid(bits,numeric=numeric)
+        r['numreports']=decodenumreports(bits,numeric=numeric)
+        r['stationid1']=decodestationid1(bits,numeric=numeric)
+        r['time1_day']=decodetime1_day(bits,numeric=numeric)
+        r['time1_hour']=decodetime1_hour(bits,numeric=numeric)
+        r['time1_min']=decodetime1_min(bits,numeric=numeric)
+        r['center1_longitude']=decodecenter1_longitude(bits,numeric=numeric)
+        r['center1_latitude']=decodecenter1_latitude(bits,numeric=numeric)
+        r['timetoexpire1']=decodetimetoexpire1(bits,numeric=numeric)
+        r['radius1']=decoderadius1(bits,numeric=numeric)
+        r['stationid2']=decodestationid2(bits,numeric=numeric)
+        r['time2_day']=decodetime2_day(bits,numeric=numeric)
+        r['time2_hour']=decodetime2_hour(bits,numeric=numeric)
+        r['time2_min']=decodetime2_min(bits,numeric=numeric)
+        r['center2_longitude']=decodecenter2_longitude(bits,numeric=numeric)
+        r['center2_latitude']=decodecenter2_latitude(bits,numeric=numeric)
+        r['timetoexpire2']=decodetimetoexpire2(bits,numeric=numeric)
+        r['radius2']=decoderadius2(bits,numeric=numeric)
+        r['stationid3']=decodestationid3(bits,numeric=numeric)
+        r['time3_day']=decodetime3_day(bits,numeric=numeric)
+        r['time3_hour']=decodetime3_hour(bits,numeric=numeric)
+        r['time3_min']=decodetime3_min(bits,numeric=numeric)
+        r['center3_longitude']=decodecenter3_longitude(bits,numeric=numeric)
+        r['center3_latitude']=decodecenter3_latitude(bits,numeric=numeric)
+        r['timetoexpire3']=decodetimetoexpire3(bits,numeric=numeric)
+        r['radius3']=decoderadius3(bits,numeric=numeric)
+        r['Spare2']=decodeSpare2(bits,numeric=numeric)
+        return r
+    v = bits.value
+    if n > 424: v >>= n-424
     r = {}
     r['MessageID']=8
-    r['RepeatIndicator']=int(bv[6:8])
-    r['UserID']=int(bv[8:38])
+    r['RepeatIndicator']=int((v>>416)&0x3)
+    r['UserID']=int((v>>386)&0x3fffffff)
     r['Spare']=0
     r['dac']=366
     r['fid']=63
     r['efid']=1
-    r['numreports']=int(bv[68:70])
-    r['stationid1']=int(bv[70:78])
-    r['time1_day']=int(bv[78:83])
-    r['time1_hour']=int(bv[83:88])
-    r['time1_min']=int(bv[88:94])
-    r['center1_longitude']=Decimal(binary.signedIntFromBV(bv[94:122]))/Decimal('600000')
-    r['center1_latitude']=Decimal(binary.signedIntFromBV(bv[122:149]))/Decimal('600000')
-    r['timetoexpire1']=int(bv[149:165])
-    r['radius1']=int(bv[165:181])
-    r['stationid2']=int(bv[181:189])
-    r['time2_day']=int(bv[189:194])
-    r['time2_hour']=int(bv[194:199])
-    r['time2_min']=int(bv[199:205])
-    r['center2_longitude']=Decimal(binary.signedIntFromBV(bv[205:233]))/Decimal('600000')
-    r['center2_latitude']=Decimal(binary.signedIntFromBV(bv[233:260]))/Decimal('600000')
-    r['timetoexpire2']=int(bv[260:276])
-    r['radius2']=int(bv[276:292])
-    r['stationid3']=int(bv[292:300])
-    r['time3_day']=int(bv[300:305])
-    r['time3_hour']=int(bv[305:310])
-    r['time3_min']=int(bv[310:316])
-    r['center3_longitude']=Decimal(binary.signedIntFromBV(bv[316:344]))/Decimal('600000')
-    r['center3_latitude']=Decimal(binary.signedIntFromBV(bv[344:371]))/Decimal('600000')
-    r['timetoexpire3']=int(bv[371:387])
-    r['radius3']=int(bv[387:403])
+    r['numreports']=int((v>>354)&0x3)
+    r['stationid1']=int((v>>346)&0xff)
+    r['time1_day']=int((v>>341)&0x1f)
+    r['time1_hour']=int((v>>336)&0x1f)
+    r['time1_min']=int((v>>330)&0x3f)
+    r['timetoexpire1']=int((v>>259)&0xffff)
+    r['radius1']=int((v>>243)&0xffff)
+    r['stationid2']=int((v>>235)&0xff)
+    r['time2_day']=int((v>>230)&0x1f)
+    r['time2_hour']=int((v>>225)&0x1f)
+    r['time2_min']=int((v>>219)&0x3f)
+    r['timetoexpire2']=int((v>>148)&0xffff)
+    r['radius2']=int((v>>132)&0xffff)
+    r['stationid3']=int((v>>124)&0xff)
+    r['time3_day']=int((v>>119)&0x1f)
+    r['time3_hour']=int((v>>114)&0x1f)
+    r['time3_min']=int((v>>108)&0x3f)
+    r['timetoexpire3']=int((v>>37)&0xffff)
+    r['radius3']=int((v>>21)&0xffff)
     r['Spare2']=0
+    if 'decimal' == numeric:
+        r['center1_longitude']=Decimal((((v>>302)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['center1_latitude']=Decimal((((v>>275)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['center2_longitude']=Decimal((((v>>191)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['center2_latitude']=Decimal((((v>>164)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+        r['center3_longitude']=Decimal((((v>>80)&0xfffffff)^0x8000000)-0x8000000)/Decimal('600000')
+        r['center3_latitude']=Decimal((((v>>53)&0x7ffffff)^0x4000000)-0x4000000)/Decimal('600000')
+    elif 'float' == numeric:
+        r['center1_longitude']=((((v>>302)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['center1_latitude']=((((v>>275)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['center2_longitude']=((((v>>191)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['center2_latitude']=((((v>>164)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+        r['center3_longitude']=((((v>>80)&0xfffffff)^0x8000000)-0x8000000)/600000.0
+        r['center3_latitude']=((((v>>53)&0x7ffffff)^0x4000000)-0x4000000)/600000.0
+    elif 'raw' == numeric:
+        r['center1_longitude']=int((((v>>302)&0xfffffff)^0x8000000)-0x8000000)
+        r['center1_latitude']=int((((v>>275)&0x7ffffff)^0x4000000)-0x4000000)
+        r['center2_longitude']=int((((v>>191)&0xfffffff)^0x8000000)-0x8000000)
+        r['center2_latitude']=int((((v>>164)&0x7ffffff)^0x4000000)-0x4000000)
+        r['center3_longitude']=int((((v>>80)&0xfffffff)^0x8000000)-0x8000000)
+        r['center3_latitude']=int((((v>>53)&0x7ffffff)^0x4000000)-0x4000000)
+    else: raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
     return r
 
-def decodeMessageID(bv, validate=False):
+def decodeMessageID(bv, validate=False, numeric='decimal'):
     return 8
 
-def decodeRepeatIndicator(bv, validate=False):
-    return int(bv[6:8])
+def decodeRepeatIndicator(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(6,2)
 
-def decodeUserID(bv, validate=False):
-    return int(bv[8:38])
+def decodeUserID(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(8,30)
 
-def decodeSpare(bv, validate=False):
+def decodeSpare(bv, validate=False, numeric='decimal'):
     return 0
 
-def decodedac(bv, validate=False):
+def decodedac(bv, validate=False, numeric='decimal'):
     return 366
 
-def decodefid(bv, validate=False):
+def decodefid(bv, validate=False, numeric='decimal'):
     return 63
 
-def decodeefid(bv, validate=False):
+def decodeefid(bv, validate=False, numeric='decimal'):
     return 1
 
-def decodenumreports(bv, validate=False):
-    return int(bv[68:70])
+def decodenumreports(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(68,2)
 
-def decodestationid1(bv, validate=False):
-    return int(bv[70:78])
+def decodestationid1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(70,8)
 
-def decodetime1_day(bv, validate=False):
-    return int(bv[78:83])
+def decodetime1_day(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(78,5)
 
-def decodetime1_hour(bv, validate=False):
-    return int(bv[83:88])
+def decodetime1_hour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(83,5)
 
-def decodetime1_min(bv, validate=False):
-    return int(bv[88:94])
+def decodetime1_min(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(88,6)
 
-def decodecenter1_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[94:122]))/Decimal('600000')
+def decodecenter1_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(94,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodecenter1_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[122:149]))/Decimal('600000')
+def decodecenter1_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(122,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodetimetoexpire1(bv, validate=False):
-    return int(bv[149:165])
+def decodetimetoexpire1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(149,16)
 
-def decoderadius1(bv, validate=False):
-    return int(bv[165:181])
+def decoderadius1(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(165,16)
 
-def decodestationid2(bv, validate=False):
-    return int(bv[181:189])
+def decodestationid2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(181,8)
 
-def decodetime2_day(bv, validate=False):
-    return int(bv[189:194])
+def decodetime2_day(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(189,5)
 
-def decodetime2_hour(bv, validate=False):
-    return int(bv[194:199])
+def decodetime2_hour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(194,5)
 
-def decodetime2_min(bv, validate=False):
-    return int(bv[199:205])
+def decodetime2_min(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(199,6)
 
-def decodecenter2_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[205:233]))/Decimal('600000')
+def decodecenter2_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(205,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodecenter2_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[233:260]))/Decimal('600000')
+def decodecenter2_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(233,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodetimetoexpire2(bv, validate=False):
-    return int(bv[260:276])
+def decodetimetoexpire2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(260,16)
 
-def decoderadius2(bv, validate=False):
-    return int(bv[276:292])
+def decoderadius2(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(276,16)
 
-def decodestationid3(bv, validate=False):
-    return int(bv[292:300])
+def decodestationid3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(292,8)
 
-def decodetime3_day(bv, validate=False):
-    return int(bv[300:305])
+def decodetime3_day(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(300,5)
 
-def decodetime3_hour(bv, validate=False):
-    return int(bv[305:310])
+def decodetime3_hour(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(305,5)
 
-def decodetime3_min(bv, validate=False):
-    return int(bv[310:316])
+def decodetime3_min(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(310,6)
 
-def decodecenter3_longitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[316:344]))/Decimal('600000')
+def decodecenter3_longitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(316,28)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodecenter3_latitude(bv, validate=False):
-    return Decimal(binary.signedIntFromBV(bv[344:371]))/Decimal('600000')
+def decodecenter3_latitude(bv, validate=False, numeric='decimal'):
+    val = bitreader.asBitReader(bv).sint(344,27)
+    if 'decimal' == numeric: return Decimal(val)/Decimal('600000')
+    if 'float' == numeric: return val/600000.0
+    if 'raw' == numeric: return val
+    raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))
 
-def decodetimetoexpire3(bv, validate=False):
-    return int(bv[371:387])
+def decodetimetoexpire3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(371,16)
 
-def decoderadius3(bv, validate=False):
-    return int(bv[387:403])
+def decoderadius3(bv, validate=False, numeric='decimal'):
+    return bitreader.asBitReader(bv).uint(387,16)
 
-def decodeSpare2(bv, validate=False):
+def decodeSpare2(bv, validate=False, numeric='decimal'):
     return 0
 
 
+class View(object):
+    '''Lazy view of a whalenotice message.
+
+    Fields are decoded from the bits the first time they are accessed
+    and then cached.
+    '''
+
+    __slots__ = ('bits','numeric','_MessageID','_RepeatIndicator','_UserID','_Spare','_dac','_fid','_efid','_numreports','_stationid1','_time1_day','_time1_hour','_time1_min','_center1_longitude','_center1_latitude','_timetoexpire1','_radius1','_stationid2','_time2_day','_time2_hour','_time2_min','_center2_longitude','_center2_latitude','_timetoexpire2','_radius2','_stationid3','_time3_day','_time3_hour','_time3_min','_center3_longitude','_center3_latitude','_timetoexpire3','_radius3','_Spare2')
+
+    def __init__(self, bv, numeric='decimal'):
+        '''
+        @param bv: Bits defining a message
+        @type bv: BitReader or BitVector
+        @param numeric: decimal, float or raw for the scaled fields
+        '''
+        self.bits = bitreader.asBitReader(bv)
+        self.numeric = numeric
+
+    def __getitem__(self, fieldName):
+        if fieldName not in fieldList: raise KeyError(fieldName)
+        return getattr(self, fieldName)
+
+    def asDict(self):
+        '''@return: params the same as decode()'''
+        return decode(self.bits, numeric=self.numeric)
+
+    @property
+    def MessageID(self):
+        try: return self._MessageID
+        except AttributeError: pass
+        self._MessageID = decodeMessageID(self.bits)
+        return self._MessageID
+
+    @property
+    def RepeatIndicator(self):
+        try: return self._RepeatIndicator
+        except AttributeError: pass
+        self._RepeatIndicator = decodeRepeatIndicator(self.bits)
+        return self._RepeatIndicator
+
+    @property
+    def UserID(self):
+        try: return self._UserID
+        except AttributeError: pass
+        self._UserID = decodeUserID(self.bits)
+        return self._UserID
+
+    @property
+    def Spare(self):
+        try: return self._Spare
+        except AttributeError: pass
+        self._Spare = decodeSpare(self.bits)
+        return self._Spare
+
+    @property
+    def dac(self):
+        try: return self._dac
+        except AttributeError: pass
+        self._dac = decodedac(self.bits)
+        return self._dac
+
+    @property
+    def fid(self):
+        try: return self._fid
+        except AttributeError: pass
+        self._fid = decodefid(self.bits)
+        return self._fid
+
+    @property
+    def efid(self):
+        try: return self._efid
+        except AttributeError: pass
+        self._efid = decodeefid(self.bits)
+        return self._efid
+
+    @property
+    def numreports(self):
+        try: return self._numreports
+        except AttributeError: pass
+        self._numreports = decodenumreports(self.bits)
+        return self._numreports
+
+    @property
+    def stationid1(self):
+        try: return self._stationid1
+        except AttributeError: pass
+        self._stationid1 = decodestationid1(self.bits)
+        return self._stationid1
+
+    @property
+    def time1_day(self):
+        try: return self._time1_day
+        except AttributeError: pass
+        self._time1_day = decodetime1_day(self.bits)
+        return self._time1_day
+
+    @property
+    def time1_hour(self):
+        try: return self._time1_hour
+        except AttributeError: pass
+        self._time1_hour = decodetime1_hour(self.bits)
+        return self._time1_hour
+
+    @property
+    def time1_min(self):
+        try: return self._time1_min
+        except AttributeError: pass
+        self._time1_min = decodetime1_min(self.bits)
+        return self._time1_min
+
+    @property
+    def center1_longitude(self):
+        try: return self._center1_longitude
+        except AttributeError: pass
+        self._center1_longitude = decodecenter1_longitude(self.bits, numeric=self.numeric)
+        return self._center1_longitude
+
+    @property
+    def center1_latitude(self):
+        try: return self._center1_latitude
+        except AttributeError: pass
+        self._center1_latitude = decodecenter1_latitude(self.bits, numeric=self.numeric)
+        return self._center1_latitude
+
+    @property
+    def timetoexpire1(self):
+        try: return self._timetoexpire1
+        except AttributeError: pass
+        self._timetoexpire1 = decodetimetoexpire1(self.bits)
+        return self._timetoexpire1
+
+    @property
+    def radius1(self):
+        try: return self._radius1
+        except AttributeError: pass
+        self._radius1 = decoderadius1(self.bits)
+        return self._radius1
+
+    @property
+    def stationid2(self):
+        try: return self._stationid2
+        except AttributeError: pass
+        self._stationid2 = decodestationid2(self.bits)
+        return self._stationid2
+
+    @property
+    def time2_day(self):
+        try: return self._time2_day
+        except AttributeError: pass
+        self._time2_day = decodetime2_day(self.bits)
+        return self._time2_day
+
+    @property
+    def time2_hour(self):
+        try: return self._time2_hour
+        except AttributeError: pass
+        self._time2_hour = decodetime2_hour(self.bits)
+        return self._time2_hour
+
+    @property
+    def time2_min(self):
+        try: return self._time2_min
+        except AttributeError: pass
+        self._time2_min = decodetime2_min(self.bits)
+        return self._time2_min
+
+    @property
+    def center2_longitude(self):
+        try: return self._center2_longitude
+        except AttributeError: pass
+        self._center2_longitude = decodecenter2_longitude(self.bits, numeric=self.numeric)
+        return self._center2_longitude
+
+    @property
+    def center2_latitude(self):
+        try: return self._center2_latitude
+        except AttributeError: pass
+        self._center2_latitude = decodecenter2_latitude(self.bits, numeric=self.numeric)
+        return self._center2_latitude
+
+    @property
+    def timetoexpire2(self):
+        try: return self._timetoexpire2
+        except AttributeError: pass
+        self._timetoexpire2 = decodetimetoexpire2(self.bits)
+        return self._timetoexpire2
+
+    @property
+    def radius2(self):
+        try: return self._radius2
+        except AttributeError: pass
+        self._radius2 = decoderadius2(self.bits)
+        return self._radius2
+
+    @property
+    def stationid3(self):
+        try: return self._stationid3
+        except AttributeError: pass
+        self._stationid3 = decodestationid3(self.bits)
+        return self._stationid3
+
+    @property
+    def time3_day(self):
+        try: return self._time3_day
+        except AttributeError: pass
+        self._time3_day = decodetime3_day(self.bits)
+        return self._time3_day
+
+    @property
+    def time3_hour(self):
+        try: return self._time3_hour
+        except AttributeError: pass
+        self._time3_hour = decodetime3_hour(self.bits)
+        return self._time3_hour
+
+    @property
+    def time3_min(self):
+        try: return self._time3_min
+        except AttributeError: pass
+        self._time3_min = decodetime3_min(self.bits)
+        return self._time3_min
+
+    @property
+    def center3_longitude(self):
+        try: return self._center3_longitude
+        except AttributeError: pass
+        self._center3_longitude = decodecenter3_longitude(self.bits, numeric=self.numeric)
+        return self._center3_longitude
+
+    @property
+    def center3_latitude(self):
+        try: return self._center3_latitude
+        except AttributeError: pass
+        self._center3_latitude = decodecenter3_latitude(self.bits, numeric=self.numeric)
+        return self._center3_latitude
+
+    @property
+    def timetoexpire3(self):
+        try: return self._timetoexpire3
+        except AttributeError: pass
+        self._timetoexpire3 = decodetimetoexpire3(self.bits)
+        return self._timetoexpire3
+
+    @property
+    def radius3(self):
+        try: return self._radius3
+        except AttributeError: pass
+        self._radius3 = decoderadius3(self.bits)
+        return self._radius3
+
+    @property
+    def Spare2(self):
+        try: return self._Spare2
+        except AttributeError: pass
+        self._Spare2 = decodeSpare2(self.bits)
+        return self._Spare2
+
+
 def printHtml(params, out=sys.stdout):
         out.write("<h3>whalenotice</h3>\n")
         out.write("<table border=\"1\">\n")
@@ -1084,6 +1421,105 @@ def sqlInsert(params,extraParams=None,dbType='postgres'):
 
         return i
 
+def sqlRowInsert(extraFields=(), dbType='postgres', placeholder='%s'):
+        """
+        Prepared INSERT for the rows from sqlRow.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to sqlRow as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        """
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert('whalenotice', fieldListPostgres+tuple(extraFields),
+                        geometry=('center1', 'center2', 'center3'), dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert('whalenotice', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def sqlRow(params, extraValues=(), dbType='postgres'):
+        """
+        Values of a message in the column order of sqlRowInsert.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to sqlRowInsert
+        @rtype: tuple
+        """
+        get = params.get
+        if dbType=='postgres':
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('efid'),
+                        get('numreports'),
+                        get('stationid1'),
+                        get('time1_day'),
+                        get('time1_hour'),
+                        get('time1_min'),
+                        sqlhelp.geometryWkt('POINT',get('center1_longitude'),get('center1_latitude')),
+                        get('timetoexpire1'),
+                        get('radius1'),
+                        get('stationid2'),
+                        get('time2_day'),
+                        get('time2_hour'),
+                        get('time2_min'),
+                        sqlhelp.geometryWkt('POINT',get('center2_longitude'),get('center2_latitude')),
+                        get('timetoexpire2'),
+                        get('radius2'),
+                        get('stationid3'),
+                        get('time3_day'),
+                        get('time3_hour'),
+                        get('time3_min'),
+                        sqlhelp.geometryWkt('POINT',get('center3_longitude'),get('center3_latitude')),
+                        get('timetoexpire3'),
+                        get('radius3'),
+                        get('Spare2'),
+                )
+        else:
+                row = (
+                        get('MessageID'),
+                        get('RepeatIndicator'),
+                        get('UserID'),
+                        get('Spare'),
+                        get('dac'),
+                        get('fid'),
+                        get('efid'),
+                        get('numreports'),
+                        get('stationid1'),
+                        get('time1_day'),
+                        get('time1_hour'),
+                        get('time1_min'),
+                        sqlhelp.toFloat(get('center1_longitude')),
+                        sqlhelp.toFloat(get('center1_latitude')),
+                        get('timetoexpire1'),
+                        get('radius1'),
+                        get('stationid2'),
+                        get('time2_day'),
+                        get('time2_hour'),
+                        get('time2_min'),
+                        sqlhelp.toFloat(get('center2_longitude')),
+                        sqlhelp.toFloat(get('center2_latitude')),
+                        get('timetoexpire2'),
+                        get('radius2'),
+                        get('stationid3'),
+                        get('time3_day'),
+                        get('time3_hour'),
+                        get('time3_min'),
+                        sqlhelp.toFloat(get('center3_longitude')),
+                        sqlhelp.toFloat(get('center3_latitude')),
+                        get('timetoexpire3'),
+                        get('radius3'),
+                        get('Spare2'),
+                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+
 ######################################################################
 # LATEX SUPPORT
 ######################################################################
@@ -1286,6 +1722,24 @@ class Testwhalenotice(unittest.TestCase):
         self.failUnlessEqual(r['radius3'],params['radius3'])
         self.failUnlessEqual(r['Spare2'],params['Spare2'])
 
+    def testView(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        view = View(bits)
+        for fieldName in fieldList:
+            self.failUnlessEqual(view[fieldName],r[fieldName])
+        self.failUnlessEqual(view.asDict(),r)
+
+    def testNumeric(self):
+        bits = encode(testParams())
+        r    = decode(bits)
+        f    = decode(bits, numeric='float')
+        raw  = decode(bits, numeric='raw')
+        for fieldName in ('center1_longitude', 'center1_latitude', 'center2_longitude', 'center2_latitude', 'center3_longitude', 'center3_latitude'):
+            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)
+            self.failUnless(isinstance(raw[fieldName],int))
+        self.failUnlessRaises(ValueError,decode,bits,numeric='bogus')
+
 def addMsgOptions(parser):
     parser.add_option('-d','--decode',dest='doDecode',default=False,action='store_true',
                 help='decode a "whalenotice" AIS message')
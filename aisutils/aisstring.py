@@ -37,6 +37,7 @@ from BitVector import BitVector
 
 # Local
 import binary
+from bitreader import BitReader
 #import verbosity
 #from verbosity import BOMBASTIC,VERBOSE,TRACE,TERSE,ALWAYS
 
@@ -160,13 +161,22 @@ def decode(bits,dropAfterFirstAt=False):
     Decode bits as a string.  Does not remove the end space or @@@@.  Must be an multiple of 6 bits.
 
     @param bits: n*6 bits that represent a string.
-    @type bits: BitVector
+    @type bits: BitVector or BitReader
     @return: string with pad spaces or @@@@
     @rtype: str
     '''
     #assert(len(bits) % 6 == 0)
     numchar=len(bits)/6
     s = []
+    if isinstance(bits,BitReader):
+	# Pull each character straight out of the integer
+	value = bits.value >> (len(bits) % 6)
+	for shift in range(6*(numchar-1),-1,-6):
+	    val = int((value >> shift) & 63)
+	    if dropAfterFirstAt and val==0:
+		break
+	    s.append(characterLUT[val])
+	return ''.join(s)
     for i in range(numchar): # FIX: off by one?
 	start = 6 * i
 	end = start+6 #6 * (i+1)
@@ -0,0 +1,530 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Columnar archive of decoded AIS logs.
+
+Each analysis run over months of logs used to spend most of its time
+parsing and decoding the same NMEA text again.  An archive keeps the
+decoded position and static (5 and 24) reports as one numpy .npy file
+per column per UTC day::
+
+  root/2006-07-15/positions/mmsi.npy
+  root/2006-07-15/positions/lon.npy
+  ...
+  root/2006-07-15/static/name.npy
+  root/2006-07-15/sources.txt
+
+The columns can be memory mapped, so a later run only pages in the
+columns it uses.  Every row has a source (line number in sources.txt)
+and the byte offset of its line in that file so that the raw NMEA can
+be found again.  Adding a file that is already in sources.txt replaces
+its rows rather than adding them a second time.
+
+Reports without a USCG timestamp go in a day called undated.  Logs
+must be normalized first so that the message 5 reports are on one line.
+
+  >>> import os, shutil, tempfile
+  >>> tmp = tempfile.mkdtemp()
+  >>> logName = os.path.join(tmp, 'test.ais')
+  >>> log = open(logName, 'w')
+  >>> log.write('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433\\n')
+  >>> log.write('!AIVDM,1,1,,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j@H8888888888880,2*5B,r003669945,1165850434\\n')
+  >>> log.close()
+  >>> writer = ArchiveWriter(os.path.join(tmp, 'archive'))
+  >>> writer.addFile(logName)
+  {'positions': 1, 'static': 1}
+  >>> writer.close()
+  >>> archive = Archive(os.path.join(tmp, 'archive'))
+  >>> archive.days()
+  ['2006-12-11']
+  >>> pos = archive.load('2006-12-11', columns=('mmsi', 'lon'))
+  >>> int(pos['mmsi'][0]), round(float(pos['lon'][0]), 5)
+  (366985620, -91.23304)
+  >>> archive.load('2006-12-11', 'static')['name'][0]
+  'LMZ NAFSIKA'
+  >>> archive.rawLine('2006-12-11', 'static', 0)[:16]
+  '!AIVDM,1,1,,B,53'
+  >>> shutil.rmtree(tmp)
+
+@requires: U{numpy<http://numpy.scipy.org/>}
+@since: 2026-Oct-16
+@see: L{ais.batch.decode_positions}
+'''
+
+import datetime
+import os
+import sys
+
+import numpy
+import numpy.lib.format
+
+import ais.batch
+import ais.decodecache
+import ais.ais_msg_5
+import ais.ais_msg_24_handcoded
+from aisutils import uscg
+
+positionsKind = 'positions'
+staticKind = 'static'
+undatedDay = 'undated'
+'''Day directory for reports without a USCG timestamp'''
+
+staticMsgMods = {'5': ais.ais_msg_5, 'H': ais.ais_msg_24_handcoded}
+'''Decoder for the first payload character of each static report'''
+
+def provenanceDtype():
+    '@return: dtype of the source and offset columns added to every row'
+    return [('source', numpy.uint16), ('offset', numpy.uint64)]
+
+def positionsDtype(stationWidth=16):
+    '''
+    @return: dtype of the position rows.  ais.batch.positionDtype plus provenance.
+    '''
+    return numpy.dtype(ais.batch.positionDtype(stationWidth).descr + provenanceDtype())
+
+def staticDtype(stationWidth=16):
+    '''
+    @return: dtype of the static rows from messages 5 and 24.  Fields a
+    message does not have are zero or empty.
+    '''
+    return numpy.dtype([
+        ('msgnum', numpy.uint8),
+        ('mmsi', numpy.uint32),
+        ('partnum', numpy.uint8),
+        ('imonumber', numpy.uint32),
+        ('callsign', 'S7'),
+        ('name', 'S20'),
+        ('shipandcargo', numpy.uint8),
+        ('dima', numpy.uint16),
+        ('dimb', numpy.uint16),
+        ('dimc', numpy.uint8),
+        ('dimd', numpy.uint8),
+        ('destination', 'S20'),
+        ('cg_sec', numpy.float64),
+        ('station', 'S%d' % stationWidth),
+        ] + provenanceDtype())
+
+
+def dayName(cg_sec):
+    '''
+    >>> dayName(1165850433.), dayName(float('nan'))
+    ('2006-12-11', 'undated')
+
+    @return: archive day directory name for a UNIX UTC time
+    '''
+    if cg_sec != cg_sec: # NaN
+        return undatedDay
+    return datetime.datetime.utcfromtimestamp(int(cg_sec) // 86400 * 86400).strftime('%Y-%m-%d')
+
+
+def stationAndTime(fields):
+    '''
+    @param fields: NMEA line split on commas
+    @return: (station, cg_sec) from the USCG tail.  cg_sec is NaN if missing.
+    '''
+    station = uscg.stationField(fields) or ''
+    try:
+        cg_sec = float(fields[-1])
+    except ValueError:
+        cg_sec = numpy.nan
+    return station, cg_sec
+
+
+def saveColumn(filename, values):
+    'Write one column so that a reader never sees a partly written file'
+    tmpName = filename + '.tmp'
+    f = open(tmpName, 'wb')
+    numpy.save(f, values)
+    f.close()
+    os.rename(tmpName, filename)
+
+
+def appendColumn(filename, values):
+    '''
+    Add values to the end of a column without reading it.
+
+    The new values are written after the existing data and then the shape
+    in the header is changed in place, so a reader sees either the old or
+    the new length.  If the dtype differs or the longer shape does not
+    fit in the header padding, the column is rewritten instead.
+
+    >>> import shutil, tempfile
+    >>> tmp = tempfile.mkdtemp()
+    >>> filename = os.path.join(tmp, 'mmsi.npy')
+    >>> appendColumn(filename, numpy.arange(3, dtype=numpy.uint16))
+    >>> appendColumn(filename, numpy.arange(3, 5, dtype=numpy.uint16))
+    >>> numpy.load(filename, mmap_mode='r').tolist()
+    [0, 1, 2, 3, 4]
+    >>> shutil.rmtree(tmp)
+    '''
+    if not os.path.exists(filename):
+        saveColumn(filename, values)
+        return
+    f = open(filename, 'r+b')
+    version = numpy.lib.format.read_magic(f)
+    if (1, 0) == version:
+        shape, fortran, dtype = numpy.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran, dtype = numpy.lib.format.read_array_header_2_0(f)
+    dataStart = f.tell()
+    headerStart = numpy.lib.format.MAGIC_LEN + (2, 4)[(1, 0) != version]
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        numpy.lib.format.dtype_to_descr(dtype), shape[0] + len(values))
+    space = dataStart - headerStart - 1 # keep the newline at the end
+    if dtype != values.dtype or len(shape) != 1 or fortran or len(header) > space:
+        f.close()
+        saveColumn(filename, numpy.concatenate((numpy.load(filename), values)))
+        return
+    f.seek(dataStart + shape[0] * dtype.itemsize)
+    f.write(numpy.ascontiguousarray(values).tobytes())
+    f.flush()
+    f.seek(headerStart)
+    f.write(header.ljust(space) + '\n')
+    f.close()
+
+
+class ArchiveWriter(object):
+    '''
+    Decode NMEA log files into an archive.  Rows are buffered in memory
+    and appended to the day columns by flush, which addFile calls at the
+    end of each file.  The existing columns of a day are only read back
+    when a source that is already in the day is added again.
+
+      >>> import shutil, tempfile
+      >>> tmp = tempfile.mkdtemp()
+      >>> names = [os.path.join(tmp, name) for name in ('a.ais', 'b.ais')]
+      >>> for name in names:
+      ...     open(name, 'w').write('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433\\n')
+      >>> writer = ArchiveWriter(os.path.join(tmp, 'archive'))
+      >>> for name in names + names[:1]:
+      ...     counts = writer.addFile(name)
+      >>> archive = Archive(os.path.join(tmp, 'archive'))
+      >>> archive.load('2006-12-11')['source'].tolist(), len(archive.sources('2006-12-11'))
+      ([1, 0], 2)
+      >>> shutil.rmtree(tmp)
+    '''
+
+    def __init__(self, root, blockSize=100000, stationWidth=16, decodeCache=None):
+        '''
+        @param root: archive directory.  Made if needed.
+        @param blockSize: lines to decode at once
+        @param stationWidth: characters to keep for the station name
+        @param decodeCache: ais.decodecache.DecodeCache for the static reports
+        '''
+        self.root = root
+        self.blockSize = blockSize
+        self.stationWidth = stationWidth
+        if decodeCache is None:
+            decodeCache = ais.decodecache.DecodeCache()
+        self.decodeCache = decodeCache
+        self.pending = {} # (day, kind) -> list of structured arrays
+        self.sources = {} # day -> {source filename: index}
+        self.replace = {} # day -> source indexes to drop from the day at the next flush
+        self.days = {} # source filename -> days that it has rows for in this pass
+        if not os.path.exists(root):
+            os.makedirs(root)
+
+    def daySources(self, day):
+        '@return: source filename to index for a day'
+        daySources = self.sources.get(day)
+        if daySources is None:
+            daySources = self.sources[day] = {}
+            for i, name in enumerate(Archive(self.root).sources(day)):
+                daySources[name] = i
+        return daySources
+
+    def sourceIndex(self, day, source):
+        '''
+        @return: index of source in the sources.txt of a day.  New sources are added.
+        '''
+        daySources = self.daySources(day)
+        index = daySources.get(source)
+        if index is None:
+            index = daySources[source] = len(daySources)
+            dayDir = os.path.join(self.root, day)
+            if not os.path.exists(dayDir):
+                os.makedirs(dayDir)
+            open(os.path.join(dayDir, 'sources.txt'), 'a').write(source + '\n')
+        return index
+
+    def addFile(self, filename):
+        '''
+        Decode a whole log file and write it to the archive.
+
+        @return: rows added of each kind
+        @rtype: dict
+        '''
+        source = os.path.abspath(filename)
+        self.days[source] = set() # Start a new pass so old rows get replaced
+        counts = {positionsKind: 0, staticKind: 0}
+        lines = []
+        offsets = []
+        offset = 0
+        for line in open(filename, 'rb'):
+            lines.append(line)
+            offsets.append(offset)
+            offset += len(line)
+            if len(lines) >= self.blockSize:
+                self.addLines(lines, offsets, source, counts)
+                lines = []
+                offsets = []
+        if lines:
+            self.addLines(lines, offsets, source, counts)
+        self.flush()
+        return counts
+
+    def addLines(self, lines, offsets, source, counts=None):
+        '''
+        Decode a block of lines into the buffered rows.
+
+        @param offsets: byte offset of each line in source
+        @param source: name of the file the lines came from
+        @param counts: dict of rows added of each kind that is updated
+        '''
+        index = []
+        pos = ais.batch.decode_positions(lines, self.stationWidth, index)
+        rows = numpy.zeros(len(pos), dtype=positionsDtype(self.stationWidth))
+        for name in pos.dtype.names:
+            rows[name] = pos[name]
+        rows['offset'] = numpy.array(offsets, dtype=numpy.uint64)[index]
+        self.addRows(positionsKind, rows, source, counts)
+        self.addRows(staticKind, self.decodeStatic(lines, offsets), source, counts)
+
+    def decodeStatic(self, lines, offsets):
+        '''
+        @return: staticDtype rows for the single line 5 and 24 reports
+        '''
+        found = []
+        for line, offset in zip(lines, offsets):
+            fields = line.rstrip().split(',')
+            if len(fields) < 7 or '1' != fields[1] or fields[0][-3:] not in ('VDM','VDO'):
+                continue
+            payload = fields[5]
+            msgMod = staticMsgMods.get(payload[:1])
+            if msgMod is None:
+                continue
+            try:
+                msg = self.decodeCache.decode(payload, int(fields[6][:1]), msgMod)
+            except Exception, e:
+                sys.stderr.write('WARNING: skipping undecodable static report: %s\n' % str(e))
+                continue
+            station, cg_sec = stationAndTime(fields)
+            found.append((msg, cg_sec, station, offset))
+
+        rows = numpy.zeros(len(found), dtype=staticDtype(self.stationWidth))
+        for i, (msg, cg_sec, station, offset) in enumerate(found):
+            row = rows[i]
+            row['msgnum'] = msg['MessageID']
+            row['mmsi'] = msg['UserID']
+            row['partnum'] = msg.get('partnum', 0)
+            row['imonumber'] = msg.get('IMOnumber', 0)
+            row['callsign'] = msg.get('callsign', '').rstrip(' @')
+            row['name'] = msg.get('name', '').rstrip(' @')
+            row['shipandcargo'] = msg.get('shipandcargo', 0)
+            row['dima'] = msg.get('dimA', 0)
+            row['dimb'] = msg.get('dimB', 0)
+            row['dimc'] = msg.get('dimC', 0)
+            row['dimd'] = msg.get('dimD', 0)
+            row['destination'] = msg.get('destination', '').rstrip(' @')
+            row['cg_sec'] = cg_sec
+            row['station'] = station
+            row['offset'] = offset
+        return rows
+
+    def addRows(self, kind, rows, source, counts=None):
+        '''
+        Buffer rows of one kind split by day.  The source column is filled in here.
+        The first rows of a pass over a source that the day already has
+        replace the rows from before.
+        '''
+        if 0 == len(rows):
+            return
+        days = numpy.array([dayName(t) for t in rows['cg_sec']])
+        sourceDays = self.days.setdefault(source, set())
+        for day in numpy.unique(days):
+            if day not in sourceDays:
+                sourceDays.add(day)
+                if source in self.daySources(day):
+                    self.replaceSource(day, self.daySources(day)[source])
+            dayRows = rows[days == day]
+            dayRows['source'] = self.sourceIndex(day, source)
+            self.pending.setdefault((day, kind), []).append(dayRows)
+        if counts is not None:
+            counts[kind] += len(rows)
+
+    def replaceSource(self, day, index):
+        '''
+        Drop the rows of a source from a day.  Buffered rows go now and
+        rows on disk go at the next flush.
+        '''
+        self.replace.setdefault(day, set()).add(index)
+        for kind in (positionsKind, staticKind):
+            blocks = self.pending.get((day, kind))
+            if blocks:
+                self.pending[(day, kind)] = [block[block['source'] != index] for block in blocks]
+
+    def flush(self):
+        '''
+        Append the buffered rows to the columns on disk.  Days with a
+        source being replaced are rewritten without its old rows.
+        '''
+        pending = self.pending
+        self.pending = {}
+        replace = self.replace
+        self.replace = {}
+        archive = Archive(self.root)
+        work = dict(pending)
+        for day in replace:
+            for kind in archive.kinds(day):
+                work.setdefault((day, kind), [])
+        for (day, kind), blocks in sorted(work.iteritems()):
+            kindDir = os.path.join(self.root, day, kind)
+            if not os.path.exists(kindDir):
+                os.makedirs(kindDir)
+            rows = None
+            if blocks:
+                rows = numpy.concatenate(blocks)
+            if day not in replace or kind not in archive.kinds(day):
+                if rows is not None:
+                    for name in rows.dtype.names:
+                        appendColumn(os.path.join(kindDir, name + '.npy'), rows[name])
+                continue
+            existing = archive.load(day, kind, mmap=False)
+            keep = ~numpy.in1d(existing['source'], list(replace[day]))
+            for name, values in existing.iteritems():
+                values = values[keep]
+                if rows is not None:
+                    values = numpy.concatenate((values, rows[name]))
+                saveColumn(os.path.join(kindDir, name + '.npy'), values)
+
+    def close(self):
+        '''Write anything still buffered'''
+        self.flush()
+
+
+class Archive(object):
+    '''
+    Read the day columns of an archive.
+    '''
+
+    def __init__(self, root):
+        '''
+        @param root: archive directory from ArchiveWriter
+        '''
+        self.root = root
+
+    def days(self):
+        '''
+        @return: day directory names in order.  undated sorts last.
+        @rtype: list
+        '''
+        if not os.path.isdir(self.root):
+            return []
+        return sorted([d for d in os.listdir(self.root)
+                       if os.path.isdir(os.path.join(self.root, d))])
+
+    def kinds(self, day):
+        '''
+        @return: the kinds of rows (positions, static) that a day has
+        '''
+        dayDir = os.path.join(self.root, day)
+        return [kind for kind in (positionsKind, staticKind)
+                if os.path.isdir(os.path.join(dayDir, kind))]
+
+    def columns(self, day, kind=positionsKind):
+        '''
+        @return: column names of one kind for a day
+        '''
+        kindDir = os.path.join(self.root, day, kind)
+        if not os.path.isdir(kindDir):
+            return []
+        return sorted([name[:-4] for name in os.listdir(kindDir) if name.endswith('.npy')])
+
+    def load(self, day, kind=positionsKind, columns=None, mmap=True):
+        '''
+        @param columns: names of the columns to load.  Defaults to all.
+        @param mmap: memory map the columns read only rather than reading them in
+        @return: column name to numpy array
+        @rtype: dict
+        '''
+        if columns is None:
+            columns = self.columns(day, kind)
+        mode = None
+        if mmap:
+            mode = 'r'
+        kindDir = os.path.join(self.root, day, kind)
+        result = {}
+        for name in columns:
+            result[name] = numpy.load(os.path.join(kindDir, name + '.npy'), mmap_mode=mode)
+        return result
+
+    def iterDays(self, kind=positionsKind, columns=None, startDay=None, endDay=None, mmap=True):
+        '''
+        Walk the days in order.
+
+        @param startDay: first day to return such as 2006-07-15
+        @param endDay: last day to return
+        @return: generator of (day, columns dict)
+        '''
+        for day in self.days():
+            if day == undatedDay:
+                continue
+            if startDay is not None and day < startDay:
+                continue
+            if endDay is not None and day > endDay:
+                break
+            if kind not in self.kinds(day):
+                continue
+            yield day, self.load(day, kind, columns, mmap)
+
+    def sources(self, day):
+        '''
+        @return: source file names of a day.  The source column indexes this list.
+        '''
+        filename = os.path.join(self.root, day, 'sources.txt')
+        if not os.path.exists(filename):
+            return []
+        return [line.rstrip('\n') for line in open(filename)]
+
+    def rawLine(self, day, kind, row):
+        '''
+        Read back the original NMEA line of a row.
+
+        @param row: row number in the day columns
+        @return: the line from the source file
+        '''
+        cols = self.load(day, kind, ('source', 'offset'))
+        f = open(self.sources(day)[int(cols['source'][row])], 'rb')
+        f.seek(int(cols['offset'][row]))
+        line = f.readline()
+        f.close()
+        return line
+
+
+if __name__=='__main__':
+    from optparse import OptionParser
+    from aisutils import doctestmain
+    parser = OptionParser(usage="%prog [options] [file1.ais file2.ais ...]")
+    parser.add_option('-a','--archive',dest='archive',default=None,
+                      help='Archive directory to add the files to or summarize')
+    doctestmain.addOptions(parser)
+    (options,args) = parser.parse_args()
+
+    success = doctestmain.runDocTests(options)
+
+    if options.archive is not None:
+        if args:
+            writer = ArchiveWriter(options.archive)
+            for filename in args:
+                print filename, writer.addFile(filename)
+            writer.close()
+        else:
+            archive = Archive(options.archive)
+            for day in archive.days():
+                for kind in archive.kinds(day):
+                    print day, kind, len(archive.load(day, kind, ('mmsi',))['mmsi'])
+
+    if not success:
+        sys.exit('Something Failed')
@@ -20,7 +20,6 @@ They are usually encoded an ASCII 6-bit packing within NMEA
 
 
 @todo: Flush out stuffBits and unstuffBits
-@todo: bitvectorais6
 @todo: test cases for ais6tobitvec
 
 @var decode: cache of character to BitVector lookup
@@ -36,12 +35,15 @@ They are usually encoded an ASCII 6-bit packing within NMEA
 
 
 # Python standard library
+import operator
 import sys
 
 # Outside modules
 from BitVector import BitVector
 import struct
 
+from bitreader import BitReader
+
 def float2bitvec(floatval):
     '''
     Get the IEEE floating point bits for a python float
@@ -63,7 +65,7 @@ def float2bitvec(floatval):
     # FIX: make this go in one step now that bitvector 1.3 is out.
     bvList = []
     for i in range(4):
-         bv1 = setBitVectorSize(BitVector(intVal=ord(s[i])),8)
+        bv1 = setBitVectorSize(BitVector(intVal=ord(s[i])),8)
         #bv2 = BitVector(intVal=ord(s[i]),size=8)
         bvList.append(bv1)
     return joinBV(bvList)
@@ -201,6 +203,7 @@ def signedIntFromBV(bv):
 
     @note: Does not know the difference between byte orders.
     '''
+    if isinstance(bv,BitReader): return bv.sint(0,bv.size)
     if 0==bv[0]: return int(bv)
     # Nope, so it is negative
     val = int(addone(~(bv[1:])))
@@ -292,6 +295,36 @@ decode.pop('X')
 decode.pop('Y')
 decode.pop('Z')
 
+decodeInt = dict([(c,int(bv)) for c,bv in decode.items()])
+'''
+Lookup the 6-bit integer value for a character in an ais AIVDM message.
+'''
+
+sextetTable = [decodeInt.get(chr(i)) for i in range(256)]
+'''
+Lookup the 6-bit integer value by ord() of the character.  None for
+characters that can not be in a payload.
+'''
+
+def buildOctalTables():
+    '''
+    Build the str.translate tables that turn a payload into the high and
+    low octal digits of each sextet.  Bad characters become an '8' so that
+    int(...,8) refuses them.
+    '''
+    hiTable = []
+    loTable = []
+    for val in sextetTable:
+        if val is None:
+            hiTable.append('8')
+            loTable.append('8')
+        else:
+            hiTable.append(str(val >> 3))
+            loTable.append(str(val & 7))
+    return ''.join(hiTable), ''.join(loTable)
+
+octalHiTable, octalLoTable = buildOctalTables()
+
 encode = [chr(i+48) for i in range(40)] + [chr(i+96) for i in range(24)]
 '''
 Lookup the character representation for in an ais AIVDM message from
@@ -300,6 +333,11 @@ the 6-bit integer value.
 @see: IEC-PAS 61162-100 Ed.1 IEC Page 26, Annex C, Table C-1
 '''
 
+encodeOctal = dict([('%02o' % val, c) for val, c in enumerate(encode)])
+'''
+Lookup the payload character from the two octal digits of a sextet.
+'''
+
 def test_encode():
     if len(encode)!=64: return False
 
@@ -326,6 +364,26 @@ def ais6tobitvec(str6):
     '''Convert an ITU AIS 6 bit string into a bit vector.  Each character
     represents 6 bits.  This is the NMEA !AIVD[MO] message payload.
 
+    The bits come back as a L{BitReader} that holds the whole payload
+    in one integer.  It supports the slicing and int() calls that the
+    message decoders use.  Call toBitVector() on it if you need a real
+    BitVector.
+
+    >>> bits = ais6tobitvec('15Mt9B001;rgAFhGKLaRK1v2040@')
+    >>> len(bits), bits.uint(0,6), bits.uint(8,30)
+    (168, 1, 366938440)
+    >>> str(ais6tobitvec('0W`w'))
+    '000000100111101000111111'
+
+    The decode is table driven and does not loop over the characters
+    in python.  Characters that can not be in a payload raise a
+    ValueError.
+
+    >>> ais6tobitvec('15Mx')
+    Traceback (most recent call last):
+    ...
+    ValueError: invalid character in ais payload: '15Mx'
+
     @note: If the original BitVector had ((len(bitvector) % 6 > 0),
     then there will be pad bits in the str6.  This function has no way
     to know how many pad bits there are.
@@ -337,16 +395,21 @@ def ais6tobitvec(str6):
     @return: decoded bits (not unstuffed... what do I mean by
     unstuffed?).  There may be pad bits at the tail to make this 6 bit
     aligned.
-    @rtype: BitVector
+    @rtype: BitReader
     '''
-    bvtotal = BitVector(size=6*len(str6))
-
-    for pos in range(len(str6)):
-        bv = decode[str6[pos]]
-        start = pos*6
-        for i in range(6):
-            bvtotal[i+start] = bv[i]
-    return bvtotal
+    numChars = len(str6)
+    if 0 == numChars:
+        return BitReader(0,0)
+    # Each sextet is exactly two octal digits.  Interleave the high and
+    # low digits and let int() build the whole payload in one go.
+    octal = bytearray(2*numChars)
+    octal[0::2] = str6.translate(octalHiTable)
+    octal[1::2] = str6.translate(octalLoTable)
+    try:
+        value = int(str(octal),8)
+    except ValueError:
+        raise ValueError('invalid character in ais payload: %r' % (str6,))
+    return BitReader(value,6*numChars)
 
 def getPadding(bv):
     '''
@@ -362,38 +425,34 @@ def getPadding(bv):
 def bitvectoais6(bv,doPadding=True):
     """Convert bit vector int an ITU AIS 6 bit string.  Each character represents 6 bits
 
+    Works on a BitReader or a BitVector.  The bits are turned into an
+    octal string in one step and each pair of octal digits is one
+    character.
+
+    >>> bitvectoais6(ais6tobitvec('15Mt9B001;rgAFhGKLaRK1v2040@'))
+    ('15Mt9B001;rgAFhGKLaRK1v2040@', 0)
+    >>> bitvectoais6(BitVector(bitstring='0000011'))
+    ('1P', 5)
+
     @param bv: message bits (must be already stuffed)
-    @type bv: BitVector
+    @type bv: BitReader or BitVector
     @return: str6 ASCII that as it appears in the NMEA string
     @rtype: str, pad
 
     @todo: make a test base for needing padding
-    @bug: handle case when padding needed
     """
-    pad = 6-(len(bv)%6)
+    size = len(bv)
+    pad = 6-(size%6)
     if 6==pad: pad = 0
-    strLen = len(bv)/6
-    if pad>0: strLen+=1
-    aisStrLst = []
-
-    if pad!=0:
-        if doPadding:
-            print 'pad befaore',len(bv)
-            bv = bv + BitVector(size=pad)
-            print 'pad after',len(bv)
-        else:
-            print 'ERROR: What are you doing with a non-align entity?  Let me pad it!'
-            assert False
-
-    #else: # No pad needed
-    for i in range(strLen):
-        start = i*6
-        end = (i+1)*6
-        val = int(bv[start:end])
-        c = encode[val]
-        aisStrLst.append(c)
-
-    aisStr = ''.join(aisStrLst)
+    if pad!=0 and not doPadding:
+        print 'ERROR: What are you doing with a non-align entity?  Let me pad it!'
+        assert False
+    if 0 == size:
+        return '', 0
+
+    numChars = (size+pad)/6
+    octal = '%0*o' % (2*numChars, int(bv) << pad)
+    aisStr = ''.join(map(encodeOctal.__getitem__, map(operator.add, octal[0::2], octal[1::2])))
 
     return aisStr, pad
 
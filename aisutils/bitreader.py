@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__ = '''
+Compact integer backed bit reader for decoding AIS messages.
+
+A BitReader holds an entire message payload as a single python long
+plus a bit count.  Extracting a field is one shift and one mask rather
+than building a new BitVector and walking it one bit at a time.
+
+BitReader answers the parts of the BitVector interface that the
+decoders use (len, int, indexing, slicing, str, +, ~ and ==), so code
+written for BitVector keeps working.  New code should call uint and
+sint directly with a start bit and a bit length.
+
+Use toBitVector to get a real BitVector for code that needs more than
+that.
+
+  >>> bits = BitReader.fromBitString('0001010101')
+  >>> len(bits), int(bits)
+  (10, 85)
+  >>> bits.uint(0, 6), bits.sint(6, 4)
+  (5, 5)
+  >>> str(bits[2:8])
+  '010101'
+
+@since: 2026-Oct-16
+@see: L{binary.ais6tobitvec}
+'''
+
+
+
+class BitReader(object):
+    '''
+    Immutable sequence of bits stored as a single integer.
+
+    Bit 0 is the most significant (left most) bit, the same as BitVector.
+    '''
+
+    __slots__ = ('value', 'size')
+
+    def __init__(self, value=0, size=0):
+        '''
+        @param value: unsigned integer holding the bits
+        @type value: int or long
+        @param size: number of bits.  value must fit in this many bits.
+        @type size: int
+        '''
+        self.value = value
+        self.size = size
+
+    @classmethod
+    def fromBitVector(cls, bv):
+        '''
+        Build from a BitVector or anything else with len() and int()
+
+        >>> from BitVector import BitVector
+        >>> str(BitReader.fromBitVector(BitVector(bitstring='0110')))
+        '0110'
+        '''
+        size = len(bv)
+        if 0 == size:
+            return cls(0, 0)
+        return cls(int(bv), size)
+
+    @classmethod
+    def fromBitString(cls, bitstring):
+        '''
+        Build from a string of 0 and 1 characters
+
+        >>> BitReader.fromBitString('')
+        BitReader(0, 0)
+        '''
+        if 0 == len(bitstring):
+            return cls(0, 0)
+        return cls(int(bitstring, 2), len(bitstring))
+
+    def toBitVector(self):
+        '''
+        Compatibility adapter for code that needs a real BitVector
+
+        >>> bv = BitReader.fromBitString('00101').toBitVector()
+        >>> str(bv), len(bv)
+        ('00101', 5)
+        '''
+        from BitVector import BitVector
+        if 0 == self.size:
+            return BitVector(size=0)
+        return BitVector(bitstring=str(self))
+
+    def uint(self, start, length):
+        '''
+        Unsigned integer from length bits beginning at bit start
+
+        Bits past the end are dropped the same as a BitVector slice would.
+        A field with no bits at all raises ValueError like int() of an
+        empty BitVector.
+
+        >>> bits = BitReader.fromBitString('11110011')
+        >>> bits.uint(2, 4), bits.uint(6, 4)
+        (12, 3)
+        >>> bits.uint(8, 4)
+        Traceback (most recent call last):
+        ...
+        ValueError: no bits at 8 in 8 bits
+
+        @raise ValueError: start is at or past the end
+        '''
+        shift = self.size - start - length
+        if shift < 0:
+            if start >= self.size:
+                raise ValueError('no bits at %d in %d bits' % (start, self.size))
+            return int(self[start:start + length])
+        return int((self.value >> shift) & ((1 << length) - 1))
+
+    def sint(self, start, length):
+        '''
+        Twos complement signed integer from length bits beginning at bit start
+
+        >>> bits = BitReader.fromBitString('1110011')
+        >>> bits.sint(0, 3), bits.sint(3, 4), bits.sint(2, 3)
+        (-1, 3, -4)
+        >>> bits.sint(5, 4)
+        -1
+
+        @raise ValueError: start is at or past the end
+        '''
+        shift = self.size - start - length
+        if shift < 0:
+            if start >= self.size:
+                raise ValueError('no bits at %d in %d bits' % (start, self.size))
+            part = self[start:start + length]
+            return part.sint(0, part.size)
+        val = int((self.value >> shift) & ((1 << length) - 1))
+        if val >> (length - 1):
+            return val - (1 << length)
+        return val
+
+    def __len__(self):
+        return self.size
+
+    def length(self):
+        '''BitVector compatible name for len()'''
+        return self.size
+
+    def __int__(self):
+        return int(self.value)
+
+    def __long__(self):
+        return long(self.value)
+
+    intValue = __int__
+    int_val = __int__
+
+    def __getitem__(self, key):
+        '''
+        Get a single bit or a slice.  Slices are clamped to the end of the
+        bits the same as BitVector.
+
+        >>> bits = BitReader.fromBitString('100101')
+        >>> bits[0], bits[1], bits[-1]
+        (1, 0, 1)
+        >>> str(bits[3:]), str(bits[-2:]), str(bits[4:100]), len(bits[4:2])
+        ('101', '01', '01', 0)
+        '''
+        size = self.size
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                raise ValueError('BitReader slices do not support a step')
+            start, stop, step = key.indices(size)
+            if stop <= start:
+                return BitReader(0, 0)
+            length = stop - start
+            return BitReader((self.value >> (size - stop)) & ((1 << length) - 1), length)
+        if key < 0:
+            key += size
+        if key < 0 or key >= size:
+            raise IndexError('bit index out of range')
+        return int((self.value >> (size - key - 1)) & 1)
+
+    def __iter__(self):
+        value = self.value
+        for shift in xrange(self.size - 1, -1, -1):
+            yield int((value >> shift) & 1)
+
+    def __add__(self, other):
+        '''
+        Concatenate with another BitReader or BitVector
+
+        >>> str(BitReader.fromBitString('10') + BitReader.fromBitString('011'))
+        '10011'
+        '''
+        otherSize = len(other)
+        if 0 == otherSize:
+            return BitReader(self.value, self.size)
+        return BitReader((self.value << otherSize) | int(other), self.size + otherSize)
+
+    def __radd__(self, other):
+        otherSize = len(other)
+        if 0 == otherSize:
+            return BitReader(self.value, self.size)
+        return BitReader((int(other) << self.size) | self.value, self.size + otherSize)
+
+    def __invert__(self):
+        '''
+        >>> str(~BitReader.fromBitString('0110'))
+        '1001'
+        '''
+        return BitReader(~self.value & ((1 << self.size) - 1), self.size)
+
+    def __eq__(self, other):
+        try:
+            otherSize = len(other)
+        except TypeError:
+            return False
+        if otherSize != self.size:
+            return False
+        if 0 == otherSize:
+            return True
+        return int(other) == self.value
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((self.value, self.size))
+
+    def __str__(self):
+        if 0 == self.size:
+            return ''
+        return format(self.value, '0%db' % self.size)
+
+    def __repr__(self):
+        return 'BitReader(%d, %d)' % (self.value, self.size)
+
+
+def asBitReader(bits):
+    '''
+    Return bits as a BitReader, converting a BitVector if needed
+
+    >>> bits = BitReader(5, 3)
+    >>> asBitReader(bits) is bits
+    True
+    '''
+    if isinstance(bits, BitReader):
+        return bits
+    return BitReader.fromBitVector(bits)
+
+
+if __name__=='__main__':
+    import doctestmain
+    doctestmain.main()
@@ -180,6 +180,141 @@ def connect(options,dbType=None):
     return cx
 
 
+class InsertBatcher:
+    '''
+    Group sqlhelp.insert or preparedInsert rows by table and columns and write each group
+    with multi-row parameterized INSERT statements.  One statement per
+    batchSize rows is far fewer round trips than one per row.
+
+    Binary messages go through as strings of 0 and 1 like any other row.
+
+    >>> import sqlite3
+    >>> from ais import ais_msg_8
+    >>> from aisutils import binary
+    >>> cx = sqlite3.connect(':memory:')
+    >>> cu = cx.cursor()
+    >>> c = cu.execute(str(ais_msg_8.sqlCreate(dbType='sqlite')))
+    >>> batcher = InsertBatcher(batchSize=2, placeholder='?', useSavepoints=False)
+    >>> for payload in ('85OpLV1Kf98p96dWWPLSViUfJlU@SV>cDF2Wq5>`=u8CnEFGCIOq', '85Mw1U?P00qNGTP@v`0@9wwn26sd00000000'):
+    ...     msg = ais_msg_8.decode(binary.ais6tobitvec(payload))
+    ...     batcher.add(ais_msg_8.sqlInsert(msg, dbType='sqlite'))
+    >>> batcher.flush(cu)
+    2
+    >>> batcher.stats()['errors']
+    0
+    >>> bits = [row[0] for row in cu.execute('SELECT BinaryData FROM bin_broadcast ORDER BY UserID;')]
+    >>> [len(b) for b in bits], set(''.join(bits))
+    ([160, 256], set([u'1', u'0']))
+
+    @see: L{aisutils.sqlhelp.insert.paramSql}
+    '''
+    def __init__(self,batchSize=500,placeholder='%s',useSavepoints=True,verbose=False):
+        '''
+        @param batchSize: most rows in one INSERT statement
+        @param placeholder: parameter marker for the database module.  ? for sqlite.
+        @param useSavepoints: wrap each statement in a savepoint so that a bad
+        batch does not abort the whole transaction.  Postgres needs this.
+        Turn it off for the python sqlite3 module, which commits before a SAVEPOINT.
+        '''
+        self.batchSize = batchSize
+        self.placeholder = placeholder
+        self.useSavepoints = useSavepoints
+        self.verbose = verbose
+        self.clear()
+        self.rows = 0
+        self.statements = 0
+        self.errors = 0
+
+    def __len__(self):
+        return self.pending
+
+    def add(self,ins):
+        '''
+        Queue one row
+        @type ins: sqlhelp.insert
+        '''
+        key = (ins.table, ins.columns())
+        group = self.groups.get(key)
+        if group is None:
+            head, row = ins.paramSql(self.placeholder)
+            group = self.groups[key] = (head, row, [])
+        group[2].append(ins.paramValues())
+        self.pending += 1
+
+    def addRow(self,prepared,row):
+        '''
+        Queue one row that is already a tuple of values
+        @type prepared: sqlhelp.preparedInsert
+        @param row: values in the column order of prepared
+        '''
+        key = (prepared.table, prepared.columns)
+        group = self.groups.get(key)
+        if group is None:
+            head, rowSql = prepared.paramSql(self.placeholder)
+            group = self.groups[key] = (head, rowSql, [])
+        group[2].append(row)
+        self.pending += 1
+
+    def clear(self):
+        '''Drop all queued rows'''
+        self.groups = {} # (table, columns) -> (head, row, [values, ...])
+        self.pending = 0
+
+    def stats(self):
+        '''@return: rows written, statements run, failed rows and rows pending'''
+        return {'rows': self.rows, 'statements': self.statements,
+                'errors': self.errors, 'pending': self.pending}
+
+    def flush(self,cu):
+        '''
+        Write all queued rows.  The caller commits.
+
+        If a multi-row statement fails, its rows are retried one at a time
+        so that only the bad rows are lost.
+
+        @param cu: database cursor
+        @return: number of rows written
+        '''
+        written = 0
+        groups = self.groups
+        self.clear()
+        for head, row, valuesList in groups.itervalues():
+            for start in xrange(0, len(valuesList), self.batchSize):
+                chunk = valuesList[start:start+self.batchSize]
+                params = [value for values in chunk for value in values]
+                if self._execute(cu, head + ','.join([row]*len(chunk)), params):
+                    written += len(chunk)
+                    continue
+                if 1 == len(chunk):
+                    self.errors += 1
+                    continue
+                for values in chunk:
+                    if self._execute(cu, head + row, values):
+                        written += 1
+                    else:
+                        self.errors += 1
+        self.rows += written
+        return written
+
+    def _execute(self,cu,sql,values):
+        '''@return: True if the statement worked'''
+        if self.useSavepoints:
+            cu.execute('SAVEPOINT insert_batch')
+        try:
+            cu.execute(sql, values)
+        except Exception, e:
+            sys.stderr.write('ERROR: batch insert failed: %s\n' % str(e))
+            if self.verbose:
+                sys.stderr.write('  sql: %s\n  values: %s\n' % (sql, str(values)))
+            if self.useSavepoints:
+                cu.execute('ROLLBACK TO SAVEPOINT insert_batch')
+            return False
+        if self.useSavepoints:
+            cu.execute('RELEASE SAVEPOINT insert_batch')
+        self.statements += 1
+        return True
+
+
 def rebuild_track_lines(cx,vessels=None
                         ,limitPoints=50
                         ,trackTable='track_lines'
@@ -516,4 +651,28 @@ def rebuild_last_position(cx
         print 'done cleaning position and last_position based on startTime'
 
 
-# FIX: unittests here?
+
+if __name__=='__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--doc-test',dest='doctest',default=False,action='store_true',
+                      help='run the documentation tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+    (options,args) = parser.parse_args()
+
+    success=True
+
+    if options.doctest:
+        print os.path.basename(sys.argv[0]), 'doctests ...',
+        sys.argv= [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        import doctest
+        numfail,numtests=doctest.testmod()
+        if numfail==0: print 'ok'
+        else:
+            print 'FAILED'
+            success=False
+
+    if not success:
+        sys.exit('Something Failed')
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Thin out vessel positions so that a vessel only reports again once it
+has moved far enough or enough time has passed.
+
+This is the same rule as Decimate in ais_decimate_traffic.py, but all
+of the vessels are handled in one pass over a time sorted stream rather
+than one database query per MMSI.  The state of each vessel is a small
+__slots__ object.  Distances are first checked with an equirectangular
+approximation on the WGS 84 ellipsoid, which is good to about 0.1% at
+the distances used for decimation.  Only a point that lands within
+tolerance of the distance threshold is handed to the exact (e.g. UTM)
+distance function if there is one.
+
+  >>> d = Decimator(minDistM=200, minTimeS=600)
+  >>> [d.add(1, -70.0 + i*0.001, 42.0, i*10) for i in range(6)]
+  [True, False, False, True, False, False]
+  >>> d.add(1, -69.995, 42.0, 700)
+  True
+  >>> d.stats()['kept'], d.stats()['dropped']
+  (3, 4)
+
+@since: 2026-Oct-16
+@see: U{ais_decimate_traffic.py<../../scripts/ais_decimate_traffic.py>}
+'''
+
+import math
+
+wgs84A = 6378137.0
+'''WGS 84 semi-major axis in meters'''
+wgs84E2 = 0.00669437999014
+'''WGS 84 first eccentricity squared'''
+
+
+def metersPerDegree(lat):
+    '''
+    Length of a degree of longitude and of latitude on the WGS 84
+    ellipsoid.
+
+    >>> ['%.1f' % m for m in metersPerDegree(0)]
+    ['111319.5', '110574.3']
+
+    @return: (meters per degree of longitude, meters per degree of latitude)
+    '''
+    phi = math.radians(lat)
+    w = 1 - wgs84E2 * math.sin(phi)**2
+    primeVertical = wgs84A / math.sqrt(w)
+    meridional = wgs84A * (1 - wgs84E2) / (w * math.sqrt(w))
+    degree = math.pi / 180
+    return primeVertical * math.cos(phi) * degree, meridional * degree
+
+
+def equirectangularM(lon1, lat1, lon2, lat2):
+    '''
+    Approximate distance in meters for points that are close together
+
+    >>> '%.0f' % equirectangularM(-70, 42, -70.001, 42)
+    '83'
+    '''
+    mx, my = metersPerDegree((lat1 + lat2) / 2.)
+    dx = (lon2 - lon1) * mx
+    dy = (lat2 - lat1) * my
+    return math.sqrt(dx*dx + dy*dy)
+
+
+class VesselState(object):
+    '''Last emitted position of one vessel'''
+    __slots__ = ('x', 'y', 't', 'mx', 'my')
+
+    def __init__(self, x, y, t):
+        self.set(x, y, t)
+
+    def set(self, x, y, t):
+        self.x = x
+        self.y = y
+        self.t = t
+        self.mx, self.my = metersPerDegree(y)
+
+
+class Decimator(object):
+    '''
+    Per vessel decimation.  Positions of each vessel must arrive in time
+    order.  Vessels may be mixed together.
+    '''
+
+    def __init__(self, minDistM=200, minTimeS=600, exactDistance=None, tolerance=0.005):
+        '''
+        @param minDistM: meters a vessel must move before it is kept again
+        @param minTimeS: seconds after which a vessel is kept again
+        @param exactDistance: function(lon1, lat1, lon2, lat2) returning
+        meters for points that are too close to the threshold to call
+        with the approximation.  None to always use the approximation.
+        @param tolerance: fraction of minDistM around the threshold that
+        is checked with exactDistance
+        '''
+        self.minDistM = minDistM
+        self.minTimeS = minTimeS
+        self.exactDistance = exactDistance
+        # Squared so that most points never need a sqrt
+        self.nearSq = (minDistM * (1 - tolerance))**2
+        self.farSq = (minDistM * (1 + tolerance))**2
+        self.vessels = {} # mmsi -> VesselState
+        self.kept = 0
+        self.dropped = 0
+        self.exactCalls = 0
+
+    def __len__(self):
+        return len(self.vessels)
+
+    def add(self, mmsi, x, y, t):
+        '''
+        @param x: longitude
+        @param y: latitude
+        @param t: time in seconds
+        @return: True if the position should be kept
+        '''
+        state = self.vessels.get(mmsi)
+        if state is None:
+            self.vessels[mmsi] = VesselState(x, y, t)
+            self.kept += 1
+            return True
+        if self.moved(state, x, y, t):
+            state.set(x, y, t)
+            self.kept += 1
+            return True
+        self.dropped += 1
+        return False
+
+    def moved(self, state, x, y, t):
+        'Has the vessel gone far enough or long enough since state?'
+        if t - state.t >= self.minTimeS:
+            return True
+        dx = (x - state.x) * state.mx
+        dy = (y - state.y) * state.my
+        distSq = dx*dx + dy*dy
+        if distSq < self.nearSq:
+            return False
+        if distSq >= self.farSq or self.exactDistance is None:
+            return distSq >= self.minDistM * self.minDistM
+        self.exactCalls += 1
+        return self.exactDistance(x, y, state.x, state.y) >= self.minDistM
+
+    def addColumns(self, mmsi, x, y, t):
+        '''
+        Column version of add for numpy arrays such as pos['mmsi'],
+        pos['lon'], pos['lat'] and pos['cg_sec'] from
+        ais.batch.decode_positions.  The points are grouped by vessel with
+        a stable sort so each vessel is run through in one tight loop.
+
+        >>> import numpy
+        >>> d = Decimator(minDistM=200, minTimeS=600)
+        >>> keep = d.addColumns(numpy.array([1, 2, 1, 2, 1]), numpy.array([-70, -70, -70.001, -70.01, -70.003]),
+        ...                     numpy.array([42., 42, 42, 42, 42]), numpy.array([0, 0, 10, 10, 20]))
+        >>> keep.tolist()
+        [True, True, False, True, True]
+
+        @return: boolean array that is True for the positions to keep
+        '''
+        import numpy
+        mmsi = numpy.asarray(mmsi)
+        keep = numpy.zeros(len(mmsi), dtype=bool)
+        if 0 == len(mmsi):
+            return keep
+        order = numpy.argsort(mmsi, kind='mergesort')
+        ids = mmsi[order].tolist()
+        xs = numpy.asarray(x)[order].tolist()
+        ys = numpy.asarray(y)[order].tolist()
+        ts = numpy.asarray(t)[order].tolist()
+        sortedKeep = [False] * len(ids)
+
+        vessels = self.vessels
+        moved = self.moved
+        kept = 0
+        n = len(ids)
+        start = 0
+        while start < n:
+            vesselId = ids[start]
+            end = start + 1
+            while end < n and ids[end] == vesselId:
+                end += 1
+            state = vessels.get(vesselId)
+            i = start
+            if state is None:
+                state = vessels[vesselId] = VesselState(xs[i], ys[i], ts[i])
+                sortedKeep[i] = True
+                kept += 1
+                i += 1
+            while i < end:
+                if moved(state, xs[i], ys[i], ts[i]):
+                    state.set(xs[i], ys[i], ts[i])
+                    sortedKeep[i] = True
+                    kept += 1
+                i += 1
+            start = end
+
+        keep[order] = sortedKeep
+        self.kept += kept
+        self.dropped += n - kept
+        return keep
+
+    def filterStream(self, records):
+        '''
+        Single pass over a time sorted stream of all vessels.
+
+        @param records: iterable of tuples that start with (mmsi, x, y, t)
+        @return: generator of the records to keep
+        '''
+        add = self.add
+        for record in records:
+            if add(record[0], record[1], record[2], record[3]):
+                yield record
+
+    def expire(self, oldestT):
+        '''
+        Forget vessels that have not been kept since oldestT so that a
+        live feed does not grow without bound.  A vessel that comes back
+        is kept on its next position.
+
+        @return: number of vessels dropped
+        '''
+        old = [mmsi for mmsi, state in self.vessels.iteritems() if state.t < oldestT]
+        for mmsi in old:
+            del self.vessels[mmsi]
+        return len(old)
+
+    def stats(self):
+        '''
+        @return: kept, dropped and vessel counts along with how many
+        times the exact distance was needed
+        @rtype: dict
+        '''
+        return {'kept': self.kept, 'dropped': self.dropped,
+                'vessels': len(self.vessels), 'exactCalls': self.exactCalls}
+
+
+if __name__=='__main__':
+    import doctestmain
+    doctestmain.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Spot AIS messages that have already been heard by another receiver.
+
+The same transmission is usually picked up by several stations.  The
+Duplicates tracker remembers recent payloads in a dict for constant time
+lookup and keeps them in a deque in the order they were first seen so
+that old payloads can be expired from the front by count and by age.
+
+  >>> dups = Duplicates(maxCount=1000, maxAgeSec=5*60)
+  >>> dups.check('15Mw1U?P00qNGTP@v`0@9wwn26sd', 100, 'r003669945')
+  (1, False)
+  >>> dups.check('15Mw1U?P00qNGTP@v`0@9wwn26sd', 101, 'r003669947')
+  (1, True)
+  >>> dups.check('B52K>;h00Fc>jpUlNV@ikwpUoP06', 102, 'r003669945')
+  (2, False)
+  >>> sorted(dups.stations['r003669947'].items())
+  [('duplicate', 1), ('unique', 0)]
+
+@since: 2026-Oct-16
+@see: L{normalize}
+'''
+
+import collections
+
+import uscg
+
+
+class Duplicates(object):
+    '''
+    Duplicate payload detector with count and time based expiry.
+
+    Each new payload gets a packet id.  A duplicate gets the id of the
+    first copy so that the copies can be tied back together later.
+    '''
+
+    def __init__(self, maxCount=None, maxAgeSec=None):
+        '''
+        @param maxCount: most payloads to remember.  None for no limit.
+        @param maxAgeSec: forget payloads this many seconds older than the
+        newest one.  None for no limit.  Assumes times arrive roughly in
+        order.
+        '''
+        self.maxCount = maxCount
+        self.maxAgeSec = maxAgeSec
+        self.seen = {} # payload -> (pkt_id, time_sec)
+        # (payload, pkt_id) oldest on the left.  Entries for payloads that
+        # were already forgotten are skipped when they reach the left.
+        self.order = collections.deque() # every payload, for maxCount
+        self.timed = collections.deque() # payloads with a time, for maxAgeSec
+        self.nextId = 1 # skip zero: bool(0) is False
+        self.newestTimeSec = 0
+        self.unique = 0
+        self.duplicate = 0
+        self.stations = {} # station -> {'unique':n, 'duplicate':n}
+
+    def __len__(self):
+        return len(self.seen)
+
+    def __contains__(self, payload):
+        return payload in self.seen
+
+    def check(self, payload, timeSec=None, station=None):
+        '''
+        Record a payload and report if it is a duplicate.
+
+        @param payload: armored payload (5th field of the NMEA string)
+        @param timeSec: receive time.  Needed for maxAgeSec.
+        @param station: receive station for the per station counts
+        @return: (pkt_id, isDuplicate)
+        '''
+        found = self.seen.get(payload)
+        if found is not None:
+            self.duplicate += 1
+            if station is not None:
+                self.countStation(station, 'duplicate')
+            return found[0], True
+
+        pktId = self.nextId
+        self.nextId += 1
+        self.seen[payload] = (pktId, timeSec)
+        self.order.append((payload, pktId))
+        if timeSec is not None:
+            self.timed.append((payload, pktId))
+        self.unique += 1
+        if station is not None:
+            self.countStation(station, 'unique')
+        if timeSec is not None and self.newestTimeSec < timeSec:
+            self.newestTimeSec = timeSec
+        self.expire()
+        return pktId, False
+
+    def countStation(self, station, kind):
+        counts = self.stations.get(station)
+        if counts is None:
+            counts = self.stations[station] = {'unique': 0, 'duplicate': 0}
+        counts[kind] += 1
+
+    def expire(self):
+        '''
+        Forget payloads that are past maxCount or maxAgeSec.  Payloads
+        without a time only leave by maxCount.
+
+        >>> dups = Duplicates(maxCount=2, maxAgeSec=10)
+        >>> for i, t in enumerate((0, 1, 2)): pkt = dups.check(str(i), t)
+        >>> sorted(dups.seen)
+        ['1', '2']
+        >>> pkt = dups.check('3', 12)
+        >>> sorted(dups.seen)
+        ['2', '3']
+        >>> pkt = dups.check('4', 30)
+        >>> sorted(dups.seen)
+        ['4']
+        >>> dups = Duplicates(maxCount=100, maxAgeSec=10)
+        >>> for i, t in enumerate((None, 0, 1, 20)): pkt = dups.check(str(i), t)
+        >>> sorted(dups.seen)
+        ['0', '3']
+        '''
+        seen = self.seen
+        if self.maxCount is not None:
+            order = self.order
+            while len(seen) > self.maxCount:
+                payload, pktId = order.popleft()
+                if seen.get(payload, (None,))[0] == pktId:
+                    del seen[payload]
+        if self.maxAgeSec is not None:
+            threshold = self.newestTimeSec - self.maxAgeSec
+            timed = self.timed
+            while timed:
+                payload, pktId = timed[0]
+                found = seen.get(payload)
+                if found is not None and found[0] == pktId:
+                    if found[1] >= threshold:
+                        break
+                    del seen[payload]
+                timed.popleft()
+        # Drop the entries of forgotten payloads once they dominate
+        if len(self.order) > 2 * len(seen) + 64:
+            self.order = self.live(self.order)
+        if len(self.timed) > 2 * len(seen) + 64:
+            self.timed = self.live(self.timed)
+
+    def live(self, entries):
+        '@return: deque of the (payload, pkt_id) entries that are still remembered'
+        seen = self.seen
+        return collections.deque([entry for entry in entries
+                                  if seen.get(entry[0], (None,))[0] == entry[1]])
+
+    def stats(self):
+        '''
+        @return: unique, duplicate and tracked counts plus the per station counts
+        @rtype: dict
+        '''
+        return {'unique': self.unique, 'duplicate': self.duplicate,
+                'tracked': len(self.seen), 'stations': self.stations}
+
+
+def uniqueLines(lines, dups, posOnly=False):
+    '''
+    Filter stage that drops AIS lines that are duplicates.  Lines that are
+    not AIS pass straight through.
+
+    >>> lines = ['!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433',
+    ...          '# comment',
+    ...          '!AIVDM,1,1,,A,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0D,r003669947,1165850434']
+    >>> len(list(uniqueLines(lines, Duplicates(maxCount=10))))
+    2
+
+    @param lines: iterable of NMEA strings, optionally with USCG metadata
+    @param dups: a Duplicates tracker
+    @param posOnly: only check position messages 1, 2 and 3
+    @return: generator of lines that are not duplicates
+    '''
+    for line in lines:
+        if '!AIVD' != line[:5]:
+            yield line
+            continue
+        fields = line.rstrip().split(',')
+        payload = fields[5]
+        if posOnly and payload[:1] not in ('1','2','3'):
+            yield line
+            continue
+        station = uscg.stationField(fields)
+        timeSec = None
+        if len(fields) > 7:
+            try:
+                timeSec = float(fields[-1])
+            except ValueError:
+                pass
+        if not dups.check(payload, timeSec, station)[1]:
+            yield line
+
+
+if __name__=='__main__':
+    import doctestmain
+    doctestmain.main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+The --test command line handling shared by the aisutils modules.
+
+A module that only has doctests ends with::
+
+  if __name__=='__main__':
+      import doctestmain
+      doctestmain.main()
+
+A module with its own options adds the test options to its parser and
+runs the tests before doing its own work::
+
+  parser = OptionParser(usage="%prog [options] [file1.ais ...]")
+  doctestmain.addOptions(parser)
+  (options,args) = parser.parse_args()
+  success = doctestmain.runDocTests(options)
+
+@since: 2026-Oct-16
+'''
+
+import os
+import sys
+
+def addOptions(parser):
+    '''
+    Add --test/--doc-test and -v/--verbose to an OptionParser
+
+    >>> from optparse import OptionParser
+    >>> parser = OptionParser()
+    >>> addOptions(parser)
+    >>> options, args = parser.parse_args(['--test'])
+    >>> options.doctest, options.verbose
+    (True, False)
+    '''
+    parser.add_option('--test','--doc-test',dest='doctest',default=False,action='store_true',
+                      help='run the documentation tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+
+def runDocTests(options):
+    '''
+    Run the doctests of the __main__ module if options.doctest is set
+
+    @param options: parsed options from a parser passed to L{addOptions}
+    @return: False if any doctest failed
+    '''
+    if not options.doctest:
+        return True
+    print os.path.basename(sys.argv[0]), 'doctests ...',
+    sys.argv= [sys.argv[0]]
+    if options.verbose: sys.argv.append('-v')
+    import doctest
+    numfail,numtests=doctest.testmod(sys.modules['__main__'])
+    if numfail==0:
+        print 'ok'
+        return True
+    print 'FAILED'
+    return False
+
+def main(usage="%prog [options]"):
+    '''
+    Command line for a module that only has doctests
+    '''
+    from optparse import OptionParser
+    parser = OptionParser(usage=usage)
+    addOptions(parser)
+    (options,args) = parser.parse_args()
+    if not runDocTests(options):
+        sys.exit('Something Failed')
+
+if __name__=='__main__':
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Event driven fan out of a data stream to many TCP clients.
+
+Everything runs in one thread around select.  Each client has its own
+bounded queue of data waiting to be sent.  broadcast only appends to the
+queues, and each pass through poll joins whatever is queued for a
+client into one non-blocking send.  A client that can not keep up fills
+its queue and then either loses the new data (drop) or is disconnected
+(disconnect), but it never holds up the feed, the log or the other
+clients.  Sockets that feed the server (e.g. the upstream receiver) are
+passed to poll and watched in the same select.
+
+  >>> server = FanoutServer('127.0.0.1', 0)
+  >>> client = socket.create_connection(server.address)
+  >>> ready = server.poll(1.0)
+  >>> len(server.clients)
+  1
+  >>> server.broadcast('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E\\n')
+  >>> ready = server.poll(0)
+  >>> client.recv(100)
+  '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E\\n'
+  >>> client.close()
+  >>> server.close()
+
+@since: 2026-Oct-16
+@see: U{port_server.py<../../scripts/port_server.py>}
+'''
+
+import errno
+import select
+import socket
+import sys
+import threading
+import time
+
+overflowPolicies = ('drop', 'disconnect')
+'''What to do with a client whose queue is full'''
+
+retryErrors = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+
+class Client(object):
+    '''One connected client and the data waiting to be sent to it'''
+    __slots__ = ('sock', 'address', 'chunks', 'queued', 'sentBytes', 'droppedBytes', 'connectTime')
+
+    def __init__(self, sock, address):
+        self.sock = sock
+        self.address = address
+        self.chunks = []
+        self.queued = 0
+        self.sentBytes = 0
+        self.droppedBytes = 0
+        self.connectTime = time.time()
+
+
+class FanoutServer(object):
+    '''
+    Listen for clients and send each of them everything that is broadcast.
+    '''
+
+    def __init__(self, host, port, maxBuffer=1024*1024, overflow='drop', backlog=128, verbose=False):
+        '''
+        @param maxBuffer: most bytes to queue for one client
+        @param overflow: 'drop' to lose new data for a client with a full
+        queue or 'disconnect' to close it
+        '''
+        assert overflow in overflowPolicies
+        self.maxBuffer = maxBuffer
+        self.overflow = overflow
+        self.verbose = verbose
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((host, port))
+        self.sock.listen(backlog)
+        self.sock.setblocking(0)
+        self.clients = {} # socket -> Client
+        self.accepted = 0
+        self.disconnected = 0
+        self.slowDisconnects = 0
+
+    @property
+    def address(self):
+        '(host, port) that the server is listening on'
+        return self.sock.getsockname()
+
+    def broadcast(self, data):
+        '''
+        Queue data for every client.  Pass whole lines so that a client
+        that drops data only loses whole lines.
+        '''
+        size = len(data)
+        if 0 == size:
+            return
+        for client in self.clients.values():
+            if client.queued + size > self.maxBuffer:
+                if 'disconnect' == self.overflow:
+                    self.slowDisconnects += 1
+                    self.disconnect(client, 'too slow')
+                else:
+                    client.droppedBytes += size
+                continue
+            client.chunks.append(data)
+            client.queued += size
+
+    def send(self, client):
+        '''Write as much of the queue of a client as the socket will take'''
+        if 1 == len(client.chunks):
+            data = client.chunks[0]
+        else:
+            data = ''.join(client.chunks) # Coalesce into one write
+        try:
+            sent = client.sock.send(data)
+        except socket.error, e:
+            if e.args[0] in retryErrors:
+                client.chunks = [data]
+                return
+            self.disconnect(client, str(e))
+            return
+        client.sentBytes += sent
+        if sent < len(data):
+            client.chunks = [data[sent:]]
+            client.queued = len(data) - sent
+        else:
+            client.chunks = []
+            client.queued = 0
+
+    def accept(self):
+        try:
+            sock, address = self.sock.accept()
+        except socket.error, e:
+            if e.args[0] in retryErrors + (errno.ECONNABORTED,):
+                return None
+            raise
+        sock.setblocking(0)
+        client = self.clients[sock] = Client(sock, address)
+        self.accepted += 1
+        if self.verbose:
+            print 'connect from', address
+        return client
+
+    def disconnect(self, client, reason=''):
+        if client.sock not in self.clients:
+            return
+        del self.clients[client.sock]
+        self.disconnected += 1
+        try:
+            client.sock.close()
+        except socket.error:
+            pass
+        if self.verbose:
+            print 'Client Disconnect', client.address, reason
+
+    def poll(self, timeout=None, readers=()):
+        '''
+        Do one round of sending, accepting and checking for closed clients.
+
+        @param timeout: most seconds to wait.  0 to not wait.
+        @param readers: other sockets or files to watch for data
+        @return: the readers that are ready to read
+        '''
+        # Try the writes first so that clients that are keeping up do not
+        # need a trip through select
+        for client in self.clients.values():
+            if client.queued:
+                self.send(client)
+
+        readList = [self.sock] + self.clients.keys() + list(readers)
+        writeList = [client.sock for client in self.clients.itervalues() if client.queued]
+        try:
+            readable, writable, errors = select.select(readList, writeList, [], timeout)
+        except select.error, e:
+            if e.args[0] == errno.EINTR:
+                return []
+            raise
+
+        ready = []
+        clients = self.clients
+        for sock in readable:
+            if sock is self.sock:
+                self.accept()
+            elif sock in clients:
+                # Clients do not send anything.  Empty means they closed.
+                client = clients[sock]
+                try:
+                    data = sock.recv(4096)
+                except socket.error, e:
+                    if e.args[0] in retryErrors:
+                        continue
+                    data = ''
+                if not data:
+                    self.disconnect(client, 'closed')
+            else:
+                ready.append(sock)
+        for sock in writable:
+            client = clients.get(sock)
+            if client is not None and client.queued:
+                self.send(client)
+        return ready
+
+    def flush(self, timeout=5.0):
+        '''
+        Keep polling until every queue is empty or timeout seconds pass
+        @return: True if everything was sent
+        '''
+        end = time.time() + timeout
+        while True:
+            if not [client for client in self.clients.itervalues() if client.queued]:
+                return True
+            remaining = end - time.time()
+            if remaining <= 0:
+                return False
+            self.poll(min(remaining, 0.1))
+
+    def stats(self):
+        '''
+        @return: server counts plus (address, queued, sent, dropped) for each client
+        @rtype: dict
+        '''
+        return {'accepted': self.accepted, 'disconnected': self.disconnected,
+                'slowDisconnects': self.slowDisconnects,
+                'clients': [(c.address, c.queued, c.sentBytes, c.droppedBytes)
+                            for c in self.clients.itervalues()]}
+
+    def close(self):
+        for client in self.clients.values():
+            self.disconnect(client, 'server closing')
+        self.sock.close()
+
+
+def benchmark(numClients=24, numSlow=2, numLines=200000, linesPerRead=50, maxBuffer=256*1024):
+    '''
+    Push lines through a FanoutServer to reader threads on localhost.
+    The slow clients connect and never read to show that they do not
+    hold up the others.
+
+    @return: (lines per second, lines received by each fast client, stats)
+    '''
+    line = '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433\n'
+    block = line * linesPerRead
+    server = FanoutServer('127.0.0.1', 0, maxBuffer=maxBuffer)
+
+    received = [0] * numClients
+    def reader(num):
+        sock = socket.create_connection(server.address)
+        total = 0
+        while True:
+            data = sock.recv(65536)
+            if not data:
+                break
+            total += len(data)
+        received[num] = total / len(line)
+        sock.close()
+
+    slow = []
+    def connectSlow():
+        for i in range(numSlow):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.connect(server.address)
+            slow.append(sock)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(numClients)]
+    connector = threading.Thread(target=connectSlow)
+    for t in threads + [connector]:
+        t.start()
+    while len(server.clients) < numClients + numSlow:
+        server.poll(0.1)
+    connector.join()
+
+    start = time.time()
+    for i in range(numLines / linesPerRead):
+        server.broadcast(block)
+        server.poll(0)
+    # Wait for the fast clients.  The slow ones will never catch up.
+    fast = [c for c in server.clients.itervalues() if c.droppedBytes == 0]
+    while [c for c in fast if c.queued]:
+        server.poll(0.1)
+    elapsed = time.time() - start
+    stats = server.stats()
+    server.close()
+    for t in threads:
+        t.join()
+    for sock in slow:
+        sock.close()
+    return numLines / elapsed, received, stats
+
+
+if __name__=='__main__':
+    from optparse import OptionParser
+    import doctestmain
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--benchmark',dest='benchmark',default=False,action='store_true',
+                      help='Time sending to local clients')
+    parser.add_option('-c','--clients',dest='clients',default=24,type='int',
+                      help='Number of clients for the benchmark [default: %default]')
+    doctestmain.addOptions(parser)
+    (options,args) = parser.parse_args()
+
+    success = doctestmain.runDocTests(options)
+
+    if options.benchmark:
+        rate, received, stats = benchmark(numClients=options.clients)
+        print 'lines/sec: %.0f to %d clients' % (rate, options.clients)
+        print 'lines received by each client:', sorted(set(received))
+        for address, queued, sent, dropped in stats['clients']:
+            if dropped:
+                print 'slow client', address, 'dropped bytes:', dropped
+
+    if not success:
+        sys.exit('Something Failed')
@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Zone membership for large numbers of points with a uniform cell grid.
+
+Each zone polygon is preprocessed onto a grid that covers all of the
+zones.  A cell is either fully outside, fully inside, or on the boundary
+of a zone.  Boundary cells keep the list of the zone edges that pass
+through them and whether the cell center is inside.  A point in a
+boundary cell is then inside if the segment from the cell center to the
+point crosses an odd number of those edges while the center is outside
+(or an even number while it is inside).  Most points are answered by a
+single array lookup, and the rest only look at a few edges.
+
+All of the work is done on numpy arrays of longitude and latitude so
+that a whole block of decoded positions from L{ais.batch} can be
+checked against every zone in one pass.
+
+  >>> import numpy
+  >>> square = ((0,0), (2,0), (2,2), (0,2), (0,0))
+  >>> triangle = ((1,1), (3,1), (3,3), (1,1))
+  >>> fence = Geofence([('square', square), ('triangle', triangle)], cells=8)
+  >>> lon = numpy.array([0.5, 1.9, 2.5, 1.2, 5.0])
+  >>> lat = numpy.array([0.5, 1.5, 1.6, 1.9, 5.0])
+  >>> fence.membership(lon, lat).astype(int).tolist()
+  [[1, 1, 0, 1, 0], [0, 1, 1, 0, 0]]
+  >>> fence.zoneOf(lon, lat).tolist()
+  [0, 0, 1, 0, -1]
+
+@requires: U{numpy<http://numpy.scipy.org/>}
+@since: 2026-Oct-16
+@see: L{spatialfilter} for testing one line at a time
+'''
+
+import math
+
+import numpy
+
+
+def ringEdges(points):
+    '''
+    @param points: sequence of (lon, lat).  The ring may or may not
+    repeat the first point at the end.
+    @return: (ax, ay, bx, by) float64 arrays of the non-empty edges
+    '''
+    pts = numpy.asarray(points, dtype=numpy.float64)
+    a = numpy.roll(pts, 1, axis=0)
+    keep = (a != pts).any(axis=1)
+    return a[keep, 0], a[keep, 1], pts[keep, 0], pts[keep, 1]
+
+
+def pointsInRing(x, y, edges):
+    '''
+    Crossing number test of many points against one ring.  The loop is
+    over the edges so each edge is tested against all points at once.
+
+    @param edges: (ax, ay, bx, by) from ringEdges
+    @return: boolean array
+    '''
+    inside = numpy.zeros(len(x), dtype=bool)
+    for x0, y0, x1, y1 in zip(*edges):
+        if y0 == y1:
+            continue
+        inside ^= ((y0 > y) != (y1 > y)) & (x < x0 + (y - y0) * ((x1 - x0) / (y1 - y0)))
+    return inside
+
+
+class Zone(object):
+    '''
+    One polygon on the grid of a Geofence.
+
+    @ivar state: per cell outside, inside or boundary
+    @ivar edgeStarts: cellEdges[edgeStarts[c]:edgeStarts[c+1]] are the
+    edges through cell c
+    @ivar centerInside: per cell, is the cell center inside
+    '''
+    outside = 0
+    inside = 1
+    boundary = 2
+
+    def __init__(self, name, points, fence):
+        '''
+        @param points: ring of (lon, lat) in degrees
+        @param fence: Geofence whose grid the zone is laid out on
+        '''
+        self.name = name
+        self.fence = fence
+        self.edges = ringEdges(points)
+        nx = fence.nx
+        ny = fence.ny
+        ax, ay, bx, by = self.edges
+
+        # Walk each edge column by column and mark the cells it passes
+        # through.  The y range in each column is padded a little so that
+        # rounding can only add boundary cells, never lose them.
+        cellEdgeLists = {}
+        pad = 1e-9
+        for edge in range(len(ax)):
+            x0, y0, x1, y1 = ax[edge], ay[edge], bx[edge], by[edge]
+            if x0 > x1:
+                x0, y0, x1, y1 = x1, y1, x0, y0
+            col0 = fence.column(x0)
+            col1 = fence.column(x1)
+            for col in range(col0, col1 + 1):
+                left = max(x0, fence.minX + col * fence.cellWidth)
+                right = min(x1, fence.minX + (col + 1) * fence.cellWidth)
+                if x1 == x0:
+                    ya, yb = y0, y1
+                else:
+                    slope = (y1 - y0) / (x1 - x0)
+                    ya = y0 + (left - x0) * slope
+                    yb = y0 + (right - x0) * slope
+                row0 = fence.row(min(ya, yb) - pad * fence.cellHeight)
+                row1 = fence.row(max(ya, yb) + pad * fence.cellHeight)
+                for row in range(row0, row1 + 1):
+                    cellEdgeLists.setdefault(row * nx + col, []).append(edge)
+
+        cells = nx * ny
+        counts = numpy.zeros(cells, dtype=numpy.int64)
+        for cell, edgeList in cellEdgeLists.iteritems():
+            counts[cell] = len(edgeList)
+        self.edgeStarts = numpy.zeros(cells + 1, dtype=numpy.int64)
+        self.edgeStarts[1:] = numpy.cumsum(counts)
+        self.cellEdges = numpy.zeros(self.edgeStarts[-1], dtype=numpy.int64)
+        for cell, edgeList in cellEdgeLists.iteritems():
+            self.cellEdges[self.edgeStarts[cell]:self.edgeStarts[cell+1]] = edgeList
+
+        self.centerInside = pointsInRing(fence.centerX, fence.centerY, self.edges)
+        self.state = numpy.where(self.centerInside, Zone.inside, Zone.outside).astype(numpy.int8)
+        self.state[counts > 0] = Zone.boundary
+
+    def contains(self, x, y, cell):
+        '''
+        >>> fence = Geofence([('square', [(0, 0), (1, 0), (1, 1), (0, 1)])], cells=4)
+        >>> zone = Zone('half', [(0, 0), (0.5, 0), (0.5, 1), (0, 1)], fence)
+        >>> x = numpy.array([0.25, 0.75]); y = numpy.array([0.5, 0.5])
+        >>> zone.contains(x, y, fence.cells(x, y)).tolist()
+        [True, False]
+
+        @param cell: grid cell of each point from Geofence.cells.  -1 for off the grid.
+        @return: boolean array
+        '''
+        inGrid = cell >= 0
+        state = numpy.zeros(len(x), dtype=numpy.int8)
+        state[inGrid] = self.state[cell[inGrid]]
+        result = state == Zone.inside
+
+        b = numpy.flatnonzero(state == Zone.boundary)
+        if 0 == len(b):
+            return result
+        bCell = cell[b]
+        starts = self.edgeStarts[bCell]
+        counts = self.edgeStarts[bCell + 1] - starts
+
+        # One entry per (point, edge of its cell) pair
+        pairPoint = numpy.repeat(numpy.arange(len(b)), counts)
+        firstPair = numpy.cumsum(counts) - counts
+        pairEdge = self.cellEdges[numpy.repeat(starts - firstPair, counts) + numpy.arange(counts.sum())]
+
+        ax, ay, bx, by = [e[pairEdge] for e in self.edges]
+        cx = self.fence.centerX[bCell][pairPoint]
+        cy = self.fence.centerY[bCell][pairPoint]
+        qx = x[b][pairPoint]
+        qy = y[b][pairPoint]
+
+        # Does the segment center to point cross the edge?  A vertex that
+        # is exactly on the segment is always counted as on the negative
+        # side so that the two edges that share it agree.
+        dx = qx - cx
+        dy = qy - cy
+        sideA = dx * (ay - cy) - dy * (ax - cx)
+        sideB = dx * (by - cy) - dy * (bx - cx)
+        ex = bx - ax
+        ey = by - ay
+        sideC = ex * (cy - ay) - ey * (cx - ax)
+        sideQ = ex * (qy - ay) - ey * (qx - ax)
+        crosses = ((sideA > 0) != (sideB > 0)) & ((sideC > 0) != (sideQ > 0))
+
+        odd = numpy.bincount(pairPoint, weights=crosses, minlength=len(b)).astype(numpy.int64) % 2 == 1
+        result[b] = self.centerInside[bCell] != odd
+        return result
+
+
+class Geofence(object):
+    '''
+    Uniform grid over one or more zone polygons.
+    '''
+
+    def __init__(self, zones, cells=64):
+        '''
+        @param zones: sequence of (name, points) where points is a ring of
+        (lon, lat) in degrees
+        @param cells: number of cells along the longer side of the box
+        around all the zones
+        '''
+        allPoints = numpy.concatenate([numpy.asarray(points, dtype=numpy.float64)
+                                       for name, points in zones])
+        minX, minY = allPoints.min(axis=0)
+        maxX, maxY = allPoints.max(axis=0)
+        # Pad so that the zone edges are never on the edge of the grid
+        padX = (maxX - minX) * 1e-6 + 1e-9
+        padY = (maxY - minY) * 1e-6 + 1e-9
+        self.minX = minX - padX
+        self.minY = minY - padY
+        width = maxX - minX + 2 * padX
+        height = maxY - minY + 2 * padY
+        size = max(width, height) / cells
+        self.nx = max(1, int(math.ceil(width / size)))
+        self.ny = max(1, int(math.ceil(height / size)))
+        self.cellWidth = width / self.nx
+        self.cellHeight = height / self.ny
+
+        col, row = numpy.meshgrid(numpy.arange(self.nx), numpy.arange(self.ny))
+        self.centerX = (self.minX + (col.ravel() + 0.5) * self.cellWidth)
+        self.centerY = (self.minY + (row.ravel() + 0.5) * self.cellHeight)
+
+        self.zones = []
+        for name, points in zones:
+            self.zones.append(Zone(name, points, self))
+
+    @property
+    def names(self):
+        return [zone.name for zone in self.zones]
+
+    def column(self, x):
+        'Grid column of a longitude clamped to the grid'
+        return min(self.nx - 1, max(0, int((x - self.minX) / self.cellWidth)))
+
+    def row(self, y):
+        'Grid row of a latitude clamped to the grid'
+        return min(self.ny - 1, max(0, int((y - self.minY) / self.cellHeight)))
+
+    def cells(self, lon, lat):
+        '''
+        @return: grid cell of each point or -1 if it is off the grid
+        '''
+        col = numpy.floor((lon - self.minX) / self.cellWidth)
+        row = numpy.floor((lat - self.minY) / self.cellHeight)
+        onGrid = (col >= 0) & (col < self.nx) & (row >= 0) & (row < self.ny)
+        cell = numpy.zeros(len(lon), dtype=numpy.int64) - 1
+        cell[onGrid] = (row[onGrid] * self.nx + col[onGrid]).astype(numpy.int64)
+        return cell
+
+    def membership(self, lon, lat):
+        '''
+        @param lon: array of longitudes
+        @param lat: array of latitudes
+        @return: boolean array of shape (number of zones, number of points)
+        '''
+        lon = numpy.asarray(lon, dtype=numpy.float64)
+        lat = numpy.asarray(lat, dtype=numpy.float64)
+        cell = self.cells(lon, lat)
+        result = numpy.zeros((len(self.zones), len(lon)), dtype=bool)
+        for i, zone in enumerate(self.zones):
+            result[i] = zone.contains(lon, lat, cell)
+        return result
+
+    def zoneOf(self, lon, lat):
+        '''
+        @return: index of the first zone that each point is in or -1
+        '''
+        inside = self.membership(lon, lat)
+        result = numpy.zeros(inside.shape[1], dtype=numpy.int64) - 1
+        for i in range(len(self.zones) - 1, -1, -1):
+            result[inside[i]] = i
+        return result
+
+
+class CrossingTracker(object):
+    '''
+    Turn zone membership into enter and exit events for each vessel.
+    The last state of each vessel is kept between blocks.  The first time
+    a vessel is seen does not make an event.
+
+      >>> import numpy
+      >>> tracker = CrossingTracker(2)
+      >>> ids = numpy.array([7, 8, 7, 7, 8])
+      >>> inside = numpy.array([[0, 1, 1, 1, 0], [0, 0, 0, 1, 0]], dtype=bool)
+      >>> [e.tolist() for e in tracker.update(ids, inside)]
+      [[2, 3, 4], [0, 1, 0], [True, True, False]]
+      >>> [e.tolist() for e in tracker.update(numpy.array([7]), numpy.array([[0], [1]], dtype=bool))]
+      [[0], [0], [False]]
+    '''
+
+    def __init__(self, numZones):
+        self.numZones = numZones
+        self.state = {} # id -> bool array of the zones it was last in
+
+    def update(self, ids, inside):
+        '''
+        @param ids: array of vessel ids (MMSI) of the points in time order
+        @param inside: membership from Geofence.membership
+        @return: (point index, zone index, entered) arrays sorted by point
+        '''
+        ids = numpy.asarray(ids)
+        n = len(ids)
+        if 0 == n:
+            empty = numpy.zeros(0, dtype=numpy.int64)
+            return empty, empty, numpy.zeros(0, dtype=bool)
+        order = numpy.argsort(ids, kind='mergesort') # Stable keeps time order
+        sortedIds = ids[order]
+        first = numpy.ones(n, dtype=bool)
+        first[1:] = sortedIds[1:] != sortedIds[:-1]
+        last = numpy.ones(n, dtype=bool)
+        last[:-1] = first[1:]
+
+        # Previous state of each point.  -1 for a vessel not seen before.
+        current = inside[:, order].astype(numpy.int8)
+        previous = numpy.zeros_like(current)
+        previous[:, 1:] = current[:, :-1]
+        firstIndex = numpy.flatnonzero(first)
+        unknown = numpy.zeros(self.numZones, dtype=numpy.int8) - 1
+        for i in firstIndex:
+            previous[:, i] = self.state.get(sortedIds[i], unknown)
+        for i in numpy.flatnonzero(last):
+            self.state[sortedIds[i]] = current[:, i].copy()
+
+        zone, sortedPoint = numpy.nonzero((previous >= 0) & (previous != current))
+        point = order[sortedPoint]
+        entered = current[zone, sortedPoint] == 1
+        byPoint = numpy.lexsort((zone, point))
+        return point[byPoint], zone[byPoint], entered[byPoint]
+
+
+if __name__=='__main__':
+    import doctestmain
+    doctestmain.main()
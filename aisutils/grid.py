@@ -21,7 +21,6 @@ Privide a class to allow laying ship tracks down into a grid.
 
 from math import *
 import sys
-import traceback
 import numpy
 
 def distance(x1,y1,x2,y2):
@@ -99,7 +98,94 @@ gridTypes = [
     'occurrence'
     ,'distance'
     ,'distanceWeightedSpeed'
+    ,'time'
     ]
+'''
+ - occurrence: number of times tracks pass through each cell
+ - distance: length of track in each cell
+ - distanceWeightedSpeed: sum of length times speed in each cell.  See Grid.getMeanSpeed
+ - time: seconds spent in each cell.  Needs the time of each vertex.
+'''
+
+class SparseCells:
+    '''
+    Grid cells stored as coordinate (COO) arrays for large regions at
+    fine step sizes where a dense array will not fit in memory.  Only
+    cells that have been added to take space.  Additions are queued and
+    merged with numpy.unique so adding many values at once is cheap.
+
+    >>> cells = SparseCells((100000,100000))
+    >>> cells.add(numpy.array([5,5,7]),numpy.array([1,1,9]),numpy.array([1.,2.,4.]))
+    >>> cells[5,1], cells[7,9], cells[0,0], len(cells)
+    (3.0, 4.0, 0.0, 2)
+    '''
+    def __init__(self,shape,dtype=float,maxPending=1000000):
+        '''
+        @param shape: (number of i cells, number of j cells)
+        @param maxPending: merge the queued additions when there are this many
+        '''
+        self.shape = shape
+        self.size = shape[0]*shape[1]
+        self.dtype = numpy.dtype(dtype)
+        self.maxPending = maxPending
+        self.index = numpy.zeros(0,dtype=numpy.int64) # flat cell index, sorted
+        self.values = numpy.zeros(0,dtype=self.dtype)
+        self.pendingIndex = []
+        self.pendingValues = []
+        self.numPending = 0
+
+    def __len__(self):
+        'number of cells with a value'
+        return len(self.consolidate()[0])
+
+    def add(self,i,j,values):
+        'Add values to cells i,j.  i, j and values are arrays.'
+        self.pendingIndex.append(numpy.asarray(i,dtype=numpy.int64)*self.shape[1]+j)
+        self.pendingValues.append(numpy.asarray(values,dtype=self.dtype))
+        self.numPending += len(self.pendingIndex[-1])
+        if self.numPending >= self.maxPending:
+            self.consolidate()
+
+    def consolidate(self):
+        '''
+        Merge the queued additions.
+        @return: (flat index, values) arrays sorted by index
+        '''
+        if self.pendingIndex:
+            index = numpy.concatenate([self.index]+self.pendingIndex)
+            values = numpy.concatenate([self.values]+self.pendingValues)
+            self.index,inverse = numpy.unique(index,return_inverse=True)
+            self.values = numpy.bincount(inverse,weights=values).astype(self.dtype)
+            self.pendingIndex = []
+            self.pendingValues = []
+            self.numPending = 0
+        return self.index,self.values
+
+    def cells(self):
+        '@return: (i, j, values) arrays of the cells with values'
+        index,values = self.consolidate()
+        return index//self.shape[1],index%self.shape[1],values
+
+    def __getitem__(self,ij):
+        index,values = self.consolidate()
+        flat = ij[0]*self.shape[1]+ij[1]
+        k = numpy.searchsorted(index,flat)
+        if k < len(index) and index[k] == flat:
+            return values[k]
+        return self.dtype.type(0)
+
+    def __setitem__(self,ij,value):
+        self.add([ij[0]],[ij[1]],[value-self[ij]])
+
+    def sum(self):
+        return self.consolidate()[1].sum()
+
+    def toDense(self):
+        '@return: numpy array of the full grid'
+        dense = numpy.zeros(self.shape,dtype=self.dtype)
+        i,j,values = self.cells()
+        dense[i,j] = values
+        return dense
 
 class Grid:
     '''
@@ -110,10 +196,12 @@ class Grid:
     0,0 is at the lower left and (xNumCells-1,yNumCells-1) is the upper right cell
     '''
     epsilon = .000001
-    def __init__(self,minx,miny,maxx,maxy,stepSize,gridType='occurrence',verbose=False):
+    def __init__(self,minx,miny,maxx,maxy,stepSize,gridType='occurrence',verbose=False,sparse=False):
         ''' Prepare a grid.
         Readjust the grid such that the stepSize divides evenly into the ranges.
         Compute and cache the number of cells.
+
+        @param sparse: keep the cells in a SparseCells rather than a dense numpy array
         '''
         self.minx=minx
         self.miny=miny
@@ -160,10 +248,58 @@ class Grid:
         # FIX: why should I have to do add +1?  Rounding/edge error?
         # Will this cause errors down the road in other functions?
 
+        dtype = float
         if gridType=='occurrence':
-            self.grid=numpy.zeros((self.xNumCells+1,self.yNumCells+1),dtype=int)
-        else:
-            self.grid=numpy.zeros((self.xNumCells+1,self.yNumCells+1),dtype=float)
+            dtype = int
+        shape = (self.xNumCells+1,self.yNumCells+1)
+        self.sparse = sparse
+        self.grid = self.newCells(shape,dtype)
+        self.distance = None
+        if gridType=='distanceWeightedSpeed':
+            # Track length in each cell to turn the grid into a mean speed
+            self.distance = self.newCells(shape,float)
+
+    def newCells(self,shape,dtype):
+        if self.sparse:
+            return SparseCells(shape,dtype)
+        return numpy.zeros(shape,dtype=dtype)
+
+    def addCells(self,target,i,j,values):
+        '''
+        Add values to the cells i,j of target (self.grid or self.distance).
+        Cells must be inside the grid.
+        '''
+        if self.sparse:
+            target.add(i,j,values)
+            return
+        sums = numpy.bincount(i*target.shape[1]+j,weights=values,minlength=target.size)
+        target += sums.reshape(target.shape).astype(target.dtype)
+
+    def getMeanSpeed(self):
+        '''
+        Mean speed in each cell weighted by the distance traveled in the
+        cell for a distanceWeightedSpeed grid.
+
+        >>> g = Grid(0,0,4,4,1,gridType='distanceWeightedSpeed')
+        >>> g.addTracks([[(0.5,0.5),(2.5,0.5)],[(0.5,0.5),(1.5,0.5)]],times=[[0,2],[0,4]])
+        >>> '%.3f %.3f' % (g.getMeanSpeed()[0,0], g.getMeanSpeed()[2,0])
+        '0.625 1.000'
+
+        @return: array or SparseCells of speeds.  Empty cells are 0.
+        '''
+        assert self.gridType=='distanceWeightedSpeed'
+        if not self.sparse:
+            speed = numpy.zeros(self.grid.shape)
+            used = self.distance > 0
+            speed[used] = self.grid[used]/self.distance[used]
+            return speed
+        index,sums = self.grid.consolidate()
+        distIndex,dists = self.distance.consolidate()
+        assert (index==distIndex).all()
+        speed = SparseCells(self.grid.shape)
+        speed.index = index
+        speed.values = numpy.where(dists>0,sums/numpy.where(dists>0,dists,1),0)
+        return speed
 
     def describe(self):
         print ' === GRID === '
@@ -585,42 +721,231 @@ class Grid:
             o.write(xStr+maxyStr+'\n')
 
 
-    def addMultiSegLine(self,multiSegLine,verbose=False):
-        grid=self.grid
-        #print '\naddMultiSegLine line ',multiSegLine
+    def addMultiSegLine(self,multiSegLine,verbose=False,times=None):
+        '''
+        Add one multi vertex line.  The same as addTracks with one track,
+        so a line gives the same cells either way.
+
+        >>> g = Grid(0,0,4,4,1)
+        >>> g.addMultiSegLine([(0.5,0.5),(1.5,0.5),(1.5,2.5)])
+        >>> int(g.grid.sum()), int(g.grid[1,0])
+        (4, 1)
+
+        @param times: time of each vertex in seconds for time and
+        distanceWeightedSpeed grids
+        '''
         if verbose: sys.stderr.write('addMultiSegLine cell inserts: (using type '+self.gridType+')\n')
+        if times is not None:
+            times = [times]
+        self.addTracks([multiSegLine],times=times)
 
+    def addPoints(self,xs,ys,weights=None):
+        '''
+        Add a whole column of points at once, e.g. the lon and lat columns
+        from ais.batch.decode_positions.  Points outside the grid are
+        dropped.
+
+        >>> g = Grid(0,0,10,10,1)
+        >>> g.addPoints([0.5,0.7,9.5,20],[0.5,0.2,3.5,1])
+        3
+        >>> int(g.grid[0,0]), int(g.grid[9,3])
+        (2, 1)
+
+        @param xs: x coordinates
+        @param ys: y coordinates
+        @param weights: amount to add for each point.  Defaults to 1.
+        @return: number of points that landed in the grid
+        '''
+        xs = numpy.asarray(xs,dtype=float)
+        ys = numpy.asarray(ys,dtype=float)
+        i = numpy.floor((xs-self.minx)/self.stepSize).astype(int)
+        j = numpy.floor((ys-self.miny)/self.stepSize).astype(int)
+        inside = (i>=0) & (i<self.grid.shape[0]) & (j>=0) & (j<self.grid.shape[1])
+        if weights is None:
+            weights = numpy.ones(len(xs),dtype=self.grid.dtype)
+        else:
+            weights = numpy.asarray(weights,dtype=self.grid.dtype)
+        self.addCells(self.grid,i[inside],j[inside],weights[inside])
+        return int(inside.sum())
+
+    def getSegmentCells(self,x0,y0,x1,y1):
+        '''
+        Scan convert many line segments at once.  The grid line crossings
+        of every segment are found with array operations and sorted along
+        each segment, so each piece between two crossings is in exactly
+        one cell.
+
+        >>> g = Grid(0,0,4,4,1)
+        >>> seg,i,j,length = g.getSegmentCells([0.5,3.5],[0.5,0.5],[2.5,3.5],[0.5,2.5])
+        >>> zip(seg.tolist(),i.tolist(),j.tolist(),length.tolist())
+        [(0, 0, 0, 0.5), (0, 1, 0, 1.0), (0, 2, 0, 0.5), (1, 3, 0, 0.5), (1, 3, 1, 1.0), (1, 3, 2, 0.5)]
+
+        @param x0: array of segment start x
+        @param y0: array of segment start y
+        @param x1: array of segment end x
+        @param y1: array of segment end y
+        @return: (segment index, i, j, length) arrays with one entry for
+        each cell that each segment passes through, in order along each
+        segment.  Cells may be outside of the grid.
+        '''
+        x0 = numpy.asarray(x0,dtype=float); y0 = numpy.asarray(y0,dtype=float)
+        x1 = numpy.asarray(x1,dtype=float); y1 = numpy.asarray(y1,dtype=float)
+        n = len(x0)
+        # Work in cell units
+        u0 = (x0-self.minx)/self.stepSize; v0 = (y0-self.miny)/self.stepSize
+        du = (x1-x0)/self.stepSize; dv = (y1-y0)/self.stepSize
+        segLen = numpy.hypot(x1-x0,y1-y0)
+
+        def crossings(start,delta):
+            '(segment, t) of each grid line that the segments cross on one axis'
+            first = numpy.floor(start)
+            last = numpy.floor(start+delta)
+            count = numpy.abs(last-first).astype(int)
+            seg = numpy.repeat(numpy.arange(n),count)
+            k = numpy.arange(count.sum()) - numpy.repeat(numpy.cumsum(count)-count,count)
+            up = delta[seg] > 0
+            boundary = numpy.where(up, first[seg]+1+k, first[seg]-k)
+            return seg, (boundary-start[seg])/delta[seg]
+
+        segU,tU = crossings(u0,du)
+        segV,tV = crossings(v0,dv)
+        segAll = numpy.concatenate((numpy.arange(n),numpy.arange(n),segU,segV))
+        tAll = numpy.concatenate((numpy.zeros(n),numpy.ones(n),tU,tV))
+        order = numpy.lexsort((tAll,segAll))
+        segAll = segAll[order]; tAll = tAll[order]
+
+        # Pieces between neighboring crossings of the same segment.
+        # Crossing a corner gives an empty piece that is dropped.
+        ta = tAll[:-1]; tb = tAll[1:]
+        keep = (segAll[:-1] == segAll[1:]) & (tb > ta)
+        seg = segAll[:-1][keep]; ta = ta[keep]; tb = tb[keep]
+        mid = (ta+tb)/2
+        i = numpy.floor(u0[seg]+mid*du[seg]).astype(int)
+        j = numpy.floor(v0[seg]+mid*dv[seg]).astype(int)
+        return seg, i, j, (tb-ta)*segLen[seg]
+
+    def addSegments(self,x0,y0,x1,y1,trackIds=None,weights=None,t0=None,t1=None):
+        '''
+        Add many line segments to the grid at once.  Pieces outside of the
+        grid are dropped.
+
+        For an occurrence grid, each cell counts once for each time a
+        track passes through it.  A track going from one segment to the
+        next within a cell does not count the cell twice.  A distance grid
+        gets the length of the segment in each cell, times the weight of
+        the segment if there are weights.  A time grid gets the part of
+        the segment time spent in each cell, assuming constant speed along
+        the segment.  A distanceWeightedSpeed grid gets the length times
+        the speed, where the speed is the weight or else the segment
+        length over its time.
+
+        >>> g = Grid(0,0,4,4,1)
+        >>> g.addSegments([0.5,1.5],[0.5,0.5],[1.5,1.5],[0.5,2.5],trackIds=[7,7])
+        >>> [int(g.grid[i,j]) for i,j in ((0,0),(1,0),(1,1),(1,2))]
+        [1, 1, 1, 1]
+        >>> g = Grid(0,0,4,4,1,gridType='time')
+        >>> g.addSegments([0.5],[0.5],[2.5],[0.5],t0=[100],t1=[140])
+        >>> g.grid[:3,0].tolist()
+        [10.0, 20.0, 10.0]
+
+        @param trackIds: track of each segment.  The segments of a track
+        must be next to each other and in order.  Defaults to each segment
+        being its own track.
+        @param weights: value for each segment
+        @param t0: time in seconds of the start of each segment
+        @param t1: time in seconds of the end of each segment
+        '''
+        seg,i,j,length = self.getSegmentCells(x0,y0,x1,y1)
+        inside = (i>=0) & (i<self.grid.shape[0]) & (j>=0) & (j<self.grid.shape[1])
         if 'occurrence' == self.gridType:
-            cells = self.getMultiSegLineCells(multiSegLine)
-            for cell in cells:
-                try:
-                    grid[cell[0],cell[1]]+=1
-                    if verbose:
-                        print '  ',cell[0],cell[1],grid[cell[0],cell[1]]
-                except Exception, e:
-                    sys.stderr.write('    Exception:' + str(type(Exception))+'\n')
-                    sys.stderr.write('    Exception args:'+ str(e)+'\n')
-                    traceback.print_exc(file=sys.stderr)
-
-                    print 'error on grid cell inc:',str(multiSegLine)[:40],'...'
-                    print 'CRAP... grid failure'
-                    print '  ',cell, self.xNumCells, self.yNumCells
-                    assert False
-        elif 'distance' == self.gridType:
-            result = self.getMultiSegLineCellsWithCrossings(multiSegLine)
-            if verbose: sys.stderr.write(str(result)+'\n')
-            for seg in result:
-                # (0, 0), 0.0, 0.24874371859296465, 0.99124918032832443)
-                cell = seg[0]
-                dist = seg[3]
-                print 'adding:', cell, dist
-                grid[cell[0],cell[1]] += dist
-            print grid
+            if trackIds is None:
+                track = seg
+            else:
+                track = numpy.asarray(trackIds)[seg]
+            cell = i*self.grid.shape[1]+j
+            repeat = numpy.zeros(len(seg),dtype=bool)
+            repeat[1:] = (track[1:] == track[:-1]) & (cell[1:] == cell[:-1])
+            keep = inside & ~repeat
+            self.addCells(self.grid,i[keep],j[keep],numpy.ones(keep.sum()))
+            return
+
+        i = i[inside]; j = j[inside]; seg = seg[inside]; length = length[inside]
+        if self.gridType in ('time','distanceWeightedSpeed') and (t0 is not None or weights is None):
+            assert t0 is not None and t1 is not None, self.gridType+' grids need the vertex times'
+            dt = numpy.asarray(t1,dtype=float)-numpy.asarray(t0,dtype=float)
+
+        if 'distance' == self.gridType:
+            if weights is not None:
+                length = length*numpy.asarray(weights,dtype=float)[seg]
+            self.addCells(self.grid,i,j,length)
+        elif 'time' == self.gridType:
+            segLen = numpy.hypot(numpy.asarray(x1,dtype=float)-x0,numpy.asarray(y1,dtype=float)-y0)[seg]
+            # A segment that does not move is all in one cell
+            frac = numpy.where(segLen>0,length/numpy.where(segLen>0,segLen,1),1.)
+            self.addCells(self.grid,i,j,frac*dt[seg])
         elif 'distanceWeightedSpeed' == self.gridType:
-            assert False
+            if weights is not None:
+                speed = numpy.asarray(weights,dtype=float)
+            else:
+                segLen = numpy.hypot(numpy.asarray(x1,dtype=float)-x0,numpy.asarray(y1,dtype=float)-y0)
+                speed = numpy.where(dt>0,segLen/numpy.where(dt>0,dt,1),0.)
+            self.addCells(self.grid,i,j,length*speed[seg])
+            self.addCells(self.distance,i,j,length)
         else:
             assert False
 
+    def addTracks(self,tracks,weights=None,times=None,maxSegments=1000000):
+        '''
+        Add a list of multi vertex lines, e.g. from wktLine2list.  Done
+        in batches of about maxSegments segments so memory stays bounded.
+
+        >>> g = Grid(0,0,4,4,1)
+        >>> g.addTracks([[(0.5,0.5),(1.5,0.5),(1.5,2.5)], [(3.5,3.5),(3.5,3.5)]])
+        >>> int(g.grid.sum()), int(g.grid[3,3])
+        (5, 1)
+        >>> g = Grid(0,0,4,4,1,gridType='time',sparse=True)
+        >>> g.addTracks([[(0.5,0.5),(1.5,0.5),(1.5,2.5)]],times=[[0,10,30]])
+        >>> g.grid[0,0], g.grid[1,0], g.grid[1,1], len(g.grid)
+        (5.0, 10.0, 10.0, 4)
+
+        @param tracks: sequence of ((x1,y1),(x2,y2),...)
+        @param weights: one value per track for weighted grids
+        @param times: for each track, the time of each vertex in seconds
+        '''
+        batch = []
+        batchWeights = []
+        batchTimes = []
+        numSegments = 0
+        for trackNum,track in enumerate(tracks):
+            if len(track) < 2:
+                continue
+            batch.append(numpy.asarray(track,dtype=float))
+            if weights is not None:
+                batchWeights.append(weights[trackNum])
+            if times is not None:
+                assert len(times[trackNum])==len(track)
+                batchTimes.append(numpy.asarray(times[trackNum],dtype=float))
+            numSegments += len(track)-1
+            if numSegments >= maxSegments:
+                self._addTrackBatch(batch,batchWeights,batchTimes)
+                batch = []; batchWeights = []; batchTimes = []; numSegments = 0
+        if batch:
+            self._addTrackBatch(batch,batchWeights,batchTimes)
+
+    def _addTrackBatch(self,tracks,weights,times):
+        starts = numpy.concatenate([t[:-1] for t in tracks])
+        ends = numpy.concatenate([t[1:] for t in tracks])
+        segsPerTrack = [len(t)-1 for t in tracks]
+        trackIds = numpy.repeat(numpy.arange(len(tracks)),segsPerTrack)
+        segWeights = None
+        if weights:
+            segWeights = numpy.asarray(weights,dtype=float)[trackIds]
+        t0 = t1 = None
+        if times:
+            t0 = numpy.concatenate([t[:-1] for t in times])
+            t1 = numpy.concatenate([t[1:] for t in times])
+        self.addSegments(starts[:,0],starts[:,1],ends[:,0],ends[:,1],trackIds,segWeights,t0,t1)
+
     def writeCellsGnuplot(self,filename,useSquares=False):
         '''
         @param useSquares: if true then write out the height of each cell as a square.  False then it writes a point
@@ -628,10 +953,19 @@ class Grid:
         assert useSquares==False # FIX: implement this feature
         grid = self.grid
         o = file(filename,'w')
-        for i in range(grid.shape[0]):
-            for j in range(grid.shape[1]):
-                x,y = self.getCellCenter(i,j)
-                o.write('%f %f %f\n' % (x,y,grid[i,j]))
+        try:
+            if self.sparse:
+                # Only the cells that have something in them
+                for i,j,value in zip(*grid.cells()):
+                    x,y = self.getCellCenter(i,j)
+                    o.write('%f %f %f\n' % (x,y,value))
+                return
+            for i in range(grid.shape[0]):
+                for j in range(grid.shape[1]):
+                    x,y = self.getCellCenter(i,j)
+                    o.write('%f %f %f\n' % (x,y,grid[i,j]))
+        finally:
+            o.close()
 
 
     def writeArcAsciiGrid(self,filename):
@@ -642,11 +976,22 @@ class Grid:
         o.write('xllcorner    '+str(self.minx)+'\n')
         o.write('yllcorner    '+str(self.miny)+'\n')
         o.write('cellsize     '+str(self.stepSize)+'\n')
+        if self.sparse:
+            # Build one row at a time from the cells sorted by row
+            cellI,cellJ,values = g.cells()
+            order = numpy.lexsort((cellI,cellJ))
+            cellI = cellI[order]; cellJ = cellJ[order]; values = values[order]
+            rowStarts = numpy.searchsorted(cellJ,numpy.arange(self.yNumCells+1))
         for j in range(self.yNumCells-1,-1,-1):
             #print j
+            if self.sparse:
+                row = numpy.zeros(self.xNumCells+1,dtype=g.dtype)
+                row[cellI[rowStarts[j]:rowStarts[j+1]]] = values[rowStarts[j]:rowStarts[j+1]]
+            else:
+                row = g[:,j]
             zPoints=[]
             for i in range(self.xNumCells):
-                zPoints.append('%3d' % (g[i,j]))
+                zPoints.append('%3d' % (row[i]))
             o.write(' '.join(zPoints))
             o.write('\n')
 
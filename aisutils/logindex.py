@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Sidecar index files for USCG format NMEA logs.
+
+Finding every line for one vessel in a time window used to mean grep or
+a full scan of each day log.  An index is built once per log and saved
+next to it as log.idx.npz.  It has two parts:
+
+ - a sparse time table.  Every block of blockLines lines has the byte
+   offset of its first line and the smallest and largest cg_sec in the
+   block.  Times in USCG logs can jump backwards a little, so a block is
+   read when its time range overlaps the query rather than assuming
+   the log is sorted.
+ - per MMSI posting lists.  The offset of every first sentence line,
+   grouped by MMSI with the MMSIs sorted.
+
+Queries seek straight to the lines that can match.
+
+  >>> import os, shutil, tempfile
+  >>> tmp = tempfile.mkdtemp()
+  >>> logName = os.path.join(tmp, 'test.ais')
+  >>> log = open(logName, 'w')
+  >>> log.write('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433\\n')
+  >>> log.write('!AIVDM,1,1,,A,B52K>;h00Fc>jpUlNV@ikwpUoP06,0*4C,b003669710,1165850500\\n')
+  >>> log.write('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669946,1165850600\\n')
+  >>> log.close()
+  >>> index = LogIndex.build(logName, blockLines=2)
+  >>> index.mmsis()
+  [338087471, 366985620]
+  >>> len(list(query(logName, mmsi=366985620)))
+  2
+  >>> [line.split(',')[-1].strip() for line in query(logName, start=1165850450, end=1165850700)]
+  ['1165850500', '1165850600']
+  >>> [lineNum for lineNum, line in query(logName, start=1165850550, numbered=True)]
+  [3]
+  >>> os.path.exists(indexName(logName))
+  True
+  >>> logTimeRange(logName)
+  (1165850433.0, 1165850600.0)
+
+An index that cannot be saved, such as for a log in a read only
+directory, is still used from memory:
+
+  >>> os.chmod(tmp, 0555)
+  >>> index = LogIndex.build(os.path.join(tmp, 'test.ais'))
+  >>> os.chmod(tmp, 0755)
+  >>> len(list(query(logName, mmsi=338087471, index=index)))
+  1
+  >>> shutil.rmtree(tmp)
+
+@requires: U{numpy<http://numpy.scipy.org/>}
+@since: 2026-Oct-16
+@see: L{archive} for decoded columns rather than raw lines
+'''
+
+import os
+import sys
+
+import numpy
+
+import binary
+
+indexVersion = 2
+'''Bump when the layout of the index file changes'''
+
+
+def indexName(logName):
+    '@return: file name of the sidecar index of a log'
+    return logName + '.idx.npz'
+
+
+def lineTime(line):
+    '''
+    >>> lineTime('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433\\n')
+    1165850433.0
+    >>> lineTime('# comment')
+
+    @return: cg_sec at the end of a USCG line or None
+    '''
+    try:
+        return float(line[line.rindex(',')+1:])
+    except ValueError:
+        return None
+
+
+def lineMmsi(line):
+    '''
+    MMSI from the first 7 payload characters of the first sentence of
+    a message.  Only the armoring is decoded.
+
+    >>> lineMmsi('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433')
+    366985620
+    >>> lineMmsi('!AIVDM,2,2,7,B,888888888888880,2*25,r003669945,1165850433')
+
+    @return: MMSI or None if the line is not the start of an AIS message
+    '''
+    fields = line.split(',', 6)
+    if len(fields) < 7 or fields[0][-3:] not in ('VDM', 'VDO') or '1' != fields[2]:
+        return None
+    payload = fields[5]
+    if len(payload) < 7:
+        return None
+    value = 0
+    sextetTable = binary.sextetTable
+    for c in payload[:7]:
+        sextet = sextetTable[ord(c)]
+        if sextet is None:
+            return None
+        value = (value << 6) | sextet
+    return (value >> 4) & 0x3fffffff
+
+
+class LogIndex(object):
+    '''
+    Time blocks and MMSI posting lists for one log file.
+    '''
+
+    def __init__(self, blockOffsets, blockMinTimes, blockMaxTimes, mmsiValues,
+                 postingStarts, postings, sourceSize, blockLines, sourceMtime=0):
+        '''
+        Use build or load rather than making one directly.
+
+        @param blockOffsets: byte offset of the first line of each block plus
+        one extra entry for the end of the file
+        @param mmsiValues: sorted unique MMSIs
+        @param postingStarts: postings[postingStarts[i]:postingStarts[i+1]]
+        are the line offsets for mmsiValues[i]
+        @param sourceSize: size of the log when it was indexed
+        @param sourceMtime: modification time of the log when it was indexed
+        '''
+        self.blockOffsets = blockOffsets
+        self.blockMinTimes = blockMinTimes
+        self.blockMaxTimes = blockMaxTimes
+        self.mmsiValues = mmsiValues
+        self.postingStarts = postingStarts
+        self.postings = postings
+        self.sourceSize = sourceSize
+        self.sourceMtime = sourceMtime
+        self.blockLines = blockLines
+
+    @classmethod
+    def build(cls, logName, blockLines=1024, save=True):
+        '''
+        Scan a log and build its index.
+
+        @param blockLines: lines in each time block
+        @param save: write the sidecar file next to the log.  If it can not
+        be written, a warning is printed and the index is only kept in memory.
+        @rtype: LogIndex
+        '''
+        sourceMtime = os.path.getmtime(logName)
+        blockOffsets = []
+        blockMinTimes = []
+        blockMaxTimes = []
+        postingLists = {}
+        inf = float('inf')
+        offset = 0
+        lineNum = 0
+        minTime = inf
+        maxTime = -inf
+        for line in open(logName, 'rb'):
+            if 0 == lineNum % blockLines:
+                if lineNum:
+                    blockMinTimes.append(minTime)
+                    blockMaxTimes.append(maxTime)
+                    minTime = inf
+                    maxTime = -inf
+                blockOffsets.append(offset)
+            lineNum += 1
+            t = lineTime(line)
+            if t is not None:
+                if t < minTime: minTime = t
+                if t > maxTime: maxTime = t
+            mmsi = lineMmsi(line)
+            if mmsi is not None:
+                offsets = postingLists.get(mmsi)
+                if offsets is None:
+                    offsets = postingLists[mmsi] = []
+                offsets.append(offset)
+            offset += len(line)
+        if lineNum:
+            blockMinTimes.append(minTime)
+            blockMaxTimes.append(maxTime)
+        blockOffsets.append(offset)
+
+        mmsiValues = sorted(postingLists)
+        postingStarts = [0]
+        postings = []
+        for mmsi in mmsiValues:
+            postings.extend(postingLists[mmsi])
+            postingStarts.append(len(postings))
+
+        index = cls(numpy.array(blockOffsets, dtype=numpy.uint64),
+                    numpy.array(blockMinTimes, dtype=numpy.float64),
+                    numpy.array(blockMaxTimes, dtype=numpy.float64),
+                    numpy.array(mmsiValues, dtype=numpy.uint32),
+                    numpy.array(postingStarts, dtype=numpy.uint64),
+                    numpy.array(postings, dtype=numpy.uint64),
+                    offset, blockLines, sourceMtime)
+        if save:
+            try:
+                index.save(indexName(logName))
+            except (IOError, OSError), e:
+                sys.stderr.write('WARNING: unable to save the index of %s: %s\n' % (logName, e))
+        return index
+
+    def save(self, filename):
+        '''Write the index as a numpy npz file'''
+        tmpName = filename + '.tmp'
+        f = open(tmpName, 'wb')
+        numpy.savez(f,
+                    version=numpy.array([indexVersion]),
+                    sourceSize=numpy.array([self.sourceSize], dtype=numpy.uint64),
+                    sourceMtime=numpy.array([self.sourceMtime], dtype=numpy.float64),
+                    blockLines=numpy.array([self.blockLines]),
+                    blockOffsets=self.blockOffsets,
+                    blockMinTimes=self.blockMinTimes,
+                    blockMaxTimes=self.blockMaxTimes,
+                    mmsiValues=self.mmsiValues,
+                    postingStarts=self.postingStarts,
+                    postings=self.postings)
+        f.close()
+        os.rename(tmpName, filename)
+
+    @classmethod
+    def load(cls, filename):
+        '''
+        @raise ValueError: the index was written by a different version
+        @rtype: LogIndex
+        '''
+        npz = numpy.load(filename)
+        if int(npz['version'][0]) != indexVersion:
+            raise ValueError('index version %d is not %d: %s'
+                             % (int(npz['version'][0]), indexVersion, filename))
+        return cls(npz['blockOffsets'], npz['blockMinTimes'], npz['blockMaxTimes'],
+                   npz['mmsiValues'], npz['postingStarts'], npz['postings'],
+                   int(npz['sourceSize'][0]), int(npz['blockLines'][0]),
+                   float(npz['sourceMtime'][0]))
+
+    def mmsis(self):
+        '@return: the MMSIs in the log'
+        return [int(mmsi) for mmsi in self.mmsiValues]
+
+    def mmsiOffsets(self, mmsi):
+        '''
+        @return: byte offsets of the lines for one MMSI in file order
+        '''
+        i = numpy.searchsorted(self.mmsiValues, mmsi)
+        if i >= len(self.mmsiValues) or self.mmsiValues[i] != mmsi:
+            return numpy.zeros(0, dtype=numpy.uint64)
+        return self.postings[int(self.postingStarts[i]):int(self.postingStarts[i+1])]
+
+    def timeRanges(self, start=None, end=None):
+        '''
+        @param start: earliest cg_sec or None for no limit
+        @param end: latest cg_sec or None for no limit
+        @return: (startOffset, endOffset, lineNum) byte ranges of the blocks
+        that might have lines in the time window along with the 1 based line
+        number of the first line.  Touching blocks are merged.
+        '''
+        keep = numpy.ones(len(self.blockMinTimes), dtype=bool)
+        if start is not None:
+            keep &= self.blockMaxTimes >= start
+        if end is not None:
+            keep &= self.blockMinTimes <= end
+        ranges = []
+        for i in numpy.flatnonzero(keep):
+            blockStart = int(self.blockOffsets[i])
+            blockEnd = int(self.blockOffsets[i+1])
+            if ranges and ranges[-1][1] == blockStart:
+                ranges[-1] = (ranges[-1][0], blockEnd, ranges[-1][2])
+            else:
+                ranges.append((blockStart, blockEnd, int(i) * self.blockLines + 1))
+        return ranges
+
+    def timeRange(self):
+        '''
+        @return: (first, last) cg_sec in the log or None if no line has a time
+        '''
+        haveTime = self.blockMaxTimes >= self.blockMinTimes
+        if not haveTime.any():
+            return None
+        return float(self.blockMinTimes[haveTime].min()), float(self.blockMaxTimes[haveTime].max())
+
+
+def openIndex(logName, build=True, blockLines=1024):
+    '''
+    Load the sidecar index of a log.  The index is rebuilt if it is
+    missing or the log has changed size or modification time since it
+    was built.
+
+    @param build: build a missing or stale index.  If False, return None instead.
+    @rtype: LogIndex
+    '''
+    filename = indexName(logName)
+    if os.path.exists(filename):
+        try:
+            index = LogIndex.load(filename)
+        except (ValueError, KeyError):
+            index = None
+        if (index is not None and index.sourceSize == os.path.getsize(logName)
+            and index.sourceMtime == os.path.getmtime(logName)):
+            return index
+    if not build:
+        return None
+    return LogIndex.build(logName, blockLines)
+
+
+def logTimeRange(logName):
+    '''
+    First and last cg_sec in a log.  Uses the sidecar index if it is
+    current, otherwise reads the times without building an index.
+
+    @return: (first, last) cg_sec or None if no line has a time
+    '''
+    index = openIndex(logName, build=False)
+    if index is not None:
+        return index.timeRange()
+    first = last = None
+    for line in open(logName, 'rb'):
+        t = lineTime(line)
+        if t is None:
+            continue
+        if first is None or t < first: first = t
+        if last is None or t > last: last = t
+    if first is None:
+        return None
+    return first, last
+
+
+def query(logName, mmsi=None, start=None, end=None, index=None, numbered=False):
+    '''
+    Lines of a log for an MMSI and/or a time window.
+
+    @param mmsi: only lines that start a message from this MMSI
+    @param start: earliest cg_sec
+    @param end: latest cg_sec
+    @param index: LogIndex of the log.  Defaults to openIndex.
+    @param numbered: yield (lineNum, line) with 1 based line numbers.  Only
+    for time queries since the MMSI postings do not keep line numbers.
+    @return: generator of lines in file order
+    '''
+    if numbered and mmsi is not None:
+        raise ValueError('line numbers are only available for time queries')
+    if index is None:
+        index = openIndex(logName)
+    f = open(logName, 'rb')
+    try:
+        if mmsi is not None:
+            for offset in index.mmsiOffsets(mmsi):
+                f.seek(int(offset))
+                line = f.readline()
+                if start is not None or end is not None:
+                    t = lineTime(line)
+                    if t is None: continue
+                    if start is not None and t < start: continue
+                    if end is not None and t > end: continue
+                yield line
+            return
+
+        for rangeStart, rangeEnd, lineNum in index.timeRanges(start, end):
+            f.seek(rangeStart)
+            pos = rangeStart
+            lineNum -= 1
+            while pos < rangeEnd:
+                line = f.readline()
+                if not line:
+                    break
+                pos += len(line)
+                lineNum += 1
+                if start is not None or end is not None:
+                    t = lineTime(line)
+                    if t is None: continue
+                    if start is not None and t < start: continue
+                    if end is not None and t > end: continue
+                if numbered:
+                    yield lineNum, line
+                else:
+                    yield line
+    finally:
+        f.close()
+
+
+def addQueryOptions(parser):
+    '''
+    Add the --mmsi, --start and --end options shared by the scripts that query logs
+    '''
+    parser.add_option('--mmsi',dest='mmsi',default=None,type='int',
+                      help='Only lines for this MMSI.  Uses the log index sidecar files.')
+    parser.add_option('--start',dest='start',default=None,type='float',
+                      help='Earliest cg_sec (UNIX UTC seconds).  Uses the log index sidecar files.')
+    parser.add_option('--end',dest='end',default=None,type='float',
+                      help='Latest cg_sec (UNIX UTC seconds).  Uses the log index sidecar files.')
+
+
+def queryFiles(filenames, options):
+    '''
+    Chain the query results of several logs using the options from addQueryOptions
+    @return: generator of lines
+    '''
+    for filename in filenames:
+        for line in query(filename, options.mmsi, options.start, options.end):
+            yield line
+
+
+if __name__=='__main__':
+    from optparse import OptionParser
+    import doctestmain
+    parser = OptionParser(usage="%prog [options] file1.ais [file2.ais ...]")
+    parser.add_option('-b','--build',dest='build',default=False,action='store_true',
+                      help='(Re)build the index of each log')
+    parser.add_option('--block-lines',dest='blockLines',default=1024,type='int',
+                      help='Lines per time block when building [default: %default]')
+    addQueryOptions(parser)
+    doctestmain.addOptions(parser)
+    (options,args) = parser.parse_args()
+
+    success = doctestmain.runDocTests(options)
+
+    if options.build:
+        for filename in args:
+            index = LogIndex.build(filename, options.blockLines)
+            print filename, 'blocks:', len(index.blockMinTimes), 'mmsis:', len(index.mmsiValues)
+    elif options.mmsi is not None or options.start is not None or options.end is not None:
+        for line in queryFiles(args, options):
+            sys.stdout.write(line)
+
+    if not success:
+        sys.exit('Something Failed')
@@ -21,111 +21,271 @@ Rewrite from the command line only ais_normalize
 @license: Apache 2.0
 @since: 2008-Jan-30
 @see: U{Queue<http://www.python.org/doc/current/lib/QueueObjects.html>}
+
+The fragments are joined by a L{Reassembler}, which is shared with the
+ais_normalize command line program.  Each fragment costs one dict lookup
+and pending messages are thrown away once they are older than the ttl
+by the clock of their station or when there are too many of them.
 '''
 
+import heapq
 import sys
 import Queue
 import uscg
-import ais.nmea
-#from decimal import Decimal
-#from BitVector import BitVector
-#import StringIO
+import nmea
+
+
+class Reassembler(object):
+    '''
+    Collect the sentences of multi-sentence messages until they are complete.
+
+    Fragments are stored by a caller supplied key, usually
+    (station, sequence id, channel).  Each key belongs to a stream,
+    usually the receive station, and pending messages only age out
+    against the newest time from their own stream so that a station
+    with a slow clock does not lose its messages.  A heap per stream
+    ordered by the time of the first fragment lets stale messages be
+    dropped without scanning everything that is pending.
+
+      >>> r = Reassembler(ttl=30)
+      >>> r.add(('r1','3','A'), 1, 2, 'part1', 100, 'r1')
+      >>> r.add(('r1','3','A'), 2, 2, 'part2', 101, 'r1')
+      ['part1', 'part2']
+      >>> r.add(('r1','4','A'), 1, 2, 'lost', 102, 'r1')
+      >>> r.add(('r2','4','A'), 1, 2, 'slow1', 150, 'r2')
+      >>> r.add(('r1','5','A'), 1, 1, 'later', 200, 'r1')
+      ['later']
+      >>> r.add(('r2','4','A'), 2, 2, 'slow2', 151, 'r2')
+      ['slow1', 'slow2']
+      >>> sorted(r.stats().items())
+      [('assembled', 3), ('dangling', 0), ('expired', 1), ('overflow', 0), ('pending', 0), ('replaced', 0)]
+    '''
+
+    def __init__(self, ttl=30, maxPending=10000):
+        '''
+        @param ttl: seconds after the first fragment that a message may take to finish
+        @param maxPending: most unfinished messages to hold at once
+        '''
+        self.ttl = ttl
+        self.maxPending = maxPending
+        self.pending = {} # key -> [serial, startSec, totalSentences, count, parts, stream]
+        self.streams = {} # stream -> [newest time, heap of (startSec, serial, key)]
+        self.serial = 0
+        self.mostRecentTime = 0
+        self.assembled = 0
+        self.expired = 0   # ran out of time before the last sentence
+        self.overflow = 0  # pushed out by maxPending
+        self.replaced = 0  # a new first sentence arrived before this one finished
+        self.dangling = 0  # a later sentence without a matching first sentence
+
+    def __len__(self):
+        return len(self.pending)
+
+    def stats(self):
+        '''
+        @return: counts of assembled and dropped messages plus the number pending
+        @rtype: dict
+        '''
+        return {'assembled': self.assembled, 'expired': self.expired,
+                'overflow': self.overflow, 'replaced': self.replaced,
+                'dangling': self.dangling, 'pending': len(self.pending)}
+
+    def add(self, key, sentenceNum, totalSentences, part, timeSec=None, stream=None):
+        '''
+        Add one fragment.
+
+        A first sentence always starts a new message for the key.  A later
+        sentence without a first sentence is counted as dangling and dropped.
+
+        @param key: hashable that identifies the message
+        @param sentenceNum: 1 based sentence number
+        @param totalSentences: number of sentences in the message
+        @param part: what to hand back for this sentence once the message is complete
+        @param timeSec: receive time used for the ttl.  None skips expiry.
+        @param stream: clock that timeSec comes from, such as the receive
+        station.  None puts everything on one clock.
+        @return: list of the parts in sentence order when the message is
+        complete, otherwise None
+        '''
+        streamState = self.streams.get(stream)
+        if streamState is None:
+            streamState = self.streams[stream] = [None, []]
+        if timeSec is not None:
+            if self.mostRecentTime < timeSec:
+                self.mostRecentTime = timeSec
+            if streamState[0] is None or streamState[0] < timeSec:
+                streamState[0] = timeSec
+                self.expireStream(streamState, timeSec)
+        pending = self.pending
+        if 1 == sentenceNum:
+            if key in pending:
+                self.replaced += 1
+            if 1 == totalSentences:
+                pending.pop(key, None)
+                self.assembled += 1
+                return [part]
+            parts = [None] * totalSentences
+            parts[0] = part
+            self.serial += 1
+            if timeSec is None:
+                timeSec = streamState[0]
+                if timeSec is None:
+                    timeSec = self.mostRecentTime
+            pending[key] = [self.serial, timeSec, totalSentences, 1, parts, stream]
+            heapq.heappush(streamState[1], (timeSec, self.serial, key))
+            if len(pending) > self.maxPending:
+                self.dropOldest()
+            return None
+
+        entry = pending.get(key)
+        if entry is None or entry[2] != totalSentences or sentenceNum > totalSentences:
+            self.dangling += 1
+            return None
+        parts = entry[4]
+        if parts[sentenceNum-1] is None:
+            entry[3] += 1
+        parts[sentenceNum-1] = part
+        if entry[3] < totalSentences:
+            return None
+        del pending[key]
+        self.assembled += 1
+        return parts
+
+    def isLive(self, item):
+        '''True if the heap item still refers to a pending message'''
+        entry = self.pending.get(item[2])
+        return entry is not None and entry[0] == item[1]
+
+    def dropOldest(self):
+        '''Drop the pending message that is oldest by the clock of its own stream'''
+        oldest = None
+        for streamState in self.streams.itervalues():
+            heap = streamState[1]
+            while heap and not self.isLive(heap[0]):
+                heapq.heappop(heap)
+            if heap:
+                age = (streamState[0] or 0) - heap[0][0]
+                if oldest is None or age > oldest[0]:
+                    oldest = (age, streamState)
+        if oldest is not None:
+            item = heapq.heappop(oldest[1][1])
+            del self.pending[item[2]]
+            self.overflow += 1
+
+    def expireStream(self, streamState, now):
+        '''@return: number of messages of one stream dropped'''
+        threshold = now - self.ttl
+        heap = streamState[1]
+        dropped = 0
+        while heap and heap[0][0] < threshold:
+            item = heapq.heappop(heap)
+            if self.isLive(item):
+                del self.pending[item[2]]
+                dropped += 1
+        self.expired += dropped
+        # Stale entries from finished messages are only popped once they
+        # age out, so rebuild when they dominate the heap.
+        if len(heap) > 64 and len(heap) > 2 * len(self.pending):
+            streamState[1] = [item for item in heap if self.isLive(item)]
+            heapq.heapify(streamState[1])
+        return dropped
 
+    def expire(self, now=None):
+        '''
+        Drop messages whose first fragment is older than the ttl.
+
+        @param now: current time for every stream.  Defaults to the newest
+        time seen in each stream.
+        @return: number of messages dropped
+        '''
+        dropped = 0
+        for streamState in self.streams.values():
+            streamNow = now
+            if streamNow is None:
+                streamNow = streamState[0]
+            if streamNow is not None:
+                dropped += self.expireStream(streamState, streamNow)
+        return dropped
 
-#from ais.nmea import isChecksumValid,checksumStr # Needed for checksums
-#import ais.nmea
 
 class Normalize(Queue.Queue):
     '''
     Provide a channel that normalizes messages.  Try to model it like a Queue.
     '''
-    def __init__(self,maxsize=0,ttl=30,verbose=False):
+    def __init__(self,maxsize=0,ttl=30,verbose=False,maxPending=10000):
         '''
         param ttl: number of seconds that a message fragment can live
+        param maxPending: most partial messages to buffer
         '''
         Queue.Queue.__init__(self,maxsize)
-        self.mostRecentTime=0 # Seconds from UTC epoch
         self.ttl=ttl
-        self.stations={}  # Buffer by station
+        self.reassembler = Reassembler(ttl, maxPending)
         self.v=verbose
 
+    @property
+    def mostRecentTime(self):
+        'Seconds from UTC epoch'
+        return self.reassembler.mostRecentTime
+
     def cull(self):
         '''
         Drop messages older than the ttl
         '''
-        pass
+        return self.reassembler.expire()
 
-    def put(self,uscgNmeaStr,block=True,timeout=None):
+    def stats(self):
+        '@return: reassembly counts from the L{Reassembler}'
+        return self.reassembler.stats()
 
-        cgMsg = uscg.UscgNmea(uscgNmeaStr)
-        if self.mostRecentTime<cgMsg.cg_sec:
-            self.mostRecentTime = cgMsg.cg_sec
+    def put(self,uscgNmeaStr,block=True,timeout=None):
 
+        cgMsg = uscg.parse(uscgNmeaStr)
 
         # single line message needs no help
         if 1 == cgMsg.totalSentences:
             Queue.Queue.put(self,uscgNmeaStr,block,timeout)
             return
 
-        if cgMsg.sentenceNum!=cgMsg.totalSentences:
-            station = cgMsg.station
-            if station not in self.stations:
-                self.stations[station] = [cgMsg,]
-            else:
-                #print 'self.stations[station]',station,type(self.stations[station])
-                self.stations[station].append(cgMsg)
-            self.cull()  # Clean house so the buffers do not get too large
+        key = (cgMsg.station, cgMsg.sequentialMsgId, cgMsg.aisChannel)
+        parts = self.reassembler.add(key, cgMsg.sentenceNum, cgMsg.totalSentences,
+                                     cgMsg, cgMsg.cg_sec, cgMsg.station)
+        if parts is None:
             return
 
-        # We have a final sentence, so construct the whole deal
-
-        # Only can happen the first time we see a station and have not seen the first sentence
-        if cgMsg.station not in self.stations:
-            sys.stderr.write('dropping dangling fragment\n')
-            return
-
-        cgMsgFinal = cgMsg
-        stationList = self.stations[cgMsgFinal.station]
-
-        parts=[]
-        payloads=[]
-
-        del cgMsg
-
-        for msg in stationList:
-            if (msg.aisChannel == cgMsgFinal.aisChannel
-                and msg.sequentialMsgId == cgMsgFinal.sequentialMsgId
-                ):
-                if msg.sentenceNum==1:
-                    cgMsgFinal.cg_sec=msg.cg_sec # Save the first timestamp
-                parts.append(msg)
-                payloads.append(msg.contents)#.getBitVector)
-                assert(msg.fillbits==0)
-
-        #print 'num parts',len(parts)
-
-        #print 'before',len(stationList)
-        for cgMsg in parts:
-            stationList.remove(cgMsg)
-        #print 'after',len(stationList)
-
-        if len(parts)!=cgMsgFinal.totalSentences-1:
-            if self.v: sys.stderr.write('partial message.  Discarding\n')
-            return
-
-        payloads.append(cgMsgFinal.contents)
-        #print 'payloads:', payloads
-
-        # The fill bits will not change
-        #bv = payloads[0]
-        payload = ''.join(payloads)
-        #print payload
-        #parts.append(cgMsgFinal.getBitVector)
+        # We have all the sentences, so construct the whole deal
+        cgMsgFinal = parts[-1]
+        cgMsgFinal.cg_sec = parts[0].cg_sec # Save the first timestamp
+        payload = ''.join([msg.contents for msg in parts])
 
         cgMsgFinal.totalSentences=1
         cgMsgFinal.sentenceNum=1
         cgMsgFinal.contents = payload
-        cgMsgFinal.checksumStr = ais.nmea.checksumStr(payload)
+        cgMsgFinal.checksumStr = nmea.checksumStr(payload)
         newNmeaStr = cgMsgFinal.buildNmea()
-        #print 'queuing',newNmeaStr
         Queue.Queue.put(self,newNmeaStr,block,timeout)
+
+
+if __name__ == '__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options]")
+    parser.add_option('--test','--doc-test',dest='doctest',default=False,action='store_true',
+                      help='run the documentation tests')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+    (options,args) = parser.parse_args()
+
+    success=True
+
+    if options.doctest:
+        import os; print os.path.basename(sys.argv[0]), 'doctests ...',
+        sys.argv= [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        import doctest
+        numfail,numtests=doctest.testmod()
+        if numfail==0: print 'ok'
+        else:
+            print 'FAILED'
+            success=False
+
+    if not success:
+        sys.exit('Something Failed')
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Chain of filter stages for a stream of NMEA data with counts and timing
+for each stage.
+
+Stages work on lists of items so that the cost of a call is spread over
+everything that came in with one read.  Lines that have been split into
+fields stay split into fields until the Join stage at the end, so no
+stage parses a line that an earlier stage already threw away and
+nothing builds a full UscgNmea.  The output of the last stage collects
+in a bounded queue.  The caller stops reading its input when full() is
+true, which pushes back on the data source instead of growing a buffer.
+
+  >>> chunk = '\\n'.join([
+  ...   '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433',
+  ...   '!AIVDM,1,1,,A,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0D,r003669947,1165850434',
+  ...   '!AIVDM,2,1,4,B,53:JiN02>=7T?@Pc:20hmb0p4I<Td6222222221@I0L?A5p10G0QCR@j,0*56,r003669945,1165850435',
+  ...   '!AIVDM,2,2,4,B,88888888880,2*25,r003669945,1165850435',
+  ...   '# comment', '!AIVDM,1,1,,B,15Mw'])
+  >>> p = Pipeline([Lines(), Fields(), StationFilter(['r003669945']), Reassemble(), Dedup(), Join()])
+  >>> p.push([chunk])
+  2
+  >>> [line[:20] for line in p.take()]
+  ['!AIVDM,1,1,,B,15Mw1U', '!AIVDM,1,1,4,B,53:Ji']
+  >>> [(name, s['in'], s['out'], s['dropped'], s['depth']) for name, s in p.stats()[:3]]
+  [('Lines', 1, 5, 0, 1), ('Fields', 5, 4, 1, 0), ('StationFilter', 4, 3, 1, 0)]
+
+@since: 2026-Oct-16
+@see: U{ais-port-forward<../../scripts/ais-port-forward>}
+'''
+
+import collections
+import sys
+import time
+
+import dedup
+import nmea
+import normalize
+import spatialfilter
+import uscg
+
+
+class Stage(object):
+    '''
+    One step of a Pipeline.  Subclasses override process and count what
+    they throw away in self.dropped.  Calling the stage does the
+    counting and timing.
+    '''
+
+    def __init__(self):
+        self.name = self.__class__.__name__
+        self.received = 0
+        self.passed = 0
+        self.dropped = 0
+        self.batches = 0
+        self.seconds = 0.
+        self.maxSeconds = 0.
+
+    def __call__(self, items):
+        start = time.time()
+        result = self.process(items)
+        elapsed = time.time() - start
+        self.received += len(items)
+        self.passed += len(result)
+        self.batches += 1
+        self.seconds += elapsed
+        if elapsed > self.maxSeconds:
+            self.maxSeconds = elapsed
+        return result
+
+    def process(self, items):
+        '@return: list of the items for the next stage'
+        return items
+
+    def depth(self):
+        '@return: number of items held inside the stage'
+        return 0
+
+    def stats(self):
+        '''
+        @return: in, out, dropped and depth counts plus the total and
+        worst seconds for one batch
+        @rtype: dict
+        '''
+        return {'in': self.received, 'out': self.passed, 'dropped': self.dropped,
+                'depth': self.depth(), 'batches': self.batches,
+                'seconds': self.seconds, 'maxSeconds': self.maxSeconds}
+
+
+class Lines(Stage):
+    '''
+    Raw reads to lines.  A partial line at the end of a read is held for
+    the next one.
+    '''
+
+    def __init__(self, maxPartial=100000):
+        '''
+        @param maxPartial: longest partial line to hold before it is
+        thrown away for lack of a line ending
+        '''
+        Stage.__init__(self)
+        self.maxPartial = maxPartial
+        self.partial = ''
+
+    def process(self, chunks):
+        data = self.partial + ''.join(chunks)
+        lines = data.split('\n')
+        self.partial = lines.pop()
+        if len(self.partial) > self.maxPartial:
+            self.partial = ''
+            self.dropped += 1
+        return lines
+
+    def depth(self):
+        return len(self.partial) and 1
+
+
+class Fields(Stage):
+    '''
+    Lines to lists of fields.  Keeps USCG style lines of the given
+    sentence types that have at least the checksum and a time field.
+    '''
+
+    def __init__(self, sentences=('AIVDM',)):
+        Stage.__init__(self)
+        self.sentences = frozenset(sentences)
+
+    def process(self, lines):
+        sentences = self.sentences
+        result = []
+        for line in lines:
+            if line[1:6] in sentences:
+                fields = line.rstrip().split(',')
+                if len(fields) >= 8:
+                    result.append(fields)
+                    continue
+            self.dropped += 1
+        return result
+
+
+station = uscg.stationField
+
+
+class StationFilter(Stage):
+    'Keep the lines from a set of receive stations'
+
+    def __init__(self, stations):
+        Stage.__init__(self)
+        self.stations = frozenset(stations)
+
+    def process(self, items):
+        stations = self.stations
+        result = [fields for fields in items if station(fields) in stations]
+        self.dropped += len(items) - len(result)
+        return result
+
+
+class BoxFilter(Stage):
+    '''
+    Drop position reports outside of a longitude/latitude box.  The
+    position comes straight from the armored payload of the first
+    sentence.  Other messages pass through.
+    '''
+
+    def __init__(self, west, east, south, north, msgTypes='123'):
+        Stage.__init__(self)
+        self.box = spatialfilter.BoxFilter(west, east, south, north)
+        self.msgTypes = frozenset(msgTypes)
+
+    def process(self, items):
+        contains = self.box.contains
+        msgTypes = self.msgTypes
+        result = []
+        for fields in items:
+            payload = fields[5]
+            if '1' == fields[2] and payload[:1] in msgTypes:
+                pos = spatialfilter.payloadLonLat(payload)
+                if pos is None or not contains(pos[0], pos[1]):
+                    self.dropped += 1
+                    continue
+            result.append(fields)
+        return result
+
+
+class Reassemble(Stage):
+    '''
+    Join multi-sentence messages into one line with a L{normalize.Reassembler}.
+    The result has the time of the first sentence and the other fields of
+    the last one.
+    '''
+
+    def __init__(self, ttl=30, maxPending=10000):
+        Stage.__init__(self)
+        self.reassembler = normalize.Reassembler(ttl, maxPending)
+
+    def process(self, items):
+        add = self.reassembler.add
+        result = []
+        for fields in items:
+            if '1' == fields[1]:
+                result.append(fields)
+                continue
+            try:
+                total = int(fields[1])
+                num = int(fields[2])
+                timeSec = float(fields[-1])
+            except ValueError:
+                self.dropped += 1
+                continue
+            stationName = station(fields)
+            parts = add((stationName, fields[3], fields[4]), num, total, fields, timeSec, stationName)
+            if parts is None:
+                continue
+            joined = list(parts[-1])
+            joined[1] = joined[2] = '1'
+            joined[5] = ''.join([part[5] for part in parts])
+            fill = joined[6].split('*')[0]
+            joined[6] = fill + '*' + nmea.checksumStr(','.join(joined[0:6] + [fill]))
+            joined[-1] = parts[0][-1]
+            result.append(joined)
+        return result
+
+    def depth(self):
+        return len(self.reassembler)
+
+    def stats(self):
+        s = Stage.stats(self)
+        s.update(self.reassembler.stats())
+        return s
+
+
+class Dedup(Stage):
+    'Drop payloads already heard by another station with L{dedup.Duplicates}'
+
+    def __init__(self, maxCount=10000, maxAgeSec=60):
+        Stage.__init__(self)
+        self.duplicates = dedup.Duplicates(maxCount, maxAgeSec)
+
+    def process(self, items):
+        check = self.duplicates.check
+        result = []
+        for fields in items:
+            try:
+                timeSec = float(fields[-1])
+            except ValueError:
+                timeSec = None
+            if check(fields[5], timeSec, station(fields))[1]:
+                self.dropped += 1
+                continue
+            result.append(fields)
+        return result
+
+    def depth(self):
+        return len(self.duplicates)
+
+
+class Join(Stage):
+    'Lists of fields back to lines with a newline'
+
+    def process(self, items):
+        return [','.join(fields) + '\n' for fields in items]
+
+
+class Pipeline(object):
+    '''
+    Run batches through a list of stages into a bounded output queue.
+    '''
+
+    def __init__(self, stages, maxOutput=1000):
+        '''
+        @param maxOutput: output queue length at which full() is True.
+        The queue can go over by one batch.
+        '''
+        self.stages = stages
+        self.maxOutput = maxOutput
+        self.output = collections.deque()
+
+    def push(self, items):
+        '''
+        @param items: list for the first stage
+        @return: number of items added to the output queue
+        '''
+        for stage in self.stages:
+            if not items:
+                return 0
+            items = stage(items)
+        self.output.extend(items)
+        return len(items)
+
+    def full(self):
+        'True when the caller should stop giving the pipeline more'
+        return len(self.output) >= self.maxOutput
+
+    def take(self, count=None):
+        '''
+        Remove items from the front of the output queue
+        @param count: most items to take.  None for all.
+        @rtype: list
+        '''
+        output = self.output
+        if count is None or count >= len(output):
+            items = list(output)
+            output.clear()
+            return items
+        return [output.popleft() for i in xrange(count)]
+
+    def putBack(self, items):
+        'Return items to the front of the output queue (e.g. after a failed send)'
+        self.output.extendleft(reversed(items))
+
+    def run(self, chunks, batchSize=1):
+        '''
+        Pull everything through the pipeline.  For files rather than sockets.
+
+        @param chunks: iterable of the input for the first stage
+        @return: generator of output items
+        '''
+        batch = []
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= batchSize:
+                self.push(batch)
+                batch = []
+                while self.output:
+                    yield self.output.popleft()
+        if batch:
+            self.push(batch)
+        while self.output:
+            yield self.output.popleft()
+
+    def stats(self):
+        '''
+        @return: (name, stats) for each stage and then for the output queue
+        @rtype: list
+        '''
+        result = [(stage.name, stage.stats()) for stage in self.stages]
+        result.append(('output', {'depth': len(self.output), 'max': self.maxOutput}))
+        return result
+
+    def report(self):
+        '@return: one line per stage for a log'
+        lines = []
+        for stage in self.stages:
+            s = stage.stats()
+            meanUs = s['in'] and 1e6 * s['seconds'] / s['in']
+            lines.append('%-14s in %d out %d dropped %d depth %d mean %.1f us/item max %.1f ms/batch'
+                         % (stage.name, s['in'], s['out'], s['dropped'], s['depth'],
+                            meanUs, 1e3 * s['maxSeconds']))
+        lines.append('%-14s depth %d of %d' % ('output', len(self.output), self.maxOutput))
+        return '\n'.join(lines)
+
+
+if __name__=='__main__':
+    from optparse import OptionParser
+    import doctestmain
+    parser = OptionParser(usage="%prog [options] [file1.ais ...]")
+    parser.add_option('--benchmark',dest='benchmark',default=False,action='store_true',
+                      help='Time the forwarding stages on the files')
+    doctestmain.addOptions(parser)
+    (options,args) = parser.parse_args()
+
+    success = doctestmain.runDocTests(options)
+
+    if options.benchmark:
+        for filename in args:
+            data = open(filename).read()
+            chunks = [data[i:i+10000] for i in xrange(0, len(data), 10000)]
+            p = Pipeline([Lines(), Fields(), BoxFilter(-73, -69, 42.7, 47), Reassemble(), Join()])
+            start = time.time()
+            count = len(list(p.run(chunks)))
+            elapsed = time.time() - start
+            print '%s: %d lines out in %.2f sec' % (filename, count, elapsed)
+            print p.report()
+
+    if not success:
+        sys.exit('Something Failed')
@@ -16,6 +16,8 @@ Tools to support writing python server programs.  Pulled from serial-logger.
 
 import datetime
 import os
+import Queue
+import threading
 import time
 import sys
 
@@ -77,40 +79,259 @@ def create_daemon():
 
     return
 
+secondsPerDay = 24 * 60 * 60
+
+def nextMidnight(t):
+    """
+    UTC midnight after a time.  POSIX time has no leap seconds, so days
+    line up with multiples of 86400.
+
+    >>> nextMidnight(1165850433)
+    1165881600
+    >>> time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(nextMidnight(1165881600)))
+    '2006-12-13 00:00:00'
+    """
+    return (int(t) // secondsPerDay + 1) * secondsPerDay
+
+
+def compressFile(filename, method='gzip', remove=True, blockSize=1024*1024):
+    """
+    Compress a file that is no longer being written.  An existing .gz
+    gets another gzip member added to the end, which gunzip reads as one
+    file.  An existing .bz2 is an error.
+
+    @param method: 'gzip' or 'bz2'
+    @param remove: delete the uncompressed file when done
+    @return: name of the compressed file
+    """
+    if 'gzip' == method:
+        import gzip
+        outName = filename + '.gz'
+        out = gzip.open(outName, 'ab', 6)
+    elif 'bz2' == method:
+        import bz2
+        outName = filename + '.bz2'
+        if os.path.exists(outName):
+            raise IOError('%s already exists' % outName)
+        out = bz2.BZ2File(outName, 'w')
+    else:
+        raise ValueError('unknown compression: %s' % method)
+    infile = open(filename, 'rb')
+    while True:
+        block = infile.read(blockSize)
+        if not block:
+            break
+        out.write(block)
+    out.close()
+    infile.close()
+    if remove:
+        os.remove(filename)
+    return outName
+
+
+class Compressor(object):
+    """
+    Compress closed log files in a background thread so that the thread
+    doing the logging never waits on it.
+    """
+    def __init__(self, method='gzip', verbose=False):
+        self.method = method
+        self.v = verbose
+        self.queue = Queue.Queue()
+        self.thread = threading.Thread(target=self.run)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def add(self, filename):
+        'Queue a closed file to compress'
+        self.queue.put(filename)
+
+    def run(self):
+        while True:
+            filename = self.queue.get()
+            if filename is None:
+                return
+            try:
+                outName = compressFile(filename, self.method)
+                if self.v: print 'compressed', outName
+            except (IOError, OSError), e:
+                sys.stderr.write('unable to compress %s: %s\n' % (filename, str(e)))
+
+    def close(self):
+        'Finish the files that are queued and stop the thread'
+        self.queue.put(None)
+        self.thread.join()
+
+
+class RotatingLogWriter(object):
+    """
+    Log file that rotates at UTC midnight and coalesces writes.
+
+    The time of the next rotation is worked out once when a file is
+    opened, so each write only compares against it.  Writes collect in a
+    list and go to the file as one string when flushBytes have built up
+    or when flushSec have passed since the last flush.  Call tick() from
+    idle loops so that data does not sit in the buffer longer than
+    flushSec when nothing else is written.
+
+      >>> import tempfile, shutil
+      >>> d = tempfile.mkdtemp()
+      >>> log = RotatingLogWriter(os.path.join(d, 'log-'), '.ais', header=lambda: '# START\\n', flushSec=60)
+      >>> log.write('!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E\\n', now=1165850433)
+      >>> os.path.basename(log.filename), log.pending
+      ('log-2006-12-11.ais', 56)
+      >>> log.write('!AIVDM,1,1,,A,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0D\\n', now=1165881601)
+      >>> sorted(os.listdir(d))
+      ['log-2006-12-11.ais', 'log-2006-12-12.ais']
+      >>> log.close()
+      >>> open(os.path.join(d, 'log-2006-12-12.ais')).read()[:9]
+      '# START\\n!'
+      >>> shutil.rmtree(d)
+    """
+    def __init__(self, prefix, suffix='', rotate=True, header=None, footer=None,
+                 flushBytes=64*1024, flushSec=1.0, compress=None, verbose=False):
+        """
+        @param prefix: start of the file name.  The whole name when not rotating.
+        @param suffix: end of the file name after the date
+        @param rotate: start a new file each UTC day
+        @param header: function that returns a string to start each file
+        @param footer: function that returns a string to end each file
+        @param flushBytes: write to the file once this much is buffered
+        @param flushSec: most seconds that data waits in the buffer
+        @param compress: None, 'gzip' or 'bz2' to compress each file once
+        it is rotated out.  The file open at close is left alone since
+        it will be appended to if logging starts again that day.
+        """
+        self.prefix = prefix
+        self.suffix = suffix
+        self.rotate = rotate
+        self.header = header
+        self.footer = footer
+        self.flushBytes = flushBytes
+        self.flushSec = flushSec
+        self.v = verbose
+        self.compressor = None
+        if compress is not None:
+            self.compressor = Compressor(compress, verbose)
+        self.buf = []
+        self.pending = 0
+        self.file = None
+        self.filename = None
+        self.rotateAt = None
+        self.flushAt = None
+        self.linesWritten = 0
+        self.flushes = 0
+
+    def getFileName(self, now):
+        if not self.rotate:
+            return self.prefix + self.suffix
+        return self.prefix + time.strftime('%Y-%m-%d', time.gmtime(now)) + self.suffix
+
+    def open(self, now=None):
+        '''Open the log file for now.  Close old one if it exists'''
+        if now is None:
+            now = time.time()
+        self.closeFile()
+        self.filename = self.getFileName(now)
+        if self.v: print 'opening log file: %s' % self.filename
+        self.file = open(self.filename, 'a')
+        if self.rotate:
+            self.rotateAt = nextMidnight(now)
+        else:
+            self.rotateAt = float('inf')
+        self.flushAt = now + self.flushSec
+        if self.header is not None:
+            self.buf.append(self.header())
+            self.pending += len(self.buf[-1])
+
+    def closeFile(self, compress=True):
+        if self.file is None:
+            return
+        if self.footer is not None:
+            self.buf.append(self.footer())
+        self.flush()
+        self.file.close()
+        self.file = None
+        if compress and self.compressor is not None and self.rotate:
+            self.compressor.add(self.filename)
+
+    def write(self, data, now=None):
+        '''
+        Add to the log.  Pass now if the caller already has the time.
+        '''
+        if now is None:
+            now = time.time()
+        if self.file is None or now >= self.rotateAt:
+            if self.v and self.file is not None: print 'rotate log file'
+            self.open(now)
+        self.buf.append(data)
+        self.pending += len(data)
+        if self.pending >= self.flushBytes or now >= self.flushAt:
+            self.flush(now)
+
+    def tick(self, now=None):
+        'Rotate and flush on time when there is nothing to write'
+        if now is None:
+            now = time.time()
+        if self.file is not None and now >= self.rotateAt:
+            self.open(now)
+        if self.buf and now >= self.flushAt:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if self.buf and self.file is not None:
+            self.file.write(''.join(self.buf))
+            self.file.flush()
+            self.flushes += 1
+        self.buf = []
+        self.pending = 0
+        if now is None:
+            now = time.time()
+        self.flushAt = now + self.flushSec
+
+    def close(self):
+        'Close the file and wait for any compression to finish'
+        self.closeFile(compress=False)
+        if self.compressor is not None:
+            self.compressor.close()
+            self.compressor = None
+
+
 # Did I want to subclass file?
 class LogFileWithRotate():
+    """
+    Line at a time log with the station and time added in USCG format.
+    Uses a L{RotatingLogWriter}, so writes are buffered for up to a second.
+    """
     def __init__(self,prefix='log-', station='runknown', uscg_format=True,verbose=False):
         self.v = verbose
         self.prefix=prefix
-        self.log_filename=None
-        self.log_file=None
         self.station=station
         self.uscg_format=uscg_format
+        self.writer = RotatingLogWriter(prefix, header=self.header, footer=self.tail, verbose=verbose)
         self.open()
 
+    @property
+    def log_filename(self):
+        return self.writer.filename
+
+    @property
+    def log_file(self):
+        return self.writer.file
+
+    def header(self):
+        return '# START LOGGING\n'
+
+    def tail(self):
+        return '# STOP LOGGING\n'
+
     def open(self):
         '''Open a log file.  Close old one if it exists'''
-        if self.log_file is not None:
-            if self.v: print 'closing logfile'
-            self.write_tail()
-            self.log_file.close()
-        now = self.current_date = datetime.datetime.utcnow()
-        self.log_filename = self.prefix+now.strftime('%Y-%m-%d')
-        if self.v: print 'opening log file: %s' % self.log_filename
-        self.log_file = file(self.log_filename,'a')
-        self.write_header()
-
-    def write_header(self):
-        self.write('# START LOGGING',rotate=False)
-
-    def write_tail(self):
-        self.write('# STOP LOGGING',rotate=False)
+        self.writer.open()
 
     def needs_rotate(self):
         'Check if the log needs to be rotated'
-        old = self.current_date
-        now = datetime.datetime.utcnow()
-        return old.strftime('%j') != now.strftime('%j')
+        return time.time() >= self.writer.rotateAt
 
     def rotate(self,force=False):
         if not force and not self.needs_rotate():
@@ -119,14 +340,11 @@ class LogFileWithRotate():
         self.open()
 
     def write(self,data,verbose=False,rotate=True):
-        if rotate:
-            self.rotate()
-        log_str=''
-
+        now = time.time()
         if self.uscg_format:
             log_str = data
             if data[-1] in ('\n','\r'): log_str = data[:-1]
-            log_str += ',%s,%s\n' % ( self.station, time.time() )
+            log_str += ',%s,%s\n' % ( self.station, now )
         else:
             log_str=data
             if data!='\n': log_str+='\n'
@@ -134,9 +352,75 @@ class LogFileWithRotate():
         if verbose:
             print log_str,
 
-        self.log_file.write(log_str)
+        if rotate:
+            self.writer.write(log_str, now)
+        else:
+            self.writer.buf.append(log_str)
+
+    def close(self):
+        self.writer.close()
 
     def __del__(self):
         print 'shutting down'
-        self.write_tail()
-        self.log_file.close()
+        self.writer.close()
+
+
+def benchmark(lines, directory, out=sys.stdout):
+    """
+    Lines/sec for LogFileWithRotate and for RotatingLogWriter with the
+    station and time already on the lines.
+    """
+    log = LogFileWithRotate(os.path.join(directory, 'bench-uscg-'), 'r003669945')
+    start = time.time()
+    for line in lines:
+        log.write(line)
+    log.close()
+    elapsed = time.time() - start
+    out.write('LogFileWithRotate: %d lines %.2f sec %.0f lines/sec\n' % (len(lines), elapsed, len(lines) / elapsed))
+
+    log = RotatingLogWriter(os.path.join(directory, 'bench-raw-'))
+    tagged = [line + ',r003669945,1165850433\n' for line in lines]
+    start = time.time()
+    for line in tagged:
+        log.write(line)
+    log.close()
+    elapsed = time.time() - start
+    out.write('RotatingLogWriter: %d lines %.2f sec %.0f lines/sec\n' % (len(lines), elapsed, len(lines) / elapsed))
+
+
+if __name__ == '__main__':
+    from optparse import OptionParser
+    parser = OptionParser(usage="%prog [options] [file.ais]")
+    parser.add_option('--test','--doc-test',dest='doctest',default=False,action='store_true',
+                      help='run the documentation tests')
+    parser.add_option('--benchmark',dest='benchmark',default=False,action='store_true',
+                      help='Time writing the lines of file.ais to log files')
+    parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
+                      help='Make the test output verbose')
+    (options,args) = parser.parse_args()
+
+    success=True
+
+    if options.doctest:
+        print os.path.basename(sys.argv[0]), 'doctests ...',
+        sys.argv= [sys.argv[0]]
+        if options.verbose: sys.argv.append('-v')
+        import doctest
+        numfail,numtests=doctest.testmod()
+        if numfail==0: print 'ok'
+        else:
+            print 'FAILED'
+            success=False
+
+    if options.benchmark:
+        import shutil, tempfile
+        for filename in args:
+            lines = [line.rstrip() for line in open(filename) if line[0] != '#']
+            directory = tempfile.mkdtemp()
+            try:
+                benchmark(lines, directory)
+            finally:
+                shutil.rmtree(directory)
+
+    if not success:
+        sys.exit('Something Failed')
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Spatial prefilter for position reports that works on the armored payload.
+
+Only the 10 payload characters that hold the longitude and latitude are
+turned into an integer, two characters per table lookup.  The positions stay as
+integers in the 1/10000 minute (1/600000 degree) units that AIS sends,
+so the bounding box test is two integer compares against bounds that
+were converted once.  Points that pass the box go on to a crossing
+number point in polygon test over a table of edges that is also built
+once.  Nothing is done per line that does not need to be.
+
+  >>> line = '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433'
+  >>> payloadLonLat('15Mw1U?P00qNGTP@v`0@9wwn26sd')
+  (-54739824, 17803265)
+  >>> box = BoxFilter(-92, -91, 29, 30)
+  >>> len(list(filterLines([line, '# comment'], box)))
+  1
+  >>> poly = PolygonFilter(((-92, 29), (-91, 30), (-92, 30), (-92, 29)))
+  >>> poly.contains(*payloadLonLat('15Mw1U?P00qNGTP@v`0@9wwn26sd'))
+  False
+  >>> poly.contains(toUnits(-91.9), toUnits(29.8))
+  True
+
+@since: 2026-Oct-16
+@see: U{ais_position_in_polygon.py<../../scripts/ais_position_in_polygon.py>}
+'''
+
+import math
+import re
+
+import binary
+
+unitsPerDegree = 600000
+'''AIS positions are in 1/10000 of a minute'''
+
+positionFields = {
+    '1': (10, 31, 4), '2': (10, 31, 4), '3': (10, 31, 4),
+    'B': (9, 29, 2), 'C': (9, 29, 2),
+    }
+'''First payload character of the position reports to (first character
+to decode, longitude shift, latitude shift).  Ten characters hold the
+positions: bits 60-119 for class A and bits 54-113 for class B.'''
+
+sextetPairs = dict([(a + b, (binary.decodeInt[a] << 6) | binary.decodeInt[b])
+                    for a in binary.decodeInt for b in binary.decodeInt])
+'''Two armor characters to their 12 bits.  Half the lookups of a
+single character table.'''
+
+
+def toUnits(degrees):
+    '''
+    >>> toUnits(-70.5)
+    -42300000
+
+    @return: degrees as an integer number of 1/600000 degrees
+    '''
+    return int(round(degrees * unitsPerDegree))
+
+
+def payloadLonLat(payload):
+    '''
+    Longitude and latitude of a class A or B position report.
+
+    @param payload: armored payload (5th field of the NMEA string)
+    @return: (lon, lat) in 1/600000 degrees or None if this is not a
+    position report or the payload is too short or badly armored
+    '''
+    layout = positionFields.get(payload[:1])
+    if layout is None or len(payload) < 20:
+        return None
+    first, lonShift, latShift = layout
+    pairs = sextetPairs
+    try:
+        value = pairs[payload[first:first+2]]
+        value = (value << 12) | pairs[payload[first+2:first+4]]
+        value = (value << 12) | pairs[payload[first+4:first+6]]
+        value = (value << 12) | pairs[payload[first+6:first+8]]
+        value = (value << 12) | pairs[payload[first+8:first+10]]
+    except KeyError:
+        return None # Bad armor character
+    lon = (value >> lonShift) & 0xfffffff
+    lat = (value >> latShift) & 0x7ffffff
+    if lon & 0x8000000: lon -= 0x10000000
+    if lat & 0x4000000: lat -= 0x8000000
+    return lon, lat
+
+
+class BoxFilter(object):
+    '''
+    Longitude and latitude box.  Good luck at the +/-180 boundary!
+    '''
+
+    def __init__(self, west, east, south, north):
+        '''
+        Bounds are in degrees and are inclusive.
+        '''
+        assert west < east
+        assert south < north
+        # Round inward so that the integer compares match the float ones
+        self.minX = int(math.ceil(west * unitsPerDegree))
+        self.maxX = int(math.floor(east * unitsPerDegree))
+        self.minY = int(math.ceil(south * unitsPerDegree))
+        self.maxY = int(math.floor(north * unitsPerDegree))
+
+    def contains(self, x, y):
+        '''
+        @param x: longitude in 1/600000 degrees
+        @param y: latitude in 1/600000 degrees
+        '''
+        return self.minX <= x <= self.maxX and self.minY <= y <= self.maxY
+
+
+class PolygonFilter(BoxFilter):
+    '''
+    Single ring polygon with a bounding box and edge table.
+    '''
+
+    def __init__(self, points):
+        '''
+        @param points: sequence of (lon, lat) in degrees.  The ring may
+        or may not repeat the first point at the end.
+        '''
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        BoxFilter.__init__(self, min(xs), max(xs), min(ys), max(ys))
+        self.points = [(float(x) * unitsPerDegree, float(y) * unitsPerDegree) for x, y in points]
+
+        # (y0, y1, x0, dx/dy) of each edge that is not horizontal.
+        # Horizontal edges can never be crossed by the test ray.
+        edges = []
+        pts = self.points
+        for i in range(len(pts)):
+            x0, y0 = pts[i-1]
+            x1, y1 = pts[i]
+            if y0 == y1:
+                continue
+            edges.append((y0, y1, x0, (x1 - x0) / (y1 - y0)))
+        self.edges = edges
+
+    @classmethod
+    def fromWKT(cls, wkt):
+        '''
+        Outer ring of a WKT polygon.  Holes are not supported.
+
+        >>> PolygonFilter.fromWKT('POLYGON ((-1.0 50.5, -0.5 51.2, 0.3 50.9, -1 50.5))').contains(0, toUnits(51))
+        True
+
+        @rtype: PolygonFilter
+        '''
+        ring = re.search(r'\(\s*\(([^()]*)\)', wkt)
+        if ring is None:
+            raise ValueError('not a WKT polygon: ' + wkt)
+        points = [tuple([float(v) for v in pt.split()]) for pt in ring.group(1).split(',')]
+        return cls(points)
+
+    def contains(self, x, y):
+        '''
+        Crossing number test after the bounding box.
+
+        @param x: longitude in 1/600000 degrees
+        @param y: latitude in 1/600000 degrees
+        '''
+        if x < self.minX or x > self.maxX or y < self.minY or y > self.maxY:
+            return False
+        inside = False
+        for y0, y1, x0, slope in self.edges:
+            if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * slope:
+                inside = not inside
+        return inside
+
+    def containsArrays(self, x, y):
+        '''
+        Vectorized contains for numpy arrays.  The loop is over the
+        edges, so the work per edge is done for all points at once.
+
+        >>> import numpy
+        >>> poly = PolygonFilter(((0, 0), (1, 0), (1, 1), (0, 1)))
+        >>> list(poly.containsArrays(numpy.array([toUnits(.5), toUnits(2)]), numpy.array([toUnits(.5), toUnits(.5)])))
+        [True, False]
+
+        @param x: array of longitudes in 1/600000 degrees
+        @param y: array of latitudes in 1/600000 degrees
+        @return: boolean array
+        '''
+        import numpy
+        x = numpy.asarray(x, dtype=numpy.float64)
+        y = numpy.asarray(y, dtype=numpy.float64)
+        inside = (x >= self.minX) & (x <= self.maxX) & (y >= self.minY) & (y <= self.maxY)
+        candidates = numpy.flatnonzero(inside)
+        cx = x[candidates]
+        cy = y[candidates]
+        crossings = numpy.zeros(len(candidates), dtype=bool)
+        for y0, y1, x0, slope in self.edges:
+            crossings ^= ((y0 > cy) != (y1 > cy)) & (cx < x0 + (cy - y0) * slope)
+        inside[candidates] = crossings
+        return inside
+
+
+def filterLines(lines, spatialFilter):
+    '''
+    Pass through the position reports inside a BoxFilter or PolygonFilter
+
+    @param lines: iterable of NMEA strings
+    @return: generator of lines
+    '''
+    contains = spatialFilter.contains
+    for line in lines:
+        fields = line.split(',', 6)
+        if len(fields) < 7:
+            continue
+        pos = payloadLonLat(fields[5])
+        if pos is not None and contains(pos[0], pos[1]):
+            yield line
+
+
+if __name__=='__main__':
+    import doctestmain
+    doctestmain.main()
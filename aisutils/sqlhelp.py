@@ -16,6 +16,7 @@ import os
 import sys
 
 from BitVector import BitVector
+from bitreader import BitReader
 
 
 BOMBASTIC= 4
@@ -223,13 +224,16 @@ class create:
 
     def addBitVarying(self,field,length):
 	'''
-	SQL Boolean field
+	SQL bit string field.  sqlite has no bit type and gives BIT VARYING
+	numeric affinity, which turns a string of 0 and 1 into a float, so
+	sqlite gets a VARCHAR instead.
 	@param field: name of the field
 	@param length: largest possible size
 	'''
 	assert (length>0)
         self.fields.append(field)
-        self.types.append('BIT VARYING('+str(length)+')')
+        if 'sqlite'==self.dbType: self.types.append('VARCHAR('+str(length)+')')
+        else: self.types.append('BIT VARYING('+str(length)+')')
 
 
     def addDecimal(self,field,precision=5,scale=0):
@@ -333,7 +337,21 @@ class insert:
 	print
 
     def __str__(self):
-        "Return the SQL string for the insert"
+        '''Return the SQL string for the insert
+
+        Bits from a decoder go in quoted like any other string.
+
+        >>> import sqlite3
+        >>> from ais import ais_msg_8
+        >>> from aisutils import binary
+        >>> bv = binary.ais6tobitvec('85OpLV1Kf98p96dWWPLSViUfJlU@SV>cDF2Wq5>`=u8CnEFGCIOq')
+        >>> msg = ais_msg_8.decode(bv)
+        >>> cx = sqlite3.connect(':memory:')
+        >>> c = cx.execute(str(ais_msg_8.sqlCreate(dbType='sqlite')))
+        >>> c = cx.execute(str(ais_msg_8.sqlInsert(msg, dbType='sqlite')))
+        >>> str(cx.execute('SELECT BinaryData FROM bin_broadcast;').fetchone()[0]) == str(msg['BinaryData'])
+        True
+        '''
         if 0==len(self.fields):
             print "WARNING: empty insert.  returning empty string"
             return ""  # FIX: throw exception and a hissy fit
@@ -366,7 +384,7 @@ class insert:
                     if self.values[i]: s2List.append('1')
                     else: s2List.append('0')
                 else: s2List.append(str(self.values[i]))
-	    elif isinstance(self.values[i],BitVector): s2List.append('\''+str(self.values[i])+'\'')
+	    elif isinstance(self.values[i],(BitVector,BitReader)): s2List.append('\''+str(self.values[i])+'\'')
             elif str == type(self.values[i]):          s2List.append('\''+str(self.values[i])+'\'')
             elif type(self.values[i]) in (int, float): s2List.append(str(self.values[i]))
 
@@ -391,6 +409,69 @@ class insert:
         '''
         self.postGIS.append((field,value))
 
+    def columns(self):
+        '''
+        Column names in the order paramValues returns them.  Inserts with
+        the same table and columns can share one parameterized statement.
+
+        @rtype: tuple
+        '''
+        fields = self.fields + [entry[0] for entry in self.postGIS]
+        if 'postgres'==self.dbType:
+            return tuple([f.lower() for f in fields])
+        return tuple(fields)
+
+    def paramValues(self):
+        '''
+        Values to pass to cursor.execute with paramSql rather than quoting
+        them into the SQL string.
+
+        >>> ins = insert('Position', dbType='sqlite')
+        >>> ins.add('userid', 1); ins.add('name', 'A B'); ins.add('fixed', True)
+        >>> ins.paramValues()
+        (1, 'A B', 1)
+
+        Bits go to the database module as a string of 0 and 1.
+
+        >>> from bitreader import BitReader
+        >>> ins = insert('bin_broadcast'); ins.add('BinaryData', BitReader.fromBitString('0110'))
+        >>> ins.paramValues()
+        ('0110',)
+
+        @rtype: tuple
+        '''
+        values = []
+        for value in self.values:
+            if bool == type(value):
+                if 'sqlite'==self.dbType: value = int(value)
+            elif isinstance(value,(BitVector,BitReader)):
+                value = str(value)
+            values.append(value)
+        for entry in self.postGIS:
+            values.append(entry[1])
+        return tuple(values)
+
+    def paramSql(self,placeholder='%s'):
+        '''
+        Parameterized SQL for this insert split in two so that the
+        values part can be repeated for multi-row inserts.
+
+        >>> ins = insert('Position')
+        >>> ins.add('UserID', 1); ins.addPostGIS('Position', 'POINT(1 2)')
+        >>> ins.paramSql()
+        ('INSERT INTO position (userid,position) VALUES ', '(%s,GeomFromText(%s,4326))')
+
+        @param placeholder: parameter marker for the database module (e.g. ? for sqlite)
+        @return: (head, row) strings
+        '''
+        table = self.table
+        if 'postgres'==self.dbType: table = table.lower()
+        marks = [placeholder] * len(self.fields)
+        # FIX: this hard codes WGS 84.  Not good for a general library!
+        marks += ['GeomFromText(' + placeholder + ',4326)'] * len(self.postGIS)
+        head = 'INSERT INTO ' + table + ' (' + ','.join(self.columns()) + ') VALUES '
+        return head, '(' + ','.join(marks) + ')'
+
 
     def add(self,field,value):
         '''Add a field value pair to the insert
@@ -408,6 +489,139 @@ class insert:
         return
 
 
+class preparedInsert:
+    '''
+    Parameterized INSERT with a fixed column order.  Build one per table
+    and reuse it for every row rather than making a new insert per row.
+    Rows are plain tuples of values in the same order as the columns.
+    Geometry columns take a WKT string parameter.
+
+    >>> p = preparedInsert('Position', ('UserID','Position','cg_sec'), geometry=('Position',))
+    >>> p.sql
+    'INSERT INTO position (userid,position,cg_sec) VALUES (%s,GeomFromText(%s,4326),%s)'
+    >>> preparedInsert('Position', ('UserID','cg_sec'), dbType='sqlite', placeholder='?').sql
+    'INSERT INTO Position (UserID,cg_sec) VALUES (?,?)'
+
+    Unlike insert, string values are passed through as is.  The database
+    module does the quoting.
+
+    @see: the sqlRowInsert and sqlRow functions of the message modules
+    '''
+    def __init__(self,table,columns,geometry=(),dbType='postgres',placeholder='%s',srid=4326):
+        '''
+        @param table: which table are we going to insert into
+        @param columns: column names in row order
+        @param geometry: columns in columns that hold PostGIS geometry as WKT
+        @param dbType: postgres names are lower cased
+        @param placeholder: parameter marker for the database module (e.g. ? for sqlite)
+        @param srid: spatial reference id of the geometry columns.  4326 is WGS 84.
+        '''
+        if 'postgres'==dbType:
+            table = table.lower()
+            columns = [c.lower() for c in columns]
+            geometry = [c.lower() for c in geometry]
+        self.table = table
+        self.columns = tuple(columns)
+        self.dbType = dbType
+        self.placeholder = placeholder
+        marks = []
+        for column in self.columns:
+            if column in geometry:
+                marks.append('GeomFromText(' + placeholder + ',' + str(srid) + ')')
+            else:
+                marks.append(placeholder)
+        self.head = 'INSERT INTO ' + table + ' (' + ','.join(self.columns) + ') VALUES '
+        self.row = '(' + ','.join(marks) + ')'
+        self.sql = self.head + self.row
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __str__(self):
+        return self.sql + ';'
+
+    def paramSql(self,placeholder=None):
+        '''
+        Same as insert.paramSql so that either can be batched.
+        @return: (head, row) strings
+        '''
+        assert placeholder in (None, self.placeholder)
+        return self.head, self.row
+
+    def execute(self,cu,row):
+        '''
+        Insert one row
+        @param cu: database cursor
+        @param row: tuple of values in column order
+        '''
+        cu.execute(self.sql, row)
+
+    def executemany(self,cu,rows,batchSize=None):
+        '''
+        Insert many rows.
+
+        >>> import sqlite3
+        >>> cx = sqlite3.connect(':memory:')
+        >>> cu = cx.cursor()
+        >>> c = cu.execute('CREATE TABLE p (userid INTEGER, name VARCHAR(20));')
+        >>> p = preparedInsert('p', ('userid','name'), dbType='sqlite', placeholder='?')
+        >>> p.executemany(cu, [(1,'a'), (2,"b'c"), (3,None)], batchSize=2)
+        3
+        >>> cu.execute('SELECT * FROM p;').fetchall()
+        [(1, u'a'), (2, u"b'c"), (3, None)]
+
+        @param cu: database cursor
+        @param rows: sequence of row tuples
+        @param batchSize: put this many rows in each multi-row INSERT.  None
+        leaves it to cursor.executemany.  Older sqlite builds allow at most
+        999 parameters in one statement.
+        @return: number of rows
+        '''
+        if not batchSize:
+            cu.executemany(self.sql, rows)
+            return len(rows)
+        head = self.head
+        row = self.row
+        for start in xrange(0, len(rows), batchSize):
+            chunk = rows[start:start+batchSize]
+            params = [value for values in chunk for value in values]
+            cu.execute(head + ','.join([row]*len(chunk)), params)
+        return len(rows)
+
+
+def toFloat(value):
+    '''
+    Decimal (or any other number) to a float parameter.  None stays None.
+
+    >>> from decimal import Decimal
+    >>> toFloat(Decimal('12.5')), toFloat(None)
+    (12.5, None)
+    '''
+    if value is None: return None
+    return float(value)
+
+def toBits(value):
+    '''
+    BitVector to a string of 0 and 1 for a bit varying parameter.  None stays None.
+
+    >>> toBits(BitVector(bitstring='0110'))
+    '0110'
+    '''
+    if value is None: return None
+    return str(value)
+
+def geometryWkt(geomType,*values):
+    '''
+    WKT for a geometry parameter.  None if any value is missing.
+
+    >>> geometryWkt('POINT', -70.5, 42.25)
+    'POINT(-70.5 42.25)'
+    >>> geometryWkt('POINT', -70.5, None)
+    '''
+    if None in values: return None
+    return geomType + '(' + ' '.join([str(v) for v in values]) + ')'
+
+
 def sqlInsertStrFromList (table,aList,dbType='postgres'):
     """Take a list and make an insert string.
 
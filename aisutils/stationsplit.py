@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Split USCG format logs into one file per receive station.
+
+Input is read in large blocks and the station is found with two
+string finds per line.  Lines are held in a list per station and written
+out when that station has bufferLines waiting or when everything held
+adds up to maxBufferedLines, so the disk sees a few large writes instead
+of one per line.  Handles are kept in an LRU so that a national feed with
+hundreds of stations does not run out of file descriptors.
+
+With more than one job, each input file is split by a worker process
+into part files in a scratch directory.  The parent appends the parts
+to the station files in input order as the workers finish, so each
+station file keeps the order of the input files.
+
+  >>> import shutil, tempfile
+  >>> d = tempfile.mkdtemp()
+  >>> splitter = StationSplitter(stationPath(d), maxOpen=1)
+  >>> splitter.addLines([
+  ...   '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850433\\n',
+  ...   '!AIVDM,1,1,,A,B52K>;h00Fc>jpUlNV@ikwpUoP06,0*4C,s123,r003669947,1165850500\\n',
+  ...   '!AIVDM,1,1,,B,15Mw1U?P00qNGTP@v`0@9wwn26sd,0*0E,r003669945,1165850600\\n',
+  ...   '# comment\\n'])
+  >>> splitter.close()
+  >>> sorted(os.listdir(d))
+  ['r003669945', 'r003669947']
+  >>> sorted(splitter.lineCounts.items())
+  [('r003669945', 2), ('r003669947', 1)]
+  >>> shutil.rmtree(d)
+
+@since: 2026-Oct-16
+@see: U{ais_towersplit.py<../../scripts/ais_towersplit.py>}
+'''
+
+import collections
+import os
+import shutil
+import tempfile
+
+
+def stationOf(line, withR=True):
+    '''
+    Receive station after the checksum
+
+    >>> stationOf('!AIVDM,1,1,,B,15MgF9001,0*7C,x161434,s26256,d-109,T34.43128733,r3669961,1152921695\\n')
+    'r3669961'
+    >>> stationOf('!AIVDM,1,1,,B,15MgF9001,0*7C,r3669961\\r\\n', withR=False)
+    '3669961'
+    >>> print stationOf('!AIVDM,1,1,,B,15MgF9001,0*7C,1152921695')
+    None
+
+    @param withR: True keeps the leading r
+    @return: station or None
+    '''
+    start = line.find(',r', line.find('*'))
+    if start < 0:
+        return None
+    start += 1
+    if not withR:
+        start += 1
+    end = line.find(',', start)
+    if end < 0:
+        return line[start:].rstrip() or None
+    return line[start:end] or None
+
+
+def stationPath(directory, stationSubdirs=False, prefix=''):
+    '''
+    @param stationSubdirs: make a directory for each station with log.ais in it
+    @param prefix: put in front of each station name
+    @return: function that gives the file for a station
+    '''
+    def path(station):
+        name = os.path.join(directory, prefix + station)
+        if stationSubdirs:
+            if not os.path.isdir(name):
+                os.mkdir(name)
+            name = os.path.join(name, 'log.ais')
+        return name
+    return path
+
+
+def readBlocks(filename, blockSize=8*1024*1024):
+    '''
+    Whole lines from a file in big pieces
+
+    @return: generator of lists of lines
+    '''
+    infile = open(filename, 'rb')
+    while True:
+        data = infile.read(blockSize)
+        if not data:
+            break
+        if data[-1] != '\n':
+            data += infile.readline()
+        yield data.splitlines(True)
+    infile.close()
+
+
+class HandlePool(object):
+    '''
+    Least recently used set of open files.  A file is truncated the first
+    time it is opened if truncate is set and is appended to after that.
+    '''
+
+    def __init__(self, maxOpen=64, truncate=False):
+        self.maxOpen = maxOpen
+        self.truncate = truncate
+        self.handles = collections.OrderedDict() # filename -> file, oldest first
+        self.seen = set()
+        self.opens = 0
+        self.evictions = 0
+
+    def get(self, filename):
+        handle = self.handles.pop(filename, None)
+        if handle is None:
+            if len(self.handles) >= self.maxOpen:
+                oldName, oldHandle = self.handles.popitem(last=False)
+                oldHandle.close()
+                self.evictions += 1
+            mode = 'ab'
+            if self.truncate and filename not in self.seen:
+                mode = 'wb'
+            handle = open(filename, mode)
+            self.seen.add(filename)
+            self.opens += 1
+        self.handles[filename] = handle
+        return handle
+
+    def write(self, filename, data):
+        self.get(filename).write(data)
+
+    def close(self):
+        for handle in self.handles.itervalues():
+            handle.close()
+        self.handles.clear()
+
+
+class StationSplitter(object):
+    '''
+    Buffer lines by station and write them in large pieces.
+    '''
+
+    def __init__(self, path, maxOpen=64, bufferLines=16384, maxBufferedLines=1000000,
+                 truncate=False, withR=True, unknown=None):
+        '''
+        @param path: function that gives the file name for a station
+        @param maxOpen: most files to have open at once
+        @param bufferLines: write a station once it has this many lines waiting
+        @param maxBufferedLines: write everything once this many lines are waiting
+        @param truncate: replace files that already exist rather than
+        appending to them
+        @param withR: keep the r at the start of the station names
+        @param unknown: station name for lines without a station.  None
+        to drop those lines.
+        '''
+        self.path = path
+        self.bufferLines = bufferLines
+        self.maxBufferedLines = maxBufferedLines
+        self.withR = withR
+        self.unknown = unknown
+        self.handles = HandlePool(maxOpen, truncate)
+        self.buffers = {} # station -> lines
+        self.buffered = 0
+        self.files = {} # station -> file name
+        self.lineCounts = {}
+
+    def addLines(self, lines):
+        '''
+        Sort a list of lines into the station buffers.  Comments are skipped.
+        '''
+        buffers = self.buffers
+        get = buffers.get
+        unknown = self.unknown
+        skip = 1
+        if not self.withR:
+            skip = 2
+        for line in lines:
+            if line[0] == '#':
+                continue
+            # stationOf inline for speed
+            start = line.find(',r', line.find('*'))
+            if start < 0:
+                if unknown is None:
+                    continue
+                station = unknown
+            else:
+                start += skip
+                end = line.find(',', start)
+                if end < 0:
+                    station = line[start:].rstrip()
+                else:
+                    station = line[start:end]
+                if not station:
+                    if unknown is None:
+                        continue
+                    station = unknown
+            buf = get(station)
+            if buf is None:
+                buf = buffers[station] = []
+            buf.append(line)
+        self.buffered += len(lines)
+
+        if self.buffered >= self.maxBufferedLines:
+            self.flush()
+            return
+        bufferLines = self.bufferLines
+        for station in [station for station, buf in buffers.iteritems() if len(buf) >= bufferLines]:
+            self.flushStation(station)
+
+    def addFile(self, filename):
+        for lines in readBlocks(filename):
+            self.addLines(lines)
+
+    def flushStation(self, station):
+        buf = self.buffers.pop(station, None)
+        if buf is None:
+            return
+        filename = self.files.get(station)
+        if filename is None:
+            filename = self.files[station] = self.path(station)
+        self.handles.write(filename, ''.join(buf))
+        self.buffered -= len(buf)
+        self.lineCounts[station] = self.lineCounts.get(station, 0) + len(buf)
+
+    def flush(self):
+        'Write out every station, biggest first'
+        stations = sorted(self.buffers, key=lambda s: -len(self.buffers[s]))
+        for station in stations:
+            self.flushStation(station)
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.handles.close()
+
+
+def _splitWorker(args):
+    '''Split one input file into part files.  For multiprocessing.'''
+    filename, partDir, settings = args
+    os.mkdir(partDir)
+    splitter = StationSplitter(stationPath(partDir), truncate=True, **settings)
+    splitter.addFile(filename)
+    splitter.close()
+    return splitter.files, splitter.lineCounts
+
+
+def _buildIndex(filename):
+    import logindex
+    logindex.LogIndex.build(filename)
+    return filename
+
+
+def splitFiles(filenames, path, jobs=1, truncate=False, index=False, workDir=None,
+               maxOpen=64, withR=True, unknown=None, verbose=False):
+    '''
+    Split log files into station files.
+
+    @param path: function that gives the file name for a station
+    @param jobs: number of worker processes.  1 does everything here.
+    @param index: build a L{logindex} for each station file
+    @param workDir: where to put the part files from the workers.  Best
+    on the same file system as the output.
+    @return: (station -> file name, station -> line count)
+    '''
+    settings = {'maxOpen': maxOpen, 'withR': withR, 'unknown': unknown}
+    if jobs <= 1:
+        splitter = StationSplitter(path, truncate=truncate, **settings)
+        for filename in filenames:
+            if verbose: print 'splitting', filename
+            splitter.addFile(filename)
+        splitter.close()
+        files, lineCounts = splitter.files, splitter.lineCounts
+    else:
+        import multiprocessing
+        scratch = tempfile.mkdtemp(prefix='stationsplit-', dir=workDir)
+        tasks = [(filename, os.path.join(scratch, '%06d' % num), settings)
+                 for num, filename in enumerate(filenames)]
+        files = {}
+        lineCounts = {}
+        handles = HandlePool(maxOpen, truncate)
+        pool = multiprocessing.Pool(jobs)
+        try:
+            # imap hands back the results in input order while later
+            # files are still being split
+            for (filename, partDir, unused), (parts, counts) in zip(tasks, pool.imap(_splitWorker, tasks)):
+                if verbose: print 'merging', filename
+                for station, part in parts.iteritems():
+                    target = files.get(station)
+                    if target is None:
+                        target = files[station] = path(station)
+                        if truncate or not os.path.exists(target):
+                            # First piece of a new file.  No copy needed.
+                            shutil.move(part, target)
+                            handles.seen.add(target)
+                            continue
+                    infile = open(part, 'rb')
+                    shutil.copyfileobj(infile, handles.get(target), 4*1024*1024)
+                    infile.close()
+                    os.remove(part)
+                for station, count in counts.iteritems():
+                    lineCounts[station] = lineCounts.get(station, 0) + count
+                os.rmdir(partDir)
+            pool.close()
+        finally:
+            handles.close()
+            pool.terminate()
+            pool.join()
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    if index:
+        targets = sorted(files.values())
+        if jobs <= 1:
+            map(_buildIndex, targets)
+        else:
+            pool = multiprocessing.Pool(jobs)
+            pool.map(_buildIndex, targets)
+            pool.close()
+            pool.join()
+    return files, lineCounts
+
+
+if __name__=='__main__':
+    import doctestmain
+    doctestmain.main()
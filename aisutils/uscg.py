@@ -4,7 +4,9 @@
 Filter to a list of AIS receivers/basestations.
 
 
-TODO: For speed, provide functions that only parse the timestamp, station, etc.
+Use parse() in the forwarders.  It fills in a __slots__ UscgRecord in one
+pass and waits until timestamp or sqlTimestampStr are used to build them.
+Compare the two on a log with: uscg.py --benchmark file.ais
 """
 import doctest
 import datetime
@@ -147,7 +149,7 @@ class UscgNmea:
             fields = nmeaStr.split(',')
             self.cg_sec=float(fields[-1])
             self.timestamp = datetime.datetime.utcfromtimestamp(self.cg_sec)
-            self.sqlTimestampStr = ais.sqlhelp.sec2timestamp(self.cg_sec)
+            self.sqlTimestampStr = sqlhelp.sec2timestamp(self.cg_sec)
             # See 80_330e_PAS
             self.nmeaType=fields[0][1:]
             self.totalSentences = int(fields[1])
@@ -203,7 +205,7 @@ class UscgNmea:
         @return: bits for the payload (even if this is a multipart)
         @rtype: BitVector
         """
-        return ais.binary.ais6tobitvec(self.contents)
+        return binary.ais6tobitvec(self.contents)
 
     def __eq__(self,other):
         # Try to be smart for speed
@@ -254,6 +256,189 @@ class UscgNmea:
 #        """
         # FIX: where did I do this nicely?
 
+class UscgRecord(object):
+    """Lean record for one USCG NMEA line.  Use parse() to build one.
+
+    Has the same fields as UscgNmea, but timestamp and sqlTimestampStr
+    are only computed when they are first used.  Optional fields that
+    were not on the line are None.
+    """
+    __slots__ = ('nmeaType', 'totalSentences', 'sentenceNum', 'sequentialMsgId',
+                 'aisChannel', 'contents', 'fillbits', 'checksumStr', 'msgTypeChar',
+                 'station', 'stationTypeCode', 'rssi', 'signalStrength',
+                 'timeOfArrival', 'slotNumber', 'x', 'cg_sec',
+                 '_timestamp', '_sqlTimestampStr')
+
+    def __init__(self):
+        self.station = None
+        self.stationTypeCode = None
+        self.rssi = None
+        self.signalStrength = None
+        self.timeOfArrival = None
+        self.slotNumber = None
+        self.x = None
+        self._timestamp = None
+        self._sqlTimestampStr = None
+
+    @property
+    def timestamp(self):
+        'python datetime in UTC from cg_sec'
+        if self._timestamp is None:
+            self._timestamp = datetime.datetime.utcfromtimestamp(self.cg_sec)
+        return self._timestamp
+
+    @property
+    def sqlTimestampStr(self):
+        'SQL timestamp string from cg_sec'
+        if self._sqlTimestampStr is None:
+            self._sqlTimestampStr = sqlhelp.sec2timestamp(self.cg_sec)
+        return self._sqlTimestampStr
+
+    def getBitVector(self):
+        """
+        @return: bits for the payload (even if this is a multipart)
+        @rtype: BitVector
+        """
+        return binary.ais6tobitvec(self.contents)
+
+    def __eq__(self, other):
+        for name in self.__slots__[:-2]:
+            if getattr(self, name) != getattr(other, name, None):
+                return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __str__(self):
+        return self.buildNmea()
+
+    def buildNmea(self):
+        """Use the values in this message to reconstruct a single line nmea string"""
+        parts=['!'+self.nmeaType,str(self.totalSentences),str(self.sentenceNum)]
+        if self.sequentialMsgId is None:
+            parts.append('')
+        else:
+            parts.append(str(self.sequentialMsgId))
+        parts.append(self.aisChannel)
+        parts.append(self.contents)
+        parts.append(str(self.fillbits)+'*'+self.checksumStr)
+
+        if self.rssi is not None: parts.append('s'+str(self.rssi))
+        if self.signalStrength is not None: parts.append('d'+str(self.signalStrength))
+        if self.timeOfArrival is not None: parts.append('T'+str(self.timeOfArrival))
+        if self.slotNumber is not None: parts.append('S'+str(self.slotNumber))
+        if self.x is not None: parts.append('x'+str(self.x))
+
+        if self.station: parts.append(self.station)
+        parts.append(str(self.cg_sec)) # Always last
+        return ','.join(parts)
+
+
+stationTypeCodes = 'brBR'
+'''First characters of a receive station field'''
+
+def stationField(fields):
+    """First receive station field after the checksum
+
+    >>> stationField('!AIVDM,1,1,,B,15Mw,0*0E,s1234,R003669945,1165850433'.split(','))
+    'R003669945'
+    >>> print stationField('!AIVDM,1,1,,B,15Mw,0*0E,1165850433'.split(','))
+    None
+
+    @param fields: NMEA line split on commas
+    @return: station or None
+    """
+    for field in fields[7:-1]:
+        if field and field[0] in stationTypeCodes:
+            return field
+    return None
+
+
+def parse(nmeaStr):
+    """Parse a USCG NMEA line in one pass over the fields.
+
+    >>> msg = parse('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,s1234,d-119,r003669958,S4321,1085889680')
+    >>> msg.station, msg.rssi, msg.signalStrength, msg.slotNumber, msg.timeOfArrival
+    ('r003669958', 1234, -119, 4321, None)
+    >>> str(msg.timestamp)
+    '2004-05-30 04:01:20'
+
+    @param nmeaStr: USCG style nmea string
+    @rtype: L{UscgRecord}
+    @raise ValueError: a field could not be converted
+    @raise IndexError: too few fields
+    """
+    fields = nmeaStr.split(',')
+    msg = UscgRecord()
+    msg.cg_sec = float(fields[-1])
+    msg.nmeaType = fields[0][1:]
+    msg.totalSentences = int(fields[1])
+    msg.sentenceNum = sentenceNum = int(fields[2])
+    tmp = fields[3]
+    if tmp:
+        msg.sequentialMsgId = int(tmp)
+    else:
+        msg.sequentialMsgId = None
+    msg.aisChannel = fields[4]
+    msg.contents = contents = fields[5]
+    tmp = fields[6]
+    star = tmp.find('*')
+    msg.fillbits = int(tmp[:star])
+    msg.checksumStr = tmp[star+1:]
+    if 1 == sentenceNum:
+        msg.msgTypeChar = contents[0]
+    else:
+        msg.msgTypeChar = None
+
+    # Walk from the end so that the left most copy of a field wins like UscgNmea
+    for i in xrange(len(fields)-2, 6, -1):
+        f = fields[i]
+        if not f:
+            continue
+        c = f[0]
+        if c in stationTypeCodes:
+            msg.station = f
+            msg.stationTypeCode = c
+        elif 's' == c:
+            msg.rssi = int(f[1:])
+        elif 'd' == c:
+            msg.signalStrength = int(f[1:])
+        elif 'T' == c:
+            try:
+                msg.timeOfArrival = float(f[1:])
+            except ValueError:
+                pass
+        elif 'S' == c:
+            msg.slotNumber = int(f[1:])
+        elif 'x' == c:
+            msg.x = int(f[1:])
+    return msg
+
+
+def benchmark(lines, repeat=3, out=sys.stdout):
+    """Time UscgNmea against parse on the same lines.
+
+    @param lines: USCG NMEA strings that both can parse
+    @param repeat: best of this many runs is reported
+    @return: (UscgNmea lines/sec, parse lines/sec)
+    """
+    results = []
+    for name, func in (('UscgNmea', UscgNmea), ('parse', parse)):
+        best = None
+        for i in range(repeat):
+            start = time.time()
+            for line in lines:
+                func(line)
+            elapsed = time.time() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        rate = len(lines) / max(best, 1e-9)
+        out.write('%-10s %10.0f lines/sec\n' % (name, rate))
+        results.append(rate)
+    return tuple(results)
+
+
 class TestUscgNmea(unittest.TestCase):
     def testUscgNmea(self):
         un = UscgNmea('!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,s1234,d-119,T12.34567123,r003669958,S4321,1085889680')
@@ -313,6 +498,27 @@ class TestUscgNmea(unittest.TestCase):
 
 
 
+class TestUscgRecord(unittest.TestCase):
+    def testParseMatchesUscgNmea(self):
+        line = '!AIVDM,1,1,,B,15Cjtd0Oj;Jp7ilG7=UkKBoB0<06,0*63,s1234,d-119,T12.34567123,r003669958,S4321,x12,1085889680'
+        old = UscgNmea(line)
+        new = parse(line)
+        for name in ('nmeaType', 'totalSentences', 'sentenceNum', 'sequentialMsgId',
+                     'aisChannel', 'contents', 'fillbits', 'checksumStr', 'msgTypeChar',
+                     'station', 'stationTypeCode', 'rssi', 'signalStrength',
+                     'timeOfArrival', 'slotNumber', 'x', 'cg_sec',
+                     'timestamp', 'sqlTimestampStr'):
+            self.failUnlessEqual(getattr(old, name), getattr(new, name))
+        self.failUnlessEqual(old.buildNmea(), new.buildNmea())
+
+    def testMissingFields(self):
+        msg = parse('!AIVDM,2,2,4,B,@H8888888888880,2*2B,1152921692')
+        self.failUnlessEqual(msg.station, None)
+        self.failUnlessEqual(msg.msgTypeChar, None)
+        self.failUnlessEqual(msg.sequentialMsgId, 4)
+        self.failUnlessEqual(msg.buildNmea(), '!AIVDM,2,2,4,B,@H8888888888880,2*2B,1152921692.0')
+
+
 def create_nmea(bits,
                 nmeaType='!AIVDM',  # Could also use $.
                 totalSentences=None,
@@ -402,4 +608,10 @@ def test():
 
 
 if __name__ == '__main__':
-    test()
+    if len(sys.argv) > 2 and '--benchmark' == sys.argv[1]:
+        lines = []
+        for filename in sys.argv[2:]:
+            lines += [line.strip() for line in file(filename) if line.startswith('!AIVD')]
+        benchmark(lines)
+    else:
+        test()
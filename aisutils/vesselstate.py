@@ -0,0 +1,371 @@
+#!/usr/bin/env python
+
+__license__ = 'Apache 2.0'
+
+__doc__='''
+Keep the latest state of each vessel in memory so that the track_lines
+and last_position cache tables can be written straight from the decoded
+messages.
+
+Rebuilding those tables from the database means several queries per
+vessel for every commit.  VesselStates instead keeps the last few
+positions of each vessel in a ring buffer along with the most recent
+name and ship type.  Each update marks the vessel as changed, and flush
+replaces the rows of just the changed vessels with one DELETE per table
+and batched multi-row INSERTs.  A vessel without a name yet gets the
+name and ship type from the shipdata table the first time it is
+written, and the track_lines row is left alone until there are two new
+points for a vessel.  That way a restart does not lose tracks or names.
+
+  >>> states = VesselStates(maxPoints=3)
+  >>> for i in range(5):
+  ...     v = states.update({'MessageID':1, 'UserID':123, 'longitude':-70.0-i/10.,
+  ...                        'latitude':42.5, 'COG':90, 'SOG':12.5, 'NavigationStatus':0},
+  ...                       cg_sec=1000+i, station='r003669945')
+  >>> v = states.update({'MessageID':5, 'UserID':123, 'name':'SEA DOG@@@@', 'shipandcargo':70})
+  >>> [v.userid for v in states.changed()]
+  [123]
+  >>> states.trackRow(states.vessels[123])
+  (123, 'SEA DOG', 'LINESTRING(-70.4 42.5,-70.3 42.5,-70.2 42.5)')
+
+@since: 2026-Oct-16
+@see: L{database.rebuild_track_lines}
+@see: L{database.rebuild_last_position}
+'''
+
+import collections
+import datetime
+
+import sqlhelp
+
+positionMessages = (1, 2, 3, 18, 19)
+'''MessageID values with a position'''
+
+
+class Vessel(object):
+    '''
+    State of one vessel.  points holds (cg_sec, x, y) tuples with the
+    newest on the right.  lastSec is when any message was last heard from
+    the vessel, static data and unavailable positions included.  seeded is
+    True once the name has been looked up in the database.
+    '''
+    __slots__ = ('userid', 'points', 'cog', 'sog', 'cg_sec', 'cg_r',
+                 'navigationstatus', 'name', 'shipandcargo', 'lastSec', 'seeded')
+
+    def __init__(self, userid, maxPoints):
+        self.userid = userid
+        self.points = collections.deque(maxlen=maxPoints)
+        self.cog = None
+        self.sog = None
+        self.cg_sec = None
+        self.cg_r = None
+        self.navigationstatus = None
+        self.name = None
+        self.shipandcargo = None
+        self.lastSec = None
+        self.seeded = False
+
+
+class VesselStates(object):
+    '''
+    Per MMSI vessel state built from decoded message dictionaries.
+    '''
+
+    def __init__(self, maxPoints=50, navStatusLut=None, shipTypeLut=None,
+                 trackTable='track_lines', lastPosTable='last_position'):
+        '''
+        @param maxPoints: most points to keep for each track line
+        @param navStatusLut: str(NavigationStatus) to text for last_position.
+        See ais.ais_msg_1.NavigationStatusDecodeLut
+        @param shipTypeLut: str(shipandcargo) to text for last_position.
+        See ais.ais_msg_5.shipandcargoDecodeLut
+        '''
+        self.maxPoints = maxPoints
+        self.navStatusLut = navStatusLut
+        self.shipTypeLut = shipTypeLut
+        self.trackTable = trackTable
+        self.lastPosTable = lastPosTable
+        self.vessels = {} # userid -> Vessel
+        self.dirty = set() # userids with new state to write
+        self.removed = set() # userids that aged out and need their rows deleted
+        self.newestSec = None # Newest receive time in the data
+
+    def __len__(self):
+        return len(self.vessels)
+
+    def update(self, msg, cg_sec=None, station=None):
+        '''
+        Fold one decoded message into the vessel state.
+
+        Positions of 181/91 (not available) are not added to the track.
+
+        @param msg: decoded message dictionary
+        @param cg_sec: receive time in UNIX UTC seconds.  None for the
+        newest time seen so far.
+        @param station: receive station
+        @return: the Vessel or None if the message has nothing to keep
+        '''
+        msgType = msg['MessageID']
+        if msgType not in positionMessages and msgType not in (5, 24):
+            return None
+        userid = int(msg['UserID'])
+        vessel = self.vessels.get(userid)
+        if vessel is None:
+            vessel = self.vessels[userid] = Vessel(userid, self.maxPoints)
+        self.removed.discard(userid)
+        if cg_sec is None:
+            vessel.lastSec = self.newestSec
+        else:
+            vessel.lastSec = cg_sec
+            if self.newestSec is None or cg_sec > self.newestSec:
+                self.newestSec = cg_sec
+
+        if 'name' in msg:
+            vessel.name = msg['name']
+        if 'shipandcargo' in msg:
+            vessel.shipandcargo = msg['shipandcargo']
+
+        if msgType in positionMessages:
+            x = msg['longitude']
+            y = msg['latitude']
+            if x > 180 or y > 90:
+                return vessel
+            vessel.points.append((cg_sec, x, y))
+            vessel.cog = msg['COG']
+            vessel.sog = msg['SOG']
+            vessel.cg_sec = cg_sec
+            vessel.cg_r = station
+            if 'NavigationStatus' in msg:
+                vessel.navigationstatus = msg['NavigationStatus']
+
+        if vessel.points:
+            self.dirty.add(userid)
+        return vessel
+
+    def changed(self):
+        '''
+        @return: the vessels that changed since the last call
+        @rtype: list
+        '''
+        vessels = self.vessels
+        result = [vessels[userid] for userid in self.dirty if userid in vessels]
+        self.dirty = set()
+        return result
+
+    def expire(self, oldestSec, trackOldestSec=None):
+        '''
+        Age out vessels and track points.
+
+        >>> states = VesselStates()
+        >>> for t in (10, 20, 30):
+        ...     v = states.update({'MessageID':18, 'UserID':1, 'longitude':-70, 'latitude':42,
+        ...                        'COG':0, 'SOG':0}, cg_sec=t)
+        >>> states.expire(5, trackOldestSec=25), len(states.vessels[1].points)
+        (0, 1)
+        >>> states.expire(40), sorted(states.removed)
+        (1, [1])
+
+        Vessels with only static data or no position available age out too.
+
+        >>> v = states.update({'MessageID':5, 'UserID':2, 'name':'SEA DOG', 'shipandcargo':70}, cg_sec=50)
+        >>> v = states.update({'MessageID':1, 'UserID':3, 'longitude':181, 'latitude':91,
+        ...                    'COG':0, 'SOG':0}, cg_sec=60)
+        >>> states.expire(55), sorted(states.vessels)
+        (1, [3])
+        >>> states.expire(1e9), len(states)
+        (1, 0)
+
+        @param oldestSec: vessels not heard from since this time are dropped.
+        Vessels that have never had a time are dropped too.
+        @param trackOldestSec: track points older than this are dropped
+        @return: number of vessels dropped
+        '''
+        dropped = []
+        for userid, vessel in self.vessels.iteritems():
+            if vessel.lastSec is None or vessel.lastSec < oldestSec:
+                dropped.append(userid)
+                continue
+            if trackOldestSec is not None:
+                points = vessel.points
+                trimmed = False
+                while points and points[0][0] is not None and points[0][0] < trackOldestSec:
+                    points.popleft()
+                    trimmed = True
+                if trimmed:
+                    self.dirty.add(userid)
+        for userid in dropped:
+            del self.vessels[userid]
+            self.dirty.discard(userid)
+            self.removed.add(userid)
+        return len(dropped)
+
+    def expireAge(self, maxAgeSec, trackMaxAgeSec=None):
+        '''
+        Age out vessels against the newest time in the data rather than the
+        clock, so that replaying old logs works the same as a live feed.
+
+        >>> states = VesselStates()
+        >>> for userid, t in ((1, 1000), (2, 1500)):
+        ...     v = states.update({'MessageID':5, 'UserID':userid, 'name':'X'}, cg_sec=t)
+        >>> states.expireAge(400), sorted(states.vessels)
+        (1, [2])
+
+        @param maxAgeSec: drop vessels not heard from in this many seconds
+        @param trackMaxAgeSec: drop track points older than this many seconds
+        @return: number of vessels dropped
+        '''
+        if self.newestSec is None:
+            return 0
+        trackOldestSec = None
+        if trackMaxAgeSec is not None:
+            trackOldestSec = self.newestSec - trackMaxAgeSec
+        return self.expire(self.newestSec - maxAgeSec, trackOldestSec)
+
+    def seed(self, cu, vessels, placeholder='%s'):
+        '''
+        Fill in the name and ship type of vessels that have not had a
+        static report since startup from the newest shipdata row.
+        '''
+        vessels = [vessel for vessel in vessels if not vessel.seeded]
+        for vessel in vessels:
+            vessel.seeded = True
+        vessels = dict([(vessel.userid, vessel) for vessel in vessels if vessel.name is None])
+        userids = vessels.keys()
+        for start in xrange(0, len(userids), 500):
+            chunk = userids[start:start+500]
+            marks = ','.join([placeholder] * len(chunk))
+            cu.execute('SELECT userid,name,shipandcargo FROM shipdata WHERE userid IN ('
+                       + marks + ') ORDER BY cg_sec;', chunk)
+            # Rows are oldest first, so the newest one wins
+            for userid, name, shipandcargo in cu.fetchall():
+                vessel = vessels[userid]
+                vessel.name = name
+                vessel.shipandcargo = shipandcargo
+
+    def displayName(self, vessel):
+        'Name with the AIS padding removed or the MMSI if there is no name'
+        name = vessel.name
+        if name:
+            name = name.strip('@ ')
+        if not name:
+            return str(vessel.userid)
+        return name
+
+    def trackRow(self, vessel):
+        '''
+        @return: (userid, name, line WKT) or None if there are fewer than 2 points
+        '''
+        if len(vessel.points) < 2:
+            return None
+        # Newest point first like ORDER BY cg_sec DESC
+        coords = ['%s %s' % (float(x), float(y)) for t, x, y in reversed(vessel.points)]
+        return vessel.userid, self.displayName(vessel), 'LINESTRING(' + ','.join(coords) + ')'
+
+    def lastPositionInsert(self, vessel, dbType='postgres'):
+        '''
+        @return: insert for the last_position row of the vessel
+        @rtype: sqlhelp.insert
+        '''
+        t, x, y = vessel.points[-1]
+        cog = vessel.cog
+        if cog is None or cog == 511:
+            cog = 0 # make unknowns point north
+        ins = sqlhelp.insert(self.lastPosTable, dbType=dbType)
+        ins.add('userid', vessel.userid)
+        ins.add('name', self.displayName(vessel))
+        ins.add('cog', int(cog))
+        if vessel.sog is not None:
+            ins.add('sog', float(vessel.sog))
+        if vessel.cg_sec is not None:
+            ins.add('cg_timestamp', sqlhelp.sec2timestamp(vessel.cg_sec))
+        if vessel.cg_r is not None:
+            ins.add('cg_r', vessel.cg_r)
+        if vessel.navigationstatus is not None:
+            ins.add('navigationstatus', self.lookup(self.navStatusLut, vessel.navigationstatus))
+        shipandcargo = 'unknown'
+        if vessel.shipandcargo is not None:
+            shipandcargo = self.lookup(self.shipTypeLut, vessel.shipandcargo)
+        ins.add('shipandcargo', shipandcargo)
+        ins.addPostGIS('position', 'POINT(%s %s)' % (float(x), float(y)))
+        return ins
+
+    def lookup(self, lut, value):
+        'Text for a code, cut down to fit the 30 character columns'
+        text = str(value)
+        if lut is not None and text in lut:
+            text = lut[text]
+        return text[:29]
+
+    def flush(self, cu, batcher, dbType='postgres', placeholder='%s'):
+        '''
+        Replace the track_lines and last_position rows of the changed and
+        aged out vessels.  The caller commits.  A vessel with fewer than
+        two points keeps the track_lines row it already has.
+
+        After a restart the name comes from shipdata and the old track stays.
+
+        >>> import sqlite3
+        >>> from database import InsertBatcher
+        >>> cx = sqlite3.connect(':memory:')
+        >>> cu = cx.cursor()
+        >>> c = cu.execute('CREATE TABLE shipdata (userid INTEGER, name VARCHAR(20), shipandcargo INTEGER, cg_sec INTEGER);')
+        >>> c = cu.execute("INSERT INTO shipdata VALUES (123, 'OLD NAME', 60, 10), (123, 'SEA DOG@@', 70, 20);")
+        >>> c = cu.execute('CREATE TABLE track_lines (userid INTEGER, name VARCHAR(20), update_timestamp TIMESTAMP, track TEXT);')
+        >>> c = cu.execute("INSERT INTO track_lines VALUES (123, 'SEA DOG', NULL, 'LINESTRING(-70 42,-71 42)');")
+        >>> c = cu.execute('CREATE TABLE last_position (userid INTEGER, name VARCHAR(30), cog INTEGER, sog REAL, cg_timestamp TIMESTAMP, cg_r VARCHAR(15), navigationstatus VARCHAR(30), shipandcargo VARCHAR(30), position TEXT);')
+        >>> states = VesselStates()
+        >>> v = states.update({'MessageID':1, 'UserID':123, 'longitude':-70.5, 'latitude':42.5,
+        ...                    'COG':90, 'SOG':12.5, 'NavigationStatus':0}, cg_sec=1000)
+        >>> class SqliteInsertBatcher(InsertBatcher):
+        ...     def add(self, ins):
+        ...         ins.postGIS = [] # sqlite has no GeomFromText
+        ...         InsertBatcher.add(self, ins)
+        >>> states.flush(cu, SqliteInsertBatcher(placeholder='?', useSavepoints=False), dbType='sqlite', placeholder='?')
+        (0, 1, 0)
+        >>> cu.execute('SELECT track FROM track_lines;').fetchall()
+        [(u'LINESTRING(-70 42,-71 42)',)]
+        >>> cu.execute('SELECT name, shipandcargo FROM last_position;').fetchall()
+        [(u'SEA DOG', u'70')]
+
+        @param cu: database cursor
+        @param batcher: L{database.InsertBatcher} for the new rows
+        @return: (tracks written, last positions written, vessels removed)
+        '''
+        vessels = self.changed()
+        removed = self.removed
+        self.removed = set()
+        if not vessels and not removed:
+            return 0, 0, 0
+        self.seed(cu, vessels, placeholder)
+        trackRows = [self.trackRow(vessel) for vessel in vessels]
+
+        # One DELETE per table per 500 vessels rather than a lookup per vessel
+        deletes = (
+            (self.trackTable, [row[0] for row in trackRows if row is not None] + list(removed)),
+            (self.lastPosTable, [vessel.userid for vessel in vessels] + list(removed)),
+            )
+        for table, userids in deletes:
+            for start in xrange(0, len(userids), 500):
+                chunk = userids[start:start+500]
+                marks = ','.join([placeholder] * len(chunk))
+                cu.execute('DELETE FROM ' + table + ' WHERE userid IN (' + marks + ');', chunk)
+
+        now = datetime.datetime.utcnow()
+        tracks = 0
+        for vessel, row in zip(vessels, trackRows):
+            if row is not None:
+                ins = sqlhelp.insert(self.trackTable, dbType=dbType)
+                ins.add('userid', row[0])
+                ins.add('name', row[1])
+                ins.add('update_timestamp', now)
+                ins.addPostGIS('track', row[2])
+                batcher.add(ins)
+                tracks += 1
+            batcher.add(self.lastPositionInsert(vessel, dbType))
+        batcher.flush(cu)
+        return tracks, len(vessels), len(removed)
+
+
+if __name__=='__main__':
+    import doctestmain
+    doctestmain.main()
@@ -25,12 +25,16 @@ CREATE INDEX bsrep_dup_idx ON bsreport(dup_flag);
 VACUUM;
 """
 
+import collections
 import datetime
 from decimal import Decimal
 import exceptions
+import multiprocessing
 from optparse import OptionParser
+import os
 import StringIO
 import sys
+import time
 import traceback
 
 import pysqlite2.dbapi2 as sqlite
@@ -43,74 +47,46 @@ import ais.ais_msg_4_handcoded
 import ais.ais_msg_5
 import ais.ais_msg_18
 import ais.ais_msg_19
+import ais.decodecache
 
 from aisutils.BitVector import BitVector
 from aisutils import binary
+from aisutils import dedup
+from aisutils.uscg import uscg_ais_nmea_regex
 
 import nmea.checksum
 
 
-class TrackDuplicates:
+class TrackDuplicates(dedup.Duplicates):
     '''handle a feed and assign packet identifiers for duplicates
-    Get this out into aisutils.
 
     Does not distinguish duplicates coming from the same receiver (should that ever happen)
+
+    @see: L{aisutils.dedup.Duplicates}
     '''
 
     def __init__(self, lookback_length=None, lookback_time_sec=5*60):
-        self.lookback_length = lookback_length
-        self.lookback_time_sec = lookback_time_sec
-
-        self.queue = []  # dicts of (time_sec,pkt_id,payload)
-
-        self.next_new_id = 1 # skip zero: useful to not have a zero... bool(0) is False
-
-        self.newest_time_sec = 0  # Unix UTC sec
-
+        dedup.Duplicates.__init__(self, maxCount=lookback_length,
+                                  maxAgeSec=lookback_time_sec or None)
 
     def check_packet(self, time_sec, payload):
         'payload is the text in the 5th position of any message... the encoded message'
+        return self.check(payload, time_sec)
 
-        found = False
-        for pkt in reversed(self.queue): # Search backwards since dups are likely close to the front, no?
-            if payload == pkt['payload']:
-                found = True
-                break
-
-        if found:
-            return pkt['pkt_id'],True  # Skipping cleaning to save time
-
-        # ! found... add packet to queue
-        self.queue.append(dict(time_sec=time_sec, pkt_id = self.next_new_id, payload=payload))
-        pkt_id = self.next_new_id
-        self.next_new_id += 1
-        if self.newest_time_sec < time_sec:
-            self.newest_time_sec = time_sec
 
+msg_modules = {
+    1: ais.ais_msg_1_handcoded,
+    2: ais.ais_msg_2_handcoded,
+    3: ais.ais_msg_3_handcoded,
+    4: ais.ais_msg_4_handcoded,
+    5: ais.ais_msg_5,
+    18: ais.ais_msg_18, # Class B position
+    19: ais.ais_msg_19, # Class B position
+    }
+'''Message module to decode and insert with for each message number'''
 
-        # clean up queue wrt to length
-        if self.lookback_length:
-            while len(self.queue) > self.lookback_length:
-                self.queue.pop(0) # drop oldest
-
-        #
-        # drop messages that are too old
-        #
-        span = 10 # Don't look too far back for speed.  Probably could work with just 1 or 2
-        threshold_time = self.newest_time_sec - self.lookback_time_sec
-
-        drop_list = []
-
-        if self.lookback_time_sec and len(self.queue) > span:
-            if len(self.queue) > span: span = len(self.queue)
-            for i in range(span):
-                if self.queue[i]['time_sec'] < threshold_time:
-                    drop_list.append(i)
-
-        for key in reversed(drop_list): # go backwards so we don't mess up the order
-            self.queue.pop(key)
-
-        return pkt_id,False
+message_set = (1,2,3,4,5,18,19)
+'''Message numbers that are loaded'''
 
 
 #def create_tables(cx, payload_table=False, verbose=False):
@@ -179,177 +155,399 @@ def get_max_key(cx):
     return max_key
 
 
-def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
-    """Try to read data from an open file object.
+class RowWriter:
+    """Single writer for the decoded rows.
 
-    Not yet well tested.
+    Packet ids for duplicates and the database keys are handed out in
+    the order that rows are added, so loading the same lines in the same
+    order always gives the same keys no matter how the decoding was split up.
+    """
 
-    @param cx: database connection
-    @param verbose: pring out more if true
-    @param uscg: Process uscg tail information to get timestamp and receive station
-    @rtype: None
-    @return: Nothing
+    def __init__(self, cx, uscg=True, verbose=False):
+        """
+        @param cx: database connection
+        @param uscg: rows have the uscg tail fields
+        """
+        self.cx = cx
+        self.cu = cx.cursor()
+        self.verbose = verbose
+        self.next_key = 0
+        max_key = get_max_key(cx)
+        if max_key is not None:
+            self.next_key = max_key + 1
+        self.rows = 0
+        self.new_file()
+
+        # One prepared insert per message type.  Rows are queued and written
+        # with executemany each time the transaction is committed.
+        uscg_fields = ()
+        if uscg:
+            uscg_fields = ('cg_sec','cg_timestamp','cg_r','cg_t_arrival','cg_s_slotnum')
+        self.prepared = {}
+        self.pending = {}
+        for msg_num in message_set:
+            extra_fields = uscg_fields
+            if msg_num in (1,2,3,4):
+                extra_fields += ('pkt_id','dup_flag')
+            self.prepared[msg_num] = msg_modules[msg_num].sqlRowInsert(
+                extra_fields + ('key',), dbType='sqlite', placeholder='?')
+            self.pending[msg_num] = []
+
+    def new_file(self):
+        """Start the duplicate tracking over the same as a new load_data call"""
+        self.track_dups = TrackDuplicates(lookback_length=1000)
+
+    def add(self, msg_num, payload, cg_sec, row):
+        """Queue one row from decode_line"""
+        if msg_num in (1,2,3,4):
+            pkt_id,dup_flag = self.track_dups.check_packet(cg_sec,payload) # Pass in the NMEA payload string of data
+            if self.verbose:
+                print 'dup_check:',pkt_id,dup_flag,payload
+            row += (pkt_id,dup_flag)
+        row += (self.next_key,)
+        self.next_key += 1
+        self.rows += 1
+        if self.verbose:
+            print self.prepared[msg_num].sql, row
+        self.pending[msg_num].append(row)
+
+    def flush(self):
+        """Insert the queued rows of each message type and empty the queues.
+
+        If a batch fails, the rows are tried one at a time so that only the
+        bad rows are lost.
+        """
+        cu = self.cu
+        for msg_num, rows in self.pending.iteritems():
+            if not rows:
+                continue
+            ins = self.prepared[msg_num]
+            try:
+                ins.executemany(cu, rows)
+            except pysqlite2.dbapi2.OperationalError, params:
+                if -1 != str(params).find('no such table'):
+                    print 'ERROR:',str(params)
+                    sys.exit('You probably need to run with --with-create')
+                for row in rows:
+                    try:
+                        ins.execute(cu, row)
+                    except pysqlite2.dbapi2.OperationalError, params:
+                        print 'ERROR: sql error?',str(params)
+                        print '  ', ins.sql
+                        print '  ', row
+            del rows[:]
+
+    def commit(self):
+        """Write the queued rows and commit them in one transaction"""
+        self.flush()
+        self.cx.commit()
+
+
+def new_counts():
+    """@return: zeroed counts of each message type and of bad checksums"""
+    counts = {'checksum_failed': 0}
+    for msg_num in message_set:
+        counts[msg_num] = 0
+    return counts
 
-    @note: can not handle multiline AIS messages.  They must be normalized first.
-    """
 
-    v = verbose # Hmm... "v"... the irony
+def print_error(lineNum, message):
+    """Print an error from decode_line.
 
-    cu = cx.cursor()
-    lineNum = 0
+    @param message: (text before the line number, text after it)
+    """
+    print message[0],lineNum
+    sys.stdout.write(message[1])
 
-    next_key = 0
-    max_key = get_max_key(cx)
-    if max_key is not None:
-        next_key = max_key + 1
-    print 'keys_starting_at:',next_key
 
-    message_set = (1,2,3,4,5,18,19)
-    counts = {}
-    for msg_num in message_set:
-        counts[msg_num] = 0
+def report_error(errors, lineNum, message):
+    """Print an error now or keep it in errors for print_error later"""
+    if errors is None:
+        print_error(lineNum, message)
+    else:
+        errors.append((lineNum, message))
 
-    counts['checksum_failed'] = 0
 
-    track_dups = TrackDuplicates(lookback_length=1000)
+def decode_line(line, lineNum, uscg, decode_cache, counts, verbose=False, errors=None):
+    """Decode one line into a row for the database.
 
-    for line in datafile:
-        lineNum += 1
-        if lineNum%1000==0:
-            print lineNum
-            cx.commit()
+    @param lineNum: line number for the error messages
+    @param errors: list to add (lineNum, message) to for print_error rather
+    than printing the errors
+    @param uscg: Process uscg tail information to get timestamp and receive station
+    @param decode_cache: ais.decodecache.DecodeCache
+    @param counts: dict from new_counts that is updated
+    @return: (msg_num, payload, cg_sec, row) for RowWriter.add or None if
+    the line is skipped.  row does not yet have pkt_id, dup_flag or key.
+    """
+    if len(line)<15 or line[3:6] not in ('VDM|VDO'): return None # Not an AIS VHF message
 
-        if len(line)<15 or line[3:6] not in ('VDM|VDO'): continue # Not an AIS VHF message
+    #print 'FIX: validate checksum'
+    if not nmea.checksum.isChecksumValid(line):
+        print >> sys.stderr, 'WARNING: invalid checksum:\n\t',line,
+        print >> sys.stderr, '   ',nmea.checksum.checksumStr(line)
+        counts['checksum_failed'] += 1
 
-        #print 'FIX: validate checksum'
-        if not nmea.checksum.isChecksumValid(line):
-            print >> sys.stderr, 'WARNING: invalid checksum:\n\t',line,
-            print >> sys.stderr, '   ',nmea.checksum.checksumStr(line)
-            counts['checksum_failed'] += 1
+    fields=line.split(',') # FIX: use this split throughout below...
 
-        fields=line.split(',') # FIX: use this split throughout below...
+    try:
+        msg_num = binary.decodeInt[fields[5][0]]
+    except:
+        print 'line would not decode',line
+        return None
+    if verbose: print 'msg_num:',msg_num
+    if msg_num not in message_set:
+        if verbose:
+            print 'skipping',line
+            print '  not in msg set:',str(message_set)
+        return None
 
-        try:
-            msg_num = int(binary.ais6tobitvec(fields[5][0]))
-        except:
-            print 'line would not decode',line
-            continue
-        if verbose: print 'msg_num:',msg_num
-        if msg_num not in message_set:
-            if verbose:
-                print 'skipping',line
-                print '  not in msg set:',str(message_set)
-            continue
+    try:
+        bv = binary.ais6tobitvec(fields[5])
+    except:
+        print >> sys.stderr, 'ERROR: Unable to decode bits in line:\n\t',line
+        traceback.print_exc(file=sys.stderr)
+        return None
+
+    # FIX: need to take padding into account ... right before the *
+    if msg_num in (1,2,3,4,18):
+        if len(bv) != 168:
+            message = ('ERROR: skipping bad one slot message, line:',
+                       '   %s   Got length %d expected 168\n' % (line, len(bv)))
+            report_error(errors, lineNum, message)
+            return None
+    elif msg_num == 5:
+        # 426 has 2 pad bits
+        if len(bv) not in (424,426):
+            message = ('ERROR: skipping bad shipdata message, line:',
+                       '   %s   Got length %d expected 424\n' % (line, len(bv)))
+            report_error(errors, lineNum, message)
+            return None
+
+    msg_mod = msg_modules[msg_num]
 
-        try:
-            bv = binary.ais6tobitvec(fields[5])
-        except:
-            print >> sys.stderr, 'ERROR: Unable to decode bits in line:\n\t',line
-            traceback.print_exc(file=sys.stderr)
-            continue
+    try:
+        fill_bits = int(fields[6][:1])
+        msg = decode_cache.decode(fields[5],fill_bits,msg_mod,bv)
+    except:
+        message = ('ERROR:  some decode error? line:', '   %s\n' % line)
+        report_error(errors, lineNum, message)
+        return None
 
-        # FIX: need to take padding into account ... right before the *
-        if msg_num in (1,2,3,4,18):
-            if len(bv) != 168:
-                print 'ERROR: skipping bad one slot message, line:',lineNum
-                print '  ',line,
-                print '   Got length',len(bv), 'expected', 168
-                continue
-        elif msg_num == 5:
-            # 426 has 2 pad bits
-            if len(bv) not in (424,426):
-                print 'ERROR: skipping bad shipdata message, line:',lineNum
-                print '  ',line,
-                print '   Got length',len(bv), 'expected', 424
-                continue
+    counts[msg_num] += 1
 
-        ins = None
+    extra = []
+    cg_sec = None
+    if uscg:
+        match = uscg_ais_nmea_regex.search(line).groupdict()
 
         try:
-            if   msg_num== 1: ins = ais.ais_msg_1_handcoded.sqlInsert(ais.ais_msg_1_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 2: ins = ais.ais_msg_2_handcoded.sqlInsert(ais.ais_msg_2_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 3: ins = ais.ais_msg_3_handcoded.sqlInsert(ais.ais_msg_3_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 4: ins = ais.ais_msg_4_handcoded.sqlInsert(ais.ais_msg_4_handcoded.decode(bv),dbType='sqlite')
-            elif msg_num== 5: ins = ais.ais_msg_5.sqlInsert(ais.ais_msg_5.decode(bv),dbType='sqlite')
-            elif msg_num==18: ins = ais.ais_msg_18.sqlInsert(ais.ais_msg_18.decode(bv),dbType='sqlite') # Class B position
-            elif msg_num==19: ins = ais.ais_msg_19.sqlInsert(ais.ais_msg_19.decode(bv),dbType='sqlite') # Class B position
-            else:
-                print 'Warning... not handling type',msg_num,'line:',lineNum
-                continue
+            cg_sec = int(float(match['timeStamp']))
+            extra.append(cg_sec)
+            extra.append(str(datetime.datetime.utcfromtimestamp(float(match['timeStamp']))))
+            extra.append(match['station'])
         except:
-            print 'ERROR:  some decode error?','line:',lineNum
-            print '  ',line
-            continue
+            print >> sys.stderr, match
+            print >> sys.stderr, 'bad uscg sections',line,
+            return None
 
-        counts[msg_num] += 1
-
-        if uscg:
-            from aisutils.uscg import uscg_ais_nmea_regex
-            match = uscg_ais_nmea_regex.search(line).groupdict()
+        # Optional fields that are not always there
 
+        time_of_arrival = None
+        if match['time_of_arrival'] is not None:
             try:
-                cg_sec = int(float(match['timeStamp']))
-                ins.add('cg_sec', cg_sec)
-                #ins.add('cg_sec', int(float(match['timeStamp'])) )
-                ins.add('cg_timestamp', str(datetime.datetime.utcfromtimestamp(float(match['timeStamp']))) )
-                ins.add('cg_r', match['station'] )
+                time_of_arrival = float(match['time_of_arrival'])
             except:
-                print >> sys.stderr, match
-                print >> sys.stderr, 'bad uscg sections',line,
-                continue
+                print >> sys.stderr, 'WARNING: corrupted time of arrival (T) in line.  T ignored\n\t',line
+                pass # Not critical if corrupted
+        extra.append(time_of_arrival)
 
-            # Optional fields that are not always there
+        slot = None
+        if match['slot'] is not None:
+            slot = int(match['slot'])
+        extra.append(slot)
 
-            if match['time_of_arrival'] is not None:
-                try:
-                    ins.add('cg_t_arrival',  float(match['time_of_arrival']))
-                except:
-                    print >> sys.stderr, 'WARNING: corrupted time of arrival (T) in line.  T ignored\n\t',line
-                    pass # Not critical if corrupted
+    return msg_num, fields[5], cg_sec, msg_mod.sqlRow(msg, extra, dbType='sqlite')
 
 
-            if match['slot'] is not None:
-                ins.add('cg_s_slotnum',  int(match['slot']) )
+def print_throughput(lines, rows, seconds, counts):
+    """Report the message counts and how fast the load went"""
+    print counts
+    rate = 0
+    if seconds > 0:
+        rate = lines / seconds
+    print 'throughput: %d lines, %d rows in %.2f sec (%.0f lines/sec)' % (lines, rows, seconds, rate)
 
-        if msg_num in (1,2,3,4):
-            pkt_id,dup_flag = track_dups.check_packet(cg_sec,fields[5]) # Pass in the NMEA payload string of data
-            if v:
-                print 'dup_check:',pkt_id,dup_flag,fields[5]
-            ins.add('pkt_id',pkt_id)
-            ins.add('dup_flag',dup_flag)
 
+def load_data(cx, datafile=sys.stdin, verbose=False, uscg=True):
+    """Try to read data from an open file object.
 
-        ins.add('key',next_key)
-        next_key += 1
+    Not yet well tested.
 
-        if verbose:
-            print str(ins)
-        try:
-            cu.execute(str(ins))
-        except pysqlite2.dbapi2.OperationalError, params:
-        #except OperationalError,  params:
-            if -1 != params.message.find('no such table'):
-                print 'ERROR:',params.message
-                sys.exit('You probably need to run with --with-create')
-            print 'params',params
-            print type(params)
-            print 'ERROR: sql error?','line:',lineNum
-            print '  ', str(ins)
-            print '  ',line
-
-            if False:
-                # Give some debugging flexibility
-                from IPython.Shell import IPShellEmbed
-                ipshell = IPShellEmbed(argv=[])
-                ipshell()
-                sys.exit('Gave up')
+    @param cx: database connection
+    @param verbose: pring out more if true
+    @param uscg: Process uscg tail information to get timestamp and receive station
+    @rtype: dict
+    @return: counts of each message type
+
+    @note: can not handle multiline AIS messages.  They must be normalized first.
+    """
+    start_time = time.time()
+    writer = RowWriter(cx, uscg=uscg, verbose=verbose)
+    print 'keys_starting_at:',writer.next_key
+
+    counts = new_counts()
+    decode_cache = ais.decodecache.DecodeCache(numeric='float') # Skip decoding duplicate receptions
+
+    lineNum = 0
+    for line in datafile:
+        lineNum += 1
+        if lineNum%1000==0:
+            print lineNum
+            writer.commit()
+
+        decoded = decode_line(line, lineNum, uscg, decode_cache, counts, verbose)
+        if decoded is not None:
+            writer.add(*decoded)
 
 #        if payload_table and msg_num in (1,2,3):
 #            payload = fields[5]
 #            key = cu.execute('SELECT key from')
 
-    print counts
-    cx.commit()
+    writer.commit()
+    print 'decode cache:',decode_cache.stats()
+    print_throughput(lineNum, writer.rows, time.time() - start_time, counts)
+    return counts
+
+
+def file_chunks(filenames, chunk_bytes=8*1024*1024):
+    """Split files into byte ranges that start and end on line boundaries.
+
+    @param filenames: files in the order they should be loaded
+    @param chunk_bytes: about how much of a file to put in each chunk
+    @return: list of (filename, start, end) in file order
+    """
+    chunks = []
+    for filename in filenames:
+        size = os.path.getsize(filename)
+        f = open(filename,'rb')
+        start = 0
+        while start < size:
+            end = start + chunk_bytes
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline() # Finish the line that the chunk ends in
+                end = f.tell()
+            chunks.append((filename, start, end))
+            start = end
+        f.close()
+    return chunks
+
+
+worker_decode_cache = None
+"""DecodeCache of each pool process.  Made by the first decode_chunk call."""
+
+def decode_chunk(task):
+    """Pool worker that decodes one chunk from file_chunks.
+
+    The worker does not know how many lines come before its chunk, so
+    the errors are handed back with line numbers within the chunk for
+    the parent to print.
+
+    @param task: (filename, start, end, uscg, verbose)
+    @return: (filename, start, number of lines, counts, list of decode_line
+    results, list of errors from decode_line)
+    """
+    global worker_decode_cache
+    if worker_decode_cache is None:
+        worker_decode_cache = ais.decodecache.DecodeCache(numeric='float')
+    filename, start, end, uscg, verbose = task
+    counts = new_counts()
+    results = []
+    errors = []
+    f = open(filename,'rb')
+    f.seek(start)
+    pos = start
+    lineNum = 0
+    while pos < end:
+        line = f.readline()
+        if not line:
+            break
+        pos += len(line)
+        lineNum += 1
+        decoded = decode_line(line, lineNum, uscg, worker_decode_cache, counts, verbose, errors)
+        if decoded is not None:
+            results.append(decoded)
+    f.close()
+    return filename, start, lineNum, counts, results, errors
+
+
+def load_files_parallel(cx, filenames, jobs=None, chunk_bytes=8*1024*1024,
+                        verbose=False, uscg=True):
+    """Decode files in a pool of processes and write from this one.
+
+    The chunks go to one RowWriter in file order, so the keys and packet
+    ids are the same as loading the files one after the other with
+    load_data.  Each chunk is committed as one transaction.  At most two
+    chunks per process are decoded ahead of the writer so that memory
+    stays bounded.
+
+    @param cx: database connection
+    @param filenames: files to load in order
+    @param jobs: number of decode processes.  Defaults to the number of CPUs.
+    @param chunk_bytes: about how much of a file to decode in each task
+    @rtype: dict
+    @return: counts of each message type
+    """
+    start_time = time.time()
+    if jobs is None:
+        jobs = multiprocessing.cpu_count()
+    chunks = file_chunks(filenames, chunk_bytes)
+    print 'chunks:',len(chunks),'jobs:',jobs
+
+    writer = RowWriter(cx, uscg=uscg, verbose=verbose)
+    print 'keys_starting_at:',writer.next_key
+
+    counts = new_counts()
+    lines = 0
+    tasks = iter(chunks)
+    waiting = collections.deque()
+    pool = multiprocessing.Pool(jobs)
+
+    def submit():
+        chunk = next(tasks, None)
+        if chunk is not None:
+            waiting.append(pool.apply_async(decode_chunk, (chunk + (uscg, verbose),)))
+
+    try:
+        for i in range(2*jobs):
+            submit()
+        file_lines = 0 # Lines before the chunk in its file
+        while waiting:
+            filename, start, numLines, chunk_counts, results, errors = waiting.popleft().get()
+            submit()
+            if 0 == start:
+                print 'processing file:',filename
+                writer.new_file()
+                file_lines = 0
+            for lineNum, message in errors:
+                print_error(file_lines + lineNum, message)
+            file_lines += numLines
+            for decoded in results:
+                writer.add(*decoded)
+            writer.commit()
+            lines += numLines
+            for key, count in chunk_counts.iteritems():
+                counts[key] += count
+            print lines
+    finally:
+        pool.terminate()
+        pool.join()
+
+    print_throughput(lines, writer.rows, time.time() - start_time, counts)
+    return counts
 
 
 ############################################################
@@ -367,10 +565,18 @@ if __name__=='__main__':
 #    parser.add_option('-p','--payload-table', dest='payload_table', default=False, action='store_true',
 #                      help='Add an additional table that stores the NMEA payload text')
 
+    parser.add_option('-j','--jobs',dest='jobs',default=1,type='int',
+                      help='Number of processes to decode with.  0 for one per CPU.  '
+                      +'More than 1 splits the files into chunks [default: %default]')
+    parser.add_option('--chunk-size',dest='chunkSize',default=8,type='int',
+                      help='Megabytes of log in each chunk for --jobs [default: %default]')
+
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
                       help='Make program output more verbose info as it runs')
 
     (options,args) = parser.parse_args()
+    if options.chunkSize <= 0:
+        parser.error('--chunk-size must be at least 1')
     cx = sqlite.connect(options.databaseFilename)
 
     if options.create_tables:
@@ -380,15 +586,24 @@ if __name__=='__main__':
 
 
     if len(args)==0:
-        args = (sys.stdin,)
         print 'processing from stdin'
-
-    for filename in args:
-        print 'processing file:',filename
-        load_data(
+        load_data(cx, sys.stdin, verbose=options.verbose, uscg=options.uscgTail)
+    elif options.jobs != 1:
+        load_files_parallel(
             cx,
-            file(filename,'r'),
+            args,
+            jobs=options.jobs or None,
+            chunk_bytes=options.chunkSize*1024*1024,
             verbose=options.verbose,
             uscg=options.uscgTail,
             )
+    else:
+        for filename in args:
+            print 'processing file:',filename
+            load_data(
+                cx,
+                file(filename,'r'),
+                verbose=options.verbose,
+                uscg=options.uscgTail,
+                )
 #            payload_table=options.payload_table
@@ -6,9 +6,12 @@ import math
 import sqlite3
 import datetime
 
+import numpy
 from pyproj import Proj
 import pytz
 
+from aisutils.decimate import Decimator
+
 
 EST = pytz.timezone('EST')
 
@@ -24,11 +27,14 @@ def lon_to_utm_zone(lon):
 def dist_utm_km (p1, p2):
     return dist_utm_m (p1[0],p1[1], p2[0],p2[1]) / 1000.
 
+utm_projs = {} # zone -> Proj.  Making a Proj is slow.
+
 def dist_utm_m (lon1, lat1, lon2, lat2):
     'calculate 2D distance.  Should be good enough for points that are close together'
     zone = lon_to_utm_zone( (lon1 + lon2 ) / 2.) # Just don't cross the dateline!
-    params = {'proj':'utm', 'zone':zone}
-    proj = Proj(params)
+    proj = utm_projs.get(zone)
+    if proj is None:
+        proj = utm_projs[zone] = Proj({'proj':'utm', 'zone':zone})
 
     utm1 = proj(lon1,lat1)
     utm2 = proj(lon2,lat2)
@@ -36,14 +42,14 @@ def dist_utm_m (lon1, lat1, lon2, lat2):
     return dist(utm1[0],utm1[1],utm2[0],utm2[1])
 
 
-class Decimate:
+class Decimate(Decimator):
+    '''aisutils.decimate.Decimator that checks the distances that are
+    close to min_dist_m in UTM'''
     def __init__(self,min_dist_m=200, min_time_s=600):
         '''min_dist: meters till we must emit
         min_time:
         '''
-        self.ship_status = {} # indexed by MMSI
-        self.min_dist_m = min_dist_m
-        self.min_time_s = min_time_s
+        Decimator.__init__(self, min_dist_m, min_time_s, exactDistance=dist_utm_m)
 
     def add_pos(self,mmsi,x,y,timestamp):
         '''
@@ -52,23 +58,17 @@ class Decimate:
         y - latitude (decimal degrees)
         Return true if position should be emitted.  False, if redunant
         '''
-        if mmsi not in self.ship_status:
-            self.ship_status[mmsi] = {'x':x,'y':y, 'timestamp': timestamp}
-            return True
-
-        last = self.ship_status[mmsi]
-
-        dt = timestamp - last['timestamp']
-        if dt >= self.min_time_s:
-            self.ship_status= {'x':x,'y':y, 'timestamp': timestamp}
-            return True
+        return self.add(mmsi,x,y,timestamp)
 
-        dist_m = dist_utm_m(x,y, last['x'], last['y'])
-        if dist_m >= self.min_dist_m:
-            self.ship_status= {'x':x,'y':y, 'timestamp': timestamp}
-            return True
+    def add_positions(self,mmsi,x,y,timestamp):
+        '''
+        Column version of add_pos for the arrays from ais.batch.decode_positions
+        such as pos['mmsi'], pos['lon'], pos['lat'], pos['cg_sec'].
+        Positions must be in time order.
 
-        return False
+        Return a boolean array that is true for the positions to emit.
+        '''
+        return self.addColumns(mmsi,x,y,timestamp)
 
 
 class Bbox:
@@ -114,53 +114,70 @@ def main():
     cx = sqlite3.connect(options.database_file)
     cx.row_factory = sqlite3.Row # Allow access of fields by name
 
-    if options.mmsi is None:
-        mmsi_list = [ row['userid'] for row in cx.execute('SELECT distinct(userid) FROM position;') ]
-    else:
-        mmsi_list = (options.mmsi,)
-    print 'mmsi_list:',mmsi_list
-
-
-    for mmsi in mmsi_list:
-
-        decimate = Decimate(min_dist_m=options.delta_dist_m, min_time_s=options.delta_time_sec)
-        if verbose: print 'Decimate options: %d m  and %d sec' % (options.delta_dist_m, options.delta_time_sec)
-        keep_cnt = 0
-        toss_cnt = 0
-        outside_cnt = 0
-
-        xymt = file(str(mmsi)+'.xymt','w')
-        csv = file(str(mmsi)+'.csv','w')
-        csv.write('mmsi,x,y,date/time UTC,date/time EST\n')
-
-        print 'mmsi:',mmsi
-        for row_num, row in enumerate (cx.execute('SELECT userid,longitude,latitude,cg_sec FROM position WHERE userid=%d AND latitude<90 ORDER by cg_sec;' % mmsi) ):
-            if options.verbose and row_num % 10000 == 0: print row_num
-            #print dict(row)
-            x = float(row['longitude'])
-            y = float(row['latitude'])
-            if bbox.is_outside(x,y):
-                outside_cnt += 1
-                continue
-            keep = decimate.add_pos(367314640, x, y, int(row['cg_sec']))
-            if keep:
-                keep_cnt += 1
-                row = dict(row)
-                #print row
-                xymt.write('{longitude} {latitude} {UserID} {cg_sec}\n'.format(**row))
-                d = datetime.datetime.utcfromtimestamp(row['cg_sec'])
-
-                d_with_tz = datetime.datetime(d.year,d.month,d.day,d.hour,d.second, tzinfo=pytz.utc)
-                d_est = d_with_tz.astimezone(EST)
-
-                csv.write('{mmsi},{x},{y},{d},{d_est}\n'.format(mmsi=row['UserID'], x=x, y=y, d=d.strftime('%Y/%d/%m %H:%M:%S'), d_est=d_est.strftime('%Y/%d/%m %H:%M:%S')))
-                #pass
+    # One pass over all the ships in time order rather than a query per ship
+    decimate = Decimate(min_dist_m=options.delta_dist_m, min_time_s=options.delta_time_sec)
+    if verbose: print 'Decimate options: %d m  and %d sec' % (options.delta_dist_m, options.delta_time_sec)
+    keep_cnt = {}
+    toss_cnt = {}
+    outside_cnt = 0
+
+    sql = 'SELECT userid,longitude,latitude,cg_sec FROM position WHERE latitude<90'
+    if options.mmsi is not None:
+        sql += ' AND userid=%d' % options.mmsi
+    sql += ' ORDER BY cg_sec;'
+
+    outputs = {} # mmsi -> (xymt, csv).  Closed and reopened to append when there are too many.
+    started = set()
+    max_open = 200
+
+    for row_num, row in enumerate (cx.execute(sql)):
+        if options.verbose and row_num % 10000 == 0: print row_num
+        #print dict(row)
+        mmsi = row['userid']
+        x = float(row['longitude'])
+        y = float(row['latitude'])
+        if bbox.is_outside(x,y):
+            outside_cnt += 1
+            continue
+        cg_sec = int(row['cg_sec'])
+        if not decimate.add_pos(mmsi, x, y, cg_sec):
+            toss_cnt[mmsi] = toss_cnt.get(mmsi,0) + 1
+            continue
+        keep_cnt[mmsi] = keep_cnt.get(mmsi,0) + 1
+
+        if mmsi not in outputs:
+            if len(outputs) >= max_open:
+                for xymt, csv in outputs.itervalues():
+                    xymt.close()
+                    csv.close()
+                outputs = {}
+            if mmsi in started:
+                outputs[mmsi] = (file(str(mmsi)+'.xymt','a'), file(str(mmsi)+'.csv','a'))
             else:
-                toss_cnt += 1
-
-        print 'keep_cnt: ',keep_cnt
-        print 'toss_cnt: ',toss_cnt
-        print 'outside_cnt: ',outside_cnt
+                print 'mmsi:',mmsi
+                started.add(mmsi)
+                outputs[mmsi] = (file(str(mmsi)+'.xymt','w'), file(str(mmsi)+'.csv','w'))
+                outputs[mmsi][1].write('mmsi,x,y,date/time UTC,date/time EST\n')
+        xymt, csv = outputs[mmsi]
+
+        xymt.write('%s %s %d %d\n' % (row['longitude'], row['latitude'], mmsi, cg_sec))
+        d = datetime.datetime.utcfromtimestamp(row['cg_sec'])
+
+        d_with_tz = d.replace(tzinfo=pytz.utc)
+        d_est = d_with_tz.astimezone(EST)
+
+        csv.write('{mmsi},{x},{y},{d},{d_est}\n'.format(mmsi=mmsi, x=x, y=y, d=d.strftime('%Y/%d/%m %H:%M:%S'), d_est=d_est.strftime('%Y/%d/%m %H:%M:%S')))
+
+    for xymt, csv in outputs.itervalues():
+        xymt.close()
+        csv.close()
+
+    for mmsi in sorted(started):
+        print 'mmsi:',mmsi,'keep_cnt:',keep_cnt.get(mmsi,0),'toss_cnt:',toss_cnt.get(mmsi,0)
+    print 'keep_cnt: ',sum(keep_cnt.values())
+    print 'toss_cnt: ',sum(toss_cnt.values())
+    print 'outside_cnt: ',outside_cnt
+    print 'decimate:',decimate.stats()
 
 
 if __name__ == '__main__':
@@ -12,6 +12,7 @@ import sys
 
 from aisutils import binary
 from aisutils import aisstring
+from aisutils import logindex
 from aisutils.BitVector import BitVector
 
 
@@ -28,15 +29,24 @@ if __name__=='__main__':
     parser.add_option('-o','--output',dest='outputFilename',default=None,
                       help='Name of the file to write [default: stdout]')
 
+    logindex.addQueryOptions(parser)
+
     (options,args) = parser.parse_args()
     o = sys.stdout
     if None != options.outputFilename: o = open(options.outFilename,'w')
 
 
+    useIndex = options.mmsi is not None or options.start is not None or options.end is not None
+
     print args
     for filename in args:
         print filename
-        for line in file(filename):
+        if useIndex:
+            # Seek straight to the matching lines with the sidecar index
+            lines = logindex.query(filename, options.mmsi, options.start, options.end)
+        else:
+            lines = file(filename)
+        for line in lines:
             if line[0]=='#':
                 continue
             fields = line.split(',')[:6]
@@ -1,11 +1,18 @@
 #!/usr/bin/env python
 """Filter AIS data to remove duplicates.
 
+Reads stdin unless log files are given.  With --mmsi, --start or --end
+only the matching lines of the files are read using the
+aisutils.logindex sidecar files.
+
  TODO(schwehr):Be able to look out across a couple seconds for messages that are dup receives
 """
 
+from optparse import OptionParser
 import sys
 
+from aisutils import logindex
+
 
 def getMsg(nmeaMsg):
     ''' Return everything in the base nmea message'''
@@ -49,11 +56,22 @@ def filterInTimestamp(lineList):
                 break
 
 
+parser = OptionParser(usage="%prog [options] [file1.ais file2.ais ...]")
+logindex.addQueryOptions(parser)
+(options,args) = parser.parse_args()
+
+if len(args)==0:
+    lines = sys.stdin
+elif options.mmsi is not None or options.start is not None or options.end is not None:
+    lines = logindex.queryFiles(args, options)
+else:
+    lines = (line for filename in args for line in file(filename))
+
 tsOld = None
 
 linesInTS=[] # Collection of all lines in the time
 
-for line in sys.stdin:
+for line in lines:
     ts = line.split(',')[-1].strip()
     if ts!=tsOld:
         if None!=tsOld:
@@ -20,32 +20,56 @@ Trying to do better than ais_nmea_uptime*.py
 @status: In progress
 '''
 import sys
+from optparse import OptionParser
+from aisutils import logindex
 from aisutils.uscg import uscg_ais_nmea_regex
 
+parser = OptionParser(usage="%prog [options] file1.ais file2.ais")
+parser.add_option('--time-slop',dest='time_slop',default=None,type='float',
+                  help='Only read the lines of file1 within this many seconds of the '
+                  +'time range of file2.  Uses the log index of file1.  '
+                  +'[default: read all of file1]')
+(options,args) = parser.parse_args()
+if len(args) != 2:
+    parser.error('need file1 and file2')
+
 use_line_num = True # else use timestamp
 
+lines = None
+if options.time_slop is not None:
+    # Only the part of file1 that overlaps file2 in time can match
+    time_range = logindex.logTimeRange(args[1])
+    if time_range is not None:
+        lines = logindex.query(args[0], start=time_range[0] - options.time_slop,
+                               end=time_range[1] + options.time_slop, numbered=True)
+if lines is None:
+    lines = enumerate(file(args[0]), 1)
+
 msg_lut = {}
-for line_num, line in enumerate(file(sys.argv[1])):
+line_count = 0
+for line_num, line in lines:
+    line_count += 1
     line = line.strip()
     try:
         match = uscg_ais_nmea_regex.search(line).groupdict()
     except:
         print 'ignoring line:',line.strip()
+        continue
     if use_line_num:
-        msg_lut[match['body']] = line_num + 1
+        msg_lut[match['body']] = line_num
     else:
-        msg_lut[match['body']] = msg['timeStamp']
-print 'msgs in lut:', len(msg_lut),'from',line_num+1,'lines'
+        msg_lut[match['body']] = match['timeStamp']
+print 'msgs in lut:', len(msg_lut),'from',line_count,'lines'
 
-#o = file(sys.argv[2]+'.inboth','w')
+#o = file(args[1]+'.inboth','w')
 if use_line_num:
-    o = file(sys.argv[2]+'.linenum','w')
+    o = file(args[1]+'.linenum','w')
 else:
-    o = file(sys.argv[2]+'.time','w')
+    o = file(args[1]+'.time','w')
 
 
 matches = 0
-for line_num, line in enumerate(file(sys.argv[2])):
+for line_num, line in enumerate(file(args[1])):
     if line_num % 500 == 0: sys.stderr.write('line %d\n' % line_num)
     try:
         match = uscg_ais_nmea_regex.search(line).groupdict()
@@ -26,9 +26,11 @@ batch of messages.
 import sys
 import os
 
+from aisutils import dedup
+
 
 def remove_dups(in_file, outfile, lookback_dist=1000, pos_only=False, verbose = False):
-    payloads = []
+    dups = dedup.Duplicates(maxCount=lookback_dist+1)
     if isinstance(in_file,str):
         in_file = file(in_file)
 
@@ -50,14 +52,10 @@ def remove_dups(in_file, outfile, lookback_dist=1000, pos_only=False, verbose =
             o.write(line)
             continue
 
-        if payload in payloads:
+        if dups.check(payload)[1]:
             dropped += 1
             continue
 
-        if len(payloads) > lookback_dist:
-            payloads.pop(0)
-
-        payloads.append(payload)
         o.write(line)
 
 def main():
@@ -8,7 +8,6 @@ the same timestamp (second).
 
 License: Apache 2.0
 
-TODO(schwehr): report on the number of message fragments that got dropped
 TODO(schwehr): allow for a single receiver and no uscg station
 TODO(schwehr): Allow the parts to be separated by one (or two?) seconds for the
     messages that go over timestamp boundaries between parts.
@@ -18,6 +17,7 @@ import sys
 import traceback
 
 from nmea.checksum import isChecksumValid,checksumStr # Needed for checksums
+from aisutils.normalize import Reassembler
 
 def assembleAisNmeaMessages(infile=sys.stdin,
                             outfile=sys.stdout,
@@ -28,13 +28,18 @@ def assembleAisNmeaMessages(infile=sys.stdin,
                             window=2,
                             treatABequal=False,
                             pass_invalid_checksums=False,
-                            allow_missing_timestamps=False):
+                            allow_missing_timestamps=False,
+                            ttl=30,
+                            maxPending=10000):
     '''
     Put together messages
     @param infile: file stream like object to read from
     @param outfile: some object that can take write messages for output
     @param window: number of seconds to allow the later parts of a multiline message to span
     @type window: int
+    @param ttl: seconds to hold on to an unfinished message
+    @param maxPending: most unfinished messages to hold on to
+    @return: reassembly counts from L{Reassembler.stats}
     '''
     o = outfile
 
@@ -42,8 +47,8 @@ def assembleAisNmeaMessages(infile=sys.stdin,
         print 'Without uscg not yet supported.'
         assert False
 
-    # Put partial messages in a queue by station so that they can be reassembled
-    buffers = {}
+    # Put partial messages in a buffer by station so that they can be reassembled
+    buffers = Reassembler(ttl, maxPending)
     line_num = 0
     invalid_checksums = 0
 
@@ -101,21 +106,16 @@ def assembleAisNmeaMessages(infile=sys.stdin,
             # seqId and Channel make a unique stream
             bufferSlot = station + fields[3] + fields[4]
 
-        newPacket = (payload,station,timestamp)
-        if sentenceNum == 1:
-            buffers[bufferSlot] = [newPacket] # Overwrite any partials
-            continue
+        try:
+            timeSec = float(timestamp)
+        except ValueError:
+            timeSec = None
 
-        if totNumSentences == sentenceNum:
+        newPacket = (payload,station,timestamp)
+        dangling = buffers.dangling
+        parts = buffers.add(bufferSlot, sentenceNum, totNumSentences, newPacket, timeSec, station)
+        if parts is not None:
             # Finished a message
-            if bufferSlot not in buffers:
-                if verbose: print 'Do not have the preceeding packets for line'
-                if verbose: print '  ',line
-                continue
-            buffers[bufferSlot].append(newPacket)
-            parts = buffers[bufferSlot]  # Now have all the pieces.
-            del buffers[bufferSlot]  # Clear out the used packets to save memory.
-
             # Sanity check
             ok = True
             ts1 = None
@@ -166,9 +166,9 @@ def assembleAisNmeaMessages(infile=sys.stdin,
             # FIX: Why do I have to do this last strip?
             o.write(out_str.strip() + '\n')
 
-            continue
-
-        buffers[bufferSlot].append(newPacket)
+        elif verbose and dangling != buffers.dangling:
+            print 'Do not have the preceeding packets for line'
+            print '  ',line
       except Exception, inst:
           # Catch all exceptions
           sys.stderr.write('ERROR... some exception for this line:\n')
@@ -179,6 +179,12 @@ def assembleAisNmeaMessages(infile=sys.stdin,
 
     print >> sys.stderr, 'invalid checksums found...\t',
     print >> sys.stderr, '%d\t(of %d)' % (invalid_checksums,line_num)
+    buffers.expire(float('inf'))
+    stats = buffers.stats()
+    print >> sys.stderr, 'multiline messages...\t',
+    print >> sys.stderr, ('%(assembled)d assembled, %(expired)d expired, %(overflow)d overflow, '
+                          '%(replaced)d replaced, %(dangling)d dangling' % stats)
+    return stats
 
 
 if __name__=='__main__':
@@ -210,6 +216,10 @@ if __name__=='__main__':
                             'strings can be considered for joining '
                             '[default: %default]')
 
+        parser.add_option('--ttl', dest='ttl', type='float', default=30,
+                          help='Seconds to hold on to the start of an unfinished '
+                            'multiline message [default: %default]')
+
         parser.add_option(
             '-T','--allow-missing-timestamps', default=False,
             action='store_true',
@@ -240,6 +250,7 @@ if __name__=='__main__':
                 treatABequal=options.treatABequal,
                 pass_invalid_checksums=options.pass_invalid_checksums,
                 allow_missing_timestamps = options.allow_missing_timestamps,
+                ttl=options.ttl,
                 )
 
         for filename in args:
@@ -255,4 +266,5 @@ if __name__=='__main__':
                 treatABequal = options.treatABequal,
                 pass_invalid_checksums=options.pass_invalid_checksums,
                 allow_missing_timestamps = options.allow_missing_timestamps,
+                ttl=options.ttl,
                 )
@@ -213,6 +213,7 @@ if __name__=='__main__':
 
     tracksFile = file(basename+'-tracks.dat','w')
     trackNum = 0
+    tracks = [] # Rasterized a batch at a time with Grid.addTracks
     for trackline in cu.fetchall():
         trackNum+=1
         if trackNum % 50 == 0:
@@ -229,7 +230,11 @@ if __name__=='__main__':
             tracksFile.write(str(pt[0])+' '+str(pt[1])+' 0\n')
         #cells = getMultiSegLineCells(bbox,step,trackseq,verbose)
         #print cells
-        g.addMultiSegLine(trackseq)
+        tracks.append(trackseq)
+        if len(tracks) >= 10000:
+            g.addTracks(tracks)
+            tracks = []
+    g.addTracks(tracks)
 
     tracksFile.write('\n')
 
@@ -90,6 +90,7 @@ def main():
             for item in line.split():
                 tracks.append(int(item))
 
+    trackseqs = [] # Rasterized a batch at a time with Grid.addTracks
     #cu.execute('SELECT AsText(Transform(track,32619)) FROM tpath WHERE id IN ('+tracks+');')
     #for track_count,track_wkt in enumerate(cu.fetchall()):
     for track_count, track_id in enumerate(tracks):
@@ -102,7 +103,11 @@ def main():
         if len(trackseq)<2:
             print 'TOO SHORT: ',track_count, len(trackseq)
             sys.exit('crap')
-        g.addMultiSegLine(trackseq)
+        trackseqs.append(trackseq)
+        if len(trackseqs) >= 10000:
+            g.addTracks(trackseqs)
+            trackseqs = []
+    g.addTracks(trackseqs)
 
     print 'track_count:',track_count
 
@@ -46,10 +46,9 @@ egrep '!AIVDM,1,1,[0-9]?,[AB],[1-3]' biglog.ais > pos_msgs.ais
  TODO(schwehr):allow for buffering.  poly._transform into more a better projection, buffer and then convert back
 '''
 
-import sys, os
-import ais.ais_msg_1 as ais_msg_1
-from aisutils import binary
-from cartography.geometry import Geometry
+import sys, os, time
+import ais
+from aisutils import spatialfilter
 
 
 stellwagen=(
@@ -304,6 +303,14 @@ gsctss=(
 
 # FIX: this hard coding is not going to work in the long run!
 
+zones = (
+    ('stellwagen', stellwagen),
+    ('stellwagen_5nm', stellwagen_5nm),
+    ('gsc', gsc),
+    ('gsctss', gsctss),
+    )
+'''Regions checked together by --crossings'''
+
 
 
 def listofpoints2PolygonWKT(aList):
@@ -331,13 +338,32 @@ gsctssWKT = listofpoints2PolygonWKT(gsctss)
 
 def filter_file(infile, outfile, polygonWKT, verbose=False):
     '''
-    For messages 1,2, and 3, see if the message is within the bounding box and send it to outfile if it is.
+    For messages 1,2,3,18 and 19, see if the message is within the polygon and send it to outfile if it is.
 
     Polygon should look something like this... 'POLYGON ((-1.0 50.5, -0.5 51.2, 0.3 50.9, -1 50.5))'
 
     param polygon: bounding region for the query
     type polygon: WKT polygon string
     '''
+    poly = spatialfilter.PolygonFilter.fromWKT(polygonWKT)
+
+    if verbose:
+        print 'minLon maxLon minLat maxLat filename'
+        print poly.minX/600000., poly.maxX/600000., poly.minY/600000., poly.maxY/600000.
+
+    count = 0
+    for line in spatialfilter.filterLines(infile, poly):
+        outfile.write(line)
+        count += 1
+
+    return count
+
+def filter_file_geometry(infile, outfile, polygonWKT, verbose=False):
+    '''
+    The original filter_file that tests each point with pcl-core.  Kept
+    as the reference for --benchmark.
+    '''
+    from cartography.geometry import Geometry
 
     poly = Geometry.fromWKT(polygonWKT)
     bbox = poly.envelope()
@@ -346,32 +372,19 @@ def filter_file(infile, outfile, polygonWKT, verbose=False):
     miny = bbox.miny
     maxy = bbox.maxy
 
-    if verbose:
-        print 'minLon maxLon minLat maxLat filename'
-        print minx, maxx, miny, maxy
-
     count = 0
-    linenum=0
     for line in infile:
-        linenum += 1
-        if linenum%1000==0:
-            sys.stderr.write('line '+str(linenum)+' -- count='+str(count)+'\n')
-        # Trick: Only handle the first 19 characters since that contains the lon/lat
+        # Trick: Only handle the first 25 characters since that contains the lon/lat
         txt = line.split(',')[5][:25]
-        #print txt
-        bv = binary.ais6tobitvec(txt) #line[5][:19]
+        if txt[:1] not in ('1','2','3','B','C'): continue
+        view = ais.msgView(txt, numeric='float') # Only lon and lat get decoded
 
-        # Try to throw out points as soon as possible.  Use float rather than decimal.  faster??  Maybe not
-        #lon = ais_msg_1.decodelongitude(bv)
-        lon = binary.signedIntFromBV(bv[61:89])/600000.0
+        # Try to throw out points as soon as possible
+        lon = view.longitude
         if lon<minx or lon>maxx: continue
-        #print 'close1:',lon
-        #lat = ais_msg_1.decodelatitude(bv)
-        lat = binary.signedIntFromBV(bv[89:116])/600000.0
+        lat = view.latitude
         if lat<miny or lat>maxy: continue
 
-        #print 'close2: POINT ('+str(lon)+' '+str(lat)+')'
-
         point = Geometry.fromWKT('POINT ('+str(lon)+' '+str(lat)+')')
         inside = point.within(poly)
         if 1==inside:
@@ -395,26 +408,73 @@ def filter_box(infile, outfile, west, east, lower, upper, verbose=False):
         print 'xrange:',west,east
         print 'yrange:',lower,upper
 
+    box = spatialfilter.BoxFilter(west, east, lower, upper)
     count = 0
-    linenum=0
-    for line in infile:
-        linenum += 1
-        if linenum%1000==0: sys.stderr.write('line '+str(linenum)+'\n')
-        # Trick: Only handle the first 19 characters since that contains the lon/lat
-        txt = line.split(',')[5][:25]
-        bv = binary.ais6tobitvec(txt) #line[5][:19]
-        lon = float(ais_msg_1.decodelongitude(bv))
-        lat = float(ais_msg_1.decodelatitude(bv))
-
-        if west>lon or lon>east:
-            #print 'skip on lon',type(west),type(lon),type(east), west>lon,lon>east
-            continue
-        if lower>lat or lat>upper:
-            continue
-        if verbose:
-            print 'ACCEPT',lon,lat
+    for line in spatialfilter.filterLines(infile, box):
         outfile.write(line)
         count+=1
+    return count
+
+def crossings(infiles, outfile, verbose=False):
+    '''
+    Write when each vessel enters or leaves each of the zones in one pass.
+    Points are checked against all zones at once in blocks of lines.
+    The files are read as one stream, so a vessel that crosses while the
+    logs go from one day to the next still gets its event and the vessel
+    counts are for all of the files.
+
+    Lines written are: cg_sec mmsi zone enter|exit lon lat
+
+    @param infiles: open log files in time order
+    @return: number of events written
+    '''
+    import itertools
+    import numpy
+    from ais import batch
+    from aisutils import geofence
+
+    fence = geofence.Geofence(zones)
+    tracker = geofence.CrossingTracker(len(zones))
+    names = fence.names
+    vessels = [set() for name in names]
+    count = 0
+    for pos in batch.iter_positions(itertools.chain(*infiles)):
+        inside = fence.membership(pos['lon'], pos['lat'])
+        for i in range(len(names)):
+            vessels[i].update(numpy.unique(pos['mmsi'][inside[i]]).tolist())
+        for point, zone, entered in zip(*tracker.update(pos['mmsi'], inside)):
+            p = pos[point]
+            action = 'exit'
+            if entered: action = 'enter'
+            outfile.write('%d %d %s %s %.6f %.6f\n' % (p['cg_sec'], p['mmsi'], names[zone], action, p['lon'], p['lat']))
+            count += 1
+    for name, mmsis in zip(names, vessels):
+        outfile.write('# %s vessels: %d\n' % (name, len(mmsis)))
+    return count
+
+class NullFile:
+    '''Output that throws away what is written'''
+    def write(self, data):
+        pass
+
+def benchmark(lines, polygonWKT):
+    '''
+    Print the lines/sec of filter_file and of the pcl-core based
+    filter_file_geometry on the same lines.  Only position report lines
+    should be passed in since the geometry version can not skip others.
+    '''
+    runs = [('spatialfilter', filter_file), ('geometry', filter_file_geometry)]
+    for name, func in runs:
+        start = time.time()
+        try:
+            count = func(lines, NullFile(), polygonWKT)
+        except ImportError, e:
+            print '%-14s skipped: %s' % (name, str(e))
+            continue
+        elapsed = time.time() - start
+        rate = 0
+        if elapsed > 0: rate = len(lines) / elapsed
+        print '%-14s %8d lines %6d inside %8.3f sec %10.0f lines/sec' % (name, len(lines), count, elapsed, rate)
 
 ######################################################################
 if __name__=='__main__':
@@ -464,6 +524,12 @@ if __name__=='__main__':
     parser.add_option('-Y','--lat-max', dest='latMax', type='float', default=37.25
                       ,help=' [default: %default]')
 
+    parser.add_option('--crossings',dest='crossings',default=False,action='store_true'
+                      ,help='Report vessels entering and leaving all of the built in regions')
+
+    parser.add_option('--benchmark',dest='benchmark',default=False,action='store_true'
+                      ,help='Time the polygon filter against the pcl-core version and exit')
+
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true'
                       ,help='Make the program be verbose')
 
@@ -472,13 +538,32 @@ if __name__=='__main__':
 
 
 
+    if options.benchmark:
+        infiles = [sys.stdin]
+        if len(args)>0: infiles = [open(filename) for filename in args]
+        lines = []
+        for infile in infiles:
+            for line in infile:
+                fields = line.split(',')
+                if len(fields)>5 and fields[5][:1] in ('1','2','3') and len(fields[5])>=25:
+                    lines.append(line)
+        benchmark(lines, options.polygonWKT)
+        sys.exit(0)
+
     outFile = sys.stdout
     if None != options.outputFilename: outFile = open(options.outputFilename,'w')
 
+    if options.crossings:
+        infiles = [sys.stdin]
+        if len(args)>0: infiles = [open(filename) for filename in args]
+        count = crossings(infiles, outFile, options.verbose)
+        if (options.verbose): sys.stderr.write('Crossings: '+str(count)+'\n')
+        sys.exit(0)
+
     if options.useBox:
         x = options.lonMin; X = options.lonMax
         y = options.latMin; Y = options.latMax
-        if verbose: print 'using bbox',x,X,'    ',y,Y
+        if options.verbose: print 'using bbox',x,X,'    ',y,Y
         if len(args)==0:
             count = filter_box(sys.stdin,outFile,x,X,y,Y,options.verbose)
             if (options.verbose): sys.stderr.write('Found points inside: '+str(count)+'\n')
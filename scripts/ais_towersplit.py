@@ -10,12 +10,13 @@ Split an USCG N-AIS log file into one file per receiving station.
 
  TODO(schwehr):add a link to generated doc string to bring up the html for the pretty version
 
-@bug: NOT complete
  TODO(schwehr):make sure binary is only used in AIS ITU messages and not within the binary messages!
 '''
 
 import sys, os
 
+from aisutils import stationsplit
+
 def getStation(msg,withR=True):
     '''
     Return the station/tower portion of the message
@@ -23,18 +24,7 @@ def getStation(msg,withR=True):
     @rtype: str or None
     @return: Station name
     '''
-    fields = msg.split(',')
-    numFields = len(fields)
-    #for i in range(numFields):
-    for i in range(numFields-1,-1,-1):
-        #curField = fields[numFields-i-1]
-        curField = fields[i]
-        if curField[0]=='r':
-            if withR: return curField
-            return curField[1:]
-        if curField[1]=='*': # Checksum
-            return None
-    return None
+    return stationsplit.stationOf(msg, withR)
 
 
 def towersplit(options, filenames):
@@ -45,37 +35,26 @@ def towersplit(options, filenames):
     In this message, the station is r3669961.  This is not located in a fixed position.
 
     !AIVDM,1,1,,B,15MgF90017JWnghFFuLeJrW608D;,0*7C,x161434,s26256,d-109,T34.43128733,r3669961,1152921695
+
+    Lines without a station go in a file called unknown.  The work is
+    done by L{stationsplit.splitFiles} with options.jobs processes.
     '''
-    #stations=set()
     subdir = options.subdir
     if options.useSubdir:
         if not os.access(subdir,os.X_OK):
             os.mkdir(subdir)
-        if subdir[-1]!='/': subdir += '/'
         print 'Using subdir ...',subdir
     else:
-        subdir = ''
-
-    unknown = None  # Where to write messages with no station
-    stationFiles={}
-    for filename in filenames:
-        lineNum = 0
-        for line in file(filename):
-            lineNum += 1
-            if lineNum % 20000 == 0: print 'line',lineNum
-            if line[0]=='#': continue # Allow for comments
-            station = getStation(line)
-            if None==station:
-                print 'Line had no station:',line
-                if None==unknown: unknown = file(subdir+'unknown','w')
-                unknown.write(line)
-            if station not in stationFiles:
-                stationFilename = subdir+station
-                #print 'Creating station file',stationFilename,'for',station
-                stationFiles[station] = file(stationFilename,'w')
-            #else: print 'already open'
-            #print 'writing line to file:',station
-            stationFiles[station].write(line)
+        subdir = '.'
+
+    files, lineCounts = stationsplit.splitFiles(
+        filenames, stationsplit.stationPath(subdir), jobs=options.jobs, truncate=True,
+        index=options.index, workDir=subdir, maxOpen=options.maxOpen, unknown='unknown',
+        verbose=options.verbose)
+    if 'unknown' in lineCounts:
+        print 'Lines with no station:',lineCounts['unknown']
+    print 'Wrote %d lines to %d stations' % (sum(lineCounts.values()), len(files))
+    return files
 
 ######################################################################
 if __name__=='__main__':
@@ -95,6 +74,15 @@ if __name__=='__main__':
     parser.add_option('-s','--subdir',dest='subdir',default='towers',
                         help='Where to make the tower files [default: %default]')
 
+    parser.add_option('-j','--jobs',dest='jobs',default=1,type='int',
+                        help='Number of processes to split the files with [default: %default]')
+
+    parser.add_option('--max-open',dest='maxOpen',default=64,type='int',
+                        help='Most station files to have open at once [default: %default]')
+
+    parser.add_option('--index',dest='index',default=False,action='store_true',
+                        help='Build a logindex for each station file')
+
     (options,args) = parser.parse_args()
 
     success=True
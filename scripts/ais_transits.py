@@ -11,6 +11,9 @@ ais_build_sqlite.py -d ais.db3 --with-create positions-123.ais
 
 sqlite3 ais.db3 'SELECT longitude,latitude,UserID,cg_sec FROM position' | tr '|' ' ' > ais.xymt
 
+Or read the positions straight from a columnar archive made by
+aisutils.archive with --archive.
+
 This program is getting a bit out of control.  Perhaps the best thing
 to do in the long run would be to create a sqlite database of transits
 and write many different types of reports based on that.
@@ -61,6 +64,30 @@ def lon_to_utm_zone(lon):
    return int(( float(lon) + 180 ) / 6) + 1
 
 
+def archiveXymt(root, startDay=None, endDay=None):
+   '''
+   Positions from an aisutils.archive as xymt lines in time order
+
+   @param root: archive directory
+   @param startDay: first day such as 2006-07-15
+   @param endDay: last day
+   @return: generator of "lon lat mmsi cg_sec" lines
+   '''
+   import numpy
+   from aisutils.archive import Archive
+   for day, pos in Archive(root).iterDays(columns=('mmsi','lon','lat','cg_sec'),
+                                          startDay=startDay, endDay=endDay):
+      keep = numpy.flatnonzero((numpy.abs(pos['lon']) <= 180) & (numpy.abs(pos['lat']) < 90)
+                               & ~numpy.isnan(pos['cg_sec']))
+      keep = keep[numpy.argsort(pos['cg_sec'][keep], kind='mergesort')]
+      lons = pos['lon'][keep]
+      lats = pos['lat'][keep]
+      mmsis = pos['mmsi'][keep]
+      cg_secs = pos['cg_sec'][keep]
+      for i in xrange(len(keep)):
+         yield '%.6f %.6f %d %d' % (lons[i], lats[i], mmsis[i], cg_secs[i])
+
+
 def detectTransits(inFile, basename, options):
    '''
    @param inFile: open file like object containing data
@@ -384,11 +411,31 @@ if __name__ == '__main__':
                       ,default=False,action='store_true'
                       ,help='Write a GMT multi segment file for psxy with -M')
 
+    parser.add_option('-a','--archive',dest='archive'
+                      ,default=None
+                      ,help='Read the positions from this aisutils.archive directory rather than xymt files')
+
+    parser.add_option('--start-day',dest='startDay'
+                      ,default=None
+                      ,help='First archive day to use such as 2006-07-15 [default: all]')
+
+    parser.add_option('--end-day',dest='endDay'
+                      ,default=None
+                      ,help='Last archive day to use [default: all]')
+
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true'
                       ,help='run the tests run in verbose mode')
 
     (options,args) = parser.parse_args()
 
+    if options.archive is not None:
+       basename=options.basename
+       if None==basename:
+          basename=os.path.basename(os.path.normpath(options.archive))
+       detectTransits(archiveXymt(options.archive, options.startDay, options.endDay),
+                      basename, options)
+       sys.exit(0)
+
     if len(args)==0:
        if options.basename==None:
           options.basename='transit_log'
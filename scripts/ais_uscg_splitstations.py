@@ -10,53 +10,56 @@ Split USCG N-AIS messages into separate stations
 
 import sys, os
 
+from aisutils import stationsplit
+
 def getStation(line, withR=False):
-    fields=line.split(',')
-    foundChecksum=False
-    for f in fields:
-        # must come after the checksum field
-        if len(f)<1: continue
-        if not foundChecksum:
-            if -1==f.find('*'): continue  # FIX: Is this sufficient to make sure this is a checksum?
-            #if '0'==f[0]: continue
-            foundChecksum=True
-            continue
-        if len(f)<2: continue
-        if f[0] != 'r': continue
-        if withR: return f
-        return f[1:]
-    return None
+    return stationsplit.stationOf(line, withR)
 
 
 def splitstations(logfile, subdir=None, basename=None, withR=False, verbose=False, stationSubdirs=False):
     '''
     @param logfile: file like object to read from
     @param subdir: put the files in a subdirectory
+    @param basename: prepend to each station name
     @param withR: keep the r in front of the station name
     @param verbose: be loud
     '''
-    if subdir!=None and not os.access(subdir,os.X_OK): #F_OK):
+    if subdir is None:
+        subdir = '.'
+    elif not os.access(subdir,os.X_OK):
         os.mkdir(subdir)
-    else: subdir='.'
 
-    stations={}
+    splitter = stationsplit.StationSplitter(
+        stationsplit.stationPath(subdir, stationSubdirs, basename or ''), withR=withR)
+    lines = []
     for line in logfile:
-        station = getStation(line)
-        if None==station: continue
+        lines.append(line)
+        if len(lines) >= 100000:
+            splitter.addLines(lines)
+            lines = []
+    splitter.addLines(lines)
+    splitter.close()
 
-        # Handle opening the file if have not seen the station before
-        if station not in stations:
-            if verbose: print 'New station:',station
-            filename = subdir + '/' + station
-            if stationSubdirs:
-                if not os.access(filename,os.X_OK): os.mkdir(filename)
-                filename += '/log.ais'
-            stations[station] = file(filename,'a')
+    if verbose:
+        print 'Finished file.  Station count =',len(splitter.files)
 
-        stations[station].write(line)
 
+def splitFiles(filenames, subdir=None, basename=None, withR=False, verbose=False, stationSubdirs=False,
+               jobs=1, index=False, maxOpen=64):
+    '''
+    Split many files at once with L{stationsplit.splitFiles}.  Appends to
+    the station files like splitstations.
+    '''
+    if subdir is None:
+        subdir = '.'
+    elif not os.access(subdir,os.X_OK):
+        os.mkdir(subdir)
+    files, lineCounts = stationsplit.splitFiles(
+        filenames, stationsplit.stationPath(subdir, stationSubdirs, basename or ''),
+        jobs=jobs, index=index, workDir=subdir, maxOpen=maxOpen, withR=withR, verbose=verbose)
     if verbose:
-        print 'Finished file.  Station count =',len(stations)
+        print 'Finished.  Station count =',len(files)
+    return files
 
 
 if __name__=='__main__':
@@ -71,13 +74,17 @@ if __name__=='__main__':
                 help='Make the station name be a subdir with log.ais as the filename')
         parser.add_option('-r','--with-r',dest='withR',default=False,action='store_true',
                 help='Keep the r in the station name')
+        parser.add_option('-j','--jobs',dest='jobs',default=1,type='int',
+                help='Number of processes to split the files with [default: %default]')
+        parser.add_option('--max-open',dest='maxOpen',default=64,type='int',
+                help='Most station files to have open at once [default: %default]')
+        parser.add_option('--index',dest='index',default=False,action='store_true',
+                help='Build a logindex for each station file')
         parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
                 help='Make the test output verbose')
 
         (options,args) = parser.parse_args()
         success=True
 
-        for filename in args:
-            if options.verbose: print 'Processing file:',filename
-            logfile = open(filename)
-            splitstations(logfile, options.subdir, options.basename, options.withR, options.verbose,options.withStationSubdirs)
+        splitFiles(args, options.subdir, options.basename, options.withR, options.verbose,
+                   options.withStationSubdirs, options.jobs, options.index, options.maxOpen)
@@ -25,6 +25,7 @@ which should be packaged with the resulting files.
 """
 
 import datetime
+import keyword
 import os
 import sys
 from decimal import Decimal
@@ -65,11 +66,12 @@ def hasSubTag(et,subtag):
     return False
 
 
-def writeBeginning(o):
+def writeBeginning(o, emit='bitvector'):
     '''Write the doc string header for the message file.
 
     @param o: Open output file to write code to.
     Must be pre-expanded with the expandais.py command.
+    @param emit: one of emitModes.  integer also needs bitreader.
     '''
 
     d = datetime.datetime.utcnow()
@@ -108,7 +110,10 @@ from aisutils.BitVector import BitVector
 
 from aisutils import aisstring
 from aisutils import binary
-from aisutils import sqlhelp
+''')
+    if 'integer' == emit:
+        o.write('from aisutils import bitreader\n')
+    o.write('''from aisutils import sqlhelp
 from aisutils import uscg
 
 # FIX: check to see if these will be needed
@@ -121,18 +126,20 @@ FalseBV = BitVector(bitstring="0")
 ''')
     return
 
-def generatePython(infile,outfile, prefixName=False,verbose=False):
+def generatePython(infile,outfile, prefixName=False,verbose=False, emit='bitvector'):
     '''
     @param infile: xml ais binary message definition file
     @param outfile: where to dump the python code
+    @param emit: bitvector for BitVector slicing or integer for shift and mask on one integer
     '''
+    assert emit in emitModes
 
     aisMsgsET = etree.parse(infile).getroot()
 
     o = file(outfile,'w')
     os.chmod(outfile,0755)
 
-    writeBeginning(o)
+    writeBeginning(o, emit)
 
     for msgET in aisMsgsET:
         if msgET.tag != 'message': continue
@@ -141,9 +148,10 @@ def generatePython(infile,outfile, prefixName=False,verbose=False):
         if len(msgET.xpath('include-struct')) > 0:
             sys.exit("ERROR: cannot handle xml that still has include-struct tags.\n  Please use expandais.py.")
         buildHelpers(o,msgET,prefixName=prefixName,verbose=verbose)
-        buildEncode(o,msgET,prefixName=prefixName,verbose=verbose)
-        buildDecode(o,msgET,prefixName=prefixName)
-        buildDecodeParts(o,msgET,prefixName=prefixName) # functions that only decode one field
+        buildEncode(o,msgET,prefixName=prefixName,verbose=verbose,emit=emit)
+        buildDecode(o,msgET,prefixName=prefixName,emit=emit)
+        buildDecodeParts(o,msgET,prefixName=prefixName,emit=emit) # functions that only decode one field
+        buildView(o,msgET,prefixName=prefixName,emit=emit)
         buildPrint(o,msgET,prefixName=prefixName)
         buildLUT(o,msgET,prefixName=prefixName)
         buildSQL(o,msgET,prefixName=prefixName)
@@ -158,7 +166,7 @@ def generatePython(infile,outfile, prefixName=False,verbose=False):
         if msgET.tag != 'message': continue
         print 'Building unit tests for message ...', msgET.attrib['name']
 
-        buildUnitTest(o,msgET, prefixName=prefixName)
+        buildUnitTest(o,msgET, prefixName=prefixName, emit=emit)
 
     for msgET in aisMsgsET:
         if msgET.tag != 'message': continue
@@ -958,6 +966,103 @@ def buildSQL(o,msgET, verbose=False, prefixName=False):
         return i
 """)
 
+    buildSQLRow(o,msgET,verbose=verbose,prefixName=prefixName)
+
+
+def sqlRowValueExpr(field):
+    '''
+    Python expression for one field of the tuple returned by sqlRow.
+    The decoded values are in a dict that sqlRow calls params.
+
+    @param field: Element Tree of a field node
+    @rtype: str
+    '''
+    fieldName = field.attrib['name']
+    fieldType = field.attrib['type']
+    value = 'get(\''+fieldName+'\')'
+    if fieldType in ('decimal','udecimal'): return 'sqlhelp.toFloat('+value+')'
+    if fieldType == 'binary': return 'sqlhelp.toBits('+value+')'
+    return value
+
+
+def buildSQLRow(o,msgET, verbose=False, prefixName=False):
+    '''
+    Write sqlRowInsert and sqlRow.  The column order and the conversion
+    of each value are fixed when the code is generated, so there is no
+    per row work to figure out the types.
+
+    @param o: open file where resulting code will be written
+    @param msgET: Element Tree starting at a message node
+    @param verbose: talk lots in the process
+    @param prefixName: set to a string to have the commands prefixed by that character.
+    '''
+    assert(msgET.tag=='message')
+    msgName = msgET.attrib['name']
+
+    rowInsertFuncName = 'sqlRowInsert'
+    if prefixName: rowInsertFuncName = msgName+'SqlRowInsert'
+    rowFuncName = 'sqlRow'
+    if prefixName: rowFuncName = msgName+'SqlRow'
+
+    fields = msgET.xpath('field')
+    pgNames = []
+    for field in fields:
+        if 'postgisName' in field.attrib and field.attrib['postgisName'] not in pgNames:
+            pgNames.append(field.attrib['postgisName'])
+
+    o.write('''
+def '''+rowInsertFuncName+'''(extraFields=(), dbType='postgres', placeholder='%s'):
+        \"\"\"
+        Prepared INSERT for the rows from '''+rowFuncName+'''.  Make one and use it for
+        every message rather than calling sqlInsert for each message.
+
+        @param extraFields: names of the columns after the message fields such as cg_sec.
+        Their values are passed to '''+rowFuncName+''' as extraValues in the same order.
+        @param dbType: 'sqlite' or 'postgres'
+        @param placeholder: parameter marker of the database module (? for sqlite)
+        @rtype: sqlhelp.preparedInsert
+        \"\"\"
+        if dbType=='postgres':
+                return sqlhelp.preparedInsert(\''''+msgName+'''\', fieldListPostgres+tuple(extraFields),
+                        geometry='''+repr(tuple(pgNames))+''', dbType=dbType, placeholder=placeholder)
+        return sqlhelp.preparedInsert(\''''+msgName+'''\', fieldList+tuple(extraFields),
+                dbType=dbType, placeholder=placeholder)
+
+def '''+rowFuncName+'''(params, extraValues=(), dbType='postgres'):
+        \"\"\"
+        Values of a message in the column order of '''+rowInsertFuncName+'''.  Missing
+        fields are None (NULL).
+        @param params: dict keyed by field name of values
+        @param extraValues: values for the extraFields given to '''+rowInsertFuncName+'''
+        @rtype: tuple
+        \"\"\"
+        get = params.get
+        if dbType=='postgres':
+                row = (
+''')
+    finished = []
+    for field in fields:
+        if 'postgisName' not in field.attrib:
+            o.write('                        '+sqlRowValueExpr(field)+',\n')
+            continue
+        pgName = field.attrib['postgisName']
+        if pgName in finished: continue
+        finished.append(pgName)
+        parts = msgET.xpath('field[@postgisName=\''+pgName+'\']')
+        values = ['get(\''+part.attrib['name']+'\')' for part in parts]
+        o.write('                        sqlhelp.geometryWkt(\''+field.attrib['postgisType']+'\','+','.join(values)+'),\n')
+    o.write('''                )
+        else:
+                row = (
+''')
+    for field in fields:
+        o.write('                        '+sqlRowValueExpr(field)+',\n')
+    o.write('''                )
+        if extraValues:
+                return row+tuple(extraValues)
+        return row
+''')
+
 
 
 ######################################################################
@@ -1827,6 +1932,405 @@ def decodeBinary(o,name,type,startindex,numbits,required=None,arraylen=1,unavail
 
 
 
+######################################################################
+# INTEGER EMITTER
+######################################################################
+# Alternate encode/decode bodies that keep the whole message in one
+# integer.  Every field is a precomputed shift and mask rather than a
+# BitVector slice.  Selected with --emit=integer.
+
+emitModes = ('bitvector','integer')
+'''Code styles that the encoders and decoders can be emitted in'''
+
+numericModes = ('decimal','float','raw')
+'''What integer emitted decoders return for decimal and udecimal fields'''
+
+def getFieldLayout(msgET):
+    '''
+    Work out where each field sits in a message.
+
+    @param msgET: Element Tree starting at a message node
+    @return: list of dicts with name, type, start, numbits, arraylen,
+    required, unavailable, scale, offset and optional for each field
+    '''
+    layout = []
+    startindex = 0
+    for field in msgET.xpath('field'):
+        f = {}
+        f['name'] = field.attrib['name']
+        f['type'] = field.attrib['type']
+        f['numbits'] = int(field.attrib['numberofbits'])
+        f['arraylen'] = 1
+        if 'arraylength' in field.attrib:
+            f['arraylen'] = int(field.attrib['arraylength'])
+        for tag in ('required','unavailable','scale','offset'):
+            f[tag] = None
+            if hasSubTag(field,tag): f[tag] = field.xpath(tag)[0].text
+        f['optional'] = None
+        if hasSubTag(field,'optional'):
+            f['optional'] = field.xpath('optional')[0].text or ''
+        f['start'] = startindex
+        if -1 == f['numbits']:
+            f['totalbits'] = None # Reads to the end of the message
+        else:
+            f['totalbits'] = f['numbits']*f['arraylen']
+            startindex += f['totalbits']
+        layout.append(f)
+    return layout
+
+def getFixedBitCount(layout):
+    '''
+    @return: number of bits in all of the fields that have a known size
+    '''
+    return sum([f['totalbits'] for f in layout if f['totalbits'] is not None])
+
+def hexMask(numbits):
+    '''
+    >>> hexMask(6)
+    '0x3f'
+    >>> hexMask(1)
+    '0x1'
+    '''
+    return hex((1<<numbits)-1).rstrip('L')
+
+def intFieldExpr(f, totalBits, value='v'):
+    '''
+    Python expression that pulls an unsigned field out of the message
+    integer.
+
+    >>> intFieldExpr({'start':8,'totalbits':30}, 168)
+    '(v>>130)&0x3fffffff'
+    >>> intFieldExpr({'start':0,'totalbits':6}, 6)
+    'v&0x3f'
+    '''
+    shift = totalBits - f['start'] - f['totalbits']
+    if 0 == shift:
+        return value+'&'+hexMask(f['totalbits'])
+    return '('+value+'>>'+str(shift)+')&'+hexMask(f['totalbits'])
+
+def signedFieldExpr(f, totalBits, value='v'):
+    '''
+    Python expression for a twos complement field.  Flipping the sign bit
+    and subtracting it does the sign extension without a branch.
+
+    >>> signedFieldExpr({'start':42,'totalbits':8}, 168)
+    '(((v>>118)&0xff)^0x80)-0x80'
+    '''
+    signBit = hex(1<<(f['totalbits']-1)).rstrip('L')
+    return '(('+intFieldExpr(f,totalBits,value)+')^'+signBit+')-'+signBit
+
+def scaledExpr(f, expr, numeric='decimal'):
+    '''
+    Python expression that applies the scale and offset of a decimal or
+    udecimal field to the raw integer in expr.
+
+    >>> f = {'scale':'600000','offset':None}
+    >>> scaledExpr(f, 'x')
+    "Decimal(x)/Decimal('600000')"
+    >>> scaledExpr(f, 'x', 'float')
+    'x/600000.0'
+    >>> scaledExpr({'scale':'2','offset':'-10'}, 'v&0xff', 'float')
+    '(v&0xff)/2.0+-10.0'
+    >>> scaledExpr(f, 'x', 'raw')
+    'int(x)'
+
+    @param numeric: one of numericModes.  raw leaves off the scale and offset.
+    @return: expression string
+    '''
+    assert numeric in numericModes
+    scale = f['scale'] or '1'
+    if 'raw' == numeric:
+        return 'int('+expr+')'
+    if 'float' == numeric:
+        offsetStr = ''
+        if f['offset'] is not None:
+            offsetStr = '+'+repr(float(f['offset']))
+        if not expr.isalnum(): expr = '('+expr+')'
+        return expr+'/'+repr(float(scale))+offsetStr
+    offsetStr = ''
+    if f['offset'] is not None:
+        offsetStr = '+Decimal(\''+f['offset']+'\')'
+    return 'Decimal('+expr+')/Decimal(\''+scale+'\')'+offsetStr
+
+def integerDecodeExpr(f, totalBits, numeric='decimal'):
+    '''
+    Python expression that decodes one field for a decoder that has the
+    message in the integer v aligned to totalBits and the original bits
+    in bits.
+
+    @param numeric: one of numericModes.  Only used by decimal and udecimal fields.
+    @return: expression string
+    '''
+    fieldType = f['type']
+    name = f['name']
+    end = None
+    if f['totalbits'] is not None:
+        end = f['start'] + f['totalbits']
+
+    if f['required'] is not None:
+        if fieldType == 'bool':
+            if f['required'].lower() in ('1','true'): return 'True'
+            return 'False'
+        if fieldType in ('decimal','udecimal'):
+            scale = f['scale'] or '1'
+            if 'raw' == numeric: return str(int(Decimal(f['required'])))
+            if 'float' == numeric: return repr(float(Decimal(f['required'])/Decimal(scale)))
+            return str(Decimal(f['required']))+'/Decimal(\''+scale+'\')'
+        return str(f['required'])
+
+    if fieldType == 'bool':
+        return 'bool('+intFieldExpr(f,totalBits)+')'
+    # int() so the field is not a long even though the whole message is
+    if fieldType == 'uint':
+        return 'int('+intFieldExpr(f,totalBits)+')'
+    if fieldType == 'int':
+        return 'int('+signedFieldExpr(f,totalBits)+')'
+    if fieldType in ('decimal','udecimal'):
+        if fieldType == 'decimal': expr = signedFieldExpr(f,totalBits)
+        else: expr = intFieldExpr(f,totalBits)
+        return scaledExpr(f,expr,numeric)
+    if fieldType == 'float':
+        return 'binary.bitvec2float(bits['+str(f['start'])+':'+str(end)+'])'
+    if fieldType == 'aisstr6':
+        return 'aisstring.decode(bits['+str(f['start'])+':'+str(end)+'])'
+    if fieldType == 'binary':
+        if end is None: return 'bits['+str(f['start'])+':]'
+        return 'bits['+str(f['start'])+':'+str(end)+']'
+
+    print 'WARNING: In integerDecodeExpr - Unhandled field type for',name,'...',fieldType
+    suggestType (name,fieldType)
+    assert False
+
+def buildDecodeBodyInteger(o, msgET, verbose=False, funcName='decode'):
+    '''
+    Write the body of decode() for the integer emitter.  The incoming bits
+    are right aligned to the fixed size of the message so that every
+    shift is a constant.
+
+    A payload shorter than the message is handed to the single field
+    decoders instead.  They clamp a field that runs off the end and raise
+    ValueError for a field that is missing, the same as BitVector slices.
+
+    >>> from aisutils import binary
+    >>> from aisutils.BitVector import BitVector
+    >>> from ais import ais_msg_1
+    >>> bits = binary.ais6tobitvec('15Mw1U?P00qNGTP@v`0@9wwn26sd'[:27])
+    >>> len(bits), int(BitVector(bitstring=str(bits))[154:168])
+    (162, 187)
+    >>> ais_msg_1.decode(bits)['state_slotoffset'], ais_msg_1.decodestate_slotoffset(bits)
+    (187, 187)
+    >>> ais_msg_1.decode(bits[:120])
+    Traceback (most recent call last):
+    ...
+    ValueError: no bits at 128 in 120 bits
+
+    @param o: open file where resulting code will be written
+    @param msgET: Element Tree starting at a message node
+    @param funcName: name of the decode function.  The single field
+    decoders are this plus the field name.
+    '''
+    layout = getFieldLayout(msgET)
+    totalBits = getFixedBitCount(layout)
+
+    o.write('    bits = bitreader.asBitReader(bv)\n')
+    o.write('    n = bits.size\n')
+    o.write('    if n < '+str(totalBits)+':\n')
+    o.write('        r = {}\n')
+    for f in layout:
+        if f['optional'] is not None and '' == f['optional']:
+            pad = 8-(f['start']%8)
+            o.write('        if n<='+str(f['start']+pad)+': return r; # All fields below are optional\n')
+        o.write('        r[\''+f['name']+'\']='+funcName+f['name']+'(bits,numeric=numeric)\n')
+    o.write('        return r\n')
+    o.write('    v = bits.value\n')
+    o.write('    if n > '+str(totalBits)+': v >>= n-'+str(totalBits)+'\n')
+    o.write('    r = {}\n')
+
+    # Scaled fields are grouped so numeric is only checked once per group
+    scaled = []
+    for f in layout:
+        if f['optional'] is not None:
+            if msgET.attrib['aismsgnum']!='20':
+                sys.exit('optional is only allow on AIS msg 20.  Do NOT use it on new messages!!!')
+            if '' == f['optional']:
+                pad = 8-(f['start']%8)
+                assert(pad<=6)
+                writeScaledFields(o,scaled,totalBits)
+                scaled = []
+                o.write('    if n<='+str(f['start']+pad)+': return r; # All fields below are optional\n')
+            elif f['optional'] != 'NoReturn':
+                sys.exit ('ERROR: optional text must be NoReturn or empty')
+        if verbose: print 'Processing field ...',f['name'],f['start'],f['totalbits']
+        if f['type'] in ('decimal','udecimal'):
+            scaled.append(f)
+            continue
+        o.write('    r[\''+f['name']+'\']='+integerDecodeExpr(f,totalBits)+'\n')
+    writeScaledFields(o,scaled,totalBits)
+
+    o.write('    return r\n\n')
+
+numericError = "raise ValueError('numeric must be decimal, float or raw: %r' % (numeric,))"
+'''Generated code for a bad numeric argument'''
+
+def writeScaledFields(o, scaled, totalBits):
+    '''
+    Write the decimal and udecimal fields of decode() once for each of the
+    numericModes.
+
+    @param scaled: field layouts from getFieldLayout
+    '''
+    if 0 == len(scaled): return
+    for i,numeric in enumerate(numericModes):
+        if 0 == i: o.write('    if \''+numeric+'\' == numeric:\n')
+        else: o.write('    elif \''+numeric+'\' == numeric:\n')
+        for f in scaled:
+            o.write('        r[\''+f['name']+'\']='+integerDecodeExpr(f,totalBits,numeric)+'\n')
+    o.write('    else: '+numericError+'\n')
+
+def buildDecodePartInteger(o, f):
+    '''
+    Write the body of a single field decoder for the integer emitter.
+    These work straight off of the BitReader so that a partial payload
+    with just the leading fields still decodes.
+    '''
+    fieldType = f['type']
+    if f['required'] is not None and fieldType in ('decimal','udecimal'):
+        for numeric in numericModes:
+            o.write('    if \''+numeric+'\' == numeric: return '+integerDecodeExpr(f,None,numeric)+'\n')
+        o.write('    '+numericError+'\n\n')
+        return
+    if f['required'] is not None:
+        o.write('    return '+integerDecodeExpr(f,None)+'\n\n')
+        return
+    if fieldType not in ('bool','uint','int','decimal','udecimal'):
+        # These slice the bits rather than using the integer
+        o.write('    bits = bitreader.asBitReader(bv)\n')
+        o.write('    return '+integerDecodeExpr(f,None)+'\n\n')
+        return
+
+    args = str(f['start'])+','+str(f['totalbits'])
+    if fieldType == 'bool':
+        o.write('    return bool(bitreader.asBitReader(bv).uint('+args+'))\n\n')
+    elif fieldType == 'uint':
+        o.write('    return bitreader.asBitReader(bv).uint('+args+')\n\n')
+    elif fieldType == 'int':
+        o.write('    return bitreader.asBitReader(bv).sint('+args+')\n\n')
+    else:
+        method = 'sint'
+        if fieldType == 'udecimal': method = 'uint'
+        o.write('    val = bitreader.asBitReader(bv).'+method+'('+args+')\n')
+        for numeric in numericModes:
+            if 'raw' == numeric: expr = 'val'
+            else: expr = scaledExpr(f,'val',numeric)
+            o.write('    if \''+numeric+'\' == numeric: return '+expr+'\n')
+        o.write('    '+numericError+'\n\n')
+
+def integerEncodeExpr(f, value):
+    '''
+    Python expression for the unsigned bits of one field given a python
+    expression for its value.
+
+    >>> integerEncodeExpr({'type':'int','totalbits':8,'scale':None,'offset':None}, "params['ROT']")
+    "params['ROT']&0xff"
+    '''
+    fieldType = f['type']
+    mask = hexMask(f['totalbits'])
+    if fieldType == 'bool':
+        return '1 if '+value+' else 0'
+    if fieldType in ('uint','int'):
+        return value+'&'+mask
+    if fieldType in ('decimal','udecimal'):
+        scale = f['scale'] or '1'
+        offsetStr = ''
+        if f['offset'] is not None:
+            offsetStr = '-('+f['offset']+')'
+        return 'int(Decimal('+value+offsetStr+')*Decimal(\''+scale+'\'))&'+mask
+    if fieldType == 'float':
+        return 'int(binary.float2bitvec('+value+'))'
+    if fieldType == 'aisstr6':
+        return 'int(aisstring.encode('+value+','+str(f['totalbits'])+'))'
+    assert False
+
+def integerEncodeConst(f, value):
+    '''
+    Compute the unsigned bits for a constant value at generation time
+
+    >>> integerEncodeConst({'type':'decimal','totalbits':28,'scale':'600000','offset':None}, '181')
+    '0x6791ac0'
+    >>> integerEncodeConst({'type':'int','totalbits':8,'scale':None,'offset':None}, '-128')
+    '0x80'
+    '''
+    fieldType = f['type']
+    mask = (1<<f['totalbits'])-1
+    if fieldType == 'bool':
+        if value.lower() in ('1','true'): return '1'
+        return '0'
+    if fieldType in ('uint','int'):
+        return hex(int(value) & mask).rstrip('L')
+    if fieldType in ('decimal','udecimal'):
+        scale = f['scale'] or '1'
+        return hex(int(Decimal(value)*Decimal(scale)) & mask).rstrip('L')
+    return None # Not known until run time
+
+def integerEncodeLiteral(f, value):
+    '''
+    Python literal for a required or unavailable value from the xml
+    '''
+    if f['type'] == 'aisstr6':
+        return '\''+value+'\''
+    return value
+
+def buildEncodeBodyInteger(o, msgET, verbose=False):
+    '''
+    Write the body of encode() for the integer emitter.  Each field is
+    shifted in to one integer and the result is a BitReader.
+
+    @param o: open file where resulting code will be written
+    @param msgET: Element Tree starting at a message node
+    '''
+    layout = getFieldLayout(msgET)
+    sizeExpr = str(getFixedBitCount(layout))
+
+    o.write('    v = 0\n')
+    for f in layout:
+        name = f['name']
+        if verbose: o.write('    ### FIELD: '+name+' (type='+f['type']+')\n')
+
+        if f['type'] == 'binary':
+            assert f['required'] is None and f['unavailable'] is None
+            o.write('    binBits = params[\''+name+'\']\n')
+            if f['totalbits'] is None:
+                o.write('    v = (v<<len(binBits))|int(binBits)\n')
+                sizeExpr += '+len(params[\''+name+'\'])'
+            else:
+                o.write('    v = (v<<'+str(f['totalbits'])+')|int(binBits)\n')
+            continue
+
+        shift = str(f['totalbits'])
+        if f['required'] is not None:
+            const = integerEncodeConst(f,f['required'])
+            if const is None:
+                o.write('    v = (v<<'+shift+')|'+integerEncodeExpr(f,integerEncodeLiteral(f,f['required']))+'\n')
+            else:
+                o.write('    v = (v<<'+shift+')|'+const+'\n')
+            continue
+
+        fieldExpr = integerEncodeExpr(f,'params[\''+name+'\']')
+        if f['unavailable'] is None:
+            o.write('    v = (v<<'+shift+')|('+fieldExpr+')\n')
+            continue
+
+        const = integerEncodeConst(f,f['unavailable'])
+        if const is None:
+            const = integerEncodeExpr(f,integerEncodeLiteral(f,f['unavailable']))
+        o.write("    if '"+name+"' in params:\n")
+        o.write('        v = (v<<'+shift+')|('+fieldExpr+')\n')
+        o.write('    else:\n')
+        o.write('        v = (v<<'+shift+')|'+const+'\n')
+
+    o.write('\n    return bitreader.BitReader(v,'+sizeExpr+')\n\n')
+
+
 ######################################################################
 # THE REST
 ######################################################################
@@ -1883,12 +2387,13 @@ def buildTestParamFunc(o,msgET, verbose=False, prefixName=False):
 
     o.write('\n    return params\n\n')
 
-def buildUnitTest(o,msgET, verbose=False, prefixName=False):
+def buildUnitTest(o,msgET, verbose=False, prefixName=False, emit='bitvector'):
     '''
     Write the unittests for a message
 
     @param o: open file where resulting code will be written
     @param msgET: Element Tree starting at a message node
+    @param emit: one of emitModes.  integer also tests the numeric modes.
     '''
     assert(msgET.tag=='message')
     name = msgET.attrib['name']
@@ -1920,9 +2425,43 @@ def buildUnitTest(o,msgET, verbose=False, prefixName=False):
             if hasSubTag(field,'decimalplaces'): places = field.xpath('decimalplaces')[0].text
             o.write('        self.failUnlessAlmostEqual(r[\''+name+'\'],params[\''+name+'\'],'+places+')\n')
 
+    o.write('\n    def testView(self):\n')
+    msgName = msgET.attrib['name']
+    if prefixName:
+        o.write('        bits = '+msgName+'Encode('+msgName+'TestParams())\n')
+        o.write('        r    = '+msgName+'Decode(bits)\n')
+        o.write('        view = '+msgName+'View(bits)\n')
+        o.write('        for fieldName in '+msgName+'FieldList:\n')
+    else:
+        o.write('        bits = encode(testParams())\n')
+        o.write('        r    = decode(bits)\n')
+        o.write('        view = View(bits)\n')
+        o.write('        for fieldName in fieldList:\n')
+    o.write('            self.failUnlessEqual(view[fieldName],r[fieldName])\n')
+    o.write('        self.failUnlessEqual(view.asDict(),r)\n')
+
+    scaledNames = [field.attrib['name'] for field in msgET.xpath('field')
+                   if field.attrib['type'] in ('decimal','udecimal')]
+    if 'integer' != emit or 0 == len(scaledNames): return
+
+    decodeName = 'decode'
+    if prefixName: decodeName = msgName+'Decode'
+    o.write('\n    def testNumeric(self):\n')
+    if prefixName:
+        o.write('        bits = '+msgName+'Encode('+msgName+'TestParams())\n')
+    else:
+        o.write('        bits = encode(testParams())\n')
+    o.write('        r    = '+decodeName+'(bits)\n')
+    o.write('        f    = '+decodeName+'(bits, numeric=\'float\')\n')
+    o.write('        raw  = '+decodeName+'(bits, numeric=\'raw\')\n')
+    o.write('        for fieldName in '+repr(tuple(scaledNames))+':\n')
+    o.write('            self.failUnlessAlmostEqual(f[fieldName],float(r[fieldName]),6)\n')
+    o.write('            self.failUnless(isinstance(raw[fieldName],int))\n')
+    o.write('        self.failUnlessRaises(ValueError,'+decodeName+',bits,numeric=\'bogus\')\n')
+
 
 
-def buildEncode(o,msgET, verbose=False, prefixName=False):
+def buildEncode(o,msgET, verbose=False, prefixName=False, emit='bitvector'):
     '''
     Write the encoder/decoder for a message
 
@@ -1930,6 +2469,7 @@ def buildEncode(o,msgET, verbose=False, prefixName=False):
 
     @param o: open file where resulting code will be written
     @param msgET: Element Tree starting at a message node
+    @param emit: one of emitModes
      TODO(schwehr):handle ais message 20 optional.  very troublesome
     '''
     assert(msgET.tag=='message')
@@ -1957,11 +2497,18 @@ def buildEncode(o,msgET, verbose=False, prefixName=False):
     o.write('    @param params: Dictionary of field names/values.  Throws a ValueError exception if required is missing\n')
     o.write('    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.\n')
 
-    o.write("    @rtype: BitVector\n")
+    if 'integer' == emit:
+        o.write("    @rtype: BitReader\n")
+    else:
+        o.write("    @rtype: BitVector\n")
     o.write("    @return: encoded binary message (for binary messages, this needs to be wrapped in a msg 8\n")
     o.write("    @note: The returned bits may not be 6 bit aligned.  It is up to you to pad out the bits.\n")
     o.write("    '''\n\n")
 
+    if 'integer' == emit:
+        buildEncodeBodyInteger(o,msgET,verbose=verbose)
+        return
+
     ########################################
     # Actually build the code
 
@@ -2024,7 +2571,7 @@ def buildEncode(o,msgET, verbose=False, prefixName=False):
 
 
 #, msgDict=None):
-def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
+def buildDecodeParts(o,msgET, verbose=False, prefixName=False, emit='bitvector'):
 
     '''
     Write the decoder for a message
@@ -2033,6 +2580,7 @@ def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
     @type msgET: elementtree
     @param prefixName: if True, put the name of the message on the functions.
     @param msgET: Element Tree starting at a message node
+    @param emit: one of emitModes
     @return: None
 
      TODO(schwehr):FIX: doc strings for each decode!
@@ -2049,6 +2597,12 @@ def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
     baseName = name+'Decode'
     if not prefixName: baseName = 'decode'
 
+    if 'integer' == emit:
+        for f in getFieldLayout(msgET):
+            o.write('def '+baseName+f['name']+'(bv, validate=False, numeric=\'decimal\'):\n')
+            buildDecodePartInteger(o,f)
+        return
+
     startindex = 0 # Where we are in the bitvector... FIX: what about variable length jobs?
 
     for field in msgET.xpath('field'):
@@ -2102,16 +2656,107 @@ def buildDecodeParts(o,msgET, verbose=False, prefixName=False):
         o.write('\n\n')
 
 
+######################################################################
+# LAZY VIEWS
+
+def buildView(o,msgET, verbose=False, prefixName=False, emit='bitvector'):
+    '''
+    Write a lazy view class for a message.  The view keeps the bits and
+    only decodes a field with the partial decode functions the first time
+    that field is asked for.  Each decoded value is cached in a slot.
+
+    @param o: open file where resulting code will be written
+    @param msgET: Element Tree starting at a message node
+    @param prefixName: if True, put the name of the message on the class.
+    @param emit: one of emitModes
+    @return: None
+    '''
+    assert(msgET.tag=='message')
+    name = msgET.attrib['name']
+
+    print 'Generating lazy view ...',name
+
+    className = 'View'
+    decodeName = 'decode'
+    fieldListName = 'fieldList'
+    if prefixName:
+        className = name+'View'
+        decodeName = name+'Decode'
+        fieldListName = name+'FieldList'
+
+    fieldNames = [field.attrib['name'] for field in msgET.xpath('field')]
+    scaledNames = [field.attrib['name'] for field in msgET.xpath('field')
+                   if field.attrib['type'] in ('decimal','udecimal')]
+    # Fields named with a python keyword get a trailing underscore
+    attrNames = {}
+    for fieldName in fieldNames:
+        if keyword.iskeyword(fieldName): attrNames[fieldName] = fieldName+'_'
+
+    o.write('class '+className+'(object):\n')
+    o.write("    '''Lazy view of a "+name+" message.\n\n")
+    o.write('    Fields are decoded from the bits the first time they are accessed\n')
+    o.write('    and then cached.\n')
+    o.write("    '''\n\n")
+    o.write('    __slots__ = (\'bits\',')
+    if 'integer' == emit: o.write('\'numeric\',')
+    o.write(','.join(['\'_'+fieldName+'\'' for fieldName in fieldNames]))
+    o.write(')\n\n')
+
+    if 'integer' == emit:
+        o.write('    def __init__(self, bv, numeric=\'decimal\'):\n')
+    else:
+        o.write('    def __init__(self, bv):\n')
+    o.write("        '''\n")
+    o.write('        @param bv: Bits defining a message\n')
+    if 'integer' == emit:
+        o.write('        @type bv: BitReader or BitVector\n')
+        o.write('        @param numeric: decimal, float or raw for the scaled fields\n')
+        o.write("        '''\n")
+        o.write('        self.bits = bitreader.asBitReader(bv)\n')
+        o.write('        self.numeric = numeric\n\n')
+    else:
+        o.write('        @type bv: BitVector\n')
+        o.write("        '''\n")
+        o.write('        self.bits = bv\n\n')
+
+    o.write('    def __getitem__(self, fieldName):\n')
+    o.write('        if fieldName not in '+fieldListName+': raise KeyError(fieldName)\n')
+    if attrNames:
+        o.write('        return getattr(self, '+repr(attrNames)+'.get(fieldName,fieldName))\n\n')
+    else:
+        o.write('        return getattr(self, fieldName)\n\n')
+
+    o.write('    def asDict(self):\n')
+    o.write("        '''@return: params the same as "+decodeName+"()'''\n")
+    if 'integer' == emit:
+        o.write('        return '+decodeName+'(self.bits, numeric=self.numeric)\n\n')
+    else:
+        o.write('        return '+decodeName+'(self.bits)\n\n')
+
+    for fieldName in fieldNames:
+        if verbose: print 'Processing view field ...',fieldName
+        o.write('    @property\n')
+        o.write('    def '+attrNames.get(fieldName,fieldName)+'(self):\n')
+        o.write('        try: return self._'+fieldName+'\n')
+        o.write('        except AttributeError: pass\n')
+        if 'integer' == emit and fieldName in scaledNames:
+            o.write('        self._'+fieldName+' = '+decodeName+fieldName+'(self.bits, numeric=self.numeric)\n')
+        else:
+            o.write('        self._'+fieldName+' = '+decodeName+fieldName+'(self.bits)\n')
+        o.write('        return self._'+fieldName+'\n\n')
+    o.write('\n')
+
 ######################################################################
 # DECODER RING
 
-def buildDecode(o,msgET, verbose=False, prefixName=False):
+def buildDecode(o,msgET, verbose=False, prefixName=False, emit='bitvector'):
     '''
     Write the decoder for a message
 
     @param o: open file where resulting code will be written
     @type msgET: elementtree
     @param msgET: Element Tree starting at a message node
+    @param emit: one of emitModes
     @return: None
 
      TODO(schwehr):FIX: check for a dac,fid, or efid.  If exists, then this is an AIS Msg 8 payload
@@ -2123,7 +2768,10 @@ def buildDecode(o,msgET, verbose=False, prefixName=False):
     print 'Generating decoder ...',name
     funcName = 'decode'
     if prefixName: funcName = name+'Decode'
-    o.write('def '+funcName+'(bv, validate=False):\n')
+    if 'integer' == emit:
+        o.write('def '+funcName+'(bv, validate=False, numeric=\'decimal\'):\n')
+    else:
+        o.write('def '+funcName+'(bv, validate=False):\n')
 
     ########################################
     # doc string
@@ -2136,14 +2784,22 @@ def buildDecode(o,msgET, verbose=False, prefixName=False):
             o.write(' (field automatically set to "'+field.xpath("required")[0].text+'")')
 
         o.write('\n')
-    o.write('    @type bv: BitVector\n')
+    if 'integer' == emit:
+        o.write('    @type bv: BitReader or BitVector\n')
+    else:
+        o.write('    @type bv: BitVector\n')
     o.write('    @param bv: Bits defining a message\n')
     o.write('    @param validate: Set to true to cause checking to occur.  Runs slower.  FIX: not implemented.\n')
+    if 'integer' == emit:
+        o.write('    @param numeric: decimal, float or raw for the scaled fields.  raw is the integer sent without the scale and offset.\n')
 
     o.write("    @rtype: dict\n")
     o.write("    @return: params\n")
     o.write("    '''\n\n")
 
+    if 'integer' == emit:
+        buildDecodeBodyInteger(o,msgET,verbose=verbose,funcName=funcName)
+        return
 
     o.write('    #Would be nice to check the bit count here..\n')
     o.write('    #if validate:\n')
@@ -2553,6 +3209,11 @@ if __name__=='__main__':
     parser.add_option('-v','--verbose',dest='verbose',default=False,action='store_true',
                         help='run the tests run in verbose mode')
 
+    parser.add_option('-e','--emit',dest='emit',default='bitvector',
+                        choices=emitModes,type='choice',
+                        help='Style of encoders and decoders to generate ('+', '.join(emitModes)+').'
+                        +'  integer uses shifts and masks on one integer [default: %default]')
+
     (options,args) = parser.parse_args()
 
     success=True
@@ -2584,7 +3245,8 @@ if __name__=='__main__':
         sys.exit('ERROR: must specify an xml definition file.')
     if None==options.outputFileName:
         sys.exit('ERROR: must specify an python file to write to.')
-    generatePython(options.xmlFileName,options.outputFileName,prefixName=options.prefix, verbose=options.verbose)
+    generatePython(options.xmlFileName,options.outputFileName,prefixName=options.prefix, verbose=options.verbose,
+                   emit=options.emit)
 
     print '\nrecommend running pychecker like this:'
     print '  pychecker -q',options.outputFileName
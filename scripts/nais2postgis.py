@@ -30,9 +30,11 @@ import aisutils.normalize
 
 from aisutils import sqlhelp
 import aisutils.database
+import aisutils.vesselstate
 
 #import ais.ais_msg_1 as msg1
 import ais
+import ais.decodecache
 
 from ais.ais_msg_1 import NavigationStatusDecodeLut
 from ais.ais_msg_5 import shipandcargoDecodeLut
@@ -91,7 +93,11 @@ def rebuild_b_track_line(cu,userid,name,start_time=None,point_limit=50):
     return
 
 
-def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
+def handle_insert_update(cx, uscg_msg, msg_dict, aismsg, vessel_states=None):
+    '''
+    @param vessel_states: aisutils.vesselstate.VesselStates to update rather
+    than rebuilding last_position and track_lines for each position report
+    '''
     db_uncommitted_count = 0 # how many commits were done... return this
 
     msg_type = msg_dict['MessageID']
@@ -135,6 +141,10 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
 
         db_uncommitted_count += 1
 
+        if vessel_states is not None:
+            vessel_states.update(msg_dict, uscg_msg.cg_sec, uscg_msg.station)
+            return True # need to commit db
+
         navigationstatus = msg_dict['NavigationStatus']
         shipandcargo = 'unknown'
         cg_r = uscg_msg.station
@@ -208,6 +218,9 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
             sys.stderr.write('\n\nBAD DB INSERT\n\n')
             return False
 
+        if vessel_states is not None:
+            vessel_states.update(msg_dict, uscg_msg.cg_sec, uscg_msg.station)
+
         return True # need to commit db
 
     if msg_type == 18:
@@ -233,6 +246,10 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
 
         cu.execute(str(ins))
 
+        if vessel_states is not None:
+            vessel_states.update(msg_dict, uscg_msg.cg_sec, uscg_msg.station)
+            return True # need to commit db
+
         #navigationstatus = msg_dict['NavigationStatus']
         shipandcargo = 'unknown'
         cg_r = uscg_msg.station
@@ -284,6 +301,9 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
 
         cu.execute(str(ins))
 
+        if vessel_states is not None:
+            vessel_states.update(msg_dict, uscg_msg.cg_sec, uscg_msg.station)
+
         return True # need to commit db
 
     if msg_type == 24: # Class B static data report.  Either part A (0) or B (0)
@@ -297,6 +317,9 @@ def handle_insert_update(cx, uscg_msg, msg_dict, aismsg):
 
         cu.execute(str(ins))
 
+        if vessel_states is not None:
+            vessel_states.update(msg_dict, uscg_msg.cg_sec, uscg_msg.station)
+
         return True
 
     return False # No db commit needed
@@ -313,6 +336,10 @@ class Nais2Postgis:
         self.cx = aisutils.database.connect(options, dbType='postgres')
         self.cu = self.cx.cursor()
         self.norm_queue = aisutils.normalize.Normalize() # for multipart messages
+        self.decode_cache = ais.decodecache.DecodeCache(maxSize=options.decode_cache_size)
+        self.vessel_states = aisutils.vesselstate.VesselStates(
+            navStatusLut=NavigationStatusDecodeLut, shipTypeLut=shipandcargoDecodeLut)
+        self.batcher = aisutils.database.InsertBatcher()
         self.bad = file('bad.ais','w')
 
         # Database commit handling... only commit every so often to
@@ -389,7 +416,7 @@ class Nais2Postgis:
             msg = self.norm_queue.get()
 
             try:
-                uscg_msg = aisutils.uscg.UscgNmea(msg)
+                uscg_msg = aisutils.uscg.parse(msg)
             except Exception, e:
                 logging.exception('uscg decode exception %s for msg: %s' % (str(e),msg))
                 self.bad.write('uscg decode exception %s for msg: %s' % (str(e),msg ) )
@@ -416,9 +443,8 @@ class Nais2Postgis:
                 self.bad.write(msg+'\n')
                 continue
 
-            bv = ais.binary.ais6tobitvec(uscg_msg.contents)
             try:
-                msg_dict = aismsg.decode(bv)
+                msg_dict = self.decode_cache.decode(uscg_msg.contents, uscg_msg.fillbits, aismsg)
             except Exception, e:
                 sys.stderr.write('   Dropping bad msg and calling continue: %s,%s\n' % (str(e),msg,) )
                 self.bad.write(msg+'\n')
@@ -428,7 +454,7 @@ class Nais2Postgis:
             #print msg_dict
             #print 'uscg_msg:',type(uscg_msg)
             try:
-                if handle_insert_update(self.cx, uscg_msg, msg_dict, aismsg):
+                if handle_insert_update(self.cx, uscg_msg, msg_dict, aismsg, self.vessel_states):
                     self.db_uncommitted_count += 1
 
             except Exception, e:
@@ -448,6 +474,9 @@ class Nais2Postgis:
             self.db_uncommitted_count = 0
             try:
                 #print 'Committing'
+                if self.options.vessel_max_age is not None:
+                    self.vessel_states.expireAge(self.options.vessel_max_age)
+                self.vessel_states.flush(self.cu, self.batcher)
                 self.cx.commit()
                 #print '  Successful'
             except Exception, e:
@@ -498,6 +527,13 @@ if __name__=='__main__':
                       ,help=' [default: %default]')
 
 
+    parser.add_option('--decode-cache-size', dest='decode_cache_size', type='int', default=10000
+                      ,help='Recently decoded payloads to keep so duplicate receptions are not decoded again.  0 to disable [default: %default]')
+
+    parser.add_option('--vessel-max-age', dest='vessel_max_age', type='float', default=None
+                      ,help='Seconds without a position before a vessel is dropped from '
+                      'last_position and track_lines [default: keep them]')
+
     aisutils.daemon.stdCmdlineOptions(parser, skip_short=True)
 
     aisutils.database.stdCmdlineOptions(parser, 'postgres')
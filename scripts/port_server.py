@@ -14,7 +14,6 @@ Migrated from ais-py in August 2007.
 @var __date__: Date of last svn commit
 @undocumented: __version__ __author__ __doc__ myparser
 
- TODO(schwehr):log rotation!!  Optionally compress the logs when done.  They compress well.
  TODO(schwehr):add udp in and udp out
  TODO(schwehr):line oriented mode so that
  TODO(schwehr):allow the feed in and the exports to be on different interfaces
@@ -23,7 +22,6 @@ Migrated from ais-py in August 2007.
  TODO(schwehr):multicast out
  TODO(schwehr):timestamps in line mode
  TODO(schwehr):multiple socket inputs and multiple serial port inputs
- TODO(schwehr):use select for blocking IO
 '''
 
 import sys, os
@@ -34,6 +32,8 @@ import datetime
 import exceptions # For KeyboardInterupt pychecker complaint
 import traceback
 import nmea.znt # NTP tracking
+from aisutils import fanout
+import aisutils.server
 
 ######################################################################
 
@@ -72,18 +72,30 @@ def date_str():
 ######################################################################
 class PassThroughServer:
     '''Receive data from a socket and write the data to all clients that
-    are connected.  Starts two threads and returns to the caller.
+    are connected.  Starts one thread and returns to the caller.
+
+    The feed, the listening socket and the clients are all handled by a
+    select loop in aisutils.fanout.  Each client has a bounded queue, so a
+    slow client either loses data or is disconnected
+    (options.slow_client) rather than holding up the log and the other
+    clients.
     '''
     def __init__(self, options):
-        self.clients = []
         self.options = options
         if options.log_file:
-            self.curLogFile = self.getLogFileName()
-            self.log = open(self.curLogFile,'a')
-            self.logfile_add_start()
+            if options.rotateLog:
+                prefix, suffix = options.log_file + '-', options.log_file_extension
+            else:
+                prefix, suffix = options.log_file, ''
+            self.log = aisutils.server.RotatingLogWriter(
+                prefix, suffix, rotate=options.rotateLog,
+                header=self.logfile_header, footer=self.logfile_footer,
+                compress=options.compress, verbose=options.verbosity >= TERSE)
+            self.log.open()
         else: self.log = None
         self.count = 0
         self.running = True
+        self.server = None
 
         # NTP monitoring
         if options.verbosity > 0:
@@ -92,7 +104,7 @@ class PassThroughServer:
             verbose = False
 
         self.znt = nmea.znt.ZntLogger(
-            self.log, # Make sure to change this with the log file rotation
+            self.log, # Follows the log rotation
             enabled = options.znt_enable,
             max_sec=options.znt_max_sec,
             max_cnt=options.znt_max_cnt,
@@ -102,47 +114,47 @@ class PassThroughServer:
             )
 
     def stop(self):
+        self.running = False
         if self.log:
-            self.log.write('# Closing log file at %s UTC,%s\n' % ( datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'), time.time() ) )
             self.log.close()
             self.log = None
-            self.running = False
 
     def start(self):
-        print 'starting threads'
+        print 'starting passthrough thread'
+        # Listen before returning so that a port in use is an error for the caller
+        self.server = fanout.FanoutServer(self.options.outHost, self.options.outPort,
+                                          maxBuffer=self.options.client_buffer,
+                                          overflow=self.options.slow_client,
+                                          verbose=True)
         thread.start_new_thread(self.passdata, (self,))
-        thread.start_new_thread(self.connection_handler, (self,))
         return
 
-    def getLogFileName(self):
-        '''Return the log file name.  Appends date if rotation is happenin
-
-        FIX: update when the program can rotate at arbitrary times.
-        '''
-        if self.options.rotateLog:
-            return '%s-%s%s' % (
-                self.options.log_file,
-                datetime.datetime.utcnow().strftime('%Y-%m-%d'),
-                self.options.log_file_extension
-                )
-        return self.options.log_file
-
+    @property
+    def clients(self):
+        'Sockets of the connected clients'
+        if self.server is None:
+            return []
+        return self.server.clients.keys()
 
-    def logfile_add_start(self):
-        self.log.write('# Opening log file at %s UTC,%s\n' % ( datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'), time.time() ) )
+    def logfile_header(self):
+        lines = ['# Opening log file at %s UTC,%s\n' % ( datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'), time.time() )]
         try:
-            self.log.write('# Logging host: %s %s %s\n' % os.uname()[:3])
+            lines.append('# Logging host: %s %s %s\n' % os.uname()[:3])
         except:
             print 'os.uname not supported'
         try:
-            self.log.write('# platform: %s \n' % sys.platform)
+            lines.append('# platform: %s \n' % sys.platform)
             for line in sys.version.splitlines():
-                self.log.write('# python: %s \n' % line)
+                lines.append('# python: %s \n' % line)
         except:
             print 'Python really should have platform and version!'
-        self.log.write('# NTP status:\n')
+        lines.append('# NTP status:\n')
         for line in os.popen('ntpq -p -n'):
-            self.log.write('#    ntp: %s\n' % line.rstrip())
+            lines.append('#    ntp: %s\n' % line.rstrip())
+        return ''.join(lines)
+
+    def logfile_footer(self):
+        return '# Closing log file at %s UTC,%s\n' % ( datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'), time.time() )
 
     def passdata(self, unused=None):
         while self.running:
@@ -152,10 +164,19 @@ class PassThroughServer:
                 sys.stderr.write('    Exception:' + str(type(Exception))+'\n')
                 sys.stderr.write('    Exception args:'+ str(e)+'\n')
                 traceback.print_exc(file=sys.stderr)
+            # Keep the clients served while waiting to reconnect
+            end = time.time() + 1
+            while self.running and time.time() < end:
+                self.server.poll(end - time.time())
+        self.server.close()
 
     def passdata_actual(self, unused=None):
         '''Do not use this.  Call start() instead.
 
+        Each pass waits in select for the feed or a client, so there is
+        no sleep and no blocking recv.  All of the lines from one recv are
+        written to the log and queued for the clients as one string.
+
         @bug: how can I get rid of unused?
         '''
         print 'Starting passthrough server'
@@ -165,45 +186,38 @@ class PassThroughServer:
         recv_time = None
         v = self.options.verbosity
         station_id = self.options.station_id
+        server = self.server
 
         # remote is where our data comes from
         remote = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         remote.connect((self.options.inHost, self.options.inPort))
 
-        while 1:
-            time.sleep(.001) # FIX: Replace with select
-            # Go slower for debugging
-            #if self.options.verbosity>BOMBASTIC: time.sleep(.2)
-            #else time.sleep(.01)  # Is this needed to reschedule?
-
-            # Use this for code that executes every N reads
-            self.count += 1
-            if self.count % 1000 == 1:
-                print '# TIME =', time.gmtime()
-                print
-                print '#  HOUR,MIN: ', time.gmtime()[3:5]
-                print
-
-
-            if self.log and self.options.rotateLog:
-                new_log_file = self.getLogFileName()
-                if self.curLogFile != new_log_file:
-                    if self.options.verbosity >= TERSE:
-                        print 'ROTATING LOG: ', self.curLogFile, new_log_file
-                    now = time.time()
-                    self.log.write('# Closing log file at %s UTC,%s\n' % ( datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M'), time.time() ) )
-                    self.log.close()
-                    self.curLogFile = new_log_file
-                    self.log = open(self.curLogFile, 'a')
-                    self.logfile_add_start()
-                    self.znt.out_file = self.log # Make the znt handler know about the new log file.
-
-                    # FIX: change the log file in znt
-            self.znt.update()
-
-            m = remote.recv(1000)
-            now = time.time()
-            if len(m)>0:
+        try:
+            while self.running:
+                # Wake up at least once a second for log rotation and ZNT
+                ready = server.poll(1.0, (remote,))
+
+                # Use this for code that executes every N passes
+                self.count += 1
+                if self.count % 1000 == 1:
+                    print '# TIME =', time.gmtime()
+                    print
+                    print '#  HOUR,MIN: ', time.gmtime()[3:5]
+                    print
+
+                if self.log: self.log.tick() # Rotate and flush on time
+                self.znt.update()
+
+                if not ready:
+                    if v >= VERBOSE:
+                        print 'no data'
+                    continue
+
+                m = remote.recv(65536)
+                now = time.time()
+                if len(m) == 0:
+                    print 'Data source closed the connection'
+                    return
 
                 if uscg_flag:
 
@@ -215,8 +229,7 @@ class PassThroughServer:
                     if len(data_cache) > 100000:
                         print 'WARNING... not seeing line endings.  NOT forwarding'
                         if self.log:
-                            self.log.write(data_cache)
-                            self.log.write('%s,%s\n' % (station_id, now))
+                            self.log.write(data_cache + '%s,%s\n' % (station_id, now), now)
                         recv_time = None
                         data_cache = ''
                         continue
@@ -224,55 +237,30 @@ class PassThroughServer:
                     if '\n' not in m: continue
 
                     lines = data_cache.split('\n')
-                    for line in lines[:-1]:
-
-                        line = line.rstrip()
-                        line += ',%s,%s\n' % (station_id, recv_time)
-
-                        if self.log: self.log.write(line)
-                        if v > TERSE: print line,
-
-                        for c in self.clients:
-                            try:
-                                c.send(line)
-                            except socket.error:
-                                print 'Client Disconnect'
-                                self.clients.remove(c)
+                    suffix = ',%s,%s\n' % (station_id, recv_time)
+                    m = ''.join([line.rstrip() + suffix for line in lines[:-1]])
 
                     recv_time = now
                     data_cache = lines[-1] # Save the last partial line
 
+                # Log straight through
+                if self.log: self.log.write(m, now)  # Flushed within a second
+                if v > TERSE: print m,
 
-                else:
-                    # Log straight through
-                    if self.log: self.log.write(m)  # Takes a few before it flushes
-                    if v > TERSE: print m,
-                    for c in self.clients:
-                        try:
-                            c.send(m)
-                        except socket.error:
-                            print 'Client Disconnect'
-                            self.clients.remove(c)
-
-            elif v >= VERBOSE:
-                print 'no data'
-
-    def connection_handler(self, unused=None):
-        '''Do not use this.  Call start() instead.  This listens for
-        connections and adds the new socket to the clients list.
-
-        @bug: how can I get rid of unused?
-        '''
-        print 'starting incoming connection receiver'
-
-        serversocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        serversocket.bind((self.options.outHost, self.options.outPort))
-        serversocket.listen(5)
-
-        while self.running:
-            (clientsocket, address) = serversocket.accept()
-            print 'connect from', clientsocket, address
-            self.clients.append(clientsocket)
+                if not uscg_flag:
+                    # Clients may drop whole broadcasts, so only send whole lines
+                    data_cache += m
+                    end = data_cache.rfind('\n') + 1
+                    if 0 == end:
+                        if len(data_cache) > 100000:
+                            print 'WARNING... not seeing line endings.  NOT forwarding'
+                            data_cache = ''
+                        continue
+                    m = data_cache[:end]
+                    data_cache = data_cache[end:]
+                server.broadcast(m)
+        finally:
+            remote.close()
 
 
 ######################################################################
@@ -306,12 +294,22 @@ def main():
                         action='store_true', help='turn on one a day log rotation.'+
                         '  Appends the date to the log')
 
+    parser.add_option('--compress', dest='compress', type='choice', choices=('gzip', 'bz2'), default=None,
+                        help='Compress each log file in the background once it is rotated: gzip or bz2')
+
     parser.add_option('-s', '--station-id', dest='station_id', type='string', default=None,
                       help='If uscg format is selected, you can specify a station id to'
                       +' put as ",r" before the timestamp  [default: %default]')
     parser.add_option('-u', '--uscg', dest='uscg', default=False, action='store_true',
                       help='Add the uscg style station and timestamp [default %default]',)
 
+    parser.add_option('--client-buffer', dest='client_buffer', type='int', default=1024*1024,
+                      help='Bytes to queue for each client before it is too slow [default: %default]')
+    parser.add_option('--slow-client', dest='slow_client', type='choice',
+                      choices=fanout.overflowPolicies, default='drop',
+                      help='What to do when a client is too slow: '+', '.join(fanout.overflowPolicies)
+                      +' [default: %default]')
+
     nmea.znt.znt_logger_opts(parser)
 
     add_verbosity_options(parser)
@@ -29,6 +29,9 @@ cat *.names | sort -n -u > names
 
 PYTHONPATH=.. ./ais_position_in_polygon.py 123.ais -v  > inside.ais
 
+# Entries and exits for Stellwagen, the 5nm buffer, GSC and the TSS in one pass
+PYTHONPATH=.. ./ais_position_in_polygon.py --crossings 123.ais > crossings.dat
+
 ./ais_positions.py -o inside.tracks < inside.ais
 
 # Get all the ships by mmsi